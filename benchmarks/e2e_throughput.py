@@ -0,0 +1,426 @@
+"""
+End-to-end transfer throughput benchmark.
+
+Drives N synthetic requests through the whole loop
+
+    Request DB -> requests_*.jsonl -> Response DB -> Elasticsearch
+    -> results_*.jsonl -> Request DB
+
+and reports throughput per stage, batch sizes and end-to-end latency
+percentiles as JSON.
+
+Both networks' workers run in-process (one interpreter per network, see
+``network_stages.py``) against local Postgres and Redis; no Celery broker
+is involved. Elasticsearch is replaced by a small HTTP server with
+configurable latency. Export files are moved to the other network's import
+directory as soon as they are published, standing in for the operator.
+
+Usage (databases migrated and set up as for local development):
+
+    python benchmarks/e2e_throughput.py --requests 5000 --es-latency-ms 20 \\
+        --output bench.json
+
+Connection settings come from the environment (REQUEST_DB_*, RESPONSE_DB_*)
+exactly as for the workers; Redis URLs can be overridden with
+--request-redis-url/--response-redis-url.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+STAGES_SCRIPT = BENCH_DIR / "network_stages.py"
+REPO_ROOT = BENCH_DIR.parent
+
+
+# -- fake Elasticsearch ----------------------------------------------------
+
+class FakeElasticsearch:
+    """
+    Answers ``POST /<index>/_search`` after ``latency_ms`` (+/- ``jitter_ms``)
+    with ``hits`` documents derived from the request body.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, hits: int = 10):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.hits = hits
+        self.queries = 0
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                delay = fake.latency_ms + random.uniform(-fake.jitter_ms, fake.jitter_ms)
+                time.sleep(max(0.0, delay) / 1000)
+                with fake._lock:
+                    fake.queries += 1
+                seed = body.decode("utf-8", "replace")
+                payload = json.dumps({
+                    "took": int(max(0.0, delay)),
+                    "hits": {
+                        "total": {"value": fake.hits},
+                        "hits": [{"_source": {"rank": i, "query": seed}} for i in range(fake.hits)],
+                    },
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self) -> "FakeElasticsearch":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# -- file shuttle ----------------------------------------------------------
+
+class FileShuttle:
+    """
+    Moves published export files into the peer's import directory.
+
+    Metadata files go first so an importer never sees a data part without
+    its metadata; hidden temporary files of in-progress writes are skipped.
+    """
+
+    def __init__(self, routes: List[tuple], interval: float = 0.1):
+        self.routes = routes
+        self.interval = interval
+        self.files = 0
+        self.bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def move_once(self) -> int:
+        moved = 0
+        for source, target in self.routes:
+            if not source.exists():
+                continue
+            target.mkdir(parents=True, exist_ok=True)
+            files = [p for p in source.iterdir() if p.is_file() and not p.name.startswith(".")]
+            files.sort(key=lambda p: (not p.name.endswith(".meta.json"), p.name))
+            for path in files:
+                size = path.stat().st_size
+                shutil.move(str(path), str(target / path.name))
+                self.files += 1
+                self.bytes += size
+                moved += 1
+        return moved
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.move_once()
+            self._stop.wait(self.interval)
+
+    def start(self) -> "FileShuttle":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.move_once()
+
+
+# -- network processes -----------------------------------------------------
+
+def network_env(network: str, work_dir: Path, redis_url: Optional[str], es_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "IMPORT_DIR": str(work_dir / network / "imports"),
+        "EXPORT_DIR": str(work_dir / network / "exports"),
+        "TRANSFER_BUNDLE_ENABLED": "false",
+        "PYTHONUNBUFFERED": "1",
+    })
+    if redis_url:
+        env["REDIS_URL"] = redis_url
+    if network == "response":
+        env["ELASTICSEARCH_URL"] = es_url
+    return env
+
+
+def run_command(network: str, command: str, env: Dict[str, str], *extra: str) -> List[dict]:
+    """Runs a one-shot network_stages command and returns its events."""
+    proc = subprocess.run(
+        [sys.executable, str(STAGES_SCRIPT), network, command, *extra],
+        env=env,
+        cwd=str(REPO_ROOT / f"{network}-network" / "api"),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{network} {command} failed:\n{proc.stderr}")
+    return [json.loads(line) for line in proc.stdout.splitlines() if line.startswith("{")]
+
+
+class StageWorker:
+    """A long-running ``network_stages.py run`` process and the events it reported."""
+
+    def __init__(self, network: str, env: Dict[str, str], cycle_seconds: float):
+        self.network = network
+        self.events: List[dict] = []
+        self.ready = threading.Event()
+        self.proc = subprocess.Popen(
+            [sys.executable, str(STAGES_SCRIPT), network, "run", "--cycle-seconds", str(cycle_seconds)],
+            env=env,
+            cwd=str(REPO_ROOT / f"{network}-network" / "api"),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self) -> None:
+        for line in self.proc.stdout:
+            if not line.startswith("{"):
+                continue  # Log output from the tasks
+            event = json.loads(line)
+            if event["event"] == "ready":
+                self.ready.set()
+            else:
+                self.events.append(event)
+
+    def stop(self) -> None:
+        self.proc.stdin.close()
+        self.proc.wait(timeout=60)
+        self._reader.join(timeout=5)
+
+
+# -- reporting -------------------------------------------------------------
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"count": 0, "p50": None, "p90": None, "p99": None, "max": None, "mean": None}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "max": ordered[-1],
+        "mean": statistics.fmean(ordered),
+    }
+
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    # Some columns are written from naive utcnow(); compare everything as naive UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def summarize_stages(events: List[dict]) -> Dict[str, dict]:
+    stages: Dict[str, dict] = {}
+    for event in events:
+        if event["event"] != "stage":
+            continue
+        stage = stages.setdefault(event["stage"], {
+            "network": event["network"], "calls": 0, "errors": 0,
+            "records": 0, "busy_seconds": 0.0, "batch_sizes": [],
+        })
+        stage["calls"] += 1
+        stage["busy_seconds"] += event["seconds"]
+        if event.get("error"):
+            stage["errors"] += 1
+            continue
+        stage["records"] += event["records"]
+        stage["batch_sizes"].append(event["records"])
+
+    for stage in stages.values():
+        sizes = stage.pop("batch_sizes")
+        stage["batch_size"] = {
+            "mean": statistics.fmean(sizes) if sizes else None,
+            "max": max(sizes) if sizes else None,
+            "min": min(sizes) if sizes else None,
+        }
+        busy = stage["busy_seconds"]
+        stage["records_per_minute_busy"] = stage["records"] / busy * 60 if busy else None
+    return stages
+
+
+def summarize_requests(request_rows: List[dict], incoming_rows: List[dict]) -> dict:
+    incoming = {row["id"]: row for row in incoming_rows}
+    segments = {
+        "request_export": [], "transfer_to_response": [], "response_queue": [],
+        "query_execution": [], "return_to_request": [],
+    }
+    end_to_end = []
+    first_created, last_received = None, None
+
+    for row in request_rows:
+        created = _parse(row["created_at"])
+        exported = _parse(row["exported_at"])
+        received = _parse(row["result_received_at"])
+        peer = incoming.get(row["id"], {})
+        imported = _parse(peer.get("imported_at"))
+        started = _parse(peer.get("started_at"))
+        completed = _parse(peer.get("completed_at"))
+
+        for name, start, end in (
+            ("request_export", created, exported),
+            ("transfer_to_response", exported, imported),
+            ("response_queue", imported, started),
+            ("query_execution", started, completed),
+            ("return_to_request", completed, received),
+        ):
+            if start and end:
+                segments[name].append((end - start).total_seconds())
+        if created and received:
+            end_to_end.append((received - created).total_seconds())
+            first_created = min(first_created or created, created)
+            last_received = max(last_received or received, received)
+
+    window = (last_received - first_created).total_seconds() if end_to_end else 0.0
+    return {
+        "completed": len(end_to_end),
+        "window_seconds": window,
+        "requests_per_minute": len(end_to_end) / window * 60 if window else None,
+        "latency_seconds": percentiles(end_to_end),
+        "segments_seconds": {name: percentiles(values) for name, values in segments.items()},
+    }
+
+
+# -- main ------------------------------------------------------------------
+
+def run_benchmark(args) -> dict:
+    run_id = uuid.uuid4().hex[:12]
+    started_at = datetime.utcnow()
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="e2e-bench-"))
+    es = FakeElasticsearch(args.es_latency_ms, args.es_jitter_ms, args.es_hits).start()
+
+    envs = {
+        "request": network_env("request", work_dir, args.request_redis_url, es.url),
+        "response": network_env("response", work_dir, args.response_redis_url, es.url),
+    }
+    shuttle = FileShuttle([
+        (work_dir / "request" / "exports" / "requests", work_dir / "response" / "imports" / "requests"),
+        (work_dir / "response" / "exports" / "results", work_dir / "request" / "imports" / "results"),
+    ])
+
+    workers = []
+    try:
+        run_command("response", "seed", envs["response"])
+        workers = [StageWorker(network, envs[network], args.cycle_seconds) for network in ("response", "request")]
+        for worker in workers:
+            if not worker.ready.wait(60):
+                raise RuntimeError(f"{worker.network} stage worker did not start")
+        shuttle.start()
+
+        seeded = run_command(
+            "request", "seed", envs["request"],
+            "--run-id", run_id,
+            "--requests", str(args.requests),
+            "--distinct-queries", str(args.distinct_queries),
+        )
+        started = time.monotonic()
+
+        completed = 0
+        while completed < args.requests and time.monotonic() - started < args.timeout:
+            time.sleep(args.poll_seconds)
+            completed = sum(
+                event["records"] for event in workers[1].events
+                if event.get("stage") == "results_import" and not event.get("error")
+            )
+        elapsed = time.monotonic() - started
+    finally:
+        for worker in workers:
+            worker.stop()
+        shuttle.stop()
+        es.stop()
+
+    request_rows = [e for e in run_command("request", "report", envs["request"], "--run-id", run_id) if e["event"] == "request"]
+    incoming_rows = [e for e in run_command("response", "report", envs["response"]) if e["event"] == "incoming"]
+
+    report = {
+        "run_id": run_id,
+        "started_at": started_at.isoformat(),
+        "config": {
+            "requests": args.requests,
+            "distinct_queries": args.distinct_queries,
+            "es_latency_ms": args.es_latency_ms,
+            "es_jitter_ms": args.es_jitter_ms,
+            "es_hits": args.es_hits,
+            "cycle_seconds": args.cycle_seconds,
+        },
+        "seed": seeded[-1] if seeded else None,
+        "timed_out": completed < args.requests,
+        "elapsed_seconds": elapsed,
+        "end_to_end": summarize_requests(request_rows, incoming_rows),
+        "stages": summarize_stages([event for worker in workers for event in worker.events]),
+        "transfer": {"files": shuttle.files, "bytes": shuttle.bytes},
+        "elasticsearch": {"queries": es.queries},
+        "work_dir": str(work_dir),
+    }
+    if not args.keep_files and not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end transfer throughput benchmark")
+    parser.add_argument("--requests", type=int, default=1000, help="Synthetic requests to drive")
+    parser.add_argument("--distinct-queries", type=int, default=100, help="Distinct query parameter sets")
+    parser.add_argument("--es-latency-ms", type=float, default=10.0, help="Fake Elasticsearch latency")
+    parser.add_argument("--es-jitter-ms", type=float, default=0.0, help="+/- random latency")
+    parser.add_argument("--es-hits", type=int, default=10, help="Documents per search response")
+    parser.add_argument("--cycle-seconds", type=float, default=0.5, help="Idle wait between stage cycles")
+    parser.add_argument("--poll-seconds", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=600.0, help="Give up after this many seconds")
+    parser.add_argument("--request-redis-url", default=os.getenv("BENCH_REQUEST_REDIS_URL"))
+    parser.add_argument("--response-redis-url", default=os.getenv("BENCH_RESPONSE_REDIS_URL"))
+    parser.add_argument("--work-dir", help="Import/export root (default: a temporary directory)")
+    parser.add_argument("--keep-files", action="store_true", help="Keep the temporary directory")
+    parser.add_argument("--output", default="-", help="Report path, or - for stdout")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    output = json.dumps(report, indent=2, default=str)
+    if args.output == "-":
+        print(output)
+    else:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        e2e = report["end_to_end"]
+        print(
+            f"{e2e['completed']}/{args.requests} completed, "
+            f"{e2e['requests_per_minute'] or 0:.0f} req/min, "
+            f"p50 {e2e['latency_seconds']['p50']}s p99 {e2e['latency_seconds']['p99']}s -> {args.output}"
+        )
+
+
+if __name__ == "__main__":
+    main()
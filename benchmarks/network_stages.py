@@ -0,0 +1,283 @@
+"""
+Runs one network's pipeline stages in-process for the end-to-end benchmark.
+
+Both networks use the same top-level package names (``core``, ``models``,
+``workers``, ...), so each network gets its own interpreter. The
+orchestrator (``benchmarks/e2e_throughput.py``) starts one of these per
+network, points it at its own import/export directories through the usual
+environment variables and reads one JSON object per line from stdout.
+
+Commands:
+    seed    Create the benchmark user/request type and (request network)
+            insert the synthetic requests.
+    run     Call the stage tasks directly, without a broker, until stdin
+            closes; report every non-idle call.
+    report  Print per-request stage timestamps for a finished run.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+API_DIRS = {
+    "request": REPO_ROOT / "request-network" / "api",
+    "response": REPO_ROOT / "response-network" / "api",
+}
+
+BENCH_USERNAME = "bench_user"
+BENCH_REQUEST_TYPE = "benchmark_search"
+
+# Result keys that count records moved by a stage call
+COUNT_KEYS = ("total_requests", "total_imported", "processed_count", "count")
+
+# Statuses that mean a stage call found nothing to do
+IDLE_STATUSES = ("no_changes", "no_files", "no_pending_requests", "no_new_results")
+
+
+def emit(event: str, **fields) -> None:
+    print(json.dumps({"event": event, **fields}, default=str), flush=True)
+
+
+def _timestamp(value):
+    return value.isoformat() if value is not None else None
+
+
+# -- request network -------------------------------------------------------
+
+def seed_request(run_id: str, count: int, distinct_queries: int, batch_size: int = 1000) -> None:
+    from sqlalchemy import select
+
+    from workers.tasks.export_requests import SessionLocal
+    from models.request import Request
+    from models.user import User
+
+    db = SessionLocal()
+    try:
+        user = db.execute(select(User).where(User.username == BENCH_USERNAME)).scalar_one_or_none()
+        if user is None:
+            user = User(
+                id=uuid.uuid4(),
+                username=BENCH_USERNAME,
+                email=f"{BENCH_USERNAME}@example.com",
+                hashed_password="!",  # Never matches; the benchmark does not log in
+                profile_type="basic",
+            )
+            db.add(user)
+            db.commit()
+
+        started = time.perf_counter()
+        for offset in range(0, count, batch_size):
+            db.add_all([
+                Request(
+                    user_id=user.id,
+                    name=f"bench-{run_id}-{i}",
+                    query_type=BENCH_REQUEST_TYPE,
+                    query_params={"term": f"t{i % distinct_queries}"},
+                    status="pending",
+                    meta={"benchmark_run": run_id},
+                )
+                for i in range(offset, min(offset + batch_size, count))
+            ])
+            db.commit()
+        emit("seeded", network="request", requests=count, seconds=time.perf_counter() - started)
+    finally:
+        db.close()
+
+
+def report_request(run_id: str) -> None:
+    from sqlalchemy import select
+
+    from workers.tasks.export_requests import SessionLocal
+    from models.request import Request
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(Request.id, Request.status, Request.created_at, Request.exported_at, Request.result_received_at)
+            .where(Request.meta["benchmark_run"].astext == run_id)
+        ).all()
+        for row in rows:
+            emit(
+                "request",
+                id=str(row.id),
+                status=row.status,
+                created_at=_timestamp(row.created_at),
+                exported_at=_timestamp(row.exported_at),
+                result_received_at=_timestamp(row.result_received_at),
+            )
+    finally:
+        db.close()
+
+
+def request_stages():
+    from workers.tasks.export_requests import export_pending_requests
+    from workers.tasks.results_importer import import_results_from_response_network
+
+    return [
+        ("request_export", export_pending_requests),
+        ("results_import", import_results_from_response_network),
+    ]
+
+
+# -- response network ------------------------------------------------------
+
+def seed_response() -> None:
+    from sqlalchemy import select
+
+    from workers.tasks.execute_query import SessionLocal
+    from models.request_type import RequestType
+    from models.user import User
+
+    db = SessionLocal()
+    try:
+        if db.execute(select(RequestType).where(RequestType.name == BENCH_REQUEST_TYPE)).scalar_one_or_none():
+            emit("seeded", network="response", request_type="existing")
+            return
+        owner_id = db.execute(select(User.id).order_by(User.created_at).limit(1)).scalar_one_or_none()
+        if owner_id is None:
+            raise SystemExit("Response network has no users; run the normal setup first")
+        db.add(RequestType(
+            name=BENCH_REQUEST_TYPE,
+            description="Synthetic request type for the throughput benchmark",
+            is_active=True,
+            available_indices=["benchmark"],
+            elasticsearch_query_template={"query": {"match": {"term": "{{term}}"}}},
+            created_by_id=owner_id,
+        ))
+        db.commit()
+        emit("seeded", network="response", request_type="created")
+    finally:
+        db.close()
+
+
+def report_response() -> None:
+    from sqlalchemy import select
+
+    from workers.tasks.execute_query import SessionLocal
+    from models.incoming_request import IncomingRequest
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(
+                IncomingRequest.original_request_id,
+                IncomingRequest.imported_at,
+                IncomingRequest.started_at,
+                IncomingRequest.completed_at,
+            ).where(IncomingRequest.query_type == BENCH_REQUEST_TYPE)
+        ).all()
+        for row in rows:
+            emit(
+                "incoming",
+                id=str(row.original_request_id),
+                imported_at=_timestamp(row.imported_at),
+                started_at=_timestamp(row.started_at),
+                completed_at=_timestamp(row.completed_at),
+            )
+    finally:
+        db.close()
+
+
+def response_stages():
+    from workers.tasks.import_requests import import_requests_from_request_network
+    from workers.tasks.execute_query import execute_pending_queries
+    from workers.tasks.export_results import export_completed_results
+
+    return [
+        ("requests_import", import_requests_from_request_network),
+        ("query_execution", execute_pending_queries),
+        ("results_export", export_completed_results),
+    ]
+
+
+# -- stage loop ------------------------------------------------------------
+
+def _record_count(result) -> int:
+    if not isinstance(result, dict):
+        return 0
+    for key in COUNT_KEYS:
+        if isinstance(result.get(key), int):
+            return result[key]
+    return 0
+
+
+def run_stages(network: str, stages, cycle_seconds: float) -> None:
+    """
+    Calls every stage in order, over and over, until stdin reaches EOF.
+
+    Tasks are called through ``task.run()`` so they execute inline; a
+    failing call raises instead of scheduling a Celery retry.
+    """
+    stop = threading.Event()
+
+    def _wait_for_eof():
+        sys.stdin.read()
+        stop.set()
+
+    threading.Thread(target=_wait_for_eof, daemon=True).start()
+    emit("ready", network=network, stages=[name for name, _ in stages])
+
+    while not stop.is_set():
+        busy = False
+        for name, task in stages:
+            started = time.perf_counter()
+            try:
+                result = task.run()
+                error = None
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+            seconds = time.perf_counter() - started
+
+            records = _record_count(result)
+            status = result.get("status") if isinstance(result, dict) else None
+            if error is None and (records == 0 or status in IDLE_STATUSES):
+                continue
+            busy = True
+            emit(
+                "stage",
+                network=network,
+                stage=name,
+                seconds=seconds,
+                records=records,
+                status=status,
+                error=error,
+                at=datetime.utcnow().isoformat(),
+            )
+        if not busy:
+            stop.wait(cycle_seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("network", choices=sorted(API_DIRS))
+    parser.add_argument("command", choices=["seed", "run", "report"])
+    parser.add_argument("--run-id", default="")
+    parser.add_argument("--requests", type=int, default=0)
+    parser.add_argument("--distinct-queries", type=int, default=100)
+    parser.add_argument("--cycle-seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(API_DIRS[args.network]))
+
+    if args.command == "seed":
+        if args.network == "request":
+            seed_request(args.run_id, args.requests, max(1, args.distinct_queries))
+        else:
+            seed_response()
+    elif args.command == "report":
+        if args.network == "request":
+            report_request(args.run_id)
+        else:
+            report_response()
+    else:
+        stages = request_stages() if args.network == "request" else response_stages()
+        run_stages(args.network, stages, args.cycle_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Rate limiter throughput benchmark: submissions/s per API worker.
+
+One API worker is one event loop. The benchmark runs ``--concurrency``
+simulated submissions on a single loop for ``--seconds`` against a real
+Redis and counts how many rate-limit checks complete, for each strategy:
+
+    sync_incr     before: the old ``core.rate_limiter`` path used by
+                  ``POST /requests`` (blocking INCR + EXPIRE per window,
+                  up to six round trips that stall the event loop)
+    async_multi   before: the old grace-period limiter used by the
+                  middleware (HGETALL, three GETs, EXISTS, then a pipeline
+                  to increment - two limiters, six to seven round trips)
+    lua           after: ``RateLimiter.check_limit``, one EVALSHA
+
+Limits are set high enough that no check is rejected, so every strategy
+does its full amount of work.
+
+Usage:
+
+    python benchmarks/rate_limiter.py --redis-url redis://localhost:6379/15 \\
+        --concurrency 50 --seconds 10 --output limiter.json
+
+The benchmark writes to ``rate_limit:bench-*`` keys and deletes them
+afterwards; point it at a scratch database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import redis
+import redis.asyncio as aioredis
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "request-network" / "api"))
+
+from rate_limiter import RateLimiter, RateLimitConfig  # noqa: E402
+
+WINDOWS = ("minute", "hour", "day")
+BENCH_LIMITS = {"minute": 10 ** 9, "hour": 10 ** 9, "day": 10 ** 9}
+
+
+def window_keys(user_id: str) -> dict:
+    """Counter keys for the current windows (same layout as RateLimiter)."""
+    now = datetime.utcnow()
+    return {
+        "minute": f"rate_limit:{user_id}:minute:{now.strftime('%Y%m%d%H%M')}",
+        "hour": f"rate_limit:{user_id}:hour:{now.strftime('%Y%m%d%H')}",
+        "day": f"rate_limit:{user_id}:day:{now.strftime('%Y%m%d')}",
+    }
+
+
+class SyncIncrStrategy:
+    """The removed synchronous limiter: INCR, then EXPIRE on first use."""
+
+    def __init__(self, redis_url: str):
+        self.redis = redis.from_url(redis_url)
+
+    async def check(self, user_id: str) -> None:
+        keys = window_keys(user_id)
+        for window in WINDOWS:
+            count = self.redis.incr(keys[window])
+            if count == 1:
+                self.redis.expire(keys[window], RateLimitConfig.WINDOW_TTLS[window])
+            if count > BENCH_LIMITS[window]:
+                return
+
+    async def close(self) -> None:
+        self.redis.close()
+
+
+class AsyncMultiStrategy:
+    """The removed grace-period limiter: read everything, then increment."""
+
+    def __init__(self, redis_url: str):
+        self.redis = aioredis.from_url(redis_url)
+
+    async def check(self, user_id: str) -> None:
+        await self.redis.hgetall(f"rate_limit:custom:{user_id}")
+        keys = window_keys(user_id)
+        counts = {window: int(await self.redis.get(keys[window]) or 0) for window in WINDOWS}
+        for window in WINDOWS:
+            if counts[window] >= BENCH_LIMITS[window] * RateLimitConfig.WARNING_THRESHOLD:
+                await self.redis.exists(f"rate_limit:soft_block:{user_id}:{window}")
+                break
+        async with self.redis.pipeline() as pipe:
+            for window in WINDOWS:
+                pipe.incr(keys[window])
+                pipe.expire(keys[window], RateLimitConfig.WINDOW_TTLS[window])
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self.redis.close()
+
+
+class LuaStrategy:
+    """The single-script limiter."""
+
+    def __init__(self, redis_url: str):
+        self.redis = aioredis.from_url(redis_url)
+        self.limiter = RateLimiter(self.redis)
+
+    async def check(self, user_id: str) -> None:
+        await self.limiter.check_limit(user_id, "free", limits=BENCH_LIMITS)
+
+    async def close(self) -> None:
+        await self.redis.close()
+
+
+STRATEGIES = {
+    "sync_incr": SyncIncrStrategy,
+    "async_multi": AsyncMultiStrategy,
+    "lua": LuaStrategy,
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000, 3)
+
+
+async def run_strategy(name: str, redis_url: str, concurrency: int, seconds: float, users: int) -> dict:
+    strategy = STRATEGIES[name](redis_url)
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def submitter(index: int) -> None:
+        i = index
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await strategy.check(f"bench-{i % users}")
+            latencies.append(time.perf_counter() - started)
+            i += concurrency
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(submitter(n) for n in range(concurrency)))
+    finally:
+        elapsed = time.perf_counter() - started
+        await strategy.close()
+
+    return {
+        "checks": len(latencies),
+        "submissions_per_second": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p99": percentile(latencies, 99),
+        },
+    }
+
+
+def cleanup(redis_url: str) -> None:
+    client = redis.from_url(redis_url)
+    try:
+        keys = list(client.scan_iter("rate_limit:*bench-*", count=1000))
+        for offset in range(0, len(keys), 1000):
+            client.delete(*keys[offset:offset + 1000])
+    finally:
+        client.close()
+
+
+def run_benchmark(args) -> dict:
+    results = {}
+    for name in args.strategies:
+        cleanup(args.redis_url)
+        results[name] = asyncio.run(
+            run_strategy(name, args.redis_url, args.concurrency, args.seconds, args.users)
+        )
+    cleanup(args.redis_url)
+
+    report = {
+        "config": {
+            "concurrency": args.concurrency,
+            "seconds": args.seconds,
+            "users": args.users,
+        },
+        "strategies": results,
+    }
+    if "lua" in results:
+        report["speedup_vs_lua"] = {
+            name: round(results["lua"]["submissions_per_second"] / result["submissions_per_second"], 2)
+            for name, result in results.items()
+            if name != "lua" and result["submissions_per_second"]
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rate limiter throughput benchmark")
+    parser.add_argument("--redis-url", default=os.getenv("BENCH_REDIS_URL", "redis://localhost:6379/15"))
+    parser.add_argument("--concurrency", type=int, default=50, help="In-flight submissions on the loop")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration per strategy")
+    parser.add_argument("--users", type=int, default=100, help="Distinct users submitting")
+    parser.add_argument(
+        "--strategies", nargs="+", choices=sorted(STRATEGIES), default=list(STRATEGIES)
+    )
+    parser.add_argument("--output", default="-", help="Report path, or - for stdout")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    output = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        for name, result in report["strategies"].items():
+            print(f"{name}: {result['submissions_per_second']:.0f} submissions/s, p99 {result['latency_ms']['p99']}ms")
+
+
+if __name__ == "__main__":
+    main()
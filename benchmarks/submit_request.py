@@ -0,0 +1,226 @@
+"""
+Submission latency benchmark for ``POST /requests``.
+
+Calls the endpoint's handler on one event loop against the real request
+database and Redis, with a fresh session per submission as FastAPI's
+dependency would, and reports latency percentiles, submissions/s and
+database round trips per submission for:
+
+    select_reload     before: SELECT to check the name is unique, INSERT,
+                      two commits, then a SELECT with selectinload to build
+                      the response
+    insert_returning  after: ``request_router.submit_request``, one
+                      INSERT ... ON CONFLICT (name) DO NOTHING RETURNING
+                      and one commit
+
+Both strategies run the same rate-limit check. Names are unique, so no
+submission is rejected.
+
+Usage (request database migrated as for local development):
+
+    python benchmarks/submit_request.py --submissions 2000 --concurrency 1 \\
+        --output submit.json
+
+Connection settings come from the environment (REQUEST_DB_*, REDIS_URL)
+exactly as for the API. The benchmark creates a throwaway user and deletes
+it, with its requests, afterwards.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "request-network" / "api"))
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy import delete, event, insert, select  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+
+from auth.schemas import UserPrincipal  # noqa: E402
+from db.session import AsyncSessionFactory, async_engine  # noqa: E402
+from models.request import Request  # noqa: E402
+from models.user import User  # noqa: E402
+from rate_limiter import LimitLevel, close_rate_limiter, get_rate_limiter, user_limits  # noqa: E402
+from routers.request_router import submit_request  # noqa: E402
+from schemas.request import RequestCreate, RequestPublic  # noqa: E402
+
+BENCH_LIMIT = 10 ** 9
+
+
+class RoundTrips:
+    """Counts statements and commits sent to the database."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._count)
+        event.listen(engine.sync_engine, "commit", self._count)
+
+    def _count(self, *args, **kwargs) -> None:
+        self.count += 1
+
+
+async def select_reload(request_data: RequestCreate, user: UserPrincipal) -> RequestPublic:
+    """The previous handler body."""
+    async with AsyncSessionFactory() as db:
+        existing = await db.execute(select(Request).where(Request.name == request_data.name))
+        if existing.scalar_one_or_none():
+            raise HTTPException(status_code=400, detail="exists")
+
+        rate_limiter = await get_rate_limiter()
+        limit_level, details = await rate_limiter.check_limit(
+            str(user.id), user.profile_type, limits=user_limits(user)
+        )
+        if limit_level == LimitLevel.EXCEEDED:
+            raise HTTPException(status_code=429, detail=details["message"])
+
+        new_request = Request(
+            user_id=user.id,
+            name=request_data.name,
+            query_type=request_data.request.serviceName,
+            query_params=request_data.request.fieldRequest,
+            priority=user.priority,
+            status=request_data.reqState.lower(),
+        )
+        db.add(new_request)
+        await db.commit()
+        await db.commit()
+
+        query = select(Request).options(selectinload(Request.response)).where(Request.id == new_request.id)
+        result = await db.execute(query)
+        return RequestPublic.model_validate(result.scalar_one())
+
+
+async def insert_returning(request_data: RequestCreate, user: UserPrincipal) -> RequestPublic:
+    """The current handler."""
+    async with AsyncSessionFactory() as db:
+        return await submit_request(request_data, user, db)
+
+
+STRATEGIES = {
+    "select_reload": select_reload,
+    "insert_returning": insert_returning,
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000, 3)
+
+
+async def create_user() -> UserPrincipal:
+    user_id = uuid.uuid4()
+    async with AsyncSessionFactory() as db:
+        await db.execute(insert(User).values(
+            id=user_id,
+            username=f"bench-submit-{user_id.hex[:12]}",
+            email=f"bench-submit-{user_id.hex[:12]}@example.invalid",
+            hashed_password="!",
+            profile_type="free",
+            rate_limit_per_minute=BENCH_LIMIT,
+            rate_limit_per_hour=BENCH_LIMIT,
+            rate_limit_per_day=BENCH_LIMIT,
+            priority=5,
+            is_active=True,
+        ))
+        await db.commit()
+        row = (await db.execute(select(User).where(User.id == user_id))).scalar_one()
+        return UserPrincipal.model_validate(row)
+
+
+async def delete_user(user: UserPrincipal) -> None:
+    async with AsyncSessionFactory() as db:
+        await db.execute(delete(Request).where(Request.user_id == user.id))
+        await db.execute(delete(User).where(User.id == user.id))
+        await db.commit()
+
+
+async def run_strategy(name: str, user: UserPrincipal, submissions: int, concurrency: int, round_trips: RoundTrips) -> dict:
+    submit = STRATEGIES[name]
+    latencies = []
+    run_id = uuid.uuid4().hex[:8]
+
+    # Warm the connection pool and the rate limiter script
+    await submit(RequestCreate(name=f"bench-{name}-{run_id}-warmup", request={
+        "serviceName": "bench", "fieldRequest": {}}), user)
+
+    async def submitter(index: int) -> None:
+        for i in range(index, submissions, concurrency):
+            request_data = RequestCreate(
+                name=f"bench-{name}-{run_id}-{i}",
+                request={"serviceName": "bench", "fieldRequest": {"i": i}},
+            )
+            started = time.perf_counter()
+            await submit(request_data, user)
+            latencies.append(time.perf_counter() - started)
+
+    round_trips.count = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(submitter(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "submissions": len(latencies),
+        "submissions_per_second": round(len(latencies) / elapsed, 1),
+        "db_round_trips_per_submission": round(round_trips.count / len(latencies), 2),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3),
+            "p50": percentile(latencies, 50),
+            "p99": percentile(latencies, 99),
+        },
+    }
+
+
+async def run_benchmark(args) -> dict:
+    round_trips = RoundTrips(async_engine)
+    user = await create_user()
+    results = {}
+    try:
+        for name in args.strategies:
+            results[name] = await run_strategy(name, user, args.submissions, args.concurrency, round_trips)
+    finally:
+        await delete_user(user)
+        await close_rate_limiter()
+        await async_engine.dispose()
+
+    report = {
+        "config": {"submissions": args.submissions, "concurrency": args.concurrency},
+        "strategies": results,
+    }
+    if "select_reload" in results and "insert_returning" in results:
+        before, after = results["select_reload"], results["insert_returning"]
+        report["p50_speedup"] = round(before["latency_ms"]["p50"] / after["latency_ms"]["p50"], 2)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="POST /requests latency benchmark")
+    parser.add_argument("--submissions", type=int, default=2000, help="Submissions per strategy")
+    parser.add_argument("--concurrency", type=int, default=1, help="In-flight submissions on the loop")
+    parser.add_argument(
+        "--strategies", nargs="+", choices=sorted(STRATEGIES), default=list(STRATEGIES)
+    )
+    parser.add_argument("--output", default="-", help="Report path, or - for stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    output = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        for name, result in report["strategies"].items():
+            print(
+                f"{name}: p50 {result['latency_ms']['p50']}ms, p99 {result['latency_ms']['p99']}ms, "
+                f"{result['db_round_trips_per_submission']} DB round trips"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -35,6 +35,7 @@ from models.user import User
 from models.request import Request
 from models.batch import ExportBatch, ImportBatch # noqa
 from models.api_key import ApiKey
+from shared.models.result_blob import ResultBlob  # noqa
 
 # Try to import AuditLog if it exists
 try:
@@ -0,0 +1,31 @@
+"""Add (user_id, created_at DESC, id DESC) index for request listings
+
+Revision ID: 5e0b9c7d2a14
+Revises: a78427cf0a7f
+Create Date: 2026-10-19 14:03:51.208377+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b9c7d2a14'
+down_revision: Union[str, None] = 'a78427cf0a7f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('requests', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_requests_user_id_created_at_id',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('requests', schema=None) as batch_op:
+        batch_op.drop_index('ix_requests_user_id_created_at_id')
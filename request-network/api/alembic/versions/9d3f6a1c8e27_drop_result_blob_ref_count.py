@@ -0,0 +1,27 @@
+"""Drop unused ref_count from result_blobs
+
+Revision ID: 9d3f6a1c8e27
+Revises: 5e0b9c7d2a14
+Create Date: 2026-10-19 16:20:07.114820+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3f6a1c8e27'
+down_revision: Union[str, None] = '5e0b9c7d2a14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('result_blobs', schema=None) as batch_op:
+        batch_op.drop_column('ref_count')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('result_blobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ref_count', sa.Integer(), nullable=False, server_default='1'))
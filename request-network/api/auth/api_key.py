@@ -1,25 +1,96 @@
 import hashlib
-from typing import Annotated
+from typing import Annotated, Dict, Optional
 from datetime import datetime, timezone
+import uuid
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import APIKeyHeader
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update
 from sqlalchemy.future import select
 
-from db.session import get_db_session
-from models.api_key import APIKey
-from models.user import User
+from auth.principal_cache import get_principal_cache
+from auth.schemas import ApiKeyIdentity, UserPrincipal
+from core.config import settings
+from models.api_key import ApiKey
+from shared.versioned_cache import VersionedCache, bump_version_async
+from shared.write_behind import WriteBehindBuffer
 
 # تعریف هدر برای دریافت API Key
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
+API_KEYS_NAMESPACE = "api_keys"
+
+
+async def load_api_key_identity(key_hash: str) -> ApiKeyIdentity:
+    """Resolves a key hash from the database; unknown or revoked keys resolve to an empty identity."""
+    from db.session import AsyncSessionFactory
+
+    async with AsyncSessionFactory() as db:
+        result = await db.execute(
+            select(ApiKey.id, ApiKey.user_id).where(ApiKey.key_hash == key_hash, ApiKey.is_active == True)
+        )
+        row = result.first()
+    if row is None:
+        return ApiKeyIdentity()
+    return ApiKeyIdentity(api_key_id=row.id, user_id=row.user_id)
+
+
+async def write_last_used(batch: Dict[uuid.UUID, datetime]) -> None:
+    """Writes buffered last_used_at values in one bulk UPDATE."""
+    from db.session import AsyncSessionFactory
+
+    async with AsyncSessionFactory() as db:
+        await db.execute(
+            update(ApiKey),
+            [{"id": api_key_id, "last_used_at": used_at} for api_key_id, used_at in batch.items()],
+        )
+        await db.commit()
+
+
+_api_key_cache: Optional[VersionedCache[ApiKeyIdentity]] = None
+last_used_buffer: WriteBehindBuffer[uuid.UUID, datetime] = WriteBehindBuffer(
+    write_last_used, interval=settings.API_KEY_LAST_USED_FLUSH_SECONDS, name="api_keys.last_used_at"
+)
+
+
+async def get_api_key_cache() -> VersionedCache[ApiKeyIdentity]:
+    """Returns this process's key-hash cache on the shared Redis connection."""
+    global _api_key_cache
+    if _api_key_cache is None:
+        from db.redis_client import get_redis_client
+
+        redis_client = await get_redis_client()
+        _api_key_cache = VersionedCache(
+            redis_client.client,
+            API_KEYS_NAMESPACE,
+            loader=load_api_key_identity,
+            dumps=ApiKeyIdentity.model_dump_json,
+            loads=ApiKeyIdentity.model_validate_json,
+            local_ttl=settings.API_KEY_CACHE_TTL_SECONDS,
+            max_entries=settings.API_KEY_CACHE_MAX_ENTRIES,
+            redis_ttl=settings.API_KEY_CACHE_REDIS_TTL_SECONDS,
+            check_interval=settings.API_KEY_CACHE_VERSION_CHECK_SECONDS,
+        )
+    return _api_key_cache
+
+
+async def invalidate_api_keys() -> None:
+    """Drops every cached key resolution after a key is revoked."""
+    api_key_cache = await get_api_key_cache()
+    await bump_version_async(api_key_cache.redis, API_KEYS_NAMESPACE)
+    api_key_cache.invalidate()
+
+
 async def get_api_key(
     key: Annotated[str | None, Depends(api_key_header)],
-    db: Annotated[AsyncSession, Depends(get_db_session)],
-) -> User:
+) -> UserPrincipal:
     """
     Dependency to validate an API key and return the associated active user.
     Raises HTTPException for invalid, missing, or inactive keys/users.
+
+    Keys and users are resolved from caches and last_used_at is written
+    behind in batches, so a call normally touches neither the database
+    nor, within the local TTL, Redis.
     """
     if not key:
         raise HTTPException(
@@ -30,29 +101,24 @@ async def get_api_key(
     # کلیدها برای امنیت هش شده‌اند. ما کلید ورودی را هش کرده و با دیتابیس مقایسه می‌کنیم.
     hashed_key = hashlib.sha256(key.encode()).hexdigest()
 
-    stmt = (
-        select(APIKey)
-        .join(User)
-        .where(APIKey.key_hash == hashed_key)
-    )
-    result = await db.execute(stmt)
-    api_key_obj = result.scalars().first()
+    api_key_cache = await get_api_key_cache()
+    identity = await api_key_cache.get(hashed_key)
 
-    if not api_key_obj or not api_key_obj.is_active:
+    if identity is None or identity.api_key_id is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid or inactive API Key.",
         )
 
-    user = api_key_obj.user
+    principal_cache = await get_principal_cache()
+    user = await principal_cache.get(str(identity.user_id)) if identity.user_id else None
     if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user associated with this API Key is inactive.",
         )
 
-    # آپدیت زمان آخرین استفاده از کلید
-    api_key_obj.last_used_at = datetime.now(timezone.utc)
-    await db.commit()
+    # آپدیت زمان آخرین استفاده از کلید (write-behind)
+    last_used_buffer.record(identity.api_key_id, datetime.now(timezone.utc))
 
-    return user
\ No newline at end of file
+    return user
@@ -2,13 +2,10 @@ from typing import Annotated, Callable, Sequence
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-
-from db.session import get_db_session
 from schemas.user import User as UserSchema
-from models.user import User
 from auth import security
+from auth.principal_cache import get_principal_cache
+from auth.schemas import UserPrincipal
 
 
 # This tells FastAPI where to go to get a token.
@@ -16,12 +13,10 @@ from auth import security
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db_session)
-) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserPrincipal:
     """
-    Decodes the JWT token, validates it, and fetches the corresponding user
-    from the database.
+    Decodes the JWT token, validates it, and resolves the corresponding user
+    from the principal cache (the database is only read on a cache miss).
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -33,10 +28,8 @@ async def get_current_user(
     if token_data is None or token_data.user_id is None:
         raise credentials_exception
 
-    # Fetch user from DB
-    query = select(User).where(User.id == token_data.user_id)
-    result = await db.execute(query)
-    user = result.scalar_one_or_none()
+    principal_cache = await get_principal_cache()
+    user = await principal_cache.get(str(token_data.user_id))
 
     if user is None:
         raise credentials_exception
@@ -45,8 +38,8 @@ async def get_current_user(
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user),
+) -> UserPrincipal:
     """
     A dependency that checks if the user fetched from the token is active.
     """
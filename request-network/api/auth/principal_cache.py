@@ -0,0 +1,79 @@
+"""
+Cache of authenticated users for the API.
+
+Users are a read-only replica that only ``users_importer`` writes, so
+``get_current_user`` resolves the token's user from a two-tier cache (see
+``shared.versioned_cache``) instead of querying the database on every call.
+The importer bumps ``users:version`` after each applied change, which drops
+every cached principal within ``USER_CACHE_VERSION_CHECK_SECONDS``.
+"""
+import logging
+import uuid
+from typing import Optional
+
+import redis
+from sqlalchemy import select
+
+from auth.schemas import UserPrincipal
+from core.config import settings
+from models.user import User
+from shared.versioned_cache import VersionedCache, bump_version, bump_version_async
+
+logger = logging.getLogger(__name__)
+
+USERS_NAMESPACE = "users"
+
+# Only what UserPrincipal holds
+PRINCIPAL_COLUMNS = [getattr(User, field) for field in UserPrincipal.model_fields]
+
+
+def bump_users_version() -> Optional[int]:
+    """Invalidates every cached principal (called by the users importer)."""
+    client = redis.from_url(str(settings.REDIS_URL), socket_connect_timeout=5)
+    try:
+        return bump_version(client, USERS_NAMESPACE)
+    finally:
+        client.close()
+
+
+async def invalidate_principals() -> None:
+    """Invalidates every cached principal after a user is changed in the API."""
+    principal_cache = await get_principal_cache()
+    await bump_version_async(principal_cache.redis, USERS_NAMESPACE)
+    principal_cache.invalidate()
+
+
+async def load_principal(user_id: str) -> Optional[UserPrincipal]:
+    """Reads one user's principal fields from the database."""
+    from db.session import AsyncSessionFactory
+
+    async with AsyncSessionFactory() as db:
+        result = await db.execute(select(*PRINCIPAL_COLUMNS).where(User.id == uuid.UUID(user_id)))
+        row = result.one_or_none()
+    if row is None:
+        return None
+    return UserPrincipal.model_validate(row._mapping)
+
+
+_principal_cache: Optional[VersionedCache[UserPrincipal]] = None
+
+
+async def get_principal_cache() -> VersionedCache[UserPrincipal]:
+    """Returns this process's principal cache on the shared Redis connection."""
+    global _principal_cache
+    if _principal_cache is None:
+        from db.redis_client import get_redis_client
+
+        redis_client = await get_redis_client()
+        _principal_cache = VersionedCache(
+            redis_client.client,
+            USERS_NAMESPACE,
+            loader=load_principal,
+            dumps=UserPrincipal.model_dump_json,
+            loads=UserPrincipal.model_validate_json,
+            local_ttl=settings.USER_CACHE_TTL_SECONDS,
+            max_entries=settings.USER_CACHE_MAX_ENTRIES,
+            redis_ttl=settings.USER_CACHE_REDIS_TTL_SECONDS,
+            check_interval=settings.USER_CACHE_VERSION_CHECK_SECONDS,
+        )
+    return _principal_cache
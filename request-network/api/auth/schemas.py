@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Tuple
+
+from pydantic import BaseModel, ConfigDict
 import uuid
 
 
@@ -10,4 +12,45 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     username: str | None = None
     user_id: uuid.UUID | None = None
-    scopes: list[str] = []
\ No newline at end of file
+    scopes: list[str] = []
+
+
+class UserPrincipal(BaseModel):
+    """
+    Immutable snapshot of an authenticated user: only what authorization,
+    rate limiting and request ownership need. Cached per process and in
+    Redis (see auth.principal_cache).
+    """
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
+    id: uuid.UUID
+    username: str
+    is_active: bool
+    profile_type: str
+    priority: int
+    rate_limit_per_minute: int
+    rate_limit_per_hour: int
+    rate_limit_per_day: int
+    allowed_request_types: Tuple[str, ...] = ()
+    blocked_request_types: Tuple[str, ...] = ()
+
+    def is_request_type_allowed(self, request_type: str) -> bool:
+        """Same rules as models.user.User.is_request_type_allowed."""
+        if request_type in self.blocked_request_types:
+            return False
+
+        if not self.allowed_request_types:  # Empty list = allow all
+            return True
+
+        return request_type in self.allowed_request_types
+
+
+class ApiKeyIdentity(BaseModel):
+    """
+    What an API key hash resolves to. Unknown and revoked keys resolve to
+    an identity without ``api_key_id`` so they can be cached too.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    api_key_id: uuid.UUID | None = None
+    user_id: uuid.UUID | None = None
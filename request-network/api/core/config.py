@@ -35,6 +35,59 @@ class Settings(BaseSettings):
     # Import/Export directories
     IMPORT_DIR: str = "/app/imports"
     EXPORT_DIR: str = "/app/exports"
+
+    # Transfer bundles: pack each sync window into one archive
+    TRANSFER_BUNDLE_ENABLED: bool = False
+    TRANSFER_BUNDLE_CODEC: str = "gzip"  # gzip or identity
+    TRANSFER_CHUNK_SIZE_BYTES: int = 4 * 1024 * 1024  # Merkle chunk size for batch files
+    TRANSFER_VERIFY_WORKERS: int = 4  # Threads used to hash chunks on import
+    TRANSFER_METADATA_MAX_WAIT_SECONDS: int = 3600  # Then import a data file without metadata unverified
+    EXPORT_MAX_PART_BYTES: int = 0  # Split export batches into parts of this size (0 = no limit)
+
+    # Import watcher: dispatch importers on file events instead of polling
+    IMPORT_WATCHER_ENABLED: bool = False
+    IMPORT_WATCH_SETTLE_SECONDS: float = 2.0
+    IMPORT_POLL_FALLBACK_SECONDS: float = 300.0  # Beat interval for importers while the watcher runs
+
+    # How often API processes check whether their settings snapshot is stale
+    SETTINGS_SNAPSHOT_CHECK_SECONDS: float = 1.0
+
+    # Authenticated-user cache (in-process LRU in front of Redis)
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    USER_CACHE_REDIS_TTL_SECONDS: int = 300
+    USER_CACHE_VERSION_CHECK_SECONDS: float = 1.0
+
+    # API key resolution cache; last_used_at is written behind in batches
+    API_KEY_CACHE_TTL_SECONDS: float = 30.0
+    API_KEY_CACHE_MAX_ENTRIES: int = 10000
+    API_KEY_CACHE_REDIS_TTL_SECONDS: int = 300
+    API_KEY_CACHE_VERSION_CHECK_SECONDS: float = 1.0
+    API_KEY_LAST_USED_FLUSH_SECONDS: float = 5.0
+
+    # Bulk submission: items validated, rate-limited and inserted per chunk
+    BULK_SUBMIT_CHUNK_SIZE: int = 500
+
+    # Request status push (SSE / WebSocket over Redis pub/sub)
+    STATUS_EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    STATUS_EVENTS_QUEUE_SIZE: int = 256  # Events buffered per connected client
+
+    # Pre-serialized response bodies (GET /requests/{id}/response)
+    RESPONSE_CACHE_TTL_SECONDS: int = 86400
+    RESPONSE_CACHE_CODEC: str = "gzip"  # gzip or identity
+    RESPONSE_CACHE_COMPRESS_MIN_BYTES: int = 1024  # Smaller bodies are stored uncompressed
+    RESPONSE_CACHE_LOCAL_MAX_BYTES: int = 64 * 1024 * 1024  # In-process LRU per API process (0 = off)
+    RESPONSE_CACHE_LOCAL_TTL_SECONDS: float = 3600.0
+    # Warming: the results importer caches the responses it imports
+    RESPONSE_CACHE_WARM_ENABLED: bool = True
+    RESPONSE_CACHE_WARM_MAX_BYTES: int = 0  # Skip bodies larger than this once encoded (0 = no limit)
+    RESPONSE_CACHE_WARM_PROFILES: list[str] = []  # Only warm these users' profile types (empty = all)
+    RESPONSE_CACHE_WARM_BUDGET_BYTES: int = 256 * 1024 * 1024  # Encoded bytes warmed per import batch
+    RESPONSE_CACHE_WARM_MAX_MEMORY_RATIO: float = 0.9  # Stop warming past this share of Redis maxmemory
+    RESPONSE_CACHE_WARM_CHUNK_SIZE: int = 100  # Entries written per pipeline
+
+    # Seconds Redis is skipped after a failed command before it is tried again
+    REDIS_RETRY_AFTER_SECONDS: float = 5.0
     
     # CORS
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:3001", "http://localhost:3000"]
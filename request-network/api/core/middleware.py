@@ -2,38 +2,50 @@ import time
 import uuid
 
 import structlog
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.responses import Response
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 log = structlog.get_logger(__name__)
 
 
-class RequestContextMiddleware(BaseHTTPMiddleware):
+class RequestContextMiddleware:
     """
     Injects a unique request_id into the context of each request for traceability.
     It also logs the request details and processing time.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware: ``receive`` is
+    passed through untouched, so endpoints can keep reading a streamed
+    request body while their response is already streaming (bulk submission).
     """
 
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
         request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
+        scope.setdefault("state", {})["request_id"] = request_id
 
         # Bind the request_id to the logger context for this request
         structlog.contextvars.clear_contextvars()
         structlog.contextvars.bind_contextvars(request_id=request_id)
 
         start_time = time.perf_counter()
-        log.info("Request started", method=request.method, url=str(request.url))
-
-        response = await call_next(request)
-
-        process_time = (time.perf_counter() - start_time) * 1000
-        log.info("Request finished", status_code=response.status_code, process_time_ms=f"{process_time:.2f}")
-
-        response.headers["X-Request-ID"] = request_id
-        return response
+        path = scope["path"] + (f"?{scope['query_string'].decode()}" if scope.get("query_string") else "")
+        log.info("Request started", method=scope["method"], url=path)
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+                process_time = (time.perf_counter() - start_time) * 1000
+                log.info(
+                    "Request finished",
+                    status_code=message["status"],
+                    process_time_ms=f"{process_time:.2f}",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_request_id)
@@ -20,8 +20,11 @@ if str(project_root) not in sys.path:
 
 from core.config import settings
 from core.middleware import RequestContextMiddleware
-from core.rate_limiter import RateLimiter
 from core.exceptions import global_exception_handler
+from rate_limiter import close_rate_limiter
+from auth.api_key import last_used_buffer
+from services.request_events import close_status_hub
+from services.response_cache import close_response_cache
 from db.session import get_db_session
 from routers import auth_router, request_router, admin_router, settings_router
 from routers import users as users_router  # Import users router
@@ -64,6 +67,14 @@ app.include_router(settings_router.router, prefix=settings.API_V1_STR)
 async def startup_event():
     log.info("Application startup...", api_version=app.version)
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_rate_limiter()
+    await last_used_buffer.close()
+    await close_status_hub()
+    await close_response_cache()
+
 @app.get(f"{settings.API_V1_STR}/", tags=["Root"])
 async def root():
     return {"message": "Welcome to the Request Network API"}
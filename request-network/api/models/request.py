@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
@@ -12,6 +12,10 @@ class Request(BaseModel, TimestampMixin):
     Represents a user's request submitted to the system.
     """
     __tablename__ = "requests"
+    __table_args__ = (
+        # Keyset pagination of a user's requests, newest first
+        Index("ix_requests_user_id_created_at_id", "user_id", text("created_at DESC"), text("id DESC")),
+    )
     
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -6,6 +6,7 @@ from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from shared.database.base import BaseModel, UUIDMixin
+from shared.models.result_blob import ResultBlob
 
 class Response(UUIDMixin, BaseModel):
     """
@@ -14,7 +15,9 @@ class Response(UUIDMixin, BaseModel):
     __tablename__ = "responses"
 
     request_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("requests.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
-    result_data: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # Inline payload for rows written before the blob store; new rows use result_hash
+    stored_result_data: Mapped[dict | None] = mapped_column("result_data", JSONB, nullable=True)
+    result_hash: Mapped[str | None] = mapped_column(ForeignKey("result_blobs.hash"), nullable=True, index=True)
     result_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
     execution_time_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
     received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, index=True)
@@ -24,4 +27,16 @@ class Response(UUIDMixin, BaseModel):
     meta: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
 
     # Relationship back to the request
-    request: Mapped["Request"] = relationship("Request", back_populates="response")
\ No newline at end of file
+    request: Mapped["Request"] = relationship("Request", back_populates="response")
+    blob: Mapped[ResultBlob | None] = relationship(ResultBlob, lazy="joined")
+
+    @property
+    def result_data(self) -> dict | None:
+        """The result payload, resolved from the blob store when deduplicated."""
+        if self.stored_result_data is not None:
+            return self.stored_result_data
+        return self.blob.payload if self.blob is not None else None
+
+    @result_data.setter
+    def result_data(self, value: dict | None) -> None:
+        self.stored_result_data = value
\ No newline at end of file
@@ -9,8 +9,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 import logging
 
-from rate_limiter import RateLimiter, LimitLevel
-from db.redis_client import get_redis_client
+from rate_limiter import LimitLevel, get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -44,9 +43,8 @@ class RateLimitGracePeriodMiddleware(BaseHTTPMiddleware):
             return response
         
         try:
-            # بررسی Rate Limit
-            redis_client = await get_redis_client()
-            rate_limiter = RateLimiter(redis_client.client)
+            # بررسی Rate Limit (check, count and grace period in one call)
+            rate_limiter = await get_rate_limiter()
             
             limit_level, details = await rate_limiter.check_limit(user_id, profile)
             
@@ -55,21 +53,16 @@ class RateLimitGracePeriodMiddleware(BaseHTTPMiddleware):
                 response = await call_next(request)
                 
                 # اضافه کردن headers
-                response.headers["X-RateLimit-Limit-Minute"] = str(details.get("hit_limit", "∞"))
+                response.headers["X-RateLimit-Limit-Minute"] = str(details.get("limits", {}).get("minute", "∞"))
                 response.headers["X-RateLimit-Remaining-Minute"] = str(details["remaining_minute"])
                 response.headers["X-RateLimit-Remaining-Hour"] = str(details["remaining_hour"])
                 response.headers["X-RateLimit-Remaining-Day"] = str(details["remaining_day"])
                 
-                # Increment counter بعد از پاسخ
-                await rate_limiter.increment_counter(user_id)
-                
                 return response
             
             # ⚠️ WARNING (80%) - اجازه دارد اما هشدار
             elif limit_level == LimitLevel.WARNING:
-                # فعال‌سازی soft block برای 5 دقیقه
-                await rate_limiter.activate_soft_block(user_id, details.get("hit_limit", "hour"))
-                
+                # soft block برای 5 دقیقه توسط check_limit فعال شده است
                 response = await call_next(request)
                 
                 # Add warning headers
@@ -79,9 +72,6 @@ class RateLimitGracePeriodMiddleware(BaseHTTPMiddleware):
                 response.headers["X-RateLimit-Remaining-Hour"] = str(details["remaining_hour"])
                 response.headers["X-RateLimit-Remaining-Day"] = str(details["remaining_day"])
                 
-                # Increment counter
-                await rate_limiter.increment_counter(user_id)
-                
                 logger.warning(f"User {user_id} reached {details['hit_limit']} warning threshold")
                 
                 return response
@@ -98,9 +88,6 @@ class RateLimitGracePeriodMiddleware(BaseHTTPMiddleware):
                 response.headers["X-RateLimit-Remaining-Hour"] = str(max(0, details["remaining_hour"]))
                 response.headers["X-RateLimit-Remaining-Day"] = str(max(0, details["remaining_day"]))
                 
-                # Increment counter
-                await rate_limiter.increment_counter(user_id)
-                
                 logger.warning(f"User {user_id} in soft block grace period for {details['hit_limit']}")
                 
                 return response
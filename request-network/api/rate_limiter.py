@@ -1,20 +1,35 @@
 """
 Rate Limiter with Grace Period Support
-فرهنگ پیاده‌سازی: Fixed Window algorithm با محدودیت چندگانه
+فرهنگ پیاده‌سازی: Fixed Window یا GCRA با محدودیت چندگانه
+
+One Lua script checks and increments the minute, hour and day windows,
+applies the grace-period logic and returns the counts in a single round
+trip, so a submission costs one EVALSHA and never blocks the event loop.
+
+Each profile picks its algorithm:
+
+- ``fixed_window`` counts requests in calendar buckets (per minute, hour
+  and day). Simple, but a user can send twice the limit across a bucket
+  boundary and every user's quota resets at the same instant.
+- ``gcra`` (Generic Cell Rate Algorithm) stores one "theoretical arrival
+  time" per window. A full window's worth of requests may arrive at once,
+  after which capacity returns evenly, one request every
+  ``period / limit`` seconds. Memory stays constant per user.
 """
 
+import asyncio
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Tuple, Optional
+from typing import Callable, Dict, Tuple, Optional
 from enum import Enum
 
 from redis.asyncio import Redis
 import logging
 
-from core.config import settings
-
 logger = logging.getLogger(__name__)
 
+WINDOWS = ("minute", "hour", "day")
+
 
 class LimitLevel(str, Enum):
     """سطح‌های محدودیت برای Rate Limiting"""
@@ -56,192 +71,444 @@ class RateLimitConfig:
     SOFT_BLOCK_THRESHOLD = 1.10  # 110% - اجازه دارد اما به مدت محدود
     HARD_BLOCK_THRESHOLD = 1.0  # 100% - مسدود شود
 
+    # How long a grace period started at the warning threshold lasts
+    GRACE_PERIOD_SECONDS = 300
+
+    # Counter lifetime per window (window length plus a small buffer)
+    WINDOW_TTLS = {
+        "minute": 70,
+        "hour": 3700,
+        "day": 86500,
+    }
+
+    WINDOW_SECONDS = {
+        "minute": 60,
+        "hour": 3600,
+        "day": 86400,
+    }
+
+    # Algorithm per profile: "fixed_window" or "gcra"
+    FIXED_WINDOW = "fixed_window"
+    GCRA = "gcra"
+    ALGORITHMS = {
+        "free": FIXED_WINDOW,
+        "basic": FIXED_WINDOW,
+        "premium": GCRA,
+        "enterprise": GCRA,
+    }
+
+    # Hybrid mode (see HybridRateLimiter): profiles whose workers lease part
+    # of the quota and spend it locally
+    HYBRID_PROFILES = {"enterprise"}
+    LEASE_FRACTION = 0.05  # Lease size as a share of the minute limit
+    LEASE_SECONDS = 2.0
+
+
+# KEYS: minute, hour, day counters (fixed window) or arrival times (GCRA);
+#       custom limits hash; minute, hour, day soft-block markers
+# ARGV: default minute, hour, day limits; warning threshold; soft block
+#       threshold; grace period seconds; minute, hour, day TTLs; units;
+#       algorithm; now (ms); minute, hour, day period seconds; batch flag
+#
+# units: 0 inspects, 1 counts one request, n > 1 asks for a lease of n
+# (granted in full only while every window stays below the warning
+# threshold, otherwise one request is counted as usual), n < 0 gives back
+# -n unused requests before inspecting. With the batch flag set, n > 1
+# admits as many of n requests as n separate calls would have (grace
+# period included) and the level is the one of the last request admitted
+# (or 'exceeded' if any was refused).
+#
+# Returns {level, hit window (1-3, 0 = none), limit x3, count x3, grace ttl,
+# granted}. Counts include what was granted. For GCRA the count is the
+# number of emission intervals still outstanding, which plays the same role
+# as a window counter.
+CHECK_AND_INCREMENT_LUA = """
+local limits = {tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])}
+local custom = redis.call('HMGET', KEYS[4], 'minute', 'hour', 'day')
+for i = 1, 3 do
+    if custom[i] then limits[i] = tonumber(custom[i]) end
+end
+
+local warning = tonumber(ARGV[4])
+local soft = tonumber(ARGV[5])
+local grace = tonumber(ARGV[6])
+local units = tonumber(ARGV[10])
+local gcra = ARGV[11] == 'gcra'
+local now = tonumber(ARGV[12])
+
+local intervals = {}
+for i = 1, 3 do
+    intervals[i] = tonumber(ARGV[12 + i]) * 1000 / limits[i]
+end
+
+-- Return unused leased requests
+if units < 0 then
+    for i = 1, 3 do
+        local stored = tonumber(redis.call('GET', KEYS[i]) or '0')
+        if gcra then
+            local tat = stored + units * intervals[i]
+            if tat > now then
+                redis.call('SET', KEYS[i], string.format('%.3f', tat), 'PX', math.ceil(tat - now))
+            else
+                redis.call('DEL', KEYS[i])
+            end
+        elseif stored > 0 then
+            redis.call('DECRBY', KEYS[i], math.min(-units, stored))
+        end
+    end
+    units = 0
+end
+
+local counts = {}
+local active = {}
+local started = {}
+local tats = {}
+for i = 1, 3 do
+    if gcra then
+        tats[i] = math.max(tonumber(redis.call('GET', KEYS[i]) or '0'), now)
+        counts[i] = math.ceil((tats[i] - now) / intervals[i] - 1e-9)
+    else
+        counts[i] = tonumber(redis.call('GET', KEYS[i]) or '0')
+    end
+    active[i] = redis.call('EXISTS', KEYS[4 + i]) == 1
+end
+
+local function assess()
+    -- 1. Hard block: at the limit, unless a grace period allows up to 110%
+    for i = 1, 3 do
+        if counts[i] >= limits[i] and not (active[i] and counts[i] <= math.floor(limits[i] * soft + 1e-9)) then
+            return 'exceeded', i
+        end
+    end
+    -- 2. Grace period / warning from 80%
+    for i = 1, 3 do
+        if counts[i] >= limits[i] * warning then
+            if active[i] then
+                return 'soft_block', i
+            end
+            active[i] = true
+            started[i] = true
+            return 'warning', i
+        end
+    end
+    return 'ok', 0
+end
+
+local level, hit = assess()
+local granted = 0
+
+-- Batches: admit request by request until one would be refused
+if ARGV[16] == '1' and units > 1 then
+    while level ~= 'exceeded' and granted < units do
+        granted = granted + 1
+        for i = 1, 3 do counts[i] = counts[i] + 1 end
+        if granted < units then
+            level, hit = assess()
+        end
+    end
+    units = 0
+end
+
+for i = 1, 3 do
+    if started[i] then
+        redis.call('SET', KEYS[4 + i], '1', 'EX', grace)
+    end
+end
+
+-- 3. Leases come only out of the quota below the warning threshold
+if units > 1 and level == 'ok' then
+    granted = units
+    for i = 1, 3 do
+        if math.floor(limits[i] * warning) - counts[i] < units then
+            granted = 0
+            break
+        end
+    end
+end
+if granted == 0 and units > 0 and level ~= 'exceeded' then
+    granted = 1
+end
+
+if granted > 0 then
+    for i = 1, 3 do
+        if gcra then
+            local tat = tats[i] + granted * intervals[i]
+            redis.call('SET', KEYS[i], string.format('%.3f', tat), 'PX', math.ceil(tat - now))
+            counts[i] = math.ceil((tat - now) / intervals[i] - 1e-9)
+        else
+            counts[i] = redis.call('INCRBY', KEYS[i], granted)
+            if counts[i] == granted then
+                redis.call('EXPIRE', KEYS[i], tonumber(ARGV[6 + i]))
+            end
+        end
+    end
+end
+
+local grace_ttl = -1
+if hit > 0 then
+    grace_ttl = redis.call('TTL', KEYS[4 + hit])
+end
+
+return {level, hit, limits[1], limits[2], limits[3], counts[1], counts[2], counts[3], grace_ttl, granted}
+"""
+
+
+def user_limits(user) -> Dict[str, int]:
+    """Per-window limits stored on a user row."""
+    return {
+        "minute": user.rate_limit_per_minute,
+        "hour": user.rate_limit_per_hour,
+        "day": user.rate_limit_per_day,
+    }
+
 
 class RateLimiter:
     """
     Rate Limiter with Grace Period Support
-    
+
     Features:
-    - Fixed Window algorithm (minute, hour, day windows)
+    - Fixed Window or GCRA per profile (minute, hour, day windows)
     - Grace Period (80% warning, 110% soft block for 5 min, 100% hard block)
-    - Per-user limits based on profile
-    - Redis-based counter storage
+    - Per-user limits (user row or profile defaults, admin overrides on top)
+    - Check and increment in one atomic Lua call
     - Admin reset capability
     """
 
-    def __init__(self, redis_client: Redis):
+    def __init__(self, redis_client: Redis, clock: Callable[[], float] = time.time):
         self.redis = redis_client
+        self.clock = clock
         self.config = RateLimitConfig()
+        self._script = redis_client.register_script(CHECK_AND_INCREMENT_LUA)
 
     async def get_user_limits(self, user_id: str, profile: str = "free") -> Dict:
         """
         دریافت محدودیت‌های کاربر بر اساس پروفایل
-        
+
         Args:
             user_id: ID کاربر
             profile: نوع پروفایل (free, basic, premium, enterprise)
-            
+
         Returns:
             محدودیت‌های دقیق کاربر
         """
-        limits = self.config.LIMITS.get(profile, self.config.LIMITS["free"])
-        
+        limits = dict(self.config.LIMITS.get(profile, self.config.LIMITS["free"]))
+
         # بررسی override توسط ادمین
-        custom_key = f"rate_limit:custom:{user_id}"
-        custom_limits = await self.redis.hgetall(custom_key)
-        
-        if custom_limits:
-            limits = {
-                "minute": int(custom_limits.get(b"minute", limits["minute"])),
-                "hour": int(custom_limits.get(b"hour", limits["hour"])),
-                "day": int(custom_limits.get(b"day", limits["day"])),
-            }
-        
+        custom_limits = await self.redis.hgetall(self._custom_key(user_id))
+        for key, value in (custom_limits or {}).items():
+            window = key.decode() if isinstance(key, bytes) else key
+            if window in limits:
+                limits[window] = int(value)
+
         return limits
 
-    def _get_window_keys(self, user_id: str) -> Dict[str, str]:
+    @staticmethod
+    def _custom_key(user_id: str) -> str:
+        return f"rate_limit:custom:{user_id}"
+
+    @staticmethod
+    def _soft_block_key(user_id: str, window: str) -> str:
+        return f"rate_limit:soft_block:{user_id}:{window}"
+
+    def _get_window_keys(self, user_id: str, at: Optional[float] = None) -> Dict[str, str]:
         """
         Generate Redis keys برای windows مختلف
-        
+
+        Args:
+            at: Timestamp whose windows to use (default: now)
+
         Returns:
             Dict با keys برای minute, hour, day windows
         """
-        now = datetime.utcnow()
-        
+        now = datetime.utcfromtimestamp(self.clock() if at is None else at)
+
         return {
             "minute": f"rate_limit:{user_id}:minute:{now.strftime('%Y%m%d%H%M')}",
             "hour": f"rate_limit:{user_id}:hour:{now.strftime('%Y%m%d%H')}",
             "day": f"rate_limit:{user_id}:day:{now.strftime('%Y%m%d')}",
         }
 
+    @staticmethod
+    def _gcra_keys(user_id: str) -> Dict[str, str]:
+        """Redis keys holding the GCRA arrival time per window"""
+        return {window: f"rate_limit:{user_id}:gcra:{window}" for window in WINDOWS}
+
+    def get_algorithm(self, profile: str) -> str:
+        return self.config.ALGORITHMS.get(profile, RateLimitConfig.FIXED_WINDOW)
+
+    async def _evaluate(
+        self,
+        user_id: str,
+        profile: str,
+        limits: Optional[Dict[str, int]],
+        units: int,
+        at: Optional[float] = None,
+        batch: bool = False,
+    ) -> Tuple[LimitLevel, Dict]:
+        defaults = limits or self.config.LIMITS.get(profile, self.config.LIMITS["free"])
+        algorithm = self.get_algorithm(profile)
+        if algorithm == RateLimitConfig.GCRA:
+            window_keys = self._gcra_keys(user_id)
+        else:
+            window_keys = self._get_window_keys(user_id, at)
+        keys = [window_keys[w] for w in WINDOWS] + [self._custom_key(user_id)] + [
+            self._soft_block_key(user_id, w) for w in WINDOWS
+        ]
+        args = [defaults[w] for w in WINDOWS] + [
+            self.config.WARNING_THRESHOLD,
+            self.config.SOFT_BLOCK_THRESHOLD,
+            self.config.GRACE_PERIOD_SECONDS,
+        ] + [self.config.WINDOW_TTLS[w] for w in WINDOWS] + [
+            units,
+            algorithm,
+            self.clock() * 1000,
+        ] + [self.config.WINDOW_SECONDS[w] for w in WINDOWS] + [1 if batch else 0]
+
+        raw_level, hit, *numbers = await self._script(keys=keys, args=args)
+        level = LimitLevel(raw_level.decode() if isinstance(raw_level, bytes) else raw_level)
+        effective = dict(zip(WINDOWS, (int(n) for n in numbers[0:3])))
+        counts = dict(zip(WINDOWS, (int(n) for n in numbers[3:6])))
+        grace_ttl = int(numbers[6])
+        granted = int(numbers[7])
+        hit_limit = WINDOWS[int(hit) - 1] if int(hit) else None
+
+        details = {
+            "remaining_minute": max(0, effective["minute"] - counts["minute"]),
+            "remaining_hour": max(0, effective["hour"] - counts["hour"]),
+            "remaining_day": max(0, effective["day"] - counts["day"]),
+            "limits": effective,
+            "counts": counts,
+            "hit_limit": hit_limit,
+            "usage": {w: counts[w] / effective[w] if effective[w] else 1.0 for w in WINDOWS},
+            "granted": granted,
+        }
+        if level == LimitLevel.EXCEEDED:
+            details["message"] = f"Rate limit exceeded for {hit_limit}"
+        elif level == LimitLevel.SOFT_BLOCK:
+            details["message"] = f"Soft block active for {hit_limit} (grace period)"
+            details["grace_period_ends_at"] = (
+                datetime.utcnow() + timedelta(seconds=max(0, grace_ttl))
+            ).isoformat()
+        elif level == LimitLevel.WARNING:
+            details["message"] = f"Approaching {hit_limit} limit (80% used)"
+        else:
+            details["message"] = "Rate limit OK"
+        return level, details
+
     async def check_limit(
-        self, user_id: str, profile: str = "free"
+        self,
+        user_id: str,
+        profile: str = "free",
+        limits: Optional[Dict[str, int]] = None,
+        consume: bool = True,
     ) -> Tuple[LimitLevel, Dict]:
         """
         بررسی Rate Limit با Grace Period Support
-        
+
+        Checks all three windows and, unless the request is blocked,
+        counts it, in one atomic round trip. Reaching the warning threshold
+        starts the grace period.
+
+        Args:
+            user_id: ID کاربر
+            profile: Profile whose default limits apply
+            limits: Per-window limits overriding the profile defaults
+                (e.g. from the user row); admin overrides still win
+            consume: Count this request (False only inspects)
+
         Returns:
             Tuple[LimitLevel, details_dict]
-            
+
         Details Dict شامل:
             - remaining_minute, remaining_hour, remaining_day
-            - reset_at_minute, reset_at_hour, reset_at_day
             - hit_limit (کدام limit ایجاد هشدار می‌کند)
             - message: توضیح انگلیسی
         """
+        return await self._check(user_id, profile, limits, 1 if consume else 0)
+
+    async def _check(
+        self,
+        user_id: str,
+        profile: str,
+        limits: Optional[Dict[str, int]],
+        units: int,
+        at: Optional[float] = None,
+        batch: bool = False,
+    ) -> Tuple[LimitLevel, Dict]:
         try:
-            limits = await self.get_user_limits(user_id, profile)
-            keys = self._get_window_keys(user_id)
-            
-            # دریافت شمارنده‌های فعلی
-            counts = {
-                "minute": int(await self.redis.get(keys["minute"]) or 0),
-                "hour": int(await self.redis.get(keys["hour"]) or 0),
-                "day": int(await self.redis.get(keys["day"]) or 0),
-            }
-            
-            # محاسبه استفاده (0-1 scale)
-            usage = {
-                "minute": counts["minute"] / limits["minute"],
-                "hour": counts["hour"] / limits["hour"],
-                "day": counts["day"] / limits["day"],
-            }
-            
-            # بررسی سطح محدودیت
-            # 1. Hard Block (100% exceeded)
-            for window in ["minute", "hour", "day"]:
-                if counts[window] >= limits[window]:
-                    return LimitLevel.EXCEEDED, {
-                        "remaining_minute": max(0, limits["minute"] - counts["minute"]),
-                        "remaining_hour": max(0, limits["hour"] - counts["hour"]),
-                        "remaining_day": max(0, limits["day"] - counts["day"]),
-                        "hit_limit": window,
-                        "message": f"Rate limit exceeded for {window}",
-                        "usage": usage,
-                    }
-            
-            # 2. Soft Block (80-100%, تا 5 دقیقه grace period)
-            for window in ["minute", "hour", "day"]:
-                if usage[window] >= self.config.WARNING_THRESHOLD:
-                    # Check if soft block is active
-                    soft_block_key = f"rate_limit:soft_block:{user_id}:{window}"
-                    soft_block_active = await self.redis.exists(soft_block_key)
-                    
-                    if soft_block_active:
-                        return LimitLevel.SOFT_BLOCK, {
-                            "remaining_minute": max(0, limits["minute"] - counts["minute"]),
-                            "remaining_hour": max(0, limits["hour"] - counts["hour"]),
-                            "remaining_day": max(0, limits["day"] - counts["day"]),
-                            "hit_limit": window,
-                            "message": f"Soft block active for {window} (grace period)",
-                            "usage": usage,
-                            "grace_period_ends_at": (
-                                datetime.utcnow() + timedelta(minutes=5)
-                            ).isoformat(),
-                        }
-                    
-                    return LimitLevel.WARNING, {
-                        "remaining_minute": max(0, limits["minute"] - counts["minute"]),
-                        "remaining_hour": max(0, limits["hour"] - counts["hour"]),
-                        "remaining_day": max(0, limits["day"] - counts["day"]),
-                        "hit_limit": window,
-                        "message": f"Approaching {window} limit (80% used)",
-                        "usage": usage,
-                    }
-            
-            # 3. OK - کمتر از 80%
-            return LimitLevel.OK, {
-                "remaining_minute": limits["minute"] - counts["minute"],
-                "remaining_hour": limits["hour"] - counts["hour"],
-                "remaining_day": limits["day"] - counts["day"],
-                "hit_limit": None,
-                "message": "Rate limit OK",
-                "usage": usage,
-            }
-            
+            return await self._evaluate(user_id, profile, limits, units, at, batch)
         except Exception as e:
             logger.error(f"Error checking rate limit for user {user_id}: {e}")
             # اگر Redis خراب باشد، اجازه بدهید
             return LimitLevel.OK, {"message": "Rate limit check failed (Redis error)"}
 
-    async def increment_counter(self, user_id: str) -> None:
+    async def check_batch(
+        self,
+        user_id: str,
+        count: int,
+        profile: str = "free",
+        limits: Optional[Dict[str, int]] = None,
+    ) -> Tuple[LimitLevel, Dict]:
         """
-        Increment شمارنده‌های Rate Limit
-        
-        تمام 3 window را increment می‌کند (minute, hour, day)
+        Counts up to ``count`` requests in one round trip (bulk submission).
+
+        Admits exactly what ``count`` separate :meth:`check_limit` calls
+        would have, grace period included. ``details["granted"]`` is the
+        number admitted; the first ``granted`` requests may go ahead and the
+        rest are refused. The level is the one of the last admitted request,
+        or ``EXCEEDED`` if any was refused.
         """
-        try:
-            keys = self._get_window_keys(user_id)
-            
-            # Increment همه keys با TTL
-            pipeline = self.redis.pipeline()
-            
-            # Minute window (60 ثانیه)
-            pipeline.incr(keys["minute"])
-            pipeline.expire(keys["minute"], 60)
-            
-            # Hour window (3600 ثانیه)
-            pipeline.incr(keys["hour"])
-            pipeline.expire(keys["hour"], 3600)
-            
-            # Day window (86400 ثانیه)
-            pipeline.incr(keys["day"])
-            pipeline.expire(keys["day"], 86400)
-            
-            await pipeline.execute()
-            
-        except Exception as e:
-            logger.warning(f"Error incrementing counter for user {user_id}: {e}")
+        if count <= 1:
+            level, details = await self.check_limit(user_id, profile, limits, consume=count == 1)
+        else:
+            level, details = await self._check(user_id, profile, limits, count, batch=True)
+        # Fail open like check_limit when Redis is unavailable
+        details.setdefault("granted", max(0, count))
+        return level, details
+
+    async def refund(
+        self,
+        user_id: str,
+        count: int,
+        profile: str = "free",
+        limits: Optional[Dict[str, int]] = None,
+        at: Optional[float] = None,
+    ) -> None:
+        """
+        Gives back ``count`` requests counted at ``at`` that were not
+        carried out (e.g. duplicates found after the batch was charged).
+        """
+        if count > 0:
+            await self._check(user_id, profile, limits, -count, at)
+
+    async def get_remaining(
+        self, user_id: str, profile: str = "free", limits: Optional[Dict[str, int]] = None
+    ) -> Dict:
+        """
+        Get remaining requests for each period without counting a request.
+        """
+        _, details = await self.check_limit(user_id, profile, limits, consume=False)
+        if "counts" not in details:
+            return {}
+        return {
+            window: {
+                "remaining": details[f"remaining_{window}"],
+                "used": details["counts"][window],
+                "limit": details["limits"][window],
+            }
+            for window in WINDOWS
+        }
 
     async def activate_soft_block(self, user_id: str, window: str = "hour") -> None:
         """
         Grace Period فعال‌سازی برای 5 دقیقه
-        
+
         در این مدت کاربر می‌تواند درخواست بدهد اما با هشدار
         """
         try:
-            soft_block_key = f"rate_limit:soft_block:{user_id}:{window}"
-            await self.redis.setex(soft_block_key, 300, "1")  # 5 minutes
+            await self.redis.setex(
+                self._soft_block_key(user_id, window), self.config.GRACE_PERIOD_SECONDS, "1"
+            )
             logger.info(f"Soft block activated for user {user_id} on {window}")
         except Exception as e:
             logger.error(f"Error activating soft block for user {user_id}: {e}")
@@ -249,40 +516,34 @@ class RateLimiter:
     async def reset_user_limit(self, user_id: str, window: str = "all") -> Dict:
         """
         Reset محدودیت کاربر (Admin operation)
-        
+
         Args:
             user_id: ID کاربر
             window: کدام window را reset کند (minute, hour, day, all)
-            
+
         Returns:
             تعداد counters که reset شدند
         """
         try:
             keys = self._get_window_keys(user_id)
-            reset_count = 0
-            
-            if window == "all":
-                windows = ["minute", "hour", "day"]
-            else:
-                windows = [window]
-            
-            pipeline = self.redis.pipeline()
-            
-            for w in windows:
-                if w in keys:
-                    pipeline.delete(keys[w])
-                    reset_count += 1
-            
-            await pipeline.execute()
+            gcra_keys = self._gcra_keys(user_id)
+            windows = list(WINDOWS) if window == "all" else [w for w in [window] if w in keys]
+
+            if windows:
+                await self.redis.delete(
+                    *[keys[w] for w in windows],
+                    *[gcra_keys[w] for w in windows],
+                    *[self._soft_block_key(user_id, w) for w in windows],
+                )
             logger.info(f"Rate limit reset for user {user_id}: {window}")
-            
+
             return {
                 "user_id": user_id,
                 "window": window,
-                "reset_count": reset_count,
+                "reset_count": len(windows),
                 "message": f"Rate limit reset for {window}",
             }
-            
+
         except Exception as e:
             logger.error(f"Error resetting rate limit for user {user_id}: {e}")
             return {"error": str(e)}
@@ -292,14 +553,12 @@ class RateLimiter:
     ) -> Dict:
         """
         تنظیم محدودیت‌های Custom برای کاربر (Admin operation)
-        
+
         Args:
             user_id: ID کاربر
             minute/hour/day: محدودیت‌های جدید (None = عدم تغییر)
         """
         try:
-            custom_key = f"rate_limit:custom:{user_id}"
-            
             if minute or hour or day:
                 data = {}
                 if minute:
@@ -308,48 +567,43 @@ class RateLimiter:
                     data["hour"] = hour
                 if day:
                     data["day"] = day
-                
-                await self.redis.hset(custom_key, mapping=data)
+
+                await self.redis.hset(self._custom_key(user_id), mapping=data)
                 logger.info(f"Custom limits set for user {user_id}: {data}")
-                
+
                 return {"user_id": user_id, "custom_limits": data}
-            
+
             return {"error": "No limits provided"}
-            
+
         except Exception as e:
             logger.error(f"Error setting custom limits for user {user_id}: {e}")
             return {"error": str(e)}
 
-    async def get_user_stats(self, user_id: str, profile: str = "free") -> Dict:
+    async def get_user_stats(
+        self, user_id: str, profile: str = "free", limits: Optional[Dict[str, int]] = None
+    ) -> Dict:
         """
         دریافت آمار کامل کاربر برای Admin Panel
-        
+
         شامل:
         - فعلی usage برای هر window
         - نسبت به محدودیت
         - زمان reset
         """
         try:
-            limits = await self.get_user_limits(user_id, profile)
-            keys = self._get_window_keys(user_id)
-            
-            counts = {
-                "minute": int(await self.redis.get(keys["minute"]) or 0),
-                "hour": int(await self.redis.get(keys["hour"]) or 0),
-                "day": int(await self.redis.get(keys["day"]) or 0),
-            }
-            
-            now = datetime.utcnow()
-            
+            _, details = await self._evaluate(user_id, profile, limits, units=0)
+            counts, effective = details["counts"], details["limits"]
+            now = datetime.utcfromtimestamp(self.clock())
+
             return {
                 "user_id": user_id,
                 "profile": profile,
-                "limits": limits,
+                "algorithm": self.get_algorithm(profile),
+                "limits": effective,
                 "usage": counts,
                 "percentages": {
-                    "minute": round((counts["minute"] / limits["minute"]) * 100, 2),
-                    "hour": round((counts["hour"] / limits["hour"]) * 100, 2),
-                    "day": round((counts["day"] / limits["day"]) * 100, 2),
+                    w: round((counts[w] / effective[w]) * 100, 2) if effective[w] else 100.0
+                    for w in WINDOWS
                 },
                 "reset_at": {
                     "minute": (now + timedelta(minutes=1)).strftime('%Y-%m-%d %H:%M:%S'),
@@ -357,7 +611,168 @@ class RateLimiter:
                     "day": (now + timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S'),
                 },
             }
-            
+
         except Exception as e:
             logger.error(f"Error getting stats for user {user_id}: {e}")
             return {"error": str(e)}
+
+
+class _Lease:
+    """Requests one worker may admit without asking Redis."""
+
+    __slots__ = ("profile", "limits", "tokens", "acquired_at", "expires_at", "details")
+
+    def __init__(self, profile, limits, tokens, acquired_at, expires_at, details):
+        self.profile = profile
+        self.limits = limits
+        self.tokens = tokens
+        self.acquired_at = acquired_at
+        self.expires_at = expires_at
+        self.details = details
+
+
+class HybridRateLimiter(RateLimiter):
+    """
+    Rate limiter that spends leased quota locally for high-volume profiles.
+
+    For profiles in ``RateLimitConfig.HYBRID_PROFILES`` a worker asks Redis
+    for ``LEASE_FRACTION`` of the minute limit at once and admits that many
+    requests from an in-process bucket, so a user costs one Redis call per
+    lease instead of one per request (20x fewer at 5%). Leased requests are
+    counted in Redis when granted; whatever is left when the lease expires
+    (``LEASE_SECONDS``) is given back. Other profiles, and every check once
+    a window nears its warning threshold, go to Redis as usual.
+
+    Accuracy bounds:
+
+    - Never admits more than the strict limiter: requests are counted in
+      Redis before they are admitted, leases are only granted while all
+      windows stay below the warning threshold, and fixed-window leases
+      end at the minute boundary so they are spent in the window that
+      counted them.
+    - May switch a user to strict mode (and so reach the warning and
+      grace levels) early by up to ``workers x lease size`` requests held
+      unspent by other workers, for at most ``LEASE_SECONDS``.
+    - ``remaining_*`` figures on locally admitted requests are Redis's view
+      at lease time, so they understate what is left.
+    - Admin resets and custom limits reach a worker within ``LEASE_SECONDS``.
+    """
+
+    def __init__(self, redis_client: Redis, clock: Callable[[], float] = time.time):
+        super().__init__(redis_client, clock)
+        self._leases: Dict[str, _Lease] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._next_sweep = 0.0
+        self._releases = set()
+
+    def _lease_size(self, profile: str, limits: Optional[Dict[str, int]]) -> int:
+        minute = (limits or self.config.LIMITS.get(profile, self.config.LIMITS["free"]))["minute"]
+        return int(minute * self.config.LEASE_FRACTION)
+
+    def _lease_expiry(self, profile: str, now: float) -> float:
+        expires_at = now + self.config.LEASE_SECONDS
+        if self.get_algorithm(profile) == RateLimitConfig.FIXED_WINDOW:
+            # Spend in the minute bucket that counted the lease
+            expires_at = min(expires_at, (now // 60 + 1) * 60)
+        return expires_at
+
+    def _take(self, user_id: str, now: float) -> Optional[Dict]:
+        lease = self._leases.get(user_id)
+        if lease is None or lease.tokens <= 0 or now >= lease.expires_at:
+            return None
+        lease.tokens -= 1
+        return dict(lease.details)
+
+    async def _release(self, user_id: str, lease: _Lease) -> None:
+        if lease.tokens > 0:
+            await self._check(user_id, lease.profile, lease.limits, -lease.tokens, lease.acquired_at)
+
+    def _schedule_release(self, user_id: str, lease: _Lease) -> None:
+        if lease.tokens > 0:
+            task = asyncio.ensure_future(self._release(user_id, lease))
+            self._releases.add(task)
+            task.add_done_callback(self._releases.discard)
+
+    def _sweep(self, now: float) -> None:
+        """Gives back what is left of expired leases in the background."""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.config.LEASE_SECONDS
+        for user_id, lease in list(self._leases.items()):
+            if now >= lease.expires_at:
+                del self._leases[user_id]
+                lock = self._locks.get(user_id)
+                if lock is not None and not lock.locked():
+                    del self._locks[user_id]
+                self._schedule_release(user_id, lease)
+
+    async def check_limit(
+        self,
+        user_id: str,
+        profile: str = "free",
+        limits: Optional[Dict[str, int]] = None,
+        consume: bool = True,
+    ) -> Tuple[LimitLevel, Dict]:
+        """
+        Same contract as :meth:`RateLimiter.check_limit`; hybrid profiles
+        are admitted from the local lease while it lasts.
+        """
+        if not consume or profile not in self.config.HYBRID_PROFILES:
+            return await super().check_limit(user_id, profile, limits, consume)
+
+        now = self.clock()
+        self._sweep(now)
+        details = self._take(user_id, now)
+        if details is not None:
+            return LimitLevel.OK, details
+
+        async with self._locks.setdefault(user_id, asyncio.Lock()):
+            # Another request may have renewed the lease meanwhile
+            details = self._take(user_id, now)
+            if details is not None:
+                return LimitLevel.OK, details
+
+            expired = self._leases.pop(user_id, None)
+            if expired is not None:
+                self._schedule_release(user_id, expired)
+
+            size = self._lease_size(profile, limits)
+            level, details = await self._check(user_id, profile, limits, max(1, size))
+            granted = details.get("granted", 0)
+            if granted > 1:
+                self._leases[user_id] = _Lease(
+                    profile, limits, granted - 1, now, self._lease_expiry(profile, now), details
+                )
+            return level, details
+
+    async def release_expired(self) -> None:
+        """Gives back what is left of expired leases and waits for it."""
+        self._next_sweep = 0.0
+        self._sweep(self.clock())
+        if self._releases:
+            await asyncio.gather(*self._releases)
+
+    async def release_all(self) -> None:
+        """Gives back every outstanding lease (on shutdown)."""
+        leases, self._leases = self._leases, {}
+        await asyncio.gather(*(self._release(user_id, lease) for user_id, lease in leases.items()))
+
+
+_rate_limiter: Optional[HybridRateLimiter] = None
+
+
+async def get_rate_limiter() -> HybridRateLimiter:
+    """Returns the process-wide limiter on the shared Redis connection."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        from db.redis_client import get_redis_client
+
+        redis_client = await get_redis_client()
+        _rate_limiter = HybridRateLimiter(redis_client.client)
+    return _rate_limiter
+
+
+async def close_rate_limiter() -> None:
+    """Gives back outstanding leases before the process exits."""
+    if _rate_limiter is not None:
+        await _rate_limiter.release_all()
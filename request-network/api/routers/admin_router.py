@@ -11,12 +11,12 @@ from core.config import settings
 
 from auth.dependencies import require_admin
 from db.session import get_db_session
-from db.redis_client import get_redis_client
 from models.user import User
 from models.request import Request
 from models.batch import ExportBatch, ImportBatch
 from schemas.admin import SystemStats
-from rate_limiter import RateLimiter
+from rate_limiter import get_rate_limiter
+from services.response_cache import get_response_cache
 
 router = APIRouter(
     prefix="/admin",
@@ -77,13 +77,13 @@ async def get_cache_stats(
     
     Returns:
     - Status (connected/disconnected)
-    - Number of cached responses
+    - Number of cached responses (estimated from a SCAN sample on large
+      keyspaces; see response_cache_keys_exact)
     - Memory usage
     - Connected clients
     """
-    redis_client = await get_redis_client()
-    stats = await redis_client.get_cache_stats()
-    return stats
+    cache = await get_response_cache()
+    return await cache.stats()
 
 
 @router.delete("/cache/clear")
@@ -93,19 +93,23 @@ async def clear_all_cache(
     """
     Clear all cached responses (admin only).
     Use with caution - all cached data will be lost.
+
+    Clearing moves the cache to a new generation: old entries become
+    unreachable at once and expire on their TTL.
     
     Returns:
     - Success message
-    - Number of entries cleared
+    - Number of entries cleared (estimated on large keyspaces)
     """
-    redis_client = await get_redis_client()
+    cache = await get_response_cache()
     
     # Get stats before clearing
-    stats_before = await redis_client.get_cache_stats()
+    stats_before = await cache.stats()
     cleared_count = stats_before.get("response_cache_keys", 0)
     
     # Clear all cache
-    success = await redis_client.clear_all_cache()
+    generation = await cache.clear()
+    success = generation is not None
     
     return {
         "success": success,
@@ -129,8 +133,8 @@ async def clear_user_cache(
     - Success message
     - Number of entries invalidated
     """
-    redis_client = await get_redis_client()
-    deleted_count = await redis_client.invalidate_user_cache(user_id)
+    cache = await get_response_cache()
+    deleted_count = await cache.invalidate_user(user_id)
     
     return {
         "success": True,
@@ -158,8 +162,7 @@ async def get_user_rate_limit_stats(
     - Percentage of limit used
     - Reset times
     """
-    redis_client = await get_redis_client()
-    rate_limiter = RateLimiter(redis_client.client)
+    rate_limiter = await get_rate_limiter()
     
     # Get user profile from database
     db = next(get_db_session())
@@ -187,8 +190,7 @@ async def reset_user_rate_limit(
     - Success message
     - Number of counters reset
     """
-    redis_client = await get_redis_client()
-    rate_limiter = RateLimiter(redis_client.client)
+    rate_limiter = await get_rate_limiter()
     
     result = await rate_limiter.reset_user_limit(user_id, window)
     return result
@@ -217,8 +219,7 @@ async def set_custom_rate_limits(
     - Success message
     - Applied custom limits
     """
-    redis_client = await get_redis_client()
-    rate_limiter = RateLimiter(redis_client.client)
+    rate_limiter = await get_rate_limiter()
     
     result = await rate_limiter.set_custom_limits(user_id, minute, hour, day)
     return result
@@ -235,6 +236,7 @@ async def get_all_rate_limits(
     - Limits for each profile (free, basic, premium, enterprise)
     - Warning thresholds (80%, 110%)
     - Hard block threshold (100%)
+    - Algorithm per profile (fixed_window, gcra)
     """
     from rate_limiter import RateLimitConfig
     
@@ -248,6 +250,7 @@ async def get_all_rate_limits(
             "hard_block": f"{config.HARD_BLOCK_THRESHOLD * 100}%",
         },
         "grace_period_duration": "5 minutes",
+        "algorithms": config.ALGORITHMS,
     }
 
 @router.get("/sync-status")
@@ -8,8 +8,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from db.session import get_db_session
-from models.user import User
-from models.api_key import APIKey
+from auth.schemas import UserPrincipal
+from models.api_key import ApiKey as APIKey
+from auth.api_key import invalidate_api_keys
 from schemas.api_key import APIKeyCreate, APIKeyRead, APIKeyGenerated
 from auth.dependencies import get_current_active_user
 from shared.logger import get_logger
@@ -29,7 +30,7 @@ def hash_api_key(api_key: str) -> str:
 async def create_api_key(
     api_key_in: APIKeyCreate,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
     """
     Generate a new API key for the current user.
@@ -63,7 +64,7 @@ async def create_api_key(
 @router.get("/", response_model=List[APIKeyRead])
 async def get_user_api_keys(
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
     """
     Retrieve all active API keys for the current user.
@@ -77,7 +78,7 @@ async def get_user_api_keys(
 async def revoke_api_key(
     api_key_id: UUID,
     db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
     """
     Revoke (deactivate) an API key.
@@ -91,4 +92,5 @@ async def revoke_api_key(
 
     db_api_key.is_active = False
     await db.commit()
+    await invalidate_api_keys()
     log.info("API Key revoked", user_id=current_user.id, api_key_id=api_key_id)
\ No newline at end of file
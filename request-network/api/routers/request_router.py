@@ -1,25 +1,66 @@
+import asyncio
+import json
+import logging
 import uuid
-from typing import List, Annotated
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Annotated, Optional, Set, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi import Request as HTTPRequest
+from fastapi.responses import Response as HTTPResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
+from starlette.requests import ClientDisconnect
 
+from core.config import settings
 from core.validation import validate_request_payload
-from core.rate_limiter import RateLimiter
-from db.session import get_db_session
+from db.session import AsyncSessionFactory, get_db_session
 from db.redis_client import get_redis_client
-from models.user import User
+from auth.schemas import UserPrincipal
 from models.request import Request
 from models.response import Response
-from auth.dependencies import get_current_active_user
-# from rate_limiter import check_rate_limit  # TODO: Fix rate limiter
-from schemas.request import RequestCreate, RequestPublic, RequestStatus
-from schemas.response import ResponseDetailed
+from auth.dependencies import get_current_active_user, get_current_user
+from rate_limiter import LimitLevel, get_rate_limiter, user_limits
+from schemas.request import RequestCreate, RequestPublic, RequestStatus, RequestSummary
+from schemas.response import ResponseDetailed, ResponseSummary
+from services.request_events import get_status_hub
+from services.response_cache import get_response_cache
+from shared.ndjson import NDJSON_MEDIA_TYPE, batched, dumps_line, iter_lines
+from shared.pagination import decode_cursor, encode_cursor
+from shared.response_cache import accepts_gzip
+from shared.status_events import TERMINAL_STATUSES, publish_status_changes_async, status_event
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/requests", tags=["Requests"])
-rate_limiter = RateLimiter()
+
+
+# Columns RequestPublic is built from on submission (a new request has no response)
+SUBMITTED_COLUMNS = [getattr(Request, field) for field in RequestPublic.model_fields if field != "response"]
+
+# Columns of a listing: the request and its response summary, never the payload
+LISTED_COLUMNS = [getattr(Request, field) for field in RequestSummary.model_fields if field != "response"] + [
+    Response.result_count.label("response_result_count"),
+    Response.received_at.label("response_received_at"),
+]
+
+
+def _new_request_row(current_user: UserPrincipal, request_data: RequestCreate) -> Dict[str, Any]:
+    """Column values of a newly submitted request."""
+    return {
+        "id": uuid.uuid4(),
+        "user_id": current_user.id,
+        "name": request_data.name,
+        "query_type": request_data.request.serviceName,
+        "query_params": request_data.request.fieldRequest,
+        "priority": current_user.priority,  # Inherit priority from user profile
+        "status": request_data.reqState.lower(),
+        "retry_count": 0,
+    }
 
 
 @router.post(
@@ -28,94 +69,298 @@ rate_limiter = RateLimiter()
     status_code=status.HTTP_201_CREATED)
 async def submit_request(
     request_data: RequestCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_active_user)],
     db: AsyncSession = Depends(get_db_session),
 ):
     """
     Submit a new request for processing.
 
     This endpoint handles:
-    1. Unique name validation
-    2. Request type access verification (allowed_request_types)
-    3. Rate limiting check
-    4. Request creation with query parameters
+    1. Request type access verification (allowed_request_types)
+    2. Rate limiting check
+    3. Request creation with one INSERT ... ON CONFLICT (name) DO NOTHING
+       RETURNING; a name that already exists gives 400 and is not counted
+       against the rate limit
     """
-    # 1. Check if request name is unique
-    existing_request = await db.execute(
-        select(Request).where(Request.name == request_data.name)
-    )
-    if existing_request.scalar_one_or_none():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Request with name '{request_data.name}' already exists"
-        )
-
-    # 2. Check if user is allowed to use this request type
+    # 1. Check if user is allowed to use this request type
     request_type = request_data.request.serviceName
-    
+
     if not current_user.is_request_type_allowed(request_type):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"Access denied to request type: {request_type}"
         )
-    
-    # 3. Check rate limits
-    is_allowed, rate_limit_message = rate_limiter.check_rate_limit(current_user)
-    if not is_allowed:
+
+    # 2. Check and count rate limits (one Redis round trip)
+    rate_limiter = await get_rate_limiter()
+    limits = user_limits(current_user)
+    charged_at = rate_limiter.clock()
+    limit_level, rate_limit_details = await rate_limiter.check_limit(
+        str(current_user.id), current_user.profile_type, limits=limits
+    )
+    if limit_level == LimitLevel.EXCEEDED:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=rate_limit_message
+            detail=rate_limit_details["message"]
         )
 
-    # 4. Create request object
-    new_request = Request(
-        user_id=current_user.id,
-        name=request_data.name,
-        query_type=request_type,
-        query_params=request_data.request.fieldRequest,
-        priority=current_user.priority,  # Inherit priority from user profile
-        status=request_data.reqState.lower(),
+    # 3. Create the request and read back what the response needs
+    stmt = (
+        insert(Request)
+        .values(_new_request_row(current_user, request_data))
+        .on_conflict_do_nothing(index_elements=[Request.name])
+        .returning(*SUBMITTED_COLUMNS)
     )
-    
-    db.add(new_request)
-    await db.commit()
+    row = (await db.execute(stmt)).one_or_none()
     await db.commit()
-    
-    # Reload request with eager loading for response to avoid MissingGreenlet error
-    query = select(Request).options(selectinload(Request.response)).where(Request.id == new_request.id)
-    result = await db.execute(query)
-    new_request = result.scalar_one()
 
-    return new_request
+    if row is None:
+        await rate_limiter.refund(
+            str(current_user.id), 1, current_user.profile_type, limits=limits, at=charged_at
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Request with name '{request_data.name}' already exists"
+        )
+
+    return RequestPublic.model_validate(row._mapping)
 
 
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streams the response while the request body is still being read.
 
-@router.get("/", response_model=List[RequestPublic])
+    StreamingResponse listens for client disconnects on ``receive``, which
+    would swallow the body chunks the generator is consuming; here a
+    disconnect surfaces as ClientDisconnect in the generator instead.
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+
+
+async def _iter_bulk_items(http_request: HTTPRequest) -> AsyncIterator[Tuple[int, Optional[Any], Optional[str]]]:
+    """Yields (index, payload, parse error) per item of an NDJSON or JSON-array body."""
+    if http_request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            items = json.loads(await http_request.body())
+        except ValueError as e:
+            yield 0, None, f"Invalid JSON body: {e}"
+            return
+        if not isinstance(items, list):
+            yield 0, None, "JSON body must be an array of requests"
+            return
+        for index, item in enumerate(items):
+            yield index, item, None
+        return
+
+    index = 0
+    try:
+        async for line in iter_lines(http_request.stream()):
+            try:
+                yield index, json.loads(line), None
+            except ValueError as e:
+                yield index, None, f"Invalid JSON: {e}"
+            index += 1
+    except ValueError as e:
+        yield index, None, str(e)
+
+
+async def _submit_chunk(
+    db: AsyncSession,
+    current_user: UserPrincipal,
+    chunk: List[Tuple[int, Optional[Any], Optional[str]]],
+    seen_names: Set[str],
+) -> List[Dict[str, Any]]:
+    """Validates, rate-limits and inserts one chunk; returns one status per item."""
+    results: Dict[int, Dict[str, Any]] = {}
+    candidates: List[Tuple[int, RequestCreate]] = []
+
+    for index, payload, error in chunk:
+        if error is not None:
+            results[index] = {"index": index, "status": "invalid", "error": error}
+            continue
+        try:
+            request_data = RequestCreate.model_validate(payload)
+        except ValidationError as e:
+            results[index] = {
+                "index": index,
+                "status": "invalid",
+                "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()),
+            }
+            continue
+        request_type = request_data.request.serviceName
+        if not current_user.is_request_type_allowed(request_type):
+            results[index] = {
+                "index": index,
+                "name": request_data.name,
+                "status": "forbidden",
+                "error": f"Access denied to request type: {request_type}",
+            }
+        elif request_data.name in seen_names:
+            results[index] = {
+                "index": index,
+                "name": request_data.name,
+                "status": "duplicate",
+                "error": f"Request with name '{request_data.name}' already exists",
+            }
+        else:
+            seen_names.add(request_data.name)
+            candidates.append((index, request_data))
+
+    if candidates:
+        # One rate limit round trip for the whole chunk
+        rate_limiter = await get_rate_limiter()
+        limits = user_limits(current_user)
+        charged_at = rate_limiter.clock()
+        _, rate_limit_details = await rate_limiter.check_batch(
+            str(current_user.id), len(candidates), current_user.profile_type, limits=limits
+        )
+        granted = rate_limit_details["granted"]
+        for index, request_data in candidates[granted:]:
+            results[index] = {
+                "index": index,
+                "name": request_data.name,
+                "status": "rate_limited",
+                "error": rate_limit_details["message"],
+            }
+        admitted = candidates[:granted]
+
+        created: Dict[str, uuid.UUID] = {}
+        failed: Optional[str] = None
+        if admitted:
+            rows = [_new_request_row(current_user, request_data) for _, request_data in admitted]
+            stmt = (
+                insert(Request)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=[Request.name])
+                .returning(Request.id, Request.name)
+            )
+            try:
+                result = await db.execute(stmt)
+                created = {name: request_id for request_id, name in result.all()}
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Bulk insert of {len(rows)} requests failed: {e}")
+                created, failed = {}, "Could not store request, please retry"
+
+        for index, request_data in admitted:
+            request_id = created.get(request_data.name)
+            if request_id is not None:
+                results[index] = {"index": index, "name": request_data.name, "status": "created", "id": request_id}
+            elif failed:
+                results[index] = {"index": index, "name": request_data.name, "status": "error", "error": failed}
+            else:
+                results[index] = {
+                    "index": index,
+                    "name": request_data.name,
+                    "status": "duplicate",
+                    "error": f"Request with name '{request_data.name}' already exists",
+                }
+
+        # Requests that were not stored do not count against the quota
+        await rate_limiter.refund(
+            str(current_user.id), len(admitted) - len(created), current_user.profile_type,
+            limits=limits, at=charged_at,
+        )
+
+    return [results[index] for index, _, _ in chunk]
+
+
+@router.post("/bulk", response_class=NDJSONStreamingResponse)
+async def submit_requests_bulk(
+    http_request: HTTPRequest,
+    current_user: Annotated[UserPrincipal, Depends(get_current_active_user)],
+):
+    """
+    Submit many requests in one call.
+
+    The body is NDJSON (one RequestCreate per line, ``application/x-ndjson``)
+    or a JSON array (``application/json``). NDJSON bodies are processed
+    while they stream in, in chunks of ``BULK_SUBMIT_CHUNK_SIZE``: each
+    chunk is validated, charged to the rate limiter in one round trip and
+    stored with one multi-row ``INSERT ... ON CONFLICT (name) DO NOTHING``.
+
+    The response streams one NDJSON line per item, in input order, with
+    ``index``, ``name``, ``status`` (created, invalid, forbidden, duplicate,
+    rate_limited or error) and ``id`` or ``error``.
+    """
+
+    async def results() -> AsyncIterator[bytes]:
+        seen_names: Set[str] = set()
+        items = _iter_bulk_items(http_request)
+        try:
+            async with AsyncSessionFactory() as db:
+                async for chunk in batched(items, settings.BULK_SUBMIT_CHUNK_SIZE):
+                    for result in await _submit_chunk(db, current_user, chunk, seen_names):
+                        yield dumps_line(result)
+        except ClientDisconnect:
+            logger.info(f"Client disconnected during bulk submission by user {current_user.id}")
+
+    return NDJSONStreamingResponse(results())
+
+
+@router.get("/", response_model=List[RequestSummary])
 async def get_user_requests(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_active_user)],
+    response: HTTPResponse,
     db: AsyncSession = Depends(get_db_session),
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0, deprecated=True),
 ):
     """
-    Retrieve a list of requests submitted by the current user.
+    Retrieve a page of the current user's requests, newest first.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to get the
+    next one; the header is absent on the last page. Pages are read by
+    keyset on the ``(user_id, created_at DESC, id DESC)`` index, so deep
+    pages cost the same as the first. ``skip`` (offset paging) is kept for
+    older clients.
+
+    Responses are summarized (result count and receipt time); the result
+    payload is fetched with ``GET /requests/{request_id}/response``.
     """
     query = (
-        select(Request)
+        select(*LISTED_COLUMNS)
+        .outerjoin(Response, Response.request_id == Request.id)
         .where(Request.user_id == current_user.id)
-        .order_by(Request.created_at.desc())
-        .options(selectinload(Request.response))
-        .offset(skip)
-        .limit(limit)
+        .order_by(Request.created_at.desc(), Request.id.desc())
+        .limit(limit + 1)
     )
-    result = await db.execute(query)
-    requests = result.scalars().all()
+    if cursor is not None:
+        try:
+            created_at, request_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        query = query.where(tuple_(Request.created_at, Request.id) < tuple_(created_at, request_id))
+    elif skip:
+        query = query.offset(skip)
+
+    rows = (await db.execute(query)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+
+    requests = []
+    for row in rows:
+        fields = dict(row._mapping)
+        result_count = fields.pop("response_result_count")
+        received_at = fields.pop("response_received_at")
+        fields["response"] = (
+            None if received_at is None else ResponseSummary(result_count=result_count, received_at=received_at)
+        )
+        requests.append(RequestSummary(**fields))
     return requests
 
 
 async def get_request_or_404(
     request_id: uuid.UUID,
-    current_user: User,
+    current_user: UserPrincipal,
     db: AsyncSession,
     load_response: bool = False,
 ) -> Request:
@@ -137,10 +382,122 @@ async def get_request_or_404(
     return request
 
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def _watch_statuses(
+    user_id: uuid.UUID, request_id: Optional[uuid.UUID] = None
+) -> AsyncIterator[Optional[Dict[str, str]]]:
+    """
+    Yields status changes of one request, or of all of a user's requests,
+    and None whenever STATUS_EVENTS_KEEPALIVE_SECONDS pass without one.
+
+    A single request's stream starts with its current status (read after
+    subscribing, so no change is missed) and ends once it is final.
+    """
+    hub = await get_status_hub()
+    async with hub.subscribe(user_id) as queue:
+        if request_id is not None:
+            async with AsyncSessionFactory() as db:
+                row = (await db.execute(
+                    select(Request.status, Request.updated_at).where(Request.id == request_id)
+                )).one_or_none()
+            if row is None:
+                return
+            yield status_event(request_id, user_id, row.status, row.updated_at)
+            if row.status in TERMINAL_STATUSES:
+                return
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.STATUS_EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if event is None:
+                return  # Redis failed or the API is shutting down; the client reconnects
+            if request_id is not None and event["request_id"] != str(request_id):
+                continue
+            yield event
+            if request_id is not None and event["status"] in TERMINAL_STATUSES:
+                return
+
+
+async def _sse_stream(user_id: uuid.UUID, request_id: Optional[uuid.UUID] = None) -> AsyncIterator[str]:
+    async for event in _watch_statuses(user_id, request_id):
+        if event is None:
+            yield ": keepalive\n\n"
+        else:
+            yield f"event: status\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/events")
+async def stream_status_events(
+    current_user: Annotated[UserPrincipal, Depends(get_current_active_user)],
+):
+    """
+    Stream status changes of all of the current user's requests as
+    Server-Sent Events (``event: status``, JSON data with request_id,
+    status and changed_at), instead of polling ``/{request_id}/status``.
+
+    Only changes made while connected are sent; read the current state with
+    ``GET /requests/`` after connecting.
+    """
+    return StreamingResponse(
+        _sse_stream(current_user.id), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+@router.websocket("/ws")
+async def status_events_websocket(
+    websocket: WebSocket,
+    token: str,
+    request_id: Optional[uuid.UUID] = None,
+):
+    """
+    WebSocket variant of the status streams: one JSON message per change,
+    for ``request_id`` or for all of the user's requests.
+
+    Browsers cannot set headers on a WebSocket, so the access token is
+    passed in the ``token`` query parameter.
+    """
+    try:
+        current_user = await get_current_active_user(await get_current_user(token))
+        if request_id is not None:
+            async with AsyncSessionFactory() as db:
+                await get_request_or_404(request_id, current_user, db)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+
+    await websocket.accept()
+
+    async def wait_for_disconnect() -> None:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    # Keepalive ticks let the loop notice a client that went away
+    receiver = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        async with aclosing(_watch_statuses(current_user.id, request_id)) as events:
+            async for event in events:
+                if receiver.done():
+                    break
+                if event is not None:
+                    await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        disconnected = receiver.done()
+        receiver.cancel()
+    if not disconnected:
+        await websocket.close()
+
+
 @router.get("/{request_id}", response_model=RequestPublic)
 async def get_request_details(
     request_id: uuid.UUID,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_active_user)],
     db: AsyncSession = Depends(get_db_session),
 ):
     """
@@ -153,7 +510,7 @@ async def get_request_details(
 @router.get("/{request_id}/status", response_model=RequestStatus)
 async def get_request_status(
     request_id: uuid.UUID,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_active_user)],
     db: AsyncSession = Depends(get_db_session),
 ):
     """
@@ -163,19 +520,40 @@ async def get_request_status(
     return request
 
 
+@router.get("/{request_id}/events")
+async def stream_request_status_events(
+    request_id: uuid.UUID,
+    current_user: Annotated[UserPrincipal, Depends(get_current_active_user)],
+):
+    """
+    Stream one request's status as Server-Sent Events: its current status
+    first, then each change, ending once it is completed, failed or
+    cancelled. Replaces polling ``/{request_id}/status``.
+    """
+    # Own session: the stream may outlive a request-scoped one by minutes
+    async with AsyncSessionFactory() as db:
+        await get_request_or_404(request_id, current_user, db)
+    return StreamingResponse(
+        _sse_stream(current_user.id, request_id), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
 @router.get("/{request_id}/response", response_model=ResponseDetailed)
 async def get_request_response(
     request_id: uuid.UUID,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    http_request: HTTPRequest,
+    current_user: Annotated[UserPrincipal, Depends(get_current_active_user)],
     db: AsyncSession = Depends(get_db_session),
 ):
     """
     Retrieve the response for a completed request with Redis caching support.
     
     This endpoint:
-    1. Checks Redis cache first (fast path)
+    1. Checks Redis cache first (fast path): the cached entry holds the
+       final JSON body and its owner, so a hit needs no database query and
+       is sent as stored (gzip-encoded when large and the client accepts it)
     2. Falls back to database if not cached
-    3. Caches the result in Redis for 24 hours
+    3. Caches the serialized body in Redis for RESPONSE_CACHE_TTL_SECONDS
     4. Returns 404 if request doesn't exist or has no response yet
     
     Returns:
@@ -183,37 +561,34 @@ async def get_request_response(
     - 404: Request not found or no response available yet
     - 403: User doesn't own the request
     """
-    request = await get_request_or_404(request_id, current_user, db)
-    
-    # Try to get from Redis cache first
-    redis_client = await get_redis_client()
-    cached_response = await redis_client.get_response(str(request_id))
-    
-    if cached_response:
-        return ResponseDetailed(**cached_response)
-    
-    # If not in cache, get from database
-    response_query = select(Response).where(Response.request_id == request_id)
-    response_result = await db.execute(response_query)
-    response = response_result.scalar_one_or_none()
-    
-    if not response:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Response not available yet. Request is still being processed."
+    cache = await get_response_cache()
+    entry = await cache.get(request_id)
+
+    if entry is not None:
+        if entry.owner_id != str(current_user.id):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this request")
+    else:
+        await get_request_or_404(request_id, current_user, db)
+
+        response_query = select(Response).where(Response.request_id == request_id)
+        response_result = await db.execute(response_query)
+        response = response_result.scalar_one_or_none()
+
+        if not response:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Response not available yet. Request is still being processed."
+            )
+
+        entry = await cache.set(
+            request_id, current_user.id, ResponseDetailed.model_validate(response).model_dump()
         )
-    
-    # Convert to schema
-    response_data = ResponseDetailed.model_validate(response)
-    
-    # Cache the response in Redis
-    await redis_client.set_response(
-        str(request_id),
-        response_data.model_dump(),
-        ttl_hours=24
-    )
-    
-    return response_data
+
+    headers = {"Vary": "Accept-Encoding"}
+    if entry.encoding == "gzip" and accepts_gzip(http_request.headers.get("accept-encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        return HTTPResponse(entry.body, media_type="application/json", headers=headers)
+    return HTTPResponse(entry.decoded(), media_type="application/json", headers=headers)
 
 
 @router.delete(
@@ -222,7 +597,7 @@ async def get_request_response(
 )
 async def cancel_request(
     request_id: uuid.UUID,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_active_user)],
     db: AsyncSession = Depends(get_db_session),
 ):
     """
@@ -240,12 +615,17 @@ async def cancel_request(
     db.add(request)
     await db.commit()
 
+    redis_client = await get_redis_client()
+    await publish_status_changes_async(
+        redis_client.client, [status_event(request.id, request.user_id, request.status)]
+    )
+
     return None
 
 
 @router.get("/rate-limit/status")
 async def get_rate_limit_status(
-    current_user: Annotated[User, Depends(get_current_active_user)]
+    current_user: Annotated[UserPrincipal, Depends(get_current_active_user)]
 ):
     """
     Get current rate limit status for the logged-in user.
@@ -255,7 +635,10 @@ async def get_rate_limit_status(
     - hour: remaining requests per hour
     - day: remaining requests per day
     """
-    remaining = rate_limiter.get_remaining(current_user)
+    rate_limiter = await get_rate_limiter()
+    remaining = await rate_limiter.get_remaining(
+        str(current_user.id), current_user.profile_type, limits=user_limits(current_user)
+    )
     return {
         "user_id": str(current_user.id),
         "username": current_user.username,
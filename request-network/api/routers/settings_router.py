@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from db.session import get_db_session
 from models.settings import Settings as SettingsModel
 from schemas.settings import Settings as SettingsSchema
+from services.settings_snapshot import bump_settings_version, get_settings_snapshot
 from workers.tasks.users_importer import import_users_from_response_network
 
 logger = logging.getLogger(__name__)
@@ -44,6 +45,8 @@ async def update_import_config(
         
     await db.commit()
     await db.refresh(db_setting)
+    await bump_settings_version()
+    get_settings_snapshot().invalidate()
     
     # Trigger an immediate import check to verify config
     import_users_from_response_network.delay()
@@ -58,14 +61,11 @@ async def trigger_import():
 
 
 @router.get("/system/import_config", response_model=dict)
-async def get_import_config(
-    db: Session = Depends(get_db_session)
-):
-    """Get current import configuration."""
-    result = await db.execute(select(SettingsModel).where(SettingsModel.key == "import_config"))
-    setting = result.scalar_one_or_none()
+async def get_import_config():
+    """Get current import configuration (served from the settings snapshot)."""
+    config = await get_settings_snapshot().get("import_config")
     
-    if not setting:
+    if config is None:
         return {"status": "not_configured"}
         
-    return setting.value
+    return config
@@ -7,6 +7,7 @@ from sqlalchemy.future import select
 
 from db.session import get_db_session
 from auth.dependencies import require_admin, get_current_user
+from auth.principal_cache import invalidate_principals
 from models.user import User
 from schemas.user import User as UserSchema
 
@@ -75,6 +76,7 @@ async def activate_user(
     db.add(user)
     await db.commit()
     await db.refresh(user)
+    await invalidate_principals()
     return user
 
 
@@ -97,6 +99,7 @@ async def deactivate_user(
     db.add(user)
     await db.commit()
     await db.refresh(user)
+    await invalidate_principals()
     return user
 
 
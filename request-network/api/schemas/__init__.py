@@ -1,2 +1,2 @@
 from .user import User
-from .request import RequestPublic, RequestCreate, RequestStatus
+from .request import RequestPublic, RequestCreate, RequestStatus, RequestSummary
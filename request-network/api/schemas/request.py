@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from pydantic import BaseModel, Field, ConfigDict
 
-from .response import ResponsePublic
+from .response import ResponsePublic, ResponseSummary
 
 
 from typing import Dict, Any
@@ -46,4 +46,25 @@ class RequestPublic(BaseModel):
     exported_at: datetime | None = None
     result_received_at: datetime | None = None
     error_message: str | None = None
-    response: ResponsePublic | None = None
\ No newline at end of file
+    response: ResponsePublic | None = None
+
+
+class RequestSummary(BaseModel):
+    """
+    Schema for one request in a listing: the request's details and a
+    summary of its response.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    user_id: uuid.UUID
+    name: str | None = None
+    query_type: str
+    query_params: dict
+    status: str
+    priority: int
+    created_at: datetime
+    exported_at: datetime | None = None
+    result_received_at: datetime | None = None
+    error_message: str | None = None
+    response: ResponseSummary | None = None
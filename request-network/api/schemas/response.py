@@ -19,6 +19,16 @@ class ResponsePublic(BaseModel):
     is_cached: bool
 
 
+class ResponseSummary(BaseModel):
+    """
+    The response fields shown in request listings (no result payload).
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    result_count: int | None = None
+    received_at: datetime
+
+
 class ResponseDetailed(ResponsePublic):
     """
     Schema for displaying full response details including result data.
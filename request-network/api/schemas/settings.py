@@ -41,4 +41,4 @@ class SettingsImport(BaseModel):
     """Schema for settings import file."""
     settings: List[Settings]
     exported_at: datetime = Field(description="UTC timestamp of when export was created")
-    version: int = Field(description="Export format version")
\ No newline at end of file
+    version: int = Field(default=1, description="Export format version")
\ No newline at end of file
@@ -1,12 +1,11 @@
 import os
 import json
 import logging
-import ftplib
-import io
 from pathlib import Path
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 from models.settings import Settings
+from shared.ftp_pool import get_pool
 
 logger = logging.getLogger(__name__)
 
@@ -59,18 +58,11 @@ class ImportStorageService:
                 return None
             
             try:
-                bio = io.BytesIO()
-                with ftplib.FTP(host) as ftp:
-                    ftp.login(user=user, passwd=passwd)
-                    try:
-                        ftp.cwd(remote_path)
-                    except:
-                        pass
-                    
-                    ftp.retrbinary(f"RETR latest.json", bio.write)
-                
-                bio.seek(0)
-                return json.load(bio)
+                # Pooled session; MLSD size/modify lets an unchanged file be
+                # served from the last download without a RETR
+                pool = get_pool(host, config.get("port", 21), user, passwd)
+                data = pool.download_bytes(f"{remote_path.rstrip('/')}/latest.json")
+                return json.loads(data)
             except Exception as e:
                 logger.error(f"FTP Download failed from {host}:{remote_path}: {e}")
                 return None
@@ -0,0 +1,51 @@
+"""
+Request status push for the Request Network.
+
+Celery tasks call :func:`publish_request_events` after committing status
+changes; the API streams them to clients through the process-wide
+:class:`shared.status_events.StatusHub` (see ``GET /requests/events``,
+``GET /requests/{id}/events`` and the ``/requests/ws`` WebSocket).
+"""
+from typing import Dict, List, Optional
+
+import redis
+
+from core.config import settings
+from shared.status_events import StatusHub, publish_status_changes
+
+
+def publish_request_events(events: List[Dict[str, str]]) -> int:
+    """
+    Publishes status events (built with ``status_event`` before the commit,
+    published after it) from a synchronous worker.
+
+    Returns:
+        Number of events published.
+    """
+    if not events:
+        return 0
+    client = redis.from_url(str(settings.REDIS_URL), socket_connect_timeout=5)
+    try:
+        return publish_status_changes(client, events)
+    finally:
+        client.close()
+
+
+_status_hub: Optional[StatusHub] = None
+
+
+async def get_status_hub() -> StatusHub:
+    """Returns this process's hub on the shared Redis connection pool."""
+    global _status_hub
+    if _status_hub is None:
+        from db.redis_client import get_redis_client
+
+        redis_client = await get_redis_client()
+        _status_hub = StatusHub(redis_client.client, queue_size=settings.STATUS_EVENTS_QUEUE_SIZE)
+    return _status_hub
+
+
+async def close_status_hub() -> None:
+    """Ends open status streams on shutdown."""
+    if _status_hub is not None:
+        await _status_hub.close()
@@ -0,0 +1,139 @@
+"""
+Cached response bodies for ``GET /requests/{id}/response``.
+
+The API process serves hits through :func:`get_response_cache` (which keeps
+the hottest bodies in memory and follows invalidations). The results
+importer encodes the responses it imports with :func:`prepare_response_warming`
+before committing and writes them with :func:`warm_cached_responses` after,
+so a new result's first read is a hit.
+"""
+from datetime import timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import redis
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from models.response import Response
+from models.user import User
+from schemas.response import ResponseDetailed
+from shared.models.result_blob import ResultBlob
+from shared.response_cache import CachedResponse, ResponseCache, encode_response, warm_responses
+
+
+def _response_payload(response: Response, result_data: Any) -> Dict[str, Any]:
+    """The ``ResponseDetailed`` body, from columns only (no lazy loads)."""
+    fields = {field: getattr(response, field) for field in ResponseDetailed.model_fields if field != "result_data"}
+    if fields["received_at"].tzinfo is None:
+        # As the database returns it (timestamptz)
+        fields["received_at"] = fields["received_at"].replace(tzinfo=timezone.utc)
+    return ResponseDetailed(**fields, result_data=result_data).model_dump()
+
+
+def prepare_response_warming(
+    db: Session, imported: List[Tuple[Response, Any, Any]]
+) -> Dict[str, CachedResponse]:
+    """
+    Encodes flushed, not yet committed responses for the cache.
+
+    Args:
+        imported: ``(response, owner_id, result_data)`` per imported
+            response; ``result_data`` is None when the payload is only
+            referenced by hash (it is then read from the blob store).
+
+    Returns:
+        Entries by request id, following the warming policy: only owners
+        with a profile in RESPONSE_CACHE_WARM_PROFILES (if set), only bodies
+        up to RESPONSE_CACHE_WARM_MAX_BYTES (if set), and at most
+        RESPONSE_CACHE_WARM_BUDGET_BYTES in total.
+    """
+    if not settings.RESPONSE_CACHE_WARM_ENABLED or not imported:
+        return {}
+
+    if settings.RESPONSE_CACHE_WARM_PROFILES:
+        owners = {owner_id for _, owner_id, _ in imported}
+        warmed_owners = set(db.execute(
+            select(User.id).where(User.id.in_(owners), User.profile_type.in_(settings.RESPONSE_CACHE_WARM_PROFILES))
+        ).scalars().all())
+        imported = [item for item in imported if item[1] in warmed_owners]
+
+    referenced = {response.result_hash for response, _, result_data in imported if result_data is None}
+    referenced.discard(None)
+    blobs = dict(db.execute(
+        select(ResultBlob.hash, ResultBlob.payload).where(ResultBlob.hash.in_(referenced))
+    ).all()) if referenced else {}
+
+    entries = {}
+    total = 0
+    for response, owner_id, result_data in imported:
+        if result_data is None:
+            result_data = blobs.get(response.result_hash)
+        entry = encode_response(
+            owner_id,
+            _response_payload(response, result_data),
+            settings.RESPONSE_CACHE_CODEC,
+            settings.RESPONSE_CACHE_COMPRESS_MIN_BYTES,
+        )
+        size = len(entry.body)
+        if settings.RESPONSE_CACHE_WARM_MAX_BYTES and size > settings.RESPONSE_CACHE_WARM_MAX_BYTES:
+            continue
+        if total + size > settings.RESPONSE_CACHE_WARM_BUDGET_BYTES:
+            break
+        entries[str(response.request_id)] = entry
+        total += size
+    return entries
+
+
+def warm_cached_responses(entries: Dict[str, CachedResponse], request_ids: Iterable[Any]) -> int:
+    """
+    Writes prepared entries after the import commits, and drops the cached
+    bodies of the other ``request_ids`` (not warmed by policy or budget).
+
+    Returns:
+        Number of entries written.
+    """
+    request_ids = list(request_ids)
+    if not entries and not request_ids:
+        return 0
+    client = redis.from_url(str(settings.REDIS_URL), socket_connect_timeout=5)
+    try:
+        return warm_responses(
+            client,
+            entries,
+            request_ids,
+            ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+            chunk_size=settings.RESPONSE_CACHE_WARM_CHUNK_SIZE,
+            max_memory_ratio=settings.RESPONSE_CACHE_WARM_MAX_MEMORY_RATIO,
+        )
+    finally:
+        client.close()
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+async def get_response_cache() -> ResponseCache:
+    """Returns this process's cache on the shared binary Redis connection pool."""
+    global _response_cache
+    if _response_cache is None:
+        from db.redis_client import get_redis_client
+
+        redis_client = await get_redis_client()
+        _response_cache = ResponseCache(
+            redis_client.binary_client,
+            ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+            codec=settings.RESPONSE_CACHE_CODEC,
+            compress_min_bytes=settings.RESPONSE_CACHE_COMPRESS_MIN_BYTES,
+            local_max_bytes=settings.RESPONSE_CACHE_LOCAL_MAX_BYTES,
+            local_ttl=settings.RESPONSE_CACHE_LOCAL_TTL_SECONDS,
+            health=redis_client.health,
+        )
+        _response_cache.start()
+    return _response_cache
+
+
+async def close_response_cache() -> None:
+    """Stops following invalidations on shutdown."""
+    if _response_cache is not None:
+        await _response_cache.close()
@@ -0,0 +1,135 @@
+"""
+In-memory snapshot of the settings table for the API process.
+
+Settings change only when the settings importer (or an admin endpoint)
+writes them, so the API keeps a copy in memory instead of querying on every
+read. Writers bump a version counter in Redis; readers compare it with the
+version they loaded at most every ``SETTINGS_SNAPSHOT_CHECK_SECONDS`` and
+reload only when it moved.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+import redis.asyncio as redis
+from sqlalchemy import select
+
+from core.config import settings
+from models.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_VERSION_KEY = "settings:version"
+
+
+async def bump_settings_version(client: Optional[redis.Redis] = None) -> Optional[int]:
+    """
+    Tells every API process that the settings table changed.
+
+    Returns:
+        The new version, or None if Redis is unreachable (snapshots then
+        reload once their ``max_age`` passes).
+    """
+    own_client = client is None
+    if own_client:
+        client = redis.from_url(str(settings.REDIS_URL), socket_connect_timeout=5)
+    try:
+        return await client.incr(SETTINGS_VERSION_KEY)
+    except redis.RedisError as e:
+        logger.warning(f"Could not bump settings version: {e}")
+        return None
+    finally:
+        if own_client:
+            await client.close()
+
+
+class SettingsSnapshot:
+    """
+    Settings keyed by ``key``, reloaded from the database only when the
+    Redis version changes.
+
+    Args:
+        session_factory: Async session factory used to reload.
+        check_interval: Seconds between version checks.
+        max_age: Reload after this long even if the version cannot be read.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        check_interval: float = 1.0,
+        max_age: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.session_factory = session_factory
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self.clock = clock
+        self.redis: Optional[redis.Redis] = None
+        self._values: Dict[str, Any] = {}
+        self._version: Optional[int] = None
+        self._loaded_at: Optional[float] = None
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def _current_version(self) -> Optional[int]:
+        if self.redis is None:
+            self.redis = redis.from_url(str(settings.REDIS_URL), socket_connect_timeout=5)
+        try:
+            value = await self.redis.get(SETTINGS_VERSION_KEY)
+        except redis.RedisError as e:
+            logger.warning(f"Could not read settings version: {e}")
+            return None
+        return int(value or 0)
+
+    async def _reload(self, version: Optional[int]) -> None:
+        async with self.session_factory() as db:
+            result = await db.execute(select(Settings.key, Settings.value))
+            self._values = {key: value for key, value in result.all()}
+        self._version = version
+        self._loaded_at = self.clock()
+        logger.info(f"Loaded {len(self._values)} settings (version {version})")
+
+    async def refresh(self) -> None:
+        """Reloads if the version moved or the snapshot is too old."""
+        now = self.clock()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        async with self._lock:
+            now = self.clock()
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return
+            version = await self._current_version()
+            stale = self._loaded_at is None or now - self._loaded_at >= self.max_age
+            if stale or (version is not None and version != self._version):
+                await self._reload(version)
+            self._checked_at = now
+
+    def invalidate(self) -> None:
+        """Forces a reload on the next read (after a local write)."""
+        self._loaded_at = None
+        self._checked_at = None
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        await self.refresh()
+        return self._values.get(key, default)
+
+    async def all(self) -> Dict[str, Any]:
+        await self.refresh()
+        return dict(self._values)
+
+
+_snapshot: Optional[SettingsSnapshot] = None
+
+
+def get_settings_snapshot() -> SettingsSnapshot:
+    """Returns this process's settings snapshot."""
+    global _snapshot
+    if _snapshot is None:
+        from db.session import AsyncSessionFactory
+
+        _snapshot = SettingsSnapshot(
+            AsyncSessionFactory, check_interval=settings.SETTINGS_SNAPSHOT_CHECK_SECONDS
+        )
+    return _snapshot
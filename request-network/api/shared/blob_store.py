@@ -0,0 +1,116 @@
+"""
+Content-addressed storage for query result payloads.
+
+Popular queries return the same ``result_data`` again and again. Both networks
+store each distinct payload once in ``result_blobs`` and point result rows at
+it by hash. Transfer files carry only the hash for blobs the receiving network
+has already acknowledged.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional, Set
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from shared.models.result_blob import ResultBlob
+
+
+def canonical_payload(payload: Any) -> bytes:
+    """
+    Serializes a payload to canonical JSON: sorted keys, no insignificant
+    whitespace, UTF-8. Equal payloads always produce equal bytes.
+    """
+    return json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+
+def payload_hash(payload: Any) -> str:
+    """Returns the SHA-256 hex digest of the canonical payload."""
+    return hashlib.sha256(canonical_payload(payload)).hexdigest()
+
+
+def store_blob(db: Session, payload: Any) -> Optional[str]:
+    """
+    Stores a payload if it is new.
+
+    Uses a single ``INSERT ... ON CONFLICT DO NOTHING`` so concurrent workers
+    storing the same payload never race. Blobs are never deleted: once the
+    peer network holds one, later transfers may reference it by hash alone.
+    The caller commits.
+
+    Returns:
+        The blob hash, or None for an empty (None) payload.
+    """
+    if payload is None:
+        return None
+
+    blob_hash = payload_hash(payload)
+    stmt = insert(ResultBlob).values(
+        hash=blob_hash,
+        payload=payload,
+        size_bytes=len(canonical_payload(payload)),
+    )
+    db.execute(stmt.on_conflict_do_nothing(index_elements=[ResultBlob.hash]))
+    return blob_hash
+
+
+def existing_hashes(db: Session, hashes: Iterable[str]) -> Set[str]:
+    """Returns the subset of ``hashes`` present in the blob store."""
+    wanted = set(hashes)
+    if not wanted:
+        return set()
+    result = db.execute(select(ResultBlob.hash).where(ResultBlob.hash.in_(wanted)))
+    return set(result.scalars().all())
+
+
+def peer_synced_hashes(db: Session, hashes: Iterable[str]) -> Set[str]:
+    """Returns the subset of ``hashes`` the peer network already holds."""
+    wanted = set(hashes)
+    if not wanted:
+        return set()
+    result = db.execute(
+        select(ResultBlob.hash).where(
+            ResultBlob.hash.in_(wanted),
+            ResultBlob.peer_synced_at.is_not(None),
+        )
+    )
+    return set(result.scalars().all())
+
+
+def mark_peer_synced(db: Session, hashes: Iterable[str]) -> int:
+    """
+    Records that the peer network holds ``hashes``. The caller commits.
+
+    Returns:
+        Number of blobs newly marked.
+    """
+    wanted = list(set(hashes))
+    if not wanted:
+        return 0
+    result = db.execute(
+        update(ResultBlob)
+        .where(ResultBlob.hash.in_(wanted), ResultBlob.peer_synced_at.is_(None))
+        .values(peer_synced_at=datetime.now(timezone.utc))
+    )
+    return result.rowcount or 0
+
+
+def take_unreported_hashes(db: Session, limit: int = 10000) -> list[str]:
+    """
+    Claims up to ``limit`` blob hashes not yet reported to the peer network
+    and marks them reported. The caller commits together with the export
+    that carries them.
+    """
+    result = db.execute(
+        select(ResultBlob.hash)
+        .where(ResultBlob.peer_synced_at.is_(None))
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    hashes = list(result.scalars().all())
+    mark_peer_synced(db, hashes)
+    return hashes
@@ -0,0 +1,221 @@
+"""
+Append-only, offset-addressed change log.
+
+Changes are appended as JSON lines to numbered segment files
+(``{name}.{first_seq:012d}.jsonl``). Every record carries a monotonically
+increasing ``seq``. Writers hold a short ``flock`` to allocate sequence
+numbers and then emit each record with a single ``write`` on an ``O_APPEND``
+descriptor, so concurrent writers never interleave or rewrite the file.
+Readers remember the last sequence number they applied (see
+:class:`LogOffset`) and read only what follows it. A trailing line without a
+newline belongs to a write in progress and is left for the next read.
+"""
+import fcntl
+import json
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+
+# Enough to hold the last complete line of any segment
+_TAIL_BYTES = 64 * 1024
+
+
+class ChangeLog:
+    """
+    A directory of append-only JSONL segments.
+
+    Args:
+        directory: Where the segments live.
+        name: Segment file prefix, e.g. ``password_changes``.
+        segment_max_bytes: A new segment starts once the newest one reaches this size.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        name: str,
+        segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+    ):
+        self.directory = Path(directory)
+        self.name = name
+        self.segment_max_bytes = segment_max_bytes
+        self.lock_path = self.directory / f".{name}.lock"
+
+    @property
+    def pattern(self) -> str:
+        """Glob matching this log's segments."""
+        return f"{self.name}.*.jsonl"
+
+    def segment_path(self, first_seq: int) -> Path:
+        return self.directory / f"{self.name}.{first_seq:012d}.jsonl"
+
+    def segments(self) -> List[Tuple[int, Path]]:
+        """Returns ``(first_seq, path)`` for every segment, oldest first."""
+        segments = []
+        for path in self.directory.glob(self.pattern):
+            try:
+                segments.append((int(path.name[len(self.name) + 1:-len(".jsonl")]), path))
+            except ValueError:
+                continue
+        return sorted(segments)
+
+    @contextmanager
+    def _locked(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def last_seq(self) -> int:
+        """Returns the highest sequence number written so far (0 if empty)."""
+        segments = self.segments()
+        for first_seq, path in reversed(segments):
+            with open(path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - _TAIL_BYTES))
+                tail = f.read()
+            for line in reversed(tail.split(b"\n")):
+                try:
+                    return int(json.loads(line)["seq"])
+                except (ValueError, KeyError, TypeError):
+                    continue  # Partial, blank or foreign line
+            if size == 0:
+                return first_seq - 1
+        return 0
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        # Caller holds the lock. One write() per record keeps each line whole.
+        segments = self.segments()
+        path = segments[-1][1] if segments else None
+        fd = None
+        try:
+            for record in records:
+                if path is None or (fd is None and path.stat().st_size >= self.segment_max_bytes):
+                    path = self.segment_path(record["seq"])
+                if fd is None:
+                    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+                os.write(fd, line.encode("utf-8"))
+                if os.fstat(fd).st_size >= self.segment_max_bytes:
+                    os.fsync(fd)
+                    os.close(fd)
+                    fd = None
+                    path = None
+            if fd is not None:
+                os.fsync(fd)
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """Appends one record and returns its sequence number."""
+        return self.append_many([record])[-1]
+
+    def append_many(self, records: Iterable[Dict[str, Any]]) -> List[int]:
+        """
+        Appends records under consecutive sequence numbers.
+
+        Returns:
+            The sequence numbers assigned, in order.
+        """
+        records = list(records)
+        if not records:
+            return []
+        with self._locked():
+            seq = self.last_seq()
+            stamped = []
+            for record in records:
+                seq += 1
+                stamped.append({"seq": seq, **record})
+            self._write(stamped)
+        return [record["seq"] for record in stamped]
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Appends records that already carry a ``seq`` (copied from another
+        log), skipping any at or below this log's last sequence number.
+
+        Returns:
+            Number of records appended.
+        """
+        with self._locked():
+            last = self.last_seq()
+            fresh = []
+            for record in sorted(records, key=lambda r: r["seq"]):
+                if record["seq"] > last:
+                    fresh.append(record)
+                    last = record["seq"]
+            self._write(fresh)
+        return len(fresh)
+
+    def read_from(self, offset: int = 0, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yields records with ``seq > offset`` in order, at most ``limit`` of them.
+        """
+        segments = self.segments()
+        yielded = 0
+        for index, (first_seq, path) in enumerate(segments):
+            if index + 1 < len(segments) and segments[index + 1][0] <= offset + 1:
+                continue  # Entirely at or below the offset
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Write in progress
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping unreadable line in {path.name}")
+                        continue
+                    if record.get("seq", 0) <= offset:
+                        continue
+                    yield record
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
+
+    def prune(self, offset: int) -> List[Path]:
+        """
+        Deletes segments whose records are all at or below ``offset``. The
+        newest segment is always kept so sequence numbers keep increasing.
+        """
+        segments = self.segments()
+        removed = []
+        for (_, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first <= offset + 1:
+                path.unlink(missing_ok=True)
+                removed.append(path)
+        return removed
+
+
+class LogOffset:
+    """
+    The last sequence number a consumer has applied, stored durably in a
+    small file that is replaced atomically.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def load(self) -> int:
+        try:
+            return int(self.path.read_text().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def store(self, seq: int) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(str(seq))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,278 @@
+"""
+Filesystem-event driven dispatch for local import directories.
+
+Instead of every importer globbing its directory on a fixed beat, one
+watcher process listens for file events (inotify on Linux, ``watchfiles``
+elsewhere), waits until a file has finished arriving and immediately sends
+the import task that owns the directory. The beat schedule stays as a slow
+fallback for missed events and FTP-backed imports.
+
+A file counts as settled when:
+- it was renamed into the directory (exporters write under a temporary
+  name and rename, so a rename means the file is complete), or
+- a completion marker ``<name>.done`` exists next to it, or
+- its size and mtime have not changed for ``settle_seconds``.
+"""
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+COMPLETION_SUFFIX = ".done"
+
+# (path, moved_into_place)
+WatchEvent = Tuple[Path, bool]
+
+
+class WatchRoute:
+    """One watched directory and the task that imports files matching ``patterns``."""
+
+    def __init__(self, name: str, directory: Union[str, Path], patterns: List[str], task_name: str):
+        self.name = name
+        self.directory = Path(directory).resolve()
+        self.patterns = patterns
+        self.task_name = task_name
+
+    def matches(self, path: Path) -> bool:
+        return path.parent == self.directory and any(
+            fnmatch.fnmatch(path.name, pattern) for pattern in self.patterns
+        )
+
+
+class SettleTracker:
+    """
+    Tracks files that are still arriving and reports them once settled.
+    """
+
+    def __init__(self, settle_seconds: float = 2.0, clock: Callable[[], float] = time.monotonic):
+        self.settle_seconds = settle_seconds
+        self.clock = clock
+        # path -> [(size, mtime), last change time, moved into place]
+        self._pending: Dict[Path, list] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def observe(self, path: Path, moved: bool = False) -> None:
+        """Records an event for ``path``; any event restarts its settle timer."""
+        entry = self._pending.get(path)
+        if entry is None:
+            self._pending[path] = [None, self.clock(), moved]
+        else:
+            entry[1] = self.clock()
+            entry[2] = entry[2] or moved
+
+    def settled(self) -> List[Path]:
+        """Returns (and stops tracking) every file that has finished arriving."""
+        now = self.clock()
+        ready = []
+        for path, entry in list(self._pending.items()):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Consumed by an importer or renamed away
+                del self._pending[path]
+                continue
+
+            marker = path.with_name(path.name + COMPLETION_SUFFIX)
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if entry[2] or marker.exists():
+                ready.append(path)
+            elif signature != entry[0]:
+                entry[0] = signature
+                entry[1] = now
+                continue
+            elif now - entry[1] >= self.settle_seconds:
+                ready.append(path)
+            else:
+                continue
+            del self._pending[path]
+        return ready
+
+
+class InotifyBackend:
+    """Linux inotify through libc, without extra dependencies."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, directories: Iterable[Path]):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._directories: Dict[int, Path] = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), self.WATCH_MASK)
+            if wd < 0:
+                os.close(self._fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self._directories[wd] = Path(directory)
+        self.overflowed = False
+
+    def read(self, timeout: float) -> List[WatchEvent]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + self._EVENT_HEADER.size <= len(buffer):
+            wd, mask, _cookie, length = self._EVENT_HEADER.unpack_from(buffer, offset)
+            offset += self._EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            if wd in self._directories and name:
+                events.append((self._directories[wd] / os.fsdecode(name), bool(mask & self.IN_MOVED_TO)))
+        return events
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class WatchfilesBackend:
+    """Portable fallback on top of the ``watchfiles`` package."""
+
+    def __init__(self, directories: Iterable[Path], poll_timeout: float = 0.5):
+        import watchfiles
+
+        self._watch = watchfiles.watch(
+            *[str(d) for d in directories],
+            yield_on_timeout=True,
+            rust_timeout=int(poll_timeout * 1000),
+            debounce=50,
+            recursive=False,
+        )
+        self.overflowed = False
+
+    def read(self, timeout: float) -> List[WatchEvent]:
+        # watchfiles has no rename event; an "added" path is treated like any
+        # other event and settles on size/mtime or its completion marker
+        changes = next(self._watch, set())
+        return [(Path(path), False) for change, path in changes]
+
+    def close(self) -> None:
+        self._watch.close()
+
+
+def create_backend(directories: List[Path], poll_timeout: float = 0.5):
+    """
+    Returns the best available event backend, or None if neither inotify nor
+    watchfiles works here (the beat schedule then does all the importing).
+    """
+    try:
+        return InotifyBackend(directories)
+    except (OSError, AttributeError) as e:
+        logger.info(f"inotify unavailable ({e}), trying watchfiles")
+    try:
+        return WatchfilesBackend(directories, poll_timeout)
+    except Exception as e:
+        logger.warning(f"watchfiles unavailable ({e}), falling back to polling only")
+    return None
+
+
+class ImportWatcher:
+    """
+    Dispatches import tasks as soon as files settle in their directories.
+
+    Args:
+        routes: Directories to watch and the task for each.
+        dispatch: Called with a task name, e.g. ``celery_app.send_task``.
+        settle_seconds: How long a file's size/mtime must hold still.
+        backend: Event source; defaults to :func:`create_backend`.
+    """
+
+    def __init__(
+        self,
+        routes: List[WatchRoute],
+        dispatch: Callable[[str], Any],
+        settle_seconds: float = 2.0,
+        backend=None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.routes = routes
+        self.dispatch = dispatch
+        self.tracker = SettleTracker(settle_seconds, clock)
+        self.poll_interval = max(0.1, min(1.0, settle_seconds / 2))
+        for route in routes:
+            route.directory.mkdir(parents=True, exist_ok=True)
+        self.backend = backend if backend is not None else create_backend(
+            [route.directory for route in routes], self.poll_interval
+        )
+
+    def route_for(self, path: Path) -> Optional[WatchRoute]:
+        for route in self.routes:
+            if route.matches(path):
+                return route
+        return None
+
+    def handle_event(self, path: Path, moved: bool = False) -> None:
+        if path.name.startswith("."):
+            # Temporary files of an in-progress atomic write
+            return
+        if path.name.endswith(COMPLETION_SUFFIX):
+            path = path.with_name(path.name[:-len(COMPLETION_SUFFIX)])
+        if self.route_for(path) is not None:
+            self.tracker.observe(path, moved)
+
+    def scan(self) -> None:
+        """Queues files that arrived while nobody was watching."""
+        for route in self.routes:
+            for pattern in route.patterns:
+                for path in route.directory.glob(pattern):
+                    # Might still be mid-copy, so let it settle normally
+                    self.handle_event(path)
+
+    def tick(self) -> List[str]:
+        """Dispatches each route with newly settled files once; returns their task names."""
+        dispatched = []
+        for path in self.tracker.settled():
+            route = self.route_for(path)
+            if route is not None and route.task_name not in dispatched:
+                logger.info(f"{path.name} settled, dispatching {route.task_name}")
+                self.dispatch(route.task_name)
+                dispatched.append(route.task_name)
+        return dispatched
+
+    def run_forever(self, should_stop: Callable[[], bool] = lambda: False) -> None:
+        if self.backend is None:
+            raise RuntimeError("No filesystem event backend available")
+        self.scan()
+        try:
+            while not should_stop():
+                for path, moved in self.backend.read(self.poll_interval):
+                    self.handle_event(path, moved)
+                if self.backend.overflowed:
+                    logger.warning("Event queue overflowed, rescanning import directories")
+                    self.backend.overflowed = False
+                    self.scan()
+                self.tick()
+        finally:
+            self.backend.close()
@@ -1,5 +1,6 @@
 """Shared models package."""
 
 from .worker_settings import WorkerSettings
+from .result_blob import ResultBlob
 
-__all__ = ['WorkerSettings']
\ No newline at end of file
+__all__ = ['WorkerSettings', 'ResultBlob']
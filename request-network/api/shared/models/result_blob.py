@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from sqlalchemy import String, Integer, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from shared.database.base import BaseModel, TimestampMixin
+
+
+class ResultBlob(BaseModel, TimestampMixin):
+    """
+    Content-addressed store for query result payloads, shared by both networks.
+
+    Identical ``result_data`` payloads are stored once, keyed by the SHA-256 of
+    their canonical JSON form (see ``shared.blob_store.payload_hash``).
+    ``QueryResult`` (Response Network) and ``Response`` (Request Network)
+    reference a blob through their ``result_hash`` column.
+
+    ``peer_synced_at`` records when the other network learned about the blob:
+    on the Response Network it is set once the Request Network acknowledges
+    holding it, so later transfers can ship only the hash; on the Request
+    Network it is set once the hash has been reported back in a batch manifest.
+    """
+    __tablename__ = "result_blobs"
+
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    payload: Mapped[dict | list] = mapped_column(JSONB, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    peer_synced_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
+
+    def __repr__(self):
+        return f"<ResultBlob(hash={self.hash[:12]}, size_bytes={self.size_bytes})>"
@@ -0,0 +1,206 @@
+"""
+Request status changes over Redis pub/sub.
+
+Workers publish one event per request whose status they changed, on the
+owner's channel ``request_status:{user_id}``, after their transaction
+commits. API processes push those events to subscribed clients instead of
+having them poll.
+
+Each API process holds a single pub/sub connection (:class:`StatusHub`)
+and subscribes to a user's channel only while at least one of that user's
+clients is listening, fanning messages out to per-client queues.
+
+Pub/sub does not store messages: a client that is not connected when an
+event is published misses it, so subscribers read the current status once
+after subscribing.
+"""
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set
+
+import redis
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "request_status:"
+
+# Statuses after which a request no longer changes
+TERMINAL_STATUSES = frozenset({"completed", "failed", "cancelled"})
+
+
+def status_channel(user_id: Any) -> str:
+    return f"{CHANNEL_PREFIX}{user_id}"
+
+
+def status_event(request_id: Any, user_id: Any, status: str, changed_at: Optional[datetime] = None) -> Dict[str, str]:
+    """One status change as published (ids as strings, time in UTC ISO format)."""
+    return {
+        "request_id": str(request_id),
+        "user_id": str(user_id),
+        "status": status,
+        "changed_at": (changed_at or datetime.now(timezone.utc)).isoformat(),
+    }
+
+
+def publish_status_changes(client: redis.Redis, events: Iterable[Dict[str, str]]) -> int:
+    """
+    Publishes status events from a synchronous writer (Celery tasks) in one
+    pipeline round trip.
+
+    Returns:
+        Number of events published; 0 if Redis is unreachable (clients
+        then see the change when they reconnect and read the status).
+    """
+    events = list(events)
+    if not events:
+        return 0
+    try:
+        with client.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.publish(status_channel(event["user_id"]), json.dumps(event))
+            pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish {len(events)} status changes: {e}")
+        return 0
+    return len(events)
+
+
+async def publish_status_changes_async(client: aioredis.Redis, events: Iterable[Dict[str, str]]) -> int:
+    """Async variant of :func:`publish_status_changes`."""
+    events = list(events)
+    if not events:
+        return 0
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.publish(status_channel(event["user_id"]), json.dumps(event))
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish {len(events)} status changes: {e}")
+        return 0
+    return len(events)
+
+
+class StatusHub:
+    """
+    One pub/sub connection per process, shared by every listening client.
+
+    ``subscribe(user_id)`` yields an asyncio.Queue receiving that user's
+    events as dicts. A ``None`` item means the stream ended (Redis failed
+    or the hub closed) and the client should reconnect. Events for a client
+    whose queue is full are dropped.
+
+    Args:
+        redis_client: Async Redis client (a dedicated connection is taken
+            from its pool for pub/sub).
+        queue_size: Events buffered per client.
+        poll_timeout: Seconds the reader waits for a message before checking
+            whether anyone is still listening.
+    """
+
+    def __init__(self, redis_client: aioredis.Redis, queue_size: int = 256, poll_timeout: float = 1.0):
+        self.redis = redis_client
+        self.queue_size = queue_size
+        self.poll_timeout = poll_timeout
+        self._pubsub: Optional[aioredis.client.PubSub] = None
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._cleanups: Set[asyncio.Task] = set()
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: Any) -> AsyncIterator[asyncio.Queue]:
+        channel = status_channel(user_id)
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            if channel not in self._listeners:
+                await self._pubsub.subscribe(channel)
+                self._listeners[channel] = set()
+            self._listeners[channel].add(queue)
+            if self._task is None or self._task.done():
+                self._task = asyncio.get_running_loop().create_task(self._run())
+        try:
+            yield queue
+        finally:
+            # No awaits here: a cancelled stream (client gone) cannot await
+            # in its cleanup, so Redis is unsubscribed from a separate task
+            listeners = self._listeners.get(channel)
+            if listeners is not None:
+                listeners.discard(queue)
+                if not listeners:
+                    del self._listeners[channel]
+                    task = asyncio.get_running_loop().create_task(self._unsubscribe(channel))
+                    self._cleanups.add(task)
+                    task.add_done_callback(self._cleanups.discard)
+
+    async def _unsubscribe(self, channel: str) -> None:
+        async with self._lock:
+            if channel in self._listeners or self._pubsub is None:
+                return  # Someone subscribed again meanwhile
+            try:
+                await self._pubsub.unsubscribe(channel)
+            except redis.RedisError as e:
+                logger.warning(f"Could not unsubscribe from {channel}: {e}")
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        channel = message["channel"]
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        try:
+            event = json.loads(message["data"])
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring malformed status event on {channel}")
+            return
+        for queue in self._listeners.get(channel, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.warning(f"Dropping status event for a slow subscriber on {channel}")
+
+    def _end_streams(self) -> None:
+        for listeners in self._listeners.values():
+            for queue in listeners:
+                try:
+                    queue.put_nowait(None)
+                except asyncio.QueueFull:
+                    queue.get_nowait()
+                    queue.put_nowait(None)
+
+    async def _run(self) -> None:
+        try:
+            while self._listeners:
+                message = await self._pubsub.get_message(timeout=self.poll_timeout)
+                if message is not None and message["type"] == "message":
+                    self._dispatch(message)
+        except redis.RedisError as e:
+            logger.error(f"Status event subscription failed: {e}")
+            async with self._lock:
+                self._end_streams()
+                self._listeners.clear()
+                pubsub, self._pubsub = self._pubsub, None
+                if pubsub is not None:
+                    await pubsub.aclose()
+
+    async def close(self) -> None:
+        """Ends every stream and releases the pub/sub connection."""
+        if self._cleanups:
+            await asyncio.gather(*self._cleanups)
+        async with self._lock:
+            self._end_streams()
+            self._listeners.clear()
+            if self._task is not None:
+                self._task.cancel()
+                try:
+                    await self._task
+                except asyncio.CancelledError:
+                    pass
+                self._task = None
+            if self._pubsub is not None:
+                await self._pubsub.aclose()
+                self._pubsub = None
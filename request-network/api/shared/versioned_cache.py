@@ -0,0 +1,193 @@
+"""
+Two-tier read-through cache invalidated by a version counter.
+
+Lookups go to a small in-process LRU first (entries live for ``local_ttl``
+seconds), then to Redis, and only then to the loader (usually a database
+query). Writers do not delete individual entries; they increment
+``{namespace}:version`` in Redis after their change is committed:
+
+- Redis entries are stored under ``{namespace}:{version}:{key}``, so a new
+  version makes every old entry unreachable (they expire on their TTL).
+- Each process compares the version with the one it last saw at most every
+  ``check_interval`` seconds and drops its local entries when it moved.
+
+A reader therefore sees a change within ``check_interval`` seconds (or
+``local_ttl`` if Redis is unreachable, in which case the Redis tier is
+skipped and the loader is called on local misses).
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar, Union
+
+import redis
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def version_key(namespace: str) -> str:
+    return f"{namespace}:version"
+
+
+def bump_version(client: redis.Redis, namespace: str) -> Optional[int]:
+    """
+    Invalidates every cache of ``namespace`` (for synchronous writers such
+    as Celery tasks).
+
+    Returns:
+        The new version, or None if Redis is unreachable (caches then catch
+        up once their local entries expire).
+    """
+    try:
+        return client.incr(version_key(namespace))
+    except redis.RedisError as e:
+        logger.warning(f"Could not bump {namespace} version: {e}")
+        return None
+
+
+async def bump_version_async(client: aioredis.Redis, namespace: str) -> Optional[int]:
+    """Async variant of :func:`bump_version`."""
+    try:
+        return await client.incr(version_key(namespace))
+    except redis.RedisError as e:
+        logger.warning(f"Could not bump {namespace} version: {e}")
+        return None
+
+
+class LocalTTLCache(Generic[T]):
+    """Least-recently-used mapping whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, ttl: float, max_entries: int, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[T]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if self.clock() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: T) -> None:
+        self._entries[key] = (value, self.clock() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class VersionedCache(Generic[T]):
+    """
+    In-process LRU in front of Redis in front of ``loader``.
+
+    Args:
+        redis_client: Async Redis client shared with the rest of the process.
+        namespace: Prefix of the Redis keys and of the version counter.
+        loader: Loads a value on a miss; returning None means "not found"
+            (misses are not cached).
+        dumps / loads: Convert values to and from the string stored in Redis.
+        local_ttl: Seconds an entry stays in the process.
+        max_entries: Size of the in-process LRU.
+        redis_ttl: Seconds an entry stays in Redis.
+        check_interval: Seconds between version checks.
+    """
+
+    def __init__(
+        self,
+        redis_client: aioredis.Redis,
+        namespace: str,
+        loader: Callable[[str], Awaitable[Optional[T]]],
+        dumps: Callable[[T], str],
+        loads: Callable[[Union[str, bytes]], T],
+        local_ttl: float = 30.0,
+        max_entries: int = 10000,
+        redis_ttl: int = 300,
+        check_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.redis = redis_client
+        self.namespace = namespace
+        self.loader = loader
+        self.dumps = dumps
+        self.loads = loads
+        self.redis_ttl = redis_ttl
+        self.check_interval = check_interval
+        self.clock = clock
+        self.local: LocalTTLCache[T] = LocalTTLCache(local_ttl, max_entries, clock)
+        self.version: Optional[int] = None
+        self._checked_at: Optional[float] = None
+
+    async def _check_version(self) -> None:
+        now = self.clock()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            version = int(await self.redis.get(version_key(self.namespace)) or 0)
+        except redis.RedisError as e:
+            logger.warning(f"Could not read {self.namespace} version: {e}")
+            self.version = None  # Skip the Redis tier until it answers again
+            return
+        if version != self.version:
+            if self.version is not None:
+                logger.info(f"{self.namespace} version {self.version} -> {version}, dropping local cache")
+            self.local.clear()
+            self.version = version
+
+    def _redis_key(self, version: int, key: str) -> str:
+        return f"{self.namespace}:{version}:{key}"
+
+    async def get(self, key: str) -> Optional[T]:
+        await self._check_version()
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        version = self.version
+        if version is not None:
+            try:
+                raw = await self.redis.get(self._redis_key(version, key))
+                if raw is not None:
+                    value = self.loads(raw)
+            except redis.RedisError as e:
+                logger.warning(f"Could not read {self.namespace} entry from Redis: {e}")
+
+        if value is None:
+            value = await self.loader(key)
+            if value is None:
+                return None
+            if version is not None:
+                try:
+                    await self.redis.set(self._redis_key(version, key), self.dumps(value), ex=self.redis_ttl)
+                except redis.RedisError as e:
+                    logger.warning(f"Could not store {self.namespace} entry in Redis: {e}")
+
+        # A newer version may have arrived while loading
+        if version == self.version:
+            self.local.set(key, value)
+        return value
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drops one local entry (or all) and forces a version check."""
+        if key is None:
+            self.local.clear()
+        else:
+            self.local.pop(key)
+        self._checked_at = None
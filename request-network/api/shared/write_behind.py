@@ -0,0 +1,121 @@
+"""
+Write-behind buffer for low-value, high-frequency updates.
+
+Callers record ``key -> value`` in memory; only the latest value per key is
+kept. A background task hands everything pending to ``flush`` in one batch
+every ``interval`` seconds (sooner once ``max_pending`` keys are waiting),
+so N updates per interval cost one bulk write instead of N transactions.
+
+Pending values are lost if the process dies before the next flush; use
+this only for data where that is acceptable (e.g. "last used" timestamps).
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class WriteBehindBuffer(Generic[K, V]):
+    """
+    Coalesces writes per key and flushes them in batches.
+
+    Args:
+        flush: Writes one batch; raising keeps the batch for the next try.
+        interval: Seconds between flushes.
+        max_pending: Flush early once this many keys are pending.
+        max_retry_delay: Upper bound for the delay between retries while
+            writes keep failing (the delay doubles from ``interval``).
+        name: Used in log messages.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[Dict[K, V]], Awaitable[None]],
+        interval: float = 5.0,
+        max_pending: int = 10000,
+        max_retry_delay: float = 60.0,
+        name: str = "write-behind",
+    ):
+        self._flush = flush
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_retry_delay = max_retry_delay
+        self.name = name
+        self._pending: Dict[K, V] = {}
+        self._failures = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @property
+    def retry_delay(self) -> float:
+        """Seconds the background task waits before retrying a failed write."""
+        if not self._failures:
+            return 0.0
+        return min(self.interval * 2 ** (self._failures - 1), self.max_retry_delay)
+
+    def record(self, key: K, value: V) -> None:
+        """Remembers the latest value for ``key`` (call from the event loop)."""
+        self._pending[key] = value
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """
+        Writes everything pending now.
+
+        Returns:
+            Number of keys written (0 if the write failed and was kept).
+        """
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        try:
+            await self._flush(batch)
+        except BaseException as e:
+            for key, value in batch.items():
+                self._pending.setdefault(key, value)  # Newer values win
+            if not isinstance(e, Exception):
+                raise  # Cancelled (e.g. by close(), which writes the batch)
+            self._failures += 1
+            logger.error(
+                f"{self.name}: flushing {len(batch)} updates failed, "
+                f"retrying in {self.retry_delay:.1f}s: {e}"
+            )
+            return 0
+        self._failures = 0
+        return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            if self._failures:
+                # Writes are failing: a full buffer must not turn into a
+                # tight retry loop, so early wakeups wait for the delay
+                await asyncio.sleep(self.retry_delay)
+            else:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def close(self) -> None:
+        """Stops the background task and writes what is pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -2,6 +2,10 @@ from celery import Celery
 from celery.schedules import crontab
 from core.config import settings
 
+# With the import watcher running, beat only polls local import directories
+# as a fallback for missed events
+IMPORT_POLL_SECONDS = settings.IMPORT_POLL_FALLBACK_SECONDS if settings.IMPORT_WATCHER_ENABLED else 10.0
+
 # Initialize celery app
 celery_app = Celery(
     "request_network",
@@ -24,22 +28,32 @@ celery_app.conf.update(
             "task": "workers.tasks.export_requests.export_pending_requests",
             "schedule": 10.0,
         },
+        # Pack exported batches into one transfer bundle (TRANSFER_BUNDLE_ENABLED)
+        "export-transfer-bundle-every-10s": {
+            "task": "workers.tasks.bundle_exporter.export_transfer_bundle",
+            "schedule": 10.0,
+        },
         
         # IMPORTERS (from Response Network)
-        # Import settings from response network every 10 seconds
+        # Import settings from response network every 10 seconds (or on file events)
         "import-settings-every-10s": {
             "task": "workers.tasks.settings_importer.import_settings_from_response_network",
-            "schedule": 10.0,
+            "schedule": IMPORT_POLL_SECONDS,
         },
         # Import users from response network every 60 seconds (only if changed)
         "import-users-every-60s": {
             "task": "workers.tasks.users_importer.import_users_from_response_network",
             "schedule": 60.0,
         },
-        # Import results from response network every 10 seconds
+        # Import results from response network every 10 seconds (or on file events)
         "import-results-every-10s": {
             "task": "workers.tasks.results_importer.import_results_from_response_network",
-            "schedule": 10.0,
+            "schedule": IMPORT_POLL_SECONDS,
+        },
+        # Import transfer bundles and dispatch their members every 10 seconds
+        "import-transfer-bundles-every-10s": {
+            "task": "workers.tasks.bundle_importer.import_transfer_bundles",
+            "schedule": IMPORT_POLL_SECONDS,
         },
     },
 )
@@ -51,4 +65,6 @@ celery_app.autodiscover_tasks(["workers.tasks"], force=True)
 from workers.tasks import settings_importer  # noqa
 from workers.tasks import export_requests  # noqa
 from workers.tasks import users_importer  # noqa
-from workers.tasks import results_importer  # noqa
\ No newline at end of file
+from workers.tasks import results_importer  # noqa
+from workers.tasks import bundle_exporter  # noqa
+from workers.tasks import bundle_importer  # noqa
\ No newline at end of file
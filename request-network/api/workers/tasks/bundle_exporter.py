@@ -0,0 +1,68 @@
+"""
+Bundle Exporter Task - Pack pending request exports into a single bundle
+"""
+from datetime import datetime
+from pathlib import Path
+
+from celery import shared_task
+
+from core.config import settings
+from shared.transfer_bundle import BundleWriter, generate_bundle_filename, pack_export_files
+
+EXPORT_PATH = Path(settings.EXPORT_DIR)
+BUNDLE_PATH = EXPORT_PATH / "bundles"
+ARCHIVE_PATH = EXPORT_PATH / "archive"
+
+# (member type, glob relative to EXPORT_DIR) for every file the exporters write
+BUNDLE_SOURCES = [
+    ("requests", "requests/requests_*.jsonl"),
+    ("requests_meta", "requests/requests_*.meta.json"),
+]
+
+
+@shared_task(bind=True, max_retries=3)
+def export_transfer_bundle(self):
+    """
+    Pack exported request batches into one bundle for response-network.
+
+    Exports to: /exports/bundles/bundle_request-network_{timestamp}_{id}.bundle
+
+    Workflow:
+    1. Collect requests_*.jsonl batches and their .meta.json files
+    2. Write them into one bundle with a manifest (type, count, checksum, codec)
+    3. Move the packed loose files to archive/
+    """
+    if not settings.TRANSFER_BUNDLE_ENABLED:
+        return {"status": "disabled"}
+
+    try:
+        writer = BundleWriter("request-network", codec=settings.TRANSFER_BUNDLE_CODEC)
+        packed = pack_export_files(writer, EXPORT_PATH, BUNDLE_SOURCES)
+
+        if not packed:
+            return {
+                "status": "no_changes",
+                "exported_at": datetime.utcnow().isoformat(),
+                "member_count": 0,
+            }
+
+        bundle_file = writer.write(
+            BUNDLE_PATH / generate_bundle_filename("request-network", writer.bundle_id)
+        )
+
+        for file_path in packed:
+            archive_file = ARCHIVE_PATH / file_path.relative_to(EXPORT_PATH)
+            archive_file.parent.mkdir(parents=True, exist_ok=True)
+            file_path.replace(archive_file)
+
+        manifest = writer.manifest()
+        return {
+            "status": "success",
+            "bundle_file": str(bundle_file),
+            "bundle_id": manifest["bundle_id"],
+            "member_count": manifest["member_count"],
+            "record_count": manifest["record_count"],
+            "exported_at": datetime.utcnow().isoformat(),
+        }
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=60)
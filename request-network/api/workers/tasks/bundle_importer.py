@@ -0,0 +1,126 @@
+"""
+Bundle Importer Task - Import transfer bundles from response-network
+"""
+from datetime import datetime
+import json
+from pathlib import Path
+import logging
+
+from celery import shared_task
+
+from core.config import settings
+from shared.transfer_bundle import BUNDLE_SUFFIX, BundleReader, unpack_bundle, write_member_file
+from workers.tasks.results_importer import import_results_from_response_network
+from workers.tasks.settings_importer import PASSWORD_CHANGE_LOG, import_settings_from_response_network
+from workers.tasks.users_importer import import_users_from_response_network
+
+logger = logging.getLogger(__name__)
+
+IMPORT_PATH = Path(settings.IMPORT_DIR)
+BUNDLE_PATH = IMPORT_PATH / "bundles"
+
+
+def _stage_results(member, data: bytes) -> Path:
+    return write_member_file(data, IMPORT_PATH / "results" / member.name)
+
+
+def _stage_snapshot(member, data: bytes) -> Path:
+    # Snapshot importers always read the newest copy from latest.json
+    return write_member_file(data, IMPORT_PATH / member.member_type / "latest.json")
+
+
+def _stage_password_changes(member, data: bytes) -> Path:
+    # Records keep the sender's sequence numbers, so a redelivered bundle
+    # appends nothing twice
+    records = [json.loads(line) for line in data.splitlines() if line.strip()]
+    appended = PASSWORD_CHANGE_LOG.extend(records)
+    logger.info(f"Appended {appended} of {len(records)} password changes from {member.name}")
+    return PASSWORD_CHANGE_LOG.directory
+
+
+MEMBER_STAGERS = {
+    "results": _stage_results,
+    "results_meta": _stage_results,
+    "users": _stage_snapshot,
+    "settings": _stage_snapshot,
+    "password_changes": _stage_password_changes,
+}
+
+# Importer to run once per pass for each staged member type
+MEMBER_IMPORTERS = {
+    "results": import_results_from_response_network,
+    "users": import_users_from_response_network,
+    "settings": import_settings_from_response_network,
+    "password_changes": import_settings_from_response_network,
+}
+
+
+@shared_task(bind=True, max_retries=3)
+def import_transfer_bundles(self):
+    """
+    Import transfer bundles from response-network.
+
+    Workflow:
+    1. Poll /imports/bundles/ for *.bundle files
+    2. Verify every member checksum against the manifest
+    3. Stage each member where its importer reads it
+    4. Run each affected importer once for the whole batch
+    5. Move bundle to archive/ (or failed/ if verification fails)
+    """
+    try:
+        BUNDLE_PATH.mkdir(parents=True, exist_ok=True)
+        bundle_files = sorted(BUNDLE_PATH.glob(f"*{BUNDLE_SUFFIX}"))
+
+        if not bundle_files:
+            return {
+                "status": "no_files",
+                "imported_at": datetime.utcnow().isoformat(),
+                "total_bundles": 0,
+            }
+
+        imported_bundles = []
+        failed_bundles = []
+        staged_types = set()
+
+        for bundle_file in bundle_files:
+            try:
+                with BundleReader(bundle_file) as reader:
+                    written = unpack_bundle(reader, MEMBER_STAGERS)
+                    for member in reader.members:
+                        if member.member_type not in MEMBER_STAGERS:
+                            # e.g. profile_types: this network has no importer for them
+                            logger.warning(
+                                f"Skipping unsupported {member.member_type} member {member.name} "
+                                f"in bundle {bundle_file.name}"
+                            )
+                staged_types.update(written)
+                imported_bundles.append(bundle_file.name)
+                target_dir = BUNDLE_PATH / "archive"
+            except ValueError as e:
+                failed_bundles.append((bundle_file.name, str(e)))
+                target_dir = BUNDLE_PATH / "failed"
+
+            target_dir.mkdir(parents=True, exist_ok=True)
+            bundle_file.rename(target_dir / bundle_file.name)
+
+        dispatched = {}
+        for member_type in sorted(staged_types):
+            importer = MEMBER_IMPORTERS.get(member_type)
+            if importer is None or importer.name in dispatched:
+                continue
+            try:
+                dispatched[importer.name] = importer()
+            except Exception as e:
+                logger.error(f"Importer {importer.name} failed after bundle import: {e}")
+                dispatched[importer.name] = {"status": "error", "error": str(e)}
+
+        return {
+            "status": "success" if not failed_bundles else "partial_success",
+            "imported_bundles": imported_bundles,
+            "failed_bundles": failed_bundles,
+            "dispatched": dispatched,
+            "imported_at": datetime.utcnow().isoformat(),
+        }
+
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=60)
@@ -15,6 +15,10 @@ from sqlalchemy.orm import sessionmaker
 from models.request import Request as RequestModel
 from models.user import User  # Register User model for relationship
 from models.response import Response # Register Response model
+from shared.blob_store import take_unreported_hashes
+from shared.file_format_handler import SizeCappedJSONLWriter, build_chunk_manifest, calculate_checksum
+from shared.status_events import status_event
+from services.request_events import publish_request_events
 
 # Setup sync database connection for Celery
 sync_engine = create_engine(
@@ -39,14 +43,18 @@ def export_pending_requests(self):
     Export all pending requests to file for response-network.
     
     Exports to: /exports/requests/requests_YYYYMMDD_HHMMSS.jsonl
+    (or requests_YYYYMMDD_HHMMSS.partNNN.jsonl when the batch is split)
     
     Workflow:
     1. Query pending requests (status='pending')
     2. Sort by priority DESC, created_at ASC
-    3. Generate JSONL file (JSON Lines format)
-    4. Calculate SHA-256 checksum
-    5. Write metadata file
-    6. Update request status to 'exported'
+    3. Generate JSONL file (JSON Lines format), split into parts of at most
+       EXPORT_MAX_PART_BYTES
+    4. Calculate SHA-256 checksum and the chunk Merkle manifest per part
+    5. Write metadata per part (part number/count; result blobs received
+       since the last batch go in part 1)
+    6. Update request status to 'exported', commit, then publish the parts
+       and the changes to ``request_status:{user_id}``
     """
     try:
         # Create export directory if it doesn't exist
@@ -76,59 +84,78 @@ def export_pending_requests(self):
                     "total_requests": 0
                 }
 
-            # Prepare JSONL file content
-            jsonl_lines = []
-            for req in pending_requests:
-                jsonl_lines.append(json.dumps({
-                    "id": str(req.id),
-                    "user_id": str(req.user_id),
-                    "query_type": req.query_type,
-                    "query_params": req.query_params or {},
-                    "priority": req.priority,
-                    "created_at": req.created_at.isoformat() if req.created_at else None,
-                    "name": getattr(req, "name", None)
-                }, ensure_ascii=False))
-
-            # Write to JSONL file
-            export_file = EXPORT_PATH / f"requests_{timestamp}.jsonl"
-            with open(export_file, "w", encoding="utf-8") as f:
-                f.write("\n".join(jsonl_lines))
-
-            # Calculate checksum
-            with open(export_file, "rb") as f:
-                file_hash = hashlib.sha256(f.read()).hexdigest()
-
-            # Write metadata file
-            metadata = {
-                "batch_id": batch_id,
-                "batch_type": "requests",
-                "filename": export_file.name,
-                "file_size": export_file.stat().st_size,
-                "record_count": len(pending_requests),
-                "checksum": file_hash,
-                "exported_at": datetime.utcnow().isoformat(),
-                "version": 1
-            }
-            
-            meta_file = EXPORT_PATH / f"requests_{timestamp}.meta.json"
-            with open(meta_file, "w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-            # Update request status to 'exported'
-            for req in pending_requests:
-                req.status = "exported"
-                req.exported_at = datetime.utcnow()
-            
-            db.commit()
+            # Write JSONL parts, rolling over at the configured byte budget
+            with SizeCappedJSONLWriter(
+                EXPORT_PATH, f"requests_{timestamp}", settings.EXPORT_MAX_PART_BYTES
+            ) as writer:
+                for req in pending_requests:
+                    writer.write({
+                        "id": str(req.id),
+                        "user_id": str(req.user_id),
+                        "query_type": req.query_type,
+                        "query_params": req.query_params or {},
+                        "priority": req.priority,
+                        "created_at": req.created_at.isoformat() if req.created_at else None,
+                        "name": getattr(req, "name", None)
+                    })
+                parts = writer.close()
+
+                # Report newly stored result blobs so response-network can send
+                # later copies of the same payload as hash references only
+                known_result_blobs = take_unreported_hashes(db)
+                exported_at = datetime.utcnow().isoformat()
+
+                # Metadata goes out before the parts are published so the
+                # importer never sees a part without it
+                meta_files = []
+                for part in parts:
+                    metadata = {
+                        "batch_id": batch_id,
+                        "batch_type": "requests",
+                        "filename": part.path.name,
+                        "file_size": part.size_bytes,
+                        "record_count": part.record_count,
+                        "batch_record_count": len(pending_requests),
+                        "part_number": part.part_number,
+                        "part_count": part.part_count,
+                        "checksum": calculate_checksum(part.tmp_path),
+                        "exported_at": exported_at,
+                        "known_result_blobs": known_result_blobs if part.part_number == 1 else [],
+                        "version": 1
+                    }
+                    # Per-chunk hashes let the importer ask for only the damaged chunks
+                    metadata.update(build_chunk_manifest(
+                        part.tmp_path, settings.TRANSFER_CHUNK_SIZE_BYTES, settings.TRANSFER_VERIFY_WORKERS
+                    ))
+                    with open(part.meta_path, "w", encoding="utf-8") as f:
+                        json.dump(metadata, f, ensure_ascii=False, indent=2)
+                    meta_files.append(part.meta_path)
+
+                # Update request status to 'exported'
+                status_events = []
+                for req in pending_requests:
+                    req.status = "exported"
+                    req.exported_at = datetime.utcnow()
+                    status_events.append(status_event(req.id, req.user_id, req.status))
+
+                # Commit before publishing: if the commit fails the parts are
+                # discarded and the requests go out in the next export instead
+                # of twice
+                db.commit()
+                export_files = writer.publish()
+
+            # Push "exported" to subscribed clients
+            publish_request_events(status_events)
 
             return {
                 "status": "success",
-                "export_file": str(export_file),
-                "metadata_file": str(meta_file),
+                "export_file": str(export_files[0]),
+                "metadata_file": str(meta_files[0]),
+                "export_files": [str(path) for path in export_files],
+                "part_count": len(export_files),
                 "total_requests": len(pending_requests),
                 "batch_id": batch_id,
-                "checksum": file_hash,
-                "exported_at": metadata["exported_at"],
+                "exported_at": exported_at,
             }
         finally:
             db.close()
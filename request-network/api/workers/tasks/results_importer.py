@@ -6,7 +6,6 @@ import json
 from pathlib import Path
 import hashlib
 import logging
-import asyncio
 
 from celery import shared_task
 from sqlalchemy.orm import Session
@@ -16,9 +15,104 @@ from core.dependencies import get_db_sync
 from models.request import Request as RequestModel
 from models.user import User
 from models.response import Response
+from shared.blob_store import existing_hashes, store_blob
+from shared.file_format_handler import (
+    collect_batch_parts,
+    metadata_path,
+    missing_blobs_report,
+    quarantine_for_retransfer,
+    verify_batch_file,
+)
+from shared.status_events import status_event
+from services.request_events import publish_request_events
+from services.response_cache import prepare_response_warming, warm_cached_responses
 
 logger = logging.getLogger(__name__)
 IMPORT_PATH = Path(settings.IMPORT_DIR) / "results"
+RETRANSFER_PATH = IMPORT_PATH / "retransfer"
+
+
+def _import_result_file(db, result_file: Path, status_events: list, imported_responses: list):
+    """
+    Applies the results in one JSONL file; returns (imported, missing_hashes):
+    the hashes of hash-only lines whose blob this network does not hold.
+
+    A status event per completed request is appended to ``status_events``
+    (published once the batch is committed), and ``(response, owner_id,
+    result_data)`` to ``imported_responses`` for cache warming.
+    """
+    # Read JSONL file
+    with open(result_file, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+    imported_count = 0
+    missing_hashes = []
+    records = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+
+    # Hash-only lines must point at blobs we already hold
+    referenced = existing_hashes(db, [
+        record["result_hash"] for record in records
+        if "result_data" not in record and record.get("result_hash")
+    ])
+
+    for result_data in records:
+        try:
+            request_id = result_data.get("request_id")
+
+            # Find request
+            request = db.query(RequestModel).filter(
+                RequestModel.id == request_id
+            ).first()
+
+            if request:
+                # A batch delivered twice must not fail on the unique request_id
+                if db.query(Response.id).filter(Response.request_id == request.id).first():
+                    logger.info(f"Skipping result for request {request_id}: response already imported")
+                    continue
+
+                if "result_data" in result_data:
+                    response_data = result_data.get("result_data")
+                    result_hash = store_blob(db, response_data)
+                else:
+                    result_hash = result_data.get("result_hash")
+                    if result_hash not in referenced:
+                        logger.warning(f"Missing result blob {result_hash} for request {request_id}")
+                        missing_hashes.append(result_hash)
+                        continue
+                    response_data = None
+
+                result_count = result_data.get("result_count")
+                if result_count is None and isinstance(response_data, dict):
+                    result_count = response_data.get("count", 0)
+
+                # Create Response object (payload lives in the blob store)
+                response_obj = Response(
+                    request_id=request.id,
+                    result_hash=result_hash,
+                    result_count=result_count,
+                    execution_time_ms=result_data.get("execution_time_ms", result_data.get("took", 0)),
+                    received_at=datetime.utcnow()
+                )
+                db.add(response_obj)
+                imported_responses.append((response_obj, request.user_id, response_data))
+
+                # Update request status
+                request.status = "completed"
+                request.result_received_at = datetime.utcnow()
+                status_events.append(status_event(request.id, request.user_id, request.status))
+
+                imported_count += 1
+        except (KeyError, ValueError):
+            continue
+
+    return imported_count, missing_hashes
 
 
 @shared_task(bind=True, max_retries=3)
@@ -27,14 +121,29 @@ def import_results_from_response_network(self):
     Import query results from response-network.
     
     Workflow:
-    1. Poll /imports/results/ for result files
-    2. Read JSONL format results
-    3. Update corresponding requests with results
-    4. Mark requests as completed
-    5. Move file to archive/
+    1. Poll /imports/results/ for result files and group split batches by
+       part metadata; batches still missing parts, and files whose
+       .meta.json has not arrived, wait for the next run (files still
+       without it after TRANSFER_METADATA_MAX_WAIT_SECONDS are imported
+       unverified)
+    2. Verify chunk hashes against .meta.json in parallel (or the whole-file
+       checksum when it has no chunk manifest); quarantine damaged files in
+       retransfer/ with a report of the chunks to re-send
+    3. Read JSONL format results
+    4. Update corresponding requests with results
+    5. Mark requests as completed
+    6. Encode the new responses for the response cache (see the
+       RESPONSE_CACHE_WARM_* settings), commit once per batch, write them to
+       the cache, publish the status changes to ``request_status:{user_id}``
+       and move its files (and metadata) to archive/
     
-    File format: results_YYYYMMDD_HHMMSS.jsonl
-    Each line: {"request_id": "uuid", "result_data": {...}, "execution_time_ms": 123}
+    File format: results_YYYYMMDD_HHMMSS.jsonl (or .partNNN.jsonl)
+    Each line: {"request_id": "uuid", "result_hash": "sha256", "result_data": {...}, "execution_time_ms": 123}
+
+    Payloads are stored once in the result blob store. Lines without
+    "result_data" reference a blob this network already acknowledged; a
+    file referencing a blob it does not hold is quarantined in retransfer/
+    with the missing hashes (its batch is not imported).
     """
     try:
         IMPORT_PATH.mkdir(parents=True, exist_ok=True)
@@ -51,75 +160,108 @@ def import_results_from_response_network(self):
 
         db = next(get_db_sync())
         total_imported = 0
+        missing_blobs = 0
+        warmed_count = 0
         failed_files = []
+        retransfer_requests = []
 
         try:
-            for result_file in result_files:
+            batches, waiting_batches, unmanifested = collect_batch_parts(
+                result_files, settings.TRANSFER_METADATA_MAX_WAIT_SECONDS
+            )
+            # Files from exporters that predate batch metadata: import them
+            # unverified as single-part batches, as before
+            for result_file in unmanifested:
+                logger.warning(
+                    f"{result_file.name} has no metadata after "
+                    f"{settings.TRANSFER_METADATA_MAX_WAIT_SECONDS}s, importing it unverified"
+                )
+            batches += [[(result_file, metadata_path(result_file), {})] for result_file in unmanifested]
+
+            for parts in batches:
                 try:
-                    # Read JSONL file
-                    with open(result_file, "r", encoding="utf-8") as f:
-                        lines = f.readlines()
+                    # Verify every part before importing any of them
+                    damaged = False
+                    for result_file, meta_file, metadata in parts:
+                        if result_file in unmanifested:
+                            continue
+                        report = verify_batch_file(result_file, metadata, settings.TRANSFER_VERIFY_WORKERS)
+                        if not report["valid"]:
+                            logger.warning(
+                                f"{result_file.name} failed chunk verification, "
+                                f"requesting chunks {report['bad_chunks']}"
+                            )
+                            retransfer_requests.append(quarantine_for_retransfer(
+                                result_file, meta_file, metadata, report, RETRANSFER_PATH
+                            ))
+                            damaged = True
+                    if damaged:
+                        # The remaining parts wait for the re-sent ones
+                        continue
 
-                    imported_count = 0
+                    status_events = []
+                    imported_responses = []
+                    batch_imported = 0
+                    missing_by_file = {}
+                    for result_file, meta_file, metadata in parts:
+                        imported_count, missing_hashes = _import_result_file(
+                            db, result_file, status_events, imported_responses
+                        )
+                        batch_imported += imported_count
+                        if missing_hashes:
+                            missing_by_file[result_file] = missing_hashes
 
-                    for line in lines:
-                        if not line.strip():
-                            continue
+                    if missing_by_file:
+                        # Results pointing at blobs we do not hold cannot be
+                        # applied: keep nothing of the batch and ask for the
+                        # payloads; the remaining parts wait for the re-sent ones
+                        db.rollback()
+                        for result_file, meta_file, metadata in parts:
+                            if result_file in missing_by_file:
+                                missing_blobs += len(missing_by_file[result_file])
+                                retransfer_requests.append(quarantine_for_retransfer(
+                                    result_file, meta_file, metadata,
+                                    missing_blobs_report(metadata, missing_by_file[result_file]),
+                                    RETRANSFER_PATH,
+                                ))
+                        continue
+                    total_imported += batch_imported
 
-                        try:
-                            result_data = json.loads(line)
-                            request_id = result_data.get("request_id")
-                            
-                            # Find request
-                            request = db.query(RequestModel).filter(
-                                RequestModel.id == request_id
-                            ).first()
-
-                            if request:
-                                # Create Response object
-                                response_data = result_data.get("result_data", {})
-                                response_obj = Response(
-                                    request_id=request.id,
-                                    result_data=response_data,
-                                    result_count=response_data.get("count", 0),
-                                    execution_time_ms=result_data.get("took", 0),
-                                    received_at=datetime.utcnow()
-                                )
-                                db.add(response_obj)
-
-                                # Update request status
-                                request.status = "completed"
-                                request.result_received_at = datetime.utcnow()
-                                
-                                # Invalidate cache for this request (async)
-                                try:
-                                    from db.redis_client import RedisClient
-                                    redis = RedisClient(settings.REDIS_URL)
-                                    asyncio.run(redis.invalidate_response(str(request_id)))
-                                    logger.info(f"✅ Invalidated cache for request {request_id}")
-                                except Exception as e:
-                                    logger.warning(f"Could not invalidate cache: {e}")
-                                
-                                imported_count += 1
-                        except json.JSONDecodeError:
-                            continue
+                    # Encode the new responses for the cache before committing
+                    db.flush()
+                    warm_entries = prepare_response_warming(db, imported_responses)
 
+                    # One commit per batch: a split batch lands all at once
                     db.commit()
-                    total_imported += imported_count
 
-                    # Move file to archive
+                    # Cache the new responses (dropping any stale ones), then
+                    # push "completed" to subscribed clients
+                    warmed_count += warm_cached_responses(
+                        warm_entries, (event["request_id"] for event in status_events)
+                    )
+                    publish_request_events(status_events)
+
+                    # Move files to archive
                     archive_dir = IMPORT_PATH / "archive"
                     archive_dir.mkdir(parents=True, exist_ok=True)
-                    result_file.rename(archive_dir / result_file.name)
+                    for result_file, meta_file, metadata in parts:
+                        result_file.rename(archive_dir / result_file.name)
+                        if meta_file.exists():
+                            meta_file.rename(archive_dir / meta_file.name)
 
                 except Exception as e:
-                    failed_files.append((result_file.name, str(e)))
+                    failed_files.append((parts[0][0].name, str(e)))
+                    db.rollback()
                     continue
 
             return {
-                "status": "success" if not failed_files else "partial_success",
+                "status": "success" if not (failed_files or retransfer_requests) else "partial_success",
                 "total_imported": total_imported,
+                "missing_blobs": missing_blobs,
+                "warmed_responses": warmed_count,
                 "failed_files": failed_files,
+                "waiting_batches": waiting_batches,
+                "retransfer_requests": retransfer_requests,
                 "imported_at": datetime.utcnow().isoformat()
             }
         finally:
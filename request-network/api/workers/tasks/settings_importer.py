@@ -2,27 +2,159 @@ from datetime import datetime
 import json
 from pathlib import Path
 import asyncio
+import uuid
 
 from celery import shared_task
-from sqlalchemy import select
+from sqlalchemy import cast, func, or_, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert
 
 from core.config import settings
-from db.session import get_db_session as get_db
+from db.session import AsyncSessionFactory
 from models.settings import Settings
 from models.user import User
 from schemas.settings import SettingsImport
+from services.settings_snapshot import bump_settings_version
+from shared.change_log import ChangeLog, LogOffset
+from shared.file_format_handler import calculate_checksum
 
 IMPORT_PATH = Path(settings.IMPORT_DIR) / "settings"
+# Checksum of the last latest.json applied to the database
+PROCESSED_FILE = IMPORT_PATH / ".processed_settings"
 PASSWORD_CHANGES_PATH = Path(settings.EXPORT_DIR) / "password_changes"
+PASSWORD_CHANGE_LOG = ChangeLog(PASSWORD_CHANGES_PATH, "password_changes")
+# Last password change sequence number applied here
+PASSWORD_CHANGE_OFFSET = LogOffset(Path(settings.IMPORT_DIR) / "password_changes.offset")
+
+# Password changes applied per bulk UPDATE
+PASSWORD_BATCH_SIZE = 5000
+
+# (size, mtime_ns, checksum) of the last latest.json seen by this worker, so
+# an untouched file is not even re-hashed
+_last_seen_settings_file = None
+
+
+def _read_processed_checksum():
+    try:
+        with open(PROCESSED_FILE, "r", encoding="utf-8") as f:
+            return json.load(f).get("checksum")
+    except (OSError, ValueError):
+        return None
+
+
+def _settings_file_checksum(latest_file: Path):
+    """
+    Returns the checksum of ``latest_file`` if it still has to be applied,
+    or None if it is unchanged since the last successful import.
+    """
+    global _last_seen_settings_file
+    stat = latest_file.stat()
+    signature = (stat.st_size, stat.st_mtime_ns)
+    if _last_seen_settings_file and _last_seen_settings_file[:2] == signature:
+        checksum = _last_seen_settings_file[2]
+    else:
+        checksum = calculate_checksum(latest_file)
+        _last_seen_settings_file = (*signature, checksum)
+    return None if checksum == _read_processed_checksum() else checksum
+
+
+async def upsert_settings(db, imported_settings: list) -> list:
+    """
+    Writes imported settings with one INSERT ... ON CONFLICT (key) DO UPDATE.
+
+    Rows whose value and description are already current are left alone.
+    The caller commits.
+
+    Returns:
+        Keys that were inserted or actually changed.
+    """
+    # A key exported twice keeps its last occurrence
+    rows = {
+        setting.key: {
+            "key": setting.key,
+            "value": setting.value,
+            "description": setting.description,
+            "is_public": True,
+        }
+        for setting in imported_settings
+    }
+    if not rows:
+        return []
+
+    stmt = insert(Settings).values(list(rows.values()))
+    # json has no equality operator; compare as jsonb
+    changed = or_(
+        cast(Settings.value, JSONB).is_distinct_from(cast(stmt.excluded.value, JSONB)),
+        Settings.description.is_distinct_from(stmt.excluded.description),
+        Settings.is_public.is_distinct_from(stmt.excluded.is_public),
+    )
+    result = await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Settings.key],
+            set_={
+                "value": stmt.excluded.value,
+                "description": stmt.excluded.description,
+                "is_public": stmt.excluded.is_public,
+                "updated_at": func.now(),
+            },
+            where=changed,
+        ).returning(Settings.key)
+    )
+    return list(result.scalars().all())
+
+
+async def apply_password_changes(db, changes: list) -> tuple[int, list]:
+    """
+    Applies password change log records with one bulk UPDATE.
+
+    Only the newest change per user is written. The caller commits.
+
+    Returns:
+        (number of users updated, error messages)
+    """
+    errors = []
+    latest = {}
+    for change in changes:
+        user_id = change.get("user_id")
+        if not user_id or not change.get("hashed_password"):
+            errors.append(
+                f"Invalid password change for {change.get('username')}: missing user_id or hashed_password"
+            )
+            continue
+        try:
+            latest[uuid.UUID(str(user_id))] = change
+        except ValueError:
+            errors.append(f"Invalid user_id {user_id} for {change.get('username')}")
+
+    if not latest:
+        return 0, errors
+
+    result = await db.execute(select(User.id).where(User.id.in_(list(latest))))
+    existing = set(result.scalars().all())
+    for user_id in latest.keys() - existing:
+        errors.append(f"User {latest[user_id].get('username')} ({user_id}) not found")
+
+    synced_at = datetime.utcnow()
+    rows = [
+        {"id": user_id, "hashed_password": latest[user_id]["hashed_password"], "synced_at": synced_at}
+        for user_id in existing
+    ]
+    if rows:
+        # ORM bulk UPDATE by primary key: one executemany statement
+        await db.execute(update(User), rows)
+    return len(rows), errors
 
 @shared_task
 def import_settings_from_response_network():
     """
     Import settings from response network.
     
+    Settings are only re-applied when latest.json's checksum differs from
+    the last import, and then with a single upsert statement.
+    
     Also automatically processes password changes if available:
-    - Checks for password_changes_queue.json
-    - Updates user passwords automatically
+    - Reads the password change log after the last applied sequence number
+    - Updates user passwords in one bulk UPDATE per batch
+    - Stores the new offset only after the batch commits
     - No manual intervention needed
     """
     async def _import():
@@ -41,98 +173,49 @@ def import_settings_from_response_network():
             else:
                 # Get latest settings file
                 latest_file = IMPORT_PATH / "latest.json"
-                if latest_file.exists():
+                checksum = _settings_file_checksum(latest_file) if latest_file.exists() else None
+                if checksum:
                     # Read settings data
                     with open(latest_file, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                        import_data = SettingsImport(**data)
+                        import_data = SettingsImport(**json.load(f))
                     
-                    async with get_db() as db:
-                        # For each imported setting
-                        for setting in import_data.settings:
-                            # Check if setting already exists
-                            result = await db.execute(
-                                select(Settings).where(Settings.key == setting.key)
-                            )
-                            existing = result.scalar_one_or_none()
-                            
-                            if existing:
-                                # Update existing setting
-                                existing.value = setting.value
-                                existing.description = setting.description
-                                existing.is_active = True
-                                existing.updated_at = datetime.utcnow()
-                            else:
-                                # Create new setting
-                                new_setting = Settings(
-                                    key=setting.key,
-                                    value=setting.value,
-                                    description=setting.description,
-                                    is_active=True,
-                                )
-                                db.add(new_setting)
-                        
+                    async with AsyncSessionFactory() as db:
+                        changed_keys = await upsert_settings(db, import_data.settings)
                         await db.commit()
-                        results["settings_imported"] = len(import_data.settings)
+                    
+                    with open(PROCESSED_FILE, "w", encoding="utf-8") as f:
+                        json.dump({
+                            "checksum": checksum,
+                            "imported_at": datetime.utcnow().isoformat(),
+                            "changed_keys": len(changed_keys),
+                        }, f)
+                    
+                    results["settings_imported"] = len(changed_keys)
+                    if changed_keys:
+                        # Only a real change invalidates the API snapshots
+                        await bump_settings_version()
         except Exception as e:
             results["errors"].append(f"Settings import error: {str(e)}")
         
         # ============ AUTO-SYNC PASSWORD CHANGES ============
         try:
-            queue_file = PASSWORD_CHANGES_PATH / "password_changes_queue.json"
-            
-            if queue_file.exists():
-                # Read password changes
-                with open(queue_file, "r") as f:
-                    password_changes = json.load(f)
-                
-                if not isinstance(password_changes, list):
-                    password_changes = [password_changes]
-                
-                async with get_db() as db:
-                    # Apply each password change
-                    for change in password_changes:
-                        try:
-                            user_id = change.get("user_id")
-                            hashed_password = change.get("hashed_password")
-                            username = change.get("username")
-                            
-                            if not user_id or not hashed_password:
-                                results["errors"].append(
-                                    f"Invalid password change for {username}: missing user_id or hashed_password"
-                                )
-                                continue
-                            
-                            # Get user
-                            result = await db.execute(
-                                select(User).where(User.id == user_id)
-                            )
-                            user = result.scalar_one_or_none()
-                            
-                            if not user:
-                                results["errors"].append(f"User {username} ({user_id}) not found")
-                                continue
-                            
-                            # Update password
-                            user.hashed_password = hashed_password
-                            user.synced_at = datetime.utcnow()
-                            db.add(user)
-                            results["passwords_synced"] += 1
-                            
-                        except Exception as e:
-                            results["errors"].append(
-                                f"Error syncing password for {change.get('username', 'unknown')}: {str(e)}"
-                            )
-                    
+            offset = PASSWORD_CHANGE_OFFSET.load()
+            while True:
+                password_changes = list(PASSWORD_CHANGE_LOG.read_from(offset, PASSWORD_BATCH_SIZE))
+                if not password_changes:
+                    break
+
+                async with AsyncSessionFactory() as db:
+                    synced, errors = await apply_password_changes(db, password_changes)
                     await db.commit()
-                
-                # Delete queue file after successful import
-                if results["passwords_synced"] > 0:
-                    queue_file.unlink()
-                    
-        except FileNotFoundError:
-            # No password changes to sync, this is normal
-            pass
+
+                # Re-applying a batch after a crash here is harmless
+                offset = password_changes[-1]["seq"]
+                PASSWORD_CHANGE_OFFSET.store(offset)
+                results["passwords_synced"] += synced
+                results["errors"].extend(errors)
+
+            PASSWORD_CHANGE_LOG.prune(offset)
         except Exception as e:
             results["errors"].append(f"Password sync error: {str(e)}")
         
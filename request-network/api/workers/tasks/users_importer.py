@@ -30,6 +30,7 @@ except ImportError:
 
 # Import ImportStorageService
 from services.import_storage import ImportStorageService
+from auth.principal_cache import bump_users_version
 import logging
 
 logger = logging.getLogger(__name__)
@@ -48,6 +49,7 @@ def import_users_from_response_network(self):
     2. Calculate checksum and compare with last imported
     3. If changed, import/update users
     4. Save checksum for next comparison
+    5. Bump the users version so API processes drop cached principals
     
     This is a DELTA sync - only updates when files change.
     """
@@ -160,6 +162,8 @@ def import_users_from_response_network(self):
                     imported_count += 1
 
             db.commit()
+            if imported_count or updated_count:
+                bump_users_version()
 
             # Save new checksum
             with open(PROCESSED_FILE, "w", encoding="utf-8") as f:
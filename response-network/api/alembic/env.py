@@ -18,6 +18,7 @@ from alembic import context
 # Import all models here
 from shared.database.base import Base
 from shared.models.worker_settings import WorkerSettings
+from shared.models.result_blob import ResultBlob  # noqa
 from models.user import User
 from models.settings import Settings, UserSettings
 from models.request_type import RequestType
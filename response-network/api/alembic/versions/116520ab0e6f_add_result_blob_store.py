@@ -0,0 +1,50 @@
+"""Add content-addressed result blob store
+
+Revision ID: 116520ab0e6f
+Revises: 06eb34f02521
+Create Date: 2026-10-19 09:12:04.512230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '116520ab0e6f'
+down_revision: Union[str, None] = '06eb34f02521'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('result_blobs',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('peer_synced_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    with op.batch_alter_table('result_blobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_result_blobs_peer_synced_at'), ['peer_synced_at'], unique=False)
+
+    with op.batch_alter_table('query_results', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('result_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_query_results_result_hash'), ['result_hash'], unique=False)
+        batch_op.create_foreign_key('fk_query_results_result_hash_result_blobs', 'result_blobs', ['result_hash'], ['hash'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('query_results', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_query_results_result_hash_result_blobs', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_query_results_result_hash'))
+        batch_op.drop_column('result_hash')
+
+    with op.batch_alter_table('result_blobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_result_blobs_peer_synced_at'))
+
+    op.drop_table('result_blobs')
@@ -0,0 +1,27 @@
+"""Drop unused ref_count from result_blobs
+
+Revision ID: 4b7e2d9a0c53
+Revises: 116520ab0e6f
+Create Date: 2026-10-19 16:21:42.530918+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2d9a0c53'
+down_revision: Union[str, None] = '116520ab0e6f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('result_blobs', schema=None) as batch_op:
+        batch_op.drop_column('ref_count')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('result_blobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ref_count', sa.Integer(), nullable=False, server_default='1'))
@@ -53,6 +53,28 @@ class Settings(BaseSettings):
     EXPORT_FTP_PATH: str = "/exports"
     EXPORT_FTP_USE_TLS: bool = False
 
+    # Threads for blocking storage I/O (boto3, ftplib, file copies)
+    STORAGE_IO_WORKERS: int = 16
+
+    # Transfer bundles: pack each sync window into one archive
+    TRANSFER_BUNDLE_ENABLED: bool = False
+    TRANSFER_BUNDLE_CODEC: str = "gzip"  # gzip or identity
+    TRANSFER_CHUNK_SIZE_BYTES: int = 4 * 1024 * 1024  # Merkle chunk size for batch files
+    TRANSFER_VERIFY_WORKERS: int = 4  # Threads used to hash chunks on import
+    TRANSFER_METADATA_MAX_WAIT_SECONDS: int = 3600  # Then import a data file without metadata unverified
+    EXPORT_MAX_PART_BYTES: int = 0  # Split export batches into parts of this size (0 = no limit)
+
+    # Import watcher: dispatch importers on file events instead of polling
+    IMPORT_WATCHER_ENABLED: bool = False
+    IMPORT_WATCH_SETTLE_SECONDS: float = 2.0
+    IMPORT_POLL_FALLBACK_SECONDS: float = 300.0  # Beat interval for importers while the watcher runs
+
+    # Results export: batch size adapts to backlog depth and target file size
+    RESULTS_EXPORT_TARGET_FILE_BYTES: int = 64 * 1024 * 1024
+    RESULTS_EXPORT_MIN_BATCH: int = 50
+    RESULTS_EXPORT_MAX_BATCH: int = 50000
+    RESULTS_EXPORT_CHUNK_SIZE: int = 1000  # Rows fetched and marked exported per round trip
+
     @property
     def DATABASE_URL(self) -> str:
         return f"postgresql+asyncpg://{self.RESPONSE_DB_USER}:{self.RESPONSE_DB_PASSWORD}@{self.RESPONSE_DB_HOST}:{self.RESPONSE_DB_PORT}/{self.RESPONSE_DB_NAME}"
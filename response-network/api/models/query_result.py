@@ -5,6 +5,7 @@ from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from shared.database.base import BaseModel, UUIDMixin, TimestampMixin
+from shared.models.result_blob import ResultBlob
 
 
 class QueryResult(BaseModel, UUIDMixin, TimestampMixin):
@@ -12,7 +13,9 @@ class QueryResult(BaseModel, UUIDMixin, TimestampMixin):
 
     request_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("incoming_requests.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
     original_request_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
-    result_data: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # Inline payload for rows written before the blob store; new rows use result_hash
+    stored_result_data: Mapped[dict | None] = mapped_column("result_data", JSONB, nullable=True)
+    result_hash: Mapped[str | None] = mapped_column(ForeignKey("result_blobs.hash"), nullable=True, index=True)
     result_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
     execution_time_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
     elasticsearch_took_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -22,4 +25,16 @@ class QueryResult(BaseModel, UUIDMixin, TimestampMixin):
     export_batch_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True, index=True)
     meta: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
 
-    request = relationship("IncomingRequest", back_populates="result")
\ No newline at end of file
+    request = relationship("IncomingRequest", back_populates="result")
+    blob: Mapped[ResultBlob | None] = relationship(ResultBlob, lazy="joined")
+
+    @property
+    def result_data(self) -> dict | None:
+        """The result payload, resolved from the blob store when deduplicated."""
+        if self.stored_result_data is not None:
+            return self.stored_result_data
+        return self.blob.payload if self.blob is not None else None
+
+    @result_data.setter
+    def result_data(self, value: dict | None) -> None:
+        self.stored_result_data = value
\ No newline at end of file
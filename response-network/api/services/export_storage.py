@@ -1,27 +1,54 @@
 """
 Storage service for handling file exports to different destinations.
 """
+import json
 from pathlib import Path
-from typing import BinaryIO, Union
-import tempfile
+from typing import Any, Iterator
 
 from core.config import settings
+from storage.base import Content
 from storage.local import LocalStorageHandler
 from storage.ftp import FTPStorageHandler
 
+# Encoded JSON is handed to the storage handler in blocks of about this size
+JSON_CHUNK_BYTES = 64 * 1024
+
+
+def json_chunks(data: Any, chunk_size: int = JSON_CHUNK_BYTES, **dumps_kwargs) -> Iterator[bytes]:
+    """
+    Encodes ``data`` as UTF-8 JSON incrementally, yielding blocks of roughly
+    ``chunk_size`` bytes, so large exports are never held as one string.
+    """
+    buffer = []
+    size = 0
+    for piece in json.JSONEncoder(**dumps_kwargs).iterencode(data):
+        encoded = piece.encode("utf-8")
+        buffer.append(encoded)
+        size += len(encoded)
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
 
 class ExportStorageService:
     """Service for saving export files to configured destination."""
-    
+
     @staticmethod
-    async def save_export_file(filename: str, data: bytes) -> str:
+    async def save_export_file(filename: str, data: Content) -> str:
         """
         Save export file to configured destination.
-        
+
+        The content is streamed straight to the destination under a
+        temporary name and renamed into place, so it is written once and
+        readers never see a partial file.
+
         Args:
             filename: Name of the file to save
-            data: File content as bytes
-            
+            data: File content as bytes or an iterable of byte chunks
+
         Returns:
             Path or URL where file was saved
         """
@@ -29,27 +56,19 @@ class ExportStorageService:
             return await ExportStorageService._save_to_ftp(filename, data)
         else:
             return await ExportStorageService._save_to_local(filename, data)
-    
+
     @staticmethod
-    async def _save_to_local(filename: str, data: bytes) -> str:
+    async def _save_to_local(filename: str, data: Content) -> str:
         """Save file to local file system."""
         handler = LocalStorageHandler({"base_path": settings.EXPORT_DIR})
-        
-        # Write to temp file first
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename).suffix) as tmp:
-            tmp.write(data)
-            tmp_path = tmp.name
-        
-        # Upload (copy) to destination
-        await handler.upload_file(tmp_path, filename)
-        
-        # Clean up temp file
-        Path(tmp_path).unlink()
-        
+
+        if not await handler.write_file(filename, data):
+            raise IOError(f"Failed to write export file {filename} to {settings.EXPORT_DIR}")
+
         return str(Path(settings.EXPORT_DIR) / filename)
-    
+
     @staticmethod
-    async def _save_to_ftp(filename: str, data: bytes) -> str:
+    async def _save_to_ftp(filename: str, data: Content) -> str:
         """Save file to FTP server."""
         ftp_settings = {
             "host": settings.EXPORT_FTP_HOST,
@@ -59,18 +78,10 @@ class ExportStorageService:
             "base_path": settings.EXPORT_FTP_PATH,
             "use_tls": settings.EXPORT_FTP_USE_TLS,
         }
-        
+
         handler = FTPStorageHandler(ftp_settings)
-        
-        # Write to temp file first
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename).suffix) as tmp:
-            tmp.write(data)
-            tmp_path = tmp.name
-        
-        # Upload to FTP
-        await handler.upload_file(tmp_path, filename)
-        
-        # Clean up temp file
-        Path(tmp_path).unlink()
-        
+
+        if not await handler.write_file(filename, data):
+            raise IOError(f"Failed to upload export file {filename} to {settings.EXPORT_FTP_HOST}")
+
         return f"ftp://{settings.EXPORT_FTP_HOST}{settings.EXPORT_FTP_PATH}/{filename}"
@@ -41,6 +41,14 @@ class WorkerSettingsService:
         except Exception:
             return False
     
+    async def upload_many(self, settings: WorkerSettings, items: list[tuple[str, str]]) -> Dict[str, bool]:
+        """Upload (local_path, remote_path) pairs concurrently."""
+        try:
+            handler = self._get_handler(settings)
+            return await handler.upload_many(items)
+        except Exception:
+            return {remote: False for _, remote in items}
+    
     async def download_file(self, settings: WorkerSettings, remote_path: str, local_path: str) -> bool:
         """Download file from storage."""
         try:
@@ -49,11 +57,11 @@ class WorkerSettingsService:
         except Exception:
             return False
     
-    async def list_files(self, settings: WorkerSettings, path: str) -> list[str]:
-        """List files in storage path."""
+    async def list_files(self, settings: WorkerSettings, path: str, prefix: str = "") -> list[str]:
+        """List files in storage path, optionally only those starting with prefix."""
         try:
             handler = self._get_handler(settings)
-            return await handler.list_files(path)
+            return await handler.list_files(path, prefix)
         except Exception:
             return []
     
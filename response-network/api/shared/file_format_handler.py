@@ -1,12 +1,19 @@
+import os
 import json
 import uuid
 import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Dict, Any, Generator, Union, Optional, Tuple
 
 FILENAME_FORMAT = "{timestamp}_{batch_type}_{batch_id}"
 
+# Batch files are hashed in fixed-size chunks so a corrupted byte only
+# invalidates (and requires re-sending) the chunk that contains it.
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
 class JSONLHandler:
     """
     A utility class to handle reading from and writing to JSONL (JSON Lines) files.
@@ -53,21 +60,204 @@ class JSONLHandler:
                     yield json.loads(line)
 
 
+class ExportPart:
+    """
+    One part file written by :class:`SizeCappedJSONLWriter`.
+
+    Until the writer publishes the batch the data lives at ``tmp_path``;
+    metadata should be computed from there and written before publishing.
+    """
+
+    def __init__(self, tmp_path: Path, part_number: int):
+        self.tmp_path = tmp_path
+        self.part_number = part_number
+        self.part_count = 0
+        self.path: Optional[Path] = None
+        self.record_count = 0
+        self.size_bytes = 0
+
+    @property
+    def meta_path(self) -> Path:
+        """Metadata file importers look for next to the published part."""
+        return metadata_path(self.path)
+
+
+class SizeCappedJSONLWriter:
+    """
+    Writes JSONL records into one or more part files of at most
+    ``max_part_bytes`` each (0 means unlimited).
+
+    A record larger than the budget gets a part of its own rather than being
+    split. Parts are written under hidden temporary names; :meth:`close`
+    fixes the final names and :meth:`publish` renames them into place, so
+    callers can write part metadata and commit the export first and
+    importers never see a part without its metadata or one whose export was
+    rolled back. A batch that fits in one part keeps the plain
+    ``{stem}.jsonl`` name; otherwise parts are named ``{stem}.partNNN.jsonl``.
+    """
+
+    def __init__(self, directory: Union[str, Path], stem: str, max_part_bytes: int = 0):
+        if max_part_bytes < 0:
+            raise ValueError("max_part_bytes must not be negative")
+        self.directory = Path(directory)
+        self.stem = stem
+        self.max_part_bytes = max_part_bytes
+        self.parts: List[ExportPart] = []
+        self._file = None
+        self._closed = False
+
+    def __enter__(self) -> "SizeCappedJSONLWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.abort()
+        elif not self._closed:
+            self.close()
+
+    @property
+    def record_count(self) -> int:
+        return sum(part.record_count for part in self.parts)
+
+    def _start_part(self) -> ExportPart:
+        if self._file is not None:
+            self._file.close()
+        part = ExportPart(self.directory / f".{self.stem}.part{len(self.parts) + 1:03d}.tmp", len(self.parts) + 1)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._file = part.tmp_path.open('wb')
+        self.parts.append(part)
+        return part
+
+    def write(self, record: Dict[str, Any]) -> ExportPart:
+        """Serializes and writes one record; returns the part it landed in."""
+        return self.write_line(json.dumps(record, ensure_ascii=False))
+
+    def write_line(self, line: str) -> ExportPart:
+        """Writes one pre-serialized JSON line, rolling over when the budget is reached."""
+        if self._closed:
+            raise ValueError("Writer is closed")
+        data = line.encode('utf-8') + b'\n'
+        part = self.parts[-1] if self.parts else self._start_part()
+        if (
+            self.max_part_bytes
+            and part.record_count
+            and part.size_bytes + len(data) > self.max_part_bytes
+        ):
+            part = self._start_part()
+        self._file.write(data)
+        part.size_bytes += len(data)
+        part.record_count += 1
+        return part
+
+    def close(self) -> List[ExportPart]:
+        """Finishes writing and assigns final names; the parts stay unpublished."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._closed = True
+        part_count = len(self.parts)
+        for part in self.parts:
+            part.part_count = part_count
+            name = f"{self.stem}.jsonl" if part_count == 1 else f"{self.stem}.part{part.part_number:03d}.jsonl"
+            part.path = self.directory / name
+        return self.parts
+
+    def publish(self) -> List[Path]:
+        """Renames every part into place; call after their metadata is written."""
+        if not self._closed:
+            self.close()
+        for part in self.parts:
+            os.replace(part.tmp_path, part.path)
+        return [part.path for part in self.parts]
+
+    def abort(self) -> None:
+        """Discards every unpublished part and any metadata written for it."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._closed = True
+        for part in self.parts:
+            if part.tmp_path.exists() and part.path is not None:
+                part.meta_path.unlink(missing_ok=True)
+            part.tmp_path.unlink(missing_ok=True)
+
+
+def adaptive_batch_size(
+    backlog: int,
+    avg_record_bytes: float,
+    target_file_bytes: int,
+    min_batch: int,
+    max_batch: int,
+) -> int:
+    """
+    Picks how many records to export in one run.
+
+    Drains the whole backlog when it fits, otherwise as many records as fit
+    in ``target_file_bytes`` at the observed average record size, clamped to
+    ``[min_batch, max_batch]``. Never more than the backlog.
+    """
+    if backlog <= 0:
+        return 0
+    by_size = int(target_file_bytes // avg_record_bytes) if avg_record_bytes > 0 else max_batch
+    return min(backlog, max(min_batch, min(max_batch, by_size)))
+
+
 class BatchMetadata:
     """
     Handles the creation, reading, and validation of batch metadata files.
     """
-    def __init__(self, batch_id: uuid.UUID, batch_type: str, record_count: int, file_path: Path, checksum: str):
+    def __init__(
+        self,
+        batch_id: uuid.UUID,
+        batch_type: str,
+        record_count: int,
+        file_path: Path,
+        checksum: str,
+        chunk_size: Optional[int] = None,
+        chunk_hashes: Optional[List[str]] = None,
+        part_number: Optional[int] = None,
+        part_count: Optional[int] = None,
+    ):
         self.batch_id = batch_id
         self.batch_type = batch_type
         self.record_count = record_count
         self.file_path = file_path
         self.checksum = checksum
+        self.chunk_size = chunk_size
+        self.chunk_hashes = chunk_hashes
+        self.part_number = part_number
+        self.part_count = part_count
         self.created_at = datetime.now(timezone.utc)
 
+    @classmethod
+    def from_file(
+        cls,
+        batch_id: uuid.UUID,
+        batch_type: str,
+        record_count: int,
+        file_path: Path,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_workers: Optional[int] = None,
+        part_number: Optional[int] = None,
+        part_count: Optional[int] = None,
+    ) -> "BatchMetadata":
+        """Builds metadata for a finished data file, including its chunk manifest."""
+        chunk_hashes = calculate_chunk_hashes(file_path, chunk_size, max_workers)
+        return cls(
+            batch_id=batch_id,
+            batch_type=batch_type,
+            record_count=record_count,
+            file_path=Path(file_path),
+            checksum=calculate_checksum(file_path),
+            chunk_size=chunk_size,
+            chunk_hashes=chunk_hashes,
+            part_number=part_number,
+            part_count=part_count,
+        )
+
     def to_dict(self) -> Dict[str, Any]:
         """Serializes the metadata to a dictionary."""
-        return {
+        data = {
             "batch_id": str(self.batch_id),
             "batch_type": self.batch_type,
             "record_count": self.record_count,
@@ -75,10 +265,16 @@ class BatchMetadata:
             "checksum_sha256": self.checksum,
             "created_at_utc": self.created_at.isoformat(),
         }
+        if self.part_count is not None:
+            data["part_number"] = self.part_number
+            data["part_count"] = self.part_count
+        if self.chunk_hashes is not None:
+            data.update(chunk_manifest(self.chunk_hashes, self.chunk_size))
+        return data
 
-    def write_metadata_file(self) -> Path:
-        """Writes the metadata to a .meta file next to the data file."""
-        meta_path = self.file_path.with_suffix('.meta')
+    def write_metadata_file(self, meta_path: Optional[Path] = None) -> Path:
+        """Writes the metadata to a .meta file (or ``meta_path``) next to the data file."""
+        meta_path = meta_path or self.file_path.with_suffix('.meta')
         with meta_path.open('w', encoding='utf-8') as f:
             json.dump(self.to_dict(), f, indent=2)
         return meta_path
@@ -118,6 +314,297 @@ def calculate_checksum(file_path: Union[str, Path]) -> str:
     """Calculates the SHA-256 checksum of a file."""
     sha256_hash = hashlib.sha256()
     with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
+        for byte_block in iter(lambda: f.read(1024 * 1024), b""):
             sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
\ No newline at end of file
+    return sha256_hash.hexdigest()
+
+
+def _hash_chunk(fd: int, index: int, chunk_size: int) -> str:
+    # os.pread lets worker threads share one descriptor; hashlib releases
+    # the GIL for large buffers, so chunks are hashed on several cores.
+    return hashlib.sha256(os.pread(fd, chunk_size, index * chunk_size)).hexdigest()
+
+
+def _default_workers() -> int:
+    return min(8, os.cpu_count() or 1)
+
+
+def calculate_chunk_hashes(
+    file_path: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: Optional[int] = None,
+) -> List[str]:
+    """
+    Calculates the SHA-256 of every fixed-size chunk of a file in parallel.
+    The last chunk may be shorter; an empty file has no chunks.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+
+    file_size = os.path.getsize(file_path)
+    chunk_count = (file_size + chunk_size - 1) // chunk_size
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers or _default_workers()) as pool:
+            return list(pool.map(lambda index: _hash_chunk(fd, index, chunk_size), range(chunk_count)))
+    finally:
+        os.close(fd)
+
+
+def merkle_root(chunk_hashes: List[str]) -> str:
+    """
+    Computes the Merkle root of a list of chunk hashes.
+
+    Each level hashes adjacent pairs (left || right as raw bytes); an odd
+    node at the end of a level is promoted unchanged. The root of a single
+    chunk is that chunk's hash; the root of no chunks is the hash of b"".
+    """
+    if not chunk_hashes:
+        return hashlib.sha256(b"").hexdigest()
+
+    level = [bytes.fromhex(h) for h in chunk_hashes]
+    while len(level) > 1:
+        next_level = [
+            hashlib.sha256(level[i] + level[i + 1]).digest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+    return level[0].hex()
+
+
+def chunk_manifest(chunk_hashes: List[str], chunk_size: int) -> Dict[str, Any]:
+    """Returns the chunk manifest fields recorded in batch metadata."""
+    return {
+        "chunk_size": chunk_size,
+        "chunk_count": len(chunk_hashes),
+        "chunk_hashes": chunk_hashes,
+        "merkle_root": merkle_root(chunk_hashes),
+    }
+
+
+def build_chunk_manifest(
+    file_path: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Hashes a file in chunks and returns its chunk manifest fields."""
+    return chunk_manifest(calculate_chunk_hashes(file_path, chunk_size, max_workers), chunk_size)
+
+
+def verify_chunks(
+    file_path: Union[str, Path],
+    metadata: Dict[str, Any],
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Verifies a received batch file against the chunk manifest in its metadata.
+
+    Returns:
+        A report with ``valid`` (bool), ``bad_chunks`` (indices that must be
+        re-sent, including chunks missing from a truncated file),
+        ``extra_bytes`` (data beyond the manifest) and ``chunk_size``.
+        Metadata without a chunk manifest is reported as valid with
+        ``verified`` False so callers can fall back to the whole-file checksum.
+    """
+    chunk_size = metadata.get("chunk_size")
+    expected = metadata.get("chunk_hashes")
+    if not chunk_size or expected is None:
+        return {"valid": True, "verified": False, "bad_chunks": [], "extra_bytes": 0, "chunk_size": chunk_size}
+
+    if metadata.get("merkle_root") and merkle_root(expected) != metadata["merkle_root"]:
+        # The manifest itself is damaged; nothing in it can be trusted
+        return {
+            "valid": False,
+            "verified": True,
+            "bad_chunks": list(range(len(expected))),
+            "extra_bytes": 0,
+            "chunk_size": chunk_size,
+        }
+
+    actual = calculate_chunk_hashes(file_path, chunk_size, max_workers)
+    bad_chunks = [
+        index for index, expected_hash in enumerate(expected)
+        if index >= len(actual) or actual[index] != expected_hash
+    ]
+    extra_bytes = max(0, os.path.getsize(file_path) - len(expected) * chunk_size)
+    return {
+        "valid": not bad_chunks and not extra_bytes,
+        "verified": True,
+        "bad_chunks": bad_chunks,
+        "extra_bytes": extra_bytes,
+        "chunk_size": chunk_size,
+    }
+
+def verify_batch_file(
+    file_path: Union[str, Path],
+    metadata: Dict[str, Any],
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Verifies a received batch file by its chunk manifest, or by the
+    whole-file ``checksum_sha256`` when the metadata has no manifest.
+
+    Returns:
+        A :func:`verify_chunks` report. Without a manifest a mismatching (or
+        missing) checksum marks the whole file as one bad chunk, so it is
+        re-sent entirely.
+    """
+    report = verify_chunks(file_path, metadata, max_workers)
+    if report["verified"]:
+        return report
+
+    expected = metadata.get("checksum_sha256")
+    valid = expected is not None and calculate_checksum(file_path) == expected
+    file_size = max(os.path.getsize(file_path), metadata.get("file_size_bytes") or 0)
+    return {
+        "valid": valid,
+        "verified": expected is not None,
+        "bad_chunks": [] if valid else [0],
+        "extra_bytes": 0,
+        "chunk_size": file_size or 1,
+    }
+
+
+def missing_blobs_report(metadata: Dict[str, Any], missing_hashes: List[str]) -> Dict[str, Any]:
+    """
+    A report for a file whose chunks are intact but whose hash-only lines
+    reference result blobs the receiver does not hold; the sender must
+    re-send those payloads.
+    """
+    return {
+        "valid": False,
+        "verified": True,
+        "bad_chunks": [],
+        "extra_bytes": 0,
+        "chunk_size": metadata.get("chunk_size"),
+        "missing_result_blobs": sorted(set(missing_hashes)),
+    }
+
+
+def retransfer_request(file_path: Union[str, Path], metadata: Dict[str, Any], report: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Describes the chunks of a damaged batch file the sender must re-send.
+
+    ``byte_ranges`` are half-open ``[start, end)`` offsets into the original
+    file so the sender can read them without re-hashing anything.
+    ``missing_result_blobs`` lists result blobs whose payloads must be
+    re-sent in full.
+    """
+    chunk_size = report["chunk_size"]
+    file_size = metadata.get("file_size_bytes", metadata.get("file_size"))
+    byte_ranges = []
+    for index in report["bad_chunks"]:
+        start = index * chunk_size
+        end = start + chunk_size if file_size is None else min(start + chunk_size, file_size)
+        byte_ranges.append([start, end])
+    return {
+        "filename": Path(file_path).name,
+        "batch_id": metadata.get("batch_id"),
+        "merkle_root": metadata.get("merkle_root"),
+        "chunk_size": chunk_size,
+        "bad_chunks": report["bad_chunks"],
+        "byte_ranges": byte_ranges,
+        "extra_bytes": report.get("extra_bytes", 0),
+        "missing_result_blobs": report.get("missing_result_blobs", []),
+        "requested_at_utc": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def quarantine_for_retransfer(
+    data_file: Path,
+    meta_file: Path,
+    metadata: Dict[str, Any],
+    report: Dict[str, Any],
+    retransfer_dir: Path,
+) -> Dict[str, Any]:
+    """
+    Moves a damaged batch (and its metadata) into ``retransfer_dir`` next to
+    a ``.retransfer.json`` report of the chunks the sender must re-send.
+    """
+    retransfer = retransfer_request(data_file, metadata, report)
+    retransfer_dir.mkdir(parents=True, exist_ok=True)
+    report_file = retransfer_dir / f"{data_file.stem}.retransfer.json"
+    with report_file.open('w', encoding='utf-8') as f:
+        json.dump(retransfer, f, indent=2)
+    data_file.rename(retransfer_dir / data_file.name)
+    if meta_file.exists():
+        meta_file.rename(retransfer_dir / meta_file.name)
+    return retransfer
+
+
+def metadata_path(data_file: Path) -> Path:
+    """Returns the ``.meta.json`` path for a ``.jsonl`` data file."""
+    return data_file.with_name(f"{data_file.name[:-len('.jsonl')]}.meta.json")
+
+
+def collect_batch_parts(
+    data_files: List[Path],
+    max_metadata_wait: Optional[float] = None,
+    now: Optional[float] = None,
+) -> Tuple[List[List[Tuple[Path, Path, Dict[str, Any]]]], List[str], List[Path]]:
+    """
+    Groups received data files into batches using their part metadata.
+
+    Files whose metadata has no ``part_count`` are single-part batches.
+    Files whose metadata has not arrived (or cannot be read yet) are held:
+    they may be a part of a split batch and cannot be verified. Parts may
+    arrive in any order; a batch is only returned once every part from 1 to
+    ``part_count`` is present.
+
+    Args:
+        max_metadata_wait: Seconds (by modification time) a data file is
+            held for its metadata; older files are given up on. None holds
+            them indefinitely.
+        now: Current time as a Unix timestamp (defaults to ``time.time()``).
+
+    Returns:
+        ``(complete, waiting, unmanifested)``: complete batches as lists of
+        ``(data_file, meta_file, metadata)`` ordered by part number; the
+        batch ids still missing parts followed by the names of data files
+        still missing their metadata; and data files whose metadata never
+        arrived within ``max_metadata_wait`` (e.g. written by an exporter
+        that predates batch metadata).
+    """
+    if now is None:
+        now = time.time()
+    complete = []
+    split_batches: Dict[str, Dict[int, Tuple[Path, Path, Dict[str, Any]]]] = {}
+    part_counts: Dict[str, int] = {}
+
+    without_metadata = []
+    unmanifested = []
+
+    for data_file in sorted(data_files):
+        meta_file = metadata_path(data_file)
+        try:
+            with meta_file.open('r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            metadata = None
+        if not isinstance(metadata, dict):
+            if max_metadata_wait is not None and now - data_file.stat().st_mtime > max_metadata_wait:
+                unmanifested.append(data_file)
+            else:
+                without_metadata.append(data_file.name)
+            continue
+
+        part_count = metadata.get("part_count") or 1
+        if part_count == 1 or not metadata.get("batch_id"):
+            complete.append([(data_file, meta_file, metadata)])
+            continue
+
+        batch_id = str(metadata["batch_id"])
+        part_counts[batch_id] = part_count
+        split_batches.setdefault(batch_id, {}).setdefault(
+            metadata.get("part_number"), (data_file, meta_file, metadata)
+        )
+
+    waiting = []
+    for batch_id, parts in split_batches.items():
+        if all(number in parts for number in range(1, part_counts[batch_id] + 1)):
+            complete.append([parts[number] for number in range(1, part_counts[batch_id] + 1)])
+        else:
+            waiting.append(batch_id)
+    return complete, waiting + without_metadata, unmanifested
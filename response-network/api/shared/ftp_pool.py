@@ -0,0 +1,451 @@
+"""
+Pooled, persistent FTP sessions for import/export storage.
+
+Logging in to the FTP relay costs more than most transfers, so sessions are
+kept open and reused. Idle sessions are probed with ``NOOP`` before reuse
+once they have been quiet for ``keepalive_interval`` and are recycled when
+the probe fails or they exceed ``max_idle``. Multi-file transfers run
+back-to-back on several pooled sessions at once. ``MLSD`` size/modify facts
+let unchanged files skip the transfer entirely.
+"""
+import ftplib
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Errors after which a session can no longer be trusted. ``error_perm``
+# (5xx replies such as "550 No such file") leaves the session usable.
+SESSION_ERRORS = (ftplib.error_temp, ftplib.error_proto, ftplib.error_reply, OSError, EOFError)
+
+# Downloaded payloads up to this size are kept so an unchanged file is
+# served from memory without a RETR
+DOWNLOAD_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+
+class RemoteFile:
+    """Size and modification time of a remote file, from ``MLSD`` facts."""
+
+    def __init__(self, name: str, size: Optional[int], modify: Optional[str]):
+        self.name = name
+        self.size = size
+        self.modify = modify
+
+    @property
+    def signature(self) -> Tuple[Optional[int], Optional[str]]:
+        return (self.size, self.modify)
+
+
+def _remote_join(*parts: str) -> str:
+    return str(PurePosixPath(*[p for p in parts if p]))
+
+
+class FTPSessionPool:
+    """
+    A bounded pool of authenticated FTP sessions to one server.
+
+    Use :meth:`session` to borrow a raw ``ftplib.FTP`` or the transfer helpers
+    that borrow one for you. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 21,
+        username: str = "anonymous",
+        password: str = "",
+        use_tls: bool = False,
+        max_size: int = 4,
+        keepalive_interval: float = 30.0,
+        max_idle: float = 300.0,
+        timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_size = max_size
+        self.keepalive_interval = keepalive_interval
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle: List[Tuple[ftplib.FTP, float]] = []
+        self._known_dirs: set = set()
+        # remote path -> (sha256, MLSD signature) of what we last uploaded
+        self._uploaded: Dict[str, Tuple[str, Tuple]] = {}
+        # remote path -> (MLSD signature, data or None)
+        self._downloaded: Dict[str, Tuple[Tuple, Optional[bytes]]] = {}
+        self.stats = {"connects": 0, "reused": 0, "recycled": 0, "skipped": 0}
+
+    # -- sessions ---------------------------------------------------------
+
+    def _connect(self) -> ftplib.FTP:
+        ftp = ftplib.FTP_TLS(timeout=self.timeout) if self.use_tls else ftplib.FTP(timeout=self.timeout)
+        ftp.connect(self.host, self.port)
+        ftp.login(self.username, self.password)
+        if self.use_tls:
+            ftp.prot_p()  # Switch to secure data connection
+        with self._lock:
+            self.stats["connects"] += 1
+        return ftp
+
+    @staticmethod
+    def _close(ftp: ftplib.FTP) -> None:
+        try:
+            ftp.quit()
+        except Exception:
+            ftp.close()
+
+    def _checkout(self) -> ftplib.FTP:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                ftp, last_used = self._idle.pop()
+            idle_for = self.clock() - last_used
+            if idle_for > self.max_idle:
+                self._recycle(ftp)
+                continue
+            if idle_for >= self.keepalive_interval:
+                try:
+                    ftp.voidcmd("NOOP")
+                except (ftplib.error_perm, *SESSION_ERRORS):
+                    self._recycle(ftp)
+                    continue
+            with self._lock:
+                self.stats["reused"] += 1
+            return ftp
+        return self._connect()
+
+    def _recycle(self, ftp: ftplib.FTP) -> None:
+        with self._lock:
+            self.stats["recycled"] += 1
+        self._close(ftp)
+
+    @contextmanager
+    def session(self) -> Iterator[ftplib.FTP]:
+        """Borrows a logged-in session; broken sessions are dropped, not returned."""
+        self._slots.acquire()
+        ftp = None
+        try:
+            ftp = self._checkout()
+            yield ftp
+        except SESSION_ERRORS:
+            if ftp is not None:
+                self._recycle(ftp)
+                ftp = None
+            raise
+        finally:
+            if ftp is not None:
+                with self._lock:
+                    self._idle.append((ftp, self.clock()))
+            self._slots.release()
+
+    def keepalive(self) -> int:
+        """
+        Probes idle sessions that have been quiet for ``keepalive_interval``
+        and recycles dead or expired ones. Returns the number recycled.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        keep = []
+        recycled = 0
+        now = self.clock()
+        for ftp, last_used in idle:
+            if now - last_used > self.max_idle:
+                self._recycle(ftp)
+                recycled += 1
+                continue
+            if now - last_used >= self.keepalive_interval:
+                try:
+                    ftp.voidcmd("NOOP")
+                    last_used = now
+                except (ftplib.error_perm, *SESSION_ERRORS):
+                    self._recycle(ftp)
+                    recycled += 1
+                    continue
+            keep.append((ftp, last_used))
+        with self._lock:
+            self._idle.extend(keep)
+        return recycled
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for ftp, _ in idle:
+            self._close(ftp)
+
+    # -- listing ----------------------------------------------------------
+
+    def list_dir(self, path: str) -> Dict[str, RemoteFile]:
+        """Lists the files in ``path`` with their size and modify time (``MLSD``)."""
+        with self.session() as ftp:
+            return self._mlsd_files(ftp, path)
+
+    @staticmethod
+    def _mlsd_files(ftp: ftplib.FTP, path: str) -> Dict[str, RemoteFile]:
+        files = {}
+        for name, facts in ftp.mlsd(path, facts=["type", "size", "modify"]):
+            if facts.get("type") != "file":
+                continue
+            size = facts.get("size")
+            files[name] = RemoteFile(name, int(size) if size is not None else None, facts.get("modify"))
+        return files
+
+    def _remote_info(self, ftp: ftplib.FTP, remote_path: str) -> Optional[RemoteFile]:
+        parent = str(PurePosixPath(remote_path).parent)
+        try:
+            return self._mlsd_files(ftp, parent).get(PurePosixPath(remote_path).name)
+        except ftplib.error_perm:
+            return None
+
+    # -- uploads ----------------------------------------------------------
+
+    def _ensure_dir(self, ftp: ftplib.FTP, directory: str) -> None:
+        if directory in self._known_dirs or directory in ("", "/", "."):
+            return
+        current = "/" if directory.startswith("/") else ""
+        for part in PurePosixPath(directory).parts:
+            if part == "/":
+                continue
+            current = _remote_join(current, part)
+            if current in self._known_dirs:
+                continue
+            try:
+                ftp.mkd(current)
+            except ftplib.error_perm:
+                pass  # Directory already exists
+            self._known_dirs.add(current)
+
+    def upload_bytes(self, remote_path: str, data: bytes, skip_unchanged: bool = True) -> bool:
+        """
+        Uploads ``data`` to ``remote_path`` under a temporary name and renames
+        it into place, so readers never see a partial file.
+
+        Returns:
+            False if the upload was skipped because the remote file is still
+            exactly what this pool last uploaded there, True otherwise.
+        """
+        return self._upload(remote_path, io.BytesIO(data), hashlib.sha256(data).hexdigest(), len(data), skip_unchanged)
+
+    def upload_file(self, local_path: Union[str, Path], remote_path: str, skip_unchanged: bool = True) -> bool:
+        """Uploads a local file; see :meth:`upload_bytes`."""
+        digest = hashlib.sha256()
+        with open(local_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        with open(local_path, "rb") as f:
+            return self._upload(remote_path, f, digest.hexdigest(), os.path.getsize(local_path), skip_unchanged)
+
+    def upload_chunks(self, remote_path: str, chunks: Iterable[bytes], skip_unchanged: bool = True) -> bool:
+        """
+        Uploads content produced as a stream of byte chunks; see :meth:`upload_bytes`.
+
+        The digest is needed before deciding whether to transfer, so chunks
+        are spooled (in memory up to ``DOWNLOAD_CACHE_MAX_BYTES``, on disk
+        beyond) while hashing instead of being joined into one buffer.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_CACHE_MAX_BYTES) as spool:
+            for chunk in chunks:
+                digest.update(chunk)
+                spool.write(chunk)
+                size += len(chunk)
+            spool.seek(0)
+            return self._upload(remote_path, spool, digest.hexdigest(), size, skip_unchanged)
+
+    def _upload(self, remote_path: str, stream, digest: str, size: int, skip_unchanged: bool) -> bool:
+        path = PurePosixPath(remote_path)
+        with self.session() as ftp:
+            previous = self._uploaded.get(remote_path)
+            if skip_unchanged and previous is not None and previous[0] == digest:
+                # Same content as our last upload, and nobody replaced it since
+                info = self._remote_info(ftp, remote_path)
+                if info is not None and info.signature == previous[1]:
+                    with self._lock:
+                        self.stats["skipped"] += 1
+                    return False
+
+            self._ensure_dir(ftp, str(path.parent))
+            tmp_path = str(path.with_name(f".{path.name}.tmp"))
+            ftp.storbinary(f"STOR {tmp_path}", stream)
+            try:
+                ftp.delete(remote_path)
+            except ftplib.error_perm:
+                pass  # Nothing to replace
+            ftp.rename(tmp_path, remote_path)
+            info = self._remote_info(ftp, remote_path) if skip_unchanged else None
+
+        if info is not None and info.size == size:
+            with self._lock:
+                self._uploaded[remote_path] = (digest, info.signature)
+        return True
+
+    # -- downloads --------------------------------------------------------
+
+    def download_bytes(self, remote_path: str, skip_unchanged: bool = True) -> bytes:
+        """
+        Returns the content of ``remote_path``.
+
+        If ``MLSD`` reports the same size and modify time as the last
+        download, the cached content is returned without a ``RETR``.
+        """
+        with self.session() as ftp:
+            info = self._remote_info(ftp, remote_path) if skip_unchanged else None
+            cached = self._downloaded.get(remote_path)
+            if info is not None and cached is not None and cached[0] == info.signature and cached[1] is not None:
+                with self._lock:
+                    self.stats["skipped"] += 1
+                return cached[1]
+
+            buffer = io.BytesIO()
+            ftp.retrbinary(f"RETR {remote_path}", buffer.write)
+
+        data = buffer.getvalue()
+        if info is not None:
+            with self._lock:
+                self._downloaded[remote_path] = (
+                    info.signature,
+                    data if len(data) <= DOWNLOAD_CACHE_MAX_BYTES else None,
+                )
+        return data
+
+    def download_file(
+        self,
+        remote_path: str,
+        local_path: Union[str, Path],
+        info: Optional[RemoteFile] = None,
+        skip_unchanged: bool = True,
+    ) -> bool:
+        """
+        Downloads ``remote_path`` to ``local_path`` atomically.
+
+        Returns:
+            False if skipped because the local copy is from an unchanged
+            remote file, True otherwise.
+        """
+        local = Path(local_path)
+        cached = self._downloaded.get(remote_path)
+        with self.session() as ftp:
+            if skip_unchanged:
+                info = info or self._remote_info(ftp, remote_path)
+                if info is not None and cached is not None and cached[0] == info.signature and local.exists():
+                    with self._lock:
+                        self.stats["skipped"] += 1
+                    return False
+
+            local.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = local.with_name(f".{local.name}.tmp")
+            with open(tmp_path, "wb") as f:
+                ftp.retrbinary(f"RETR {remote_path}", f.write)
+            os.replace(tmp_path, local)
+
+        if info is not None:
+            with self._lock:
+                self._downloaded[remote_path] = (info.signature, None)
+        return True
+
+    # -- multi-file transfers ---------------------------------------------
+
+    def _parallel(self, jobs: List[Callable[[], bool]], max_parallel: Optional[int]) -> List[bool]:
+        workers = max(1, min(max_parallel or self.max_size, self.max_size, len(jobs)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda job: job(), jobs))
+
+    def upload_many(
+        self,
+        items: List[Tuple[Union[str, Path, bytes], str]],
+        max_parallel: Optional[int] = None,
+        skip_unchanged: bool = True,
+    ) -> Dict[str, bool]:
+        """
+        Uploads ``(local path or bytes, remote path)`` pairs back-to-back over
+        up to ``max_parallel`` pooled sessions.
+
+        Returns:
+            remote path -> True if uploaded, False if skipped as unchanged.
+        """
+        def job(source, remote_path):
+            if isinstance(source, bytes):
+                return lambda: self.upload_bytes(remote_path, source, skip_unchanged)
+            return lambda: self.upload_file(source, remote_path, skip_unchanged)
+
+        results = self._parallel([job(source, remote) for source, remote in items], max_parallel)
+        return {remote: uploaded for (_, remote), uploaded in zip(items, results)}
+
+    def download_many(
+        self,
+        remote_dir: str,
+        local_dir: Union[str, Path],
+        names: Optional[List[str]] = None,
+        max_parallel: Optional[int] = None,
+        skip_unchanged: bool = True,
+    ) -> Dict[str, bool]:
+        """
+        Downloads the files of ``remote_dir`` (or just ``names``) into
+        ``local_dir``, listing the directory once with ``MLSD`` and skipping
+        files whose size and modify time have not changed.
+
+        Returns:
+            file name -> True if downloaded, False if skipped as unchanged.
+        """
+        listing = self.list_dir(remote_dir)
+        wanted = [name for name in (names if names is not None else sorted(listing)) if name in listing]
+        local = Path(local_dir)
+
+        def job(name):
+            return lambda: self.download_file(
+                _remote_join(remote_dir, name), local / name, listing[name], skip_unchanged
+            )
+
+        results = self._parallel([job(name) for name in wanted], max_parallel)
+        return dict(zip(wanted, results))
+
+
+_POOLS: Dict[Tuple, FTPSessionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(
+    host: str,
+    port: int = 21,
+    username: str = "anonymous",
+    password: str = "",
+    use_tls: bool = False,
+    **options,
+) -> FTPSessionPool:
+    """
+    Returns the process-wide pool for these credentials, creating it on first
+    use, so every task in a worker shares the same logged-in sessions.
+    """
+    key = (host, int(port or 21), username or "anonymous", password or "", bool(use_tls))
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = FTPSessionPool(*key, **options)
+            _POOLS[key] = pool
+        return pool
+
+
+def close_all_pools() -> None:
+    """Closes every pooled session (worker shutdown)."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
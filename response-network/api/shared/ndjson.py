@@ -0,0 +1,51 @@
+"""
+Helpers for newline-delimited JSON (NDJSON) streams.
+
+Bulk endpoints read one JSON document per line from a streamed body and
+answer with one status line per item, so neither side has to hold the
+whole batch in memory.
+"""
+import json
+from typing import Any, AsyncIterable, AsyncIterator, List, TypeVar
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+T = TypeVar("T")
+
+
+async def iter_lines(chunks: AsyncIterable[bytes], max_line_bytes: int = 1024 * 1024) -> AsyncIterator[bytes]:
+    """
+    Splits a byte stream into lines, skipping blank ones.
+
+    Raises:
+        ValueError: A line is longer than ``max_line_bytes`` (the stream
+            is not NDJSON, or a client is misbehaving).
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+        if len(buffer) > max_line_bytes:
+            raise ValueError(f"NDJSON line longer than {max_line_bytes} bytes")
+    if buffer.strip():
+        yield buffer
+
+
+async def batched(items: AsyncIterable[T], size: int) -> AsyncIterator[List[T]]:
+    """Groups an async stream into lists of at most ``size`` items."""
+    batch: List[T] = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def dumps_line(value: Any) -> bytes:
+    """Serializes one NDJSON line (UUIDs and datetimes as strings)."""
+    return json.dumps(value, default=str, separators=(",", ":")).encode() + b"\n"
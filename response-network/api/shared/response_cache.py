@@ -0,0 +1,582 @@
+"""
+Cache of ready-to-send response bodies.
+
+An entry is the final JSON body (orjson-encoded), gzip-compressed once it
+is larger than ``compress_min_bytes``, stored with the owner's user id in
+one Redis hash. A hit is one HMGET, and the bytes go to clients that accept
+gzip exactly as stored, so the API neither parses nor re-serializes the
+payload and needs no database query to check ownership.
+
+Keys live in a generation, the counter ``response:generation``:
+
+    response:{generation}:{request_id}          the entry (hash)
+    response:{generation}:users:{user_id}       ids of the user's entries (set)
+
+Clearing the whole cache increments the generation (old keys become
+unreachable and expire on their TTL), and a user's entries are dropped
+through their set, so no operation walks the keyspace with KEYS.
+
+The results importer writes entries for the responses it imports
+(:func:`warm_responses`) so the first read of a new result is a hit.
+
+Completed responses only change when the results importer replaces them,
+so each API process also keeps the hottest entries in memory (an LRU
+bounded in bytes). Writers delete the Redis entries and publish the ids on
+``response_invalidate``; every process drops them from its LRU. The LRU is
+only used while that subscription is up, since invalidations published
+while it is down are lost.
+
+Redis health is tracked passively: a failed call marks Redis down and it is
+skipped for a few seconds instead of being pinged before every command.
+"""
+import asyncio
+import gzip
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import orjson
+import redis
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+CODECS = ("identity", "gzip")
+
+INVALIDATION_CHANNEL = "response_invalidate"
+INVALIDATE_ALL = "*"
+
+GENERATION_KEY = "response:generation"
+
+# Entries deleted per pipeline when dropping a user's cache
+DELETE_CHUNK_SIZE = 500
+
+
+def response_key(generation: int, request_id: Any) -> str:
+    return f"response:{generation}:{request_id}"
+
+
+def user_index_key(generation: int, user_id: Any) -> str:
+    return f"response:{generation}:users:{user_id}"
+
+
+def is_entry_key(generation: int, key: str) -> bool:
+    return key.startswith(f"response:{generation}:") and ":users:" not in key
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip (``q=0`` refuses it)."""
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def invalidate_responses(client: redis.Redis, request_ids: Iterable[Any]) -> int:
+    """
+    Drops cached bodies from a synchronous writer (the results importer):
+    deletes the Redis entries and tells API processes to drop their copies.
+
+    Returns:
+        Number of Redis entries deleted; 0 if Redis is unreachable (entries
+        then expire on their TTL).
+    """
+    request_ids = [str(request_id) for request_id in request_ids]
+    if not request_ids:
+        return 0
+    try:
+        generation = int(client.get(GENERATION_KEY) or 0)
+        with client.pipeline(transaction=False) as pipe:
+            pipe.delete(*(response_key(generation, request_id) for request_id in request_ids))
+            pipe.publish(INVALIDATION_CHANNEL, " ".join(request_ids))
+            deleted, _ = pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not invalidate {len(request_ids)} cached responses: {e}")
+        return 0
+    return deleted
+
+
+def redis_headroom(client: redis.Redis, max_memory_ratio: float = 0.9) -> Optional[int]:
+    """
+    Bytes Redis can still take before reaching ``max_memory_ratio`` of its
+    ``maxmemory``; None when no limit is set or INFO is unavailable.
+    """
+    try:
+        memory = client.info("memory")
+    except redis.ResponseError:
+        return None  # INFO disabled (renamed) on managed servers
+    maxmemory = int(memory.get("maxmemory", 0))
+    if not maxmemory:
+        return None
+    return max(0, int(maxmemory * max_memory_ratio) - int(memory.get("used_memory", 0)))
+
+
+def warm_responses(
+    client: redis.Redis,
+    entries: Dict[str, "CachedResponse"],
+    stale_ids: Iterable[Any] = (),
+    ttl_seconds: int = 86400,
+    chunk_size: int = 100,
+    max_memory_ratio: float = 0.9,
+) -> int:
+    """
+    Writes freshly imported responses from a synchronous writer (the results
+    importer) in pipelines of ``chunk_size``, and drops the entries of
+    ``stale_ids`` that are not being written. Every process is told to drop
+    its copies of both.
+
+    Entries that would take Redis past ``max_memory_ratio`` of its
+    ``maxmemory`` are dropped instead of written.
+
+    Returns:
+        Number of entries written; 0 if Redis is unreachable (readers then
+        fill the cache on their first miss).
+    """
+    stale_ids = [request_id for request_id in dict.fromkeys(map(str, stale_ids)) if request_id not in entries]
+    items = list(entries.items())
+    if not items and not stale_ids:
+        return 0
+    warmed = 0
+    try:
+        generation = int(client.get(GENERATION_KEY) or 0)
+        headroom = redis_headroom(client, max_memory_ratio)
+        written = 0
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            with client.pipeline(transaction=False) as pipe:
+                for request_id, entry in chunk:
+                    entry_key = response_key(generation, request_id)
+                    pipe.delete(entry_key)
+                    if headroom is not None and written + len(entry.body) > headroom:
+                        continue
+                    index_key = user_index_key(generation, entry.owner_id)
+                    pipe.hset(entry_key, mapping={"owner": entry.owner_id, "encoding": entry.encoding, "body": entry.body})
+                    pipe.expire(entry_key, ttl_seconds)
+                    pipe.sadd(index_key, request_id)
+                    pipe.expire(index_key, ttl_seconds)
+                    written += len(entry.body)
+                    warmed += 1
+                pipe.publish(INVALIDATION_CHANNEL, " ".join(request_id for request_id, _ in chunk))
+                pipe.execute()
+        if len(items) > warmed:
+            logger.warning(f"Redis memory budget reached, {len(items) - warmed} responses not warmed")
+    except redis.RedisError as e:
+        logger.warning(f"Could not warm {len(items)} cached responses: {e}")
+        return 0
+    invalidate_responses(client, stale_ids)
+    return warmed
+
+
+def encode_response(
+    owner_id: Any,
+    payload: Any,
+    codec: str = "gzip",
+    compress_min_bytes: int = 1024,
+    compress_level: int = 5,
+) -> "CachedResponse":
+    """Serializes (and compresses if large enough) a response payload."""
+    body = orjson.dumps(payload, option=orjson.OPT_UTC_Z)
+    if codec == "gzip" and len(body) >= compress_min_bytes:
+        return CachedResponse(str(owner_id), "gzip", gzip.compress(body, compress_level, mtime=0))
+    return CachedResponse(str(owner_id), "identity", body)
+
+
+class RedisHealth:
+    """
+    Passive Redis health shared by a process's callers.
+
+    Callers report the outcome of their commands. After a failure Redis is
+    considered down for ``retry_after`` seconds; the first call after that
+    tries it again.
+    """
+
+    def __init__(self, retry_after: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        self.retry_after = retry_after
+        self.clock = clock
+        self._down_until: Optional[float] = None
+
+    @property
+    def available(self) -> bool:
+        return self._down_until is None or self.clock() >= self._down_until
+
+    def record_success(self) -> None:
+        if self._down_until is not None:
+            logger.info("Redis is reachable again")
+            self._down_until = None
+
+    def record_failure(self) -> None:
+        if self.available:
+            logger.warning(f"Redis marked down for {self.retry_after}s")
+        self._down_until = self.clock() + self.retry_after
+
+
+class CachedResponse:
+    """One cached body: owner, content encoding and the stored bytes."""
+
+    __slots__ = ("owner_id", "encoding", "body")
+
+    def __init__(self, owner_id: str, encoding: str, body: bytes):
+        self.owner_id = owner_id
+        self.encoding = encoding
+        self.body = body
+
+    def decoded(self) -> bytes:
+        """The body without content encoding."""
+        return gzip.decompress(self.body) if self.encoding == "gzip" else self.body
+
+
+class LocalResponseLRU:
+    """
+    Least-recently-used cached responses bounded by the total size of their
+    bodies. Entries expire after ``ttl`` seconds; bodies larger than
+    ``max_bytes // 4`` are not kept so one payload cannot flush the rest.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.size = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        entry, expires_at = item
+        if self.clock() >= expires_at:
+            self.pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CachedResponse) -> None:
+        self.pop(key)
+        if len(entry.body) > self.max_bytes // 4:
+            return
+        self._entries[key] = (entry, self.clock() + self.ttl)
+        self.size += len(entry.body)
+        while self.size > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.size -= len(evicted.body)
+
+    def pop(self, key: str) -> None:
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self.size -= len(item[0].body)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResponseCache:
+    """
+    Pre-serialized response bodies in an in-process LRU in front of Redis.
+
+    Call :meth:`start` to subscribe to invalidations (the LRU stays unused
+    until then) and :meth:`close` on shutdown. The generation is re-read at
+    most every ``check_interval`` seconds, and at once when the cache is
+    cleared.
+
+    Args:
+        redis_client: Async Redis client returning bytes (not decoded).
+        ttl_seconds: Lifetime of an entry in Redis.
+        codec: "gzip" or "identity".
+        compress_min_bytes: Bodies smaller than this are stored as they are.
+        compress_level: gzip level (speed over size; entries are written once).
+        local_max_bytes: Size of the in-process LRU (0 disables it).
+        local_ttl: Seconds an entry stays in the process, a bound on
+            staleness should an invalidation be missed.
+        health: Redis health shared with the rest of the process.
+        poll_timeout: Seconds the subscriber waits for a message per poll.
+        check_interval: Seconds between generation checks.
+    """
+
+    def __init__(
+        self,
+        redis_client: aioredis.Redis,
+        ttl_seconds: int = 86400,
+        codec: str = "gzip",
+        compress_min_bytes: int = 1024,
+        compress_level: int = 5,
+        local_max_bytes: int = 64 * 1024 * 1024,
+        local_ttl: float = 3600.0,
+        health: Optional[RedisHealth] = None,
+        poll_timeout: float = 1.0,
+        check_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if codec not in CODECS:
+            raise ValueError(f"Unsupported response cache codec: {codec}")
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.codec = codec
+        self.compress_min_bytes = compress_min_bytes
+        self.compress_level = compress_level
+        self.local = LocalResponseLRU(local_max_bytes, local_ttl, clock)
+        self.health = health or RedisHealth(clock=clock)
+        self.poll_timeout = poll_timeout
+        self.check_interval = check_interval
+        self.clock = clock
+        self.generation: Optional[int] = None
+        self._checked_at: Optional[float] = None
+        self._listening = False
+        self._invalidations = 0  # Bumped by every local invalidation
+        self._task: Optional[asyncio.Task] = None
+
+    def encode(self, owner_id: Any, payload: Any) -> CachedResponse:
+        return encode_response(owner_id, payload, self.codec, self.compress_min_bytes, self.compress_level)
+
+    @property
+    def local_enabled(self) -> bool:
+        return self._listening and self.local.max_bytes > 0
+
+    def _remember(self, key: str, entry: CachedResponse, invalidations: int) -> None:
+        # Skipped if an invalidation arrived since the caller started reading
+        if self.local_enabled and invalidations == self._invalidations:
+            self.local.set(key, entry)
+
+    async def _check_generation(self) -> Optional[int]:
+        """The current generation, or None while Redis is unavailable."""
+        now = self.clock()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self.generation
+        self._checked_at = now
+        try:
+            self.generation = int(await self.redis.get(GENERATION_KEY) or 0)
+        except redis.RedisError as e:
+            logger.warning(f"Could not read response cache generation: {e}")
+            self.health.record_failure()
+            self.generation = None
+        return self.generation
+
+    async def get(self, request_id: Any) -> Optional[CachedResponse]:
+        """Returns the cached body, or None on a miss or a Redis error."""
+        key = str(request_id)
+        if self.local_enabled:
+            entry = self.local.get(key)
+            if entry is not None:
+                return entry
+        if not self.health.available:
+            return None
+
+        invalidations = self._invalidations
+        generation = await self._check_generation()
+        if generation is None:
+            return None
+        try:
+            owner_id, encoding, body = await self.redis.hmget(
+                response_key(generation, key), "owner", "encoding", "body"
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Could not read cached response {request_id}: {e}")
+            self.health.record_failure()
+            return None
+        self.health.record_success()
+        if owner_id is None or encoding is None or body is None:
+            return None
+        entry = CachedResponse(owner_id.decode(), encoding.decode(), body)
+        self._remember(key, entry, invalidations)
+        return entry
+
+    async def set(self, request_id: Any, owner_id: Any, payload: Any) -> CachedResponse:
+        """
+        Encodes and stores a response payload; returns the entry even when
+        Redis is unavailable so the caller can serve it.
+        """
+        invalidations = self._invalidations
+        # Large payloads are compressed off the event loop
+        entry = await asyncio.to_thread(self.encode, owner_id, payload)
+        key = str(request_id)
+        self._remember(key, entry, invalidations)
+        if not self.health.available:
+            return entry
+        generation = await self._check_generation()
+        if generation is None:
+            return entry
+        entry_key = response_key(generation, key)
+        index_key = user_index_key(generation, entry.owner_id)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(entry_key)
+                pipe.hset(entry_key, mapping={"owner": entry.owner_id, "encoding": entry.encoding, "body": entry.body})
+                pipe.expire(entry_key, self.ttl_seconds)
+                pipe.sadd(index_key, key)
+                pipe.expire(index_key, self.ttl_seconds)
+                await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not cache response {request_id}: {e}")
+            self.health.record_failure()
+        else:
+            self.health.record_success()
+        return entry
+
+    def invalidate_local(self, request_ids: Iterable[str]) -> None:
+        """Drops entries from this process (``INVALIDATE_ALL`` drops every one)."""
+        self._invalidations += 1
+        for request_id in request_ids:
+            if request_id == INVALIDATE_ALL:
+                self.local.clear()
+                self._checked_at = None  # The generation moved
+                return
+            self.local.pop(request_id)
+
+    async def invalidate(self, request_ids: Iterable[Any]) -> int:
+        """
+        Drops entries in Redis and in every process.
+
+        Returns:
+            Number of Redis entries deleted; 0 if Redis is unreachable.
+        """
+        request_ids = [str(request_id) for request_id in request_ids]
+        if not request_ids:
+            return 0
+        try:
+            generation = int(await self.redis.get(GENERATION_KEY) or 0)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.delete(*(response_key(generation, request_id) for request_id in request_ids))
+                pipe.publish(INVALIDATION_CHANNEL, " ".join(request_ids))
+                deleted, _ = await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not invalidate {len(request_ids)} cached responses: {e}")
+            self.health.record_failure()
+            return 0
+        return deleted
+
+    async def invalidate_user(self, user_id: Any) -> int:
+        """
+        Drops a user's entries, found through their set (O(entries of the
+        user), in pipelines of ``DELETE_CHUNK_SIZE``).
+
+        Returns:
+            Number of Redis entries deleted; 0 if Redis is unreachable.
+        """
+        try:
+            generation = int(await self.redis.get(GENERATION_KEY) or 0)
+            index_key = user_index_key(generation, user_id)
+            request_ids = [member.decode() for member in await self.redis.smembers(index_key)]
+            deleted = 0
+            for start in range(0, len(request_ids), DELETE_CHUNK_SIZE):
+                chunk = request_ids[start:start + DELETE_CHUNK_SIZE]
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.delete(*(response_key(generation, request_id) for request_id in chunk))
+                    pipe.srem(index_key, *chunk)
+                    pipe.publish(INVALIDATION_CHANNEL, " ".join(chunk))
+                    chunk_deleted, _, _ = await pipe.execute()
+                deleted += chunk_deleted
+        except redis.RedisError as e:
+            logger.warning(f"Could not invalidate cached responses of user {user_id}: {e}")
+            self.health.record_failure()
+            return 0
+        return deleted
+
+    async def clear(self) -> Optional[int]:
+        """
+        Drops every entry in O(1) by moving to a new generation.
+
+        Returns:
+            The new generation, or None if Redis is unreachable.
+        """
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.incr(GENERATION_KEY)
+                pipe.publish(INVALIDATION_CHANNEL, INVALIDATE_ALL)
+                generation, _ = await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not clear the response cache: {e}")
+            self.health.record_failure()
+            return None
+        return generation
+
+    async def stats(self, sample_keys: int = 10000, scan_count: int = 1000) -> Dict[str, Any]:
+        """
+        Cache statistics. The number of entries is estimated from a SCAN
+        sample of about ``sample_keys`` keys (exact when the scan covers the
+        whole keyspace), so a large keyspace never blocks Redis.
+        """
+        if not self.health.available:
+            return {"status": "disconnected"}
+        try:
+            generation = int(await self.redis.get(GENERATION_KEY) or 0)
+            total_keys = await self.redis.dbsize()
+            cursor, sampled, entries = 0, 0, 0
+            while True:
+                cursor, keys = await self.redis.scan(cursor, count=scan_count)
+                sampled += len(keys)
+                entries += sum(1 for key in keys if is_entry_key(generation, key.decode()))
+                if cursor == 0 or sampled >= sample_keys:
+                    break
+            try:
+                memory = await self.redis.info("memory")
+                clients = await self.redis.info("clients")
+            except redis.ResponseError:
+                memory, clients = {}, {}  # INFO disabled (renamed) on managed servers
+        except redis.RedisError as e:
+            logger.warning(f"Could not read response cache stats: {e}")
+            self.health.record_failure()
+            return {"status": "error", "message": str(e)}
+
+        exact = cursor == 0
+        if not exact and sampled:
+            entries = round(entries * total_keys / sampled)
+        return {
+            "status": "connected",
+            "generation": generation,
+            "total_keys": total_keys,
+            "response_cache_keys": entries,
+            "response_cache_keys_exact": exact,
+            "sampled_keys": sampled,
+            "local_entries": len(self.local),
+            "local_bytes": self.local.size,
+            "used_memory_human": memory.get("used_memory_human", "N/A"),
+            "connected_clients": clients.get("connected_clients", 0),
+        }
+
+    def start(self) -> None:
+        """Starts following invalidations in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                self._listening = True
+                while True:
+                    message = await pubsub.get_message(timeout=self.poll_timeout)
+                    if message is not None and message["type"] == "message":
+                        self.invalidate_local(message["data"].decode().split())
+            except redis.RedisError as e:
+                logger.error(f"Response invalidation subscription failed: {e}")
+                self.health.record_failure()
+            finally:
+                # Invalidations may be missed until subscribed again
+                self._listening = False
+                self.invalidate_local([INVALIDATE_ALL])
+                await pubsub.aclose()
+            await asyncio.sleep(self.health.retry_after)
+
+    async def close(self) -> None:
+        """Stops following invalidations and empties the in-process tier."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
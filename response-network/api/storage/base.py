@@ -1,6 +1,43 @@
 """Base storage handler module."""
+import asyncio
+import os
+import tempfile
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from core.config import settings as app_settings
+
+# Blocking I/O (boto3, ftplib, file copies) runs here instead of on the event
+# loop. One bounded pool per process keeps storage work from starving the
+# default executor.
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_storage_executor() -> ThreadPoolExecutor:
+    """Returns the process-wide executor for blocking storage calls."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app_settings.STORAGE_IO_WORKERS, thread_name_prefix="storage-io"
+            )
+        return _executor
+
+
+# File content given either whole or as a stream of byte chunks
+Content = Union[bytes, Iterable[bytes]]
+
+
+def iter_chunks(data: Content) -> Iterator[bytes]:
+    """Returns ``data`` as an iterator of byte chunks."""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return iter([bytes(data)])
+    return iter(data)
+
 
 class StorageHandler(ABC):
     """Base class for storage handlers."""
@@ -8,6 +45,13 @@ class StorageHandler(ABC):
     def __init__(self, settings: Dict[str, Any]):
         """Initialize storage handler with settings."""
         self.settings = settings
+        # Transfers a bulk operation keeps in flight at once
+        self.max_concurrency = int(settings.get("max_concurrency", 8))
+
+    async def _run(self, func: Callable, *args, **kwargs):
+        """Runs a blocking call on the storage executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_storage_executor(), partial(func, *args, **kwargs))
     
     @abstractmethod
     async def test_connection(self) -> bool:
@@ -18,18 +62,55 @@ class StorageHandler(ABC):
     async def upload_file(self, local_path: str, remote_path: str) -> bool:
         """Upload file to storage."""
         pass
+
+    async def upload_many(self, items: List[Tuple[str, str]]) -> Dict[str, bool]:
+        """
+        Upload (local_path, remote_path) pairs, keeping up to
+        ``max_concurrency`` transfers in flight.
+
+        Returns:
+            remote_path -> whether that upload succeeded.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _upload(local_path: str, remote_path: str) -> bool:
+            async with semaphore:
+                return await self.upload_file(local_path, remote_path)
+
+        results = await asyncio.gather(*[_upload(local, remote) for local, remote in items])
+        return {remote: ok for (_, remote), ok in zip(items, results)}
     
+    def _spool_to_tempfile(self, remote_path: str, data: Content) -> str:
+        fd, tmp_path = tempfile.mkstemp(suffix=os.path.splitext(remote_path)[1])
+        with os.fdopen(fd, "wb") as tmp:
+            for chunk in iter_chunks(data):
+                tmp.write(chunk)
+        return tmp_path
+
+    async def write_file(self, remote_path: str, data: Content) -> bool:
+        """
+        Store ``data`` (bytes or an iterable of byte chunks) at ``remote_path``.
+
+        The default spools to a temporary file and uploads it; handlers that
+        can write straight to the destination override this.
+        """
+        tmp_path = await self._run(self._spool_to_tempfile, remote_path, data)
+        try:
+            return await self.upload_file(tmp_path, remote_path)
+        finally:
+            os.unlink(tmp_path)
+
     @abstractmethod
     async def download_file(self, remote_path: str, local_path: str) -> bool:
         """Download file from storage."""
         pass
     
     @abstractmethod
-    async def list_files(self, path: str) -> list[str]:
-        """List files in storage path."""
+    async def list_files(self, path: str, prefix: str = "") -> list[str]:
+        """List files in storage path whose name (relative to path) starts with prefix."""
         pass
     
     @abstractmethod
     async def delete_file(self, path: str) -> bool:
         """Delete file from storage."""
-        pass
\ No newline at end of file
+        pass
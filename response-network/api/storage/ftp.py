@@ -1,14 +1,22 @@
 """FTP storage handler module."""
-import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict
 from pathlib import Path
 import ftplib
-import tempfile
 
-from .base import StorageHandler
+from shared.ftp_pool import SESSION_ERRORS, get_pool
+
+from .base import Content, StorageHandler, iter_chunks
 
 class FTPStorageHandler(StorageHandler):
-    """Handler for FTP storage."""
+    """
+    Handler for FTP storage.
+
+    Connections come from a process-wide pool of logged-in sessions, so
+    repeated transfers to the same server skip the connect/login handshake
+    (``upload_many`` keeps up to ``max_concurrency`` of them busy, with a
+    result per file).
+    ftplib is blocking, so every call runs on the storage executor.
+    """
     
     def __init__(self, settings: Dict[str, Any]):
         """Initialize FTP storage handler with settings."""
@@ -19,99 +27,88 @@ class FTPStorageHandler(StorageHandler):
         self.password = settings.get("password", "")
         self.base_path = settings.get("base_path", "/")
         self.use_tls = settings.get("use_tls", False)
-    
-    def _get_connection(self) -> ftplib.FTP:
-        """Get FTP connection."""
-        if self.use_tls:
-            ftp = ftplib.FTP_TLS()
-        else:
-            ftp = ftplib.FTP()
-            
-        ftp.connect(self.host, self.port)
-        ftp.login(self.username, self.password)
-        
-        if self.use_tls:
-            ftp.prot_p()  # Switch to secure data connection
-            
-        return ftp
+        self.pool = get_pool(self.host, self.port, self.username, self.password, self.use_tls)
+
+    def _remote(self, path: str) -> str:
+        return f"{self.base_path.rstrip('/')}/{path}"
+
+    def _test_write(self) -> None:
+        with self.pool.session() as ftp:
+            # Try to create and remove a test directory
+            test_dir = self._remote(".test_write")
+            try:
+                ftp.mkd(test_dir)
+                ftp.rmd(test_dir)
+            except ftplib.error_perm:
+                pass  # Directory might already exist or we might not have permission
     
     async def test_connection(self) -> bool:
         """Test FTP connection and write access."""
         try:
-            with self._get_connection() as ftp:
-                # Try to create and remove a test directory
-                test_dir = f"{self.base_path}/.test_write"
-                try:
-                    ftp.mkd(test_dir)
-                    ftp.rmd(test_dir)
-                except ftplib.error_perm:
-                    pass  # Directory might already exist or we might not have permission
-                return True
-        except (ftplib.error_perm, ftplib.error_proto, OSError):
+            await self._run(self._test_write)
+            return True
+        except (ftplib.error_perm, *SESSION_ERRORS):
             return False
     
     async def upload_file(self, local_path: str, remote_path: str) -> bool:
-        """Upload file to FTP server."""
+        """Upload file to FTP server (skipped if the remote copy is unchanged)."""
         try:
-            with self._get_connection() as ftp:
-                # Create remote directories if needed
-                current_dir = self.base_path
-                for part in Path(remote_path).parent.parts:
-                    current_dir = f"{current_dir}/{part}"
-                    try:
-                        ftp.mkd(current_dir)
-                    except ftplib.error_perm:
-                        pass  # Directory might already exist
-                
-                # Upload file
-                with open(local_path, 'rb') as f:
-                    ftp.storbinary(f'STOR {self.base_path}/{remote_path}', f)
-                return True
-        except (ftplib.error_perm, ftplib.error_proto, OSError):
+            await self._run(self.pool.upload_file, local_path, self._remote(remote_path))
+            return True
+        except (ftplib.error_perm, *SESSION_ERRORS):
             return False
-    
+
+    async def write_file(self, remote_path: str, data: Content) -> bool:
+        """Upload bytes or byte chunks to FTP server without a local temp copy."""
+        try:
+            await self._run(self.pool.upload_chunks, self._remote(remote_path), iter_chunks(data))
+            return True
+        except (ftplib.error_perm, *SESSION_ERRORS):
+            return False
+
     async def download_file(self, remote_path: str, local_path: str) -> bool:
-        """Download file from FTP server."""
+        """Download file from FTP server (skipped if unchanged since the last download)."""
         try:
-            with self._get_connection() as ftp:
-                # Create local directories if needed
-                os.makedirs(Path(local_path).parent, exist_ok=True)
-                
-                # Download file
-                with open(local_path, 'wb') as f:
-                    ftp.retrbinary(f'RETR {self.base_path}/{remote_path}', f.write)
-                return True
-        except (ftplib.error_perm, ftplib.error_proto, OSError):
+            await self._run(self.pool.download_file, self._remote(remote_path), local_path)
+            return True
+        except (ftplib.error_perm, *SESSION_ERRORS):
             return False
+
+    def _list(self, path: str, prefix: str) -> list[str]:
+        with self.pool.session() as ftp:
+            files = []
+            def _list_recursive(current_path: str):
+                try:
+                    for name, facts in ftp.mlsd(self._remote(current_path)):
+                        if name in ('.', '..'):
+                            continue
+                        full_path = f"{current_path}/{name}" if current_path else name
+                        if facts['type'] == 'file':
+                            files.append(full_path)
+                        elif facts['type'] == 'dir':
+                            _list_recursive(full_path)
+                except ftplib.error_perm:
+                    pass  # Directory might not exist
+
+            _list_recursive(path)
+            base = f"{path}/" if path else ""
+            return [f for f in files if f[len(base):].startswith(prefix)]
     
-    async def list_files(self, path: str) -> list[str]:
+    async def list_files(self, path: str, prefix: str = "") -> list[str]:
         """List files in FTP path."""
         try:
-            with self._get_connection() as ftp:
-                files = []
-                def _list_recursive(current_path: str):
-                    try:
-                        for name, facts in ftp.mlsd(f"{self.base_path}/{current_path}"):
-                            if name in ('.', '..'):
-                                continue
-                            full_path = f"{current_path}/{name}" if current_path else name
-                            if facts['type'] == 'file':
-                                files.append(full_path)
-                            elif facts['type'] == 'dir':
-                                _list_recursive(full_path)
-                    except ftplib.error_perm:
-                        pass  # Directory might not exist
-                
-                _list_recursive(path)
-                return files
-        except (ftplib.error_perm, ftplib.error_proto, OSError):
+            return await self._run(self._list, path, prefix)
+        except (ftplib.error_perm, *SESSION_ERRORS):
             return []
+
+    def _delete(self, path: str) -> None:
+        with self.pool.session() as ftp:
+            ftp.delete(self._remote(path))
     
     async def delete_file(self, path: str) -> bool:
         """Delete file from FTP server."""
         try:
-            with self._get_connection() as ftp:
-                ftp.delete(f"{self.base_path}/{path}")
-                return True
-        except (ftplib.error_perm, ftplib.error_proto, OSError):
-            return False
\ No newline at end of file
+            await self._run(self._delete, path)
+            return True
+        except (ftplib.error_perm, *SESSION_ERRORS):
+            return False
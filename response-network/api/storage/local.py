@@ -4,7 +4,7 @@ import shutil
 from typing import Any, Dict, Optional
 from pathlib import Path
 
-from .base import StorageHandler
+from .base import Content, StorageHandler, iter_chunks
 
 class LocalStorageHandler(StorageHandler):
     """Handler for local file system storage."""
@@ -17,23 +17,57 @@ class LocalStorageHandler(StorageHandler):
         # Ensure base path exists
         os.makedirs(self.base_path, exist_ok=True)
     
+    def _test_write(self) -> None:
+        # Create a temp file to test write access
+        test_file = self.base_path / ".test_write"
+        test_file.write_text("test")
+        test_file.unlink()
+
     async def test_connection(self) -> bool:
         """Test if base path exists and is writable."""
         try:
-            # Create a temp file to test write access
-            test_file = self.base_path / ".test_write"
-            test_file.write_text("test")
-            test_file.unlink()
+            await self._run(self._test_write)
             return True
         except (OSError, IOError):
             return False
+
+    @staticmethod
+    def _copy_atomic(src_path: Path, dest_path: Path) -> None:
+        # Copy next to the destination and rename, so readers never see a partial file
+        os.makedirs(dest_path.parent, exist_ok=True)
+        tmp_path = dest_path.with_name(f".{dest_path.name}.tmp")
+        shutil.copy2(src_path, tmp_path)
+        os.replace(tmp_path, dest_path)
     
     async def upload_file(self, local_path: str, remote_path: str) -> bool:
         """Copy file to local storage path."""
         try:
-            dest_path = self.base_path / remote_path
-            os.makedirs(dest_path.parent, exist_ok=True)
-            shutil.copy2(local_path, dest_path)
+            await self._run(self._copy_atomic, Path(local_path), self.base_path / remote_path)
+            return True
+        except (OSError, IOError):
+            return False
+    
+    @staticmethod
+    def _write_atomic(dest_path: Path, data: Content) -> None:
+        # Stream into a temp file in the destination directory, then rename
+        # over the target: one write, no intermediate copy
+        os.makedirs(dest_path.parent, exist_ok=True)
+        tmp_path = dest_path.with_name(f".{dest_path.name}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in iter_chunks(data):
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    async def write_file(self, remote_path: str, data: Content) -> bool:
+        """Write bytes or byte chunks directly to local storage path."""
+        try:
+            await self._run(self._write_atomic, self.base_path / remote_path, data)
             return True
         except (OSError, IOError):
             return False
@@ -41,25 +75,26 @@ class LocalStorageHandler(StorageHandler):
     async def download_file(self, remote_path: str, local_path: str) -> bool:
         """Copy file from local storage path."""
         try:
-            src_path = self.base_path / remote_path
-            os.makedirs(Path(local_path).parent, exist_ok=True)
-            shutil.copy2(src_path, local_path)
+            await self._run(self._copy_atomic, self.base_path / remote_path, Path(local_path))
             return True
         except (OSError, IOError):
             return False
+
+    def _list(self, path: str, prefix: str) -> list[str]:
+        search_path = self.base_path / path
+        if not search_path.exists():
+            return []
+
+        files = []
+        for p in search_path.rglob("*"):
+            if p.is_file() and str(p.relative_to(search_path)).startswith(prefix):
+                files.append(str(p.relative_to(self.base_path)))
+        return files
     
-    async def list_files(self, path: str) -> list[str]:
+    async def list_files(self, path: str, prefix: str = "") -> list[str]:
         """List files in local storage path."""
         try:
-            search_path = self.base_path / path
-            if not search_path.exists():
-                return []
-                
-            files = []
-            for p in search_path.rglob("*"):
-                if p.is_file():
-                    files.append(str(p.relative_to(self.base_path)))
-            return files
+            return await self._run(self._list, path, prefix)
         except (OSError, IOError):
             return []
     
@@ -67,8 +102,7 @@ class LocalStorageHandler(StorageHandler):
         """Delete file from local storage."""
         try:
             file_path = self.base_path / path
-            if file_path.exists():
-                file_path.unlink()
+            await self._run(file_path.unlink, missing_ok=True)
             return True
         except (OSError, IOError):
-            return False
\ No newline at end of file
+            return False
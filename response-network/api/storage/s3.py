@@ -1,21 +1,35 @@
 """S3 storage handler module."""
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict
 from pathlib import Path
 
 import boto3
-from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
 
 from .base import StorageHandler
 
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_PART_CONCURRENCY = 8
+
+
 class S3StorageHandler(StorageHandler):
-    """Handler for S3 storage."""
+    """
+    Handler for S3 storage.
+
+    Files at or above ``multipart_part_size`` bytes are transferred as
+    multipart uploads/ranged downloads with ``part_concurrency`` parts in
+    flight. boto3 is blocking, so every call runs on the storage executor.
+    """
     
     def __init__(self, settings: Dict[str, Any]):
         """Initialize S3 storage handler with settings."""
         super().__init__(settings)
         self.bucket_name = settings["bucket_name"]
         self.base_path = settings.get("base_path", "")
+        self.part_size = int(settings.get("multipart_part_size", DEFAULT_PART_SIZE))
+        self.part_concurrency = int(settings.get("part_concurrency", DEFAULT_PART_CONCURRENCY))
         
         # AWS credentials and region
         session_kwargs = {
@@ -28,13 +42,23 @@ class S3StorageHandler(StorageHandler):
             
         if "region_name" in settings:
             session_kwargs["region_name"] = settings["region_name"]
-            
+
+        client_kwargs = {
+            # Every part of every concurrent transfer needs its own connection
+            "config": Config(max_pool_connections=max(10, self.part_concurrency * self.max_concurrency)),
+        }
         if "endpoint_url" in settings:
             # For using with S3-compatible storage (MinIO, etc.)
-            session_kwargs["endpoint_url"] = settings["endpoint_url"]
+            client_kwargs["endpoint_url"] = settings["endpoint_url"]
         
         self.session = boto3.Session(**session_kwargs)
-        self.s3 = self.session.client('s3')
+        self.s3 = self.session.client('s3', **client_kwargs)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.part_size,
+            multipart_chunksize=self.part_size,
+            max_concurrency=self.part_concurrency,
+            use_threads=True,
+        )
     
     def _get_full_path(self, path: str) -> str:
         """Get full S3 path including base path."""
@@ -46,70 +70,72 @@ class S3StorageHandler(StorageHandler):
         """Test S3 connection and bucket access."""
         try:
             # Try to list objects with a limit of 1 to verify access
-            self.s3.list_objects_v2(
-                Bucket=self.bucket_name,
-                MaxKeys=1
-            )
+            await self._run(self.s3.list_objects_v2, Bucket=self.bucket_name, MaxKeys=1)
             return True
-        except ClientError:
+        except (ClientError, BotoCoreError):
             return False
     
     async def upload_file(self, local_path: str, remote_path: str) -> bool:
-        """Upload file to S3 bucket."""
+        """Upload file to S3 bucket (multipart above the part size)."""
         try:
-            self.s3.upload_file(
+            await self._run(
+                self.s3.upload_file,
                 local_path,
                 self.bucket_name,
-                self._get_full_path(remote_path)
+                self._get_full_path(remote_path),
+                Config=self.transfer_config,
             )
             return True
-        except ClientError:
+        except (ClientError, BotoCoreError, OSError):
             return False
     
     async def download_file(self, remote_path: str, local_path: str) -> bool:
-        """Download file from S3 bucket."""
+        """Download file from S3 bucket (ranged parts above the part size)."""
         try:
             # Create local directories if needed
             os.makedirs(Path(local_path).parent, exist_ok=True)
             
-            self.s3.download_file(
+            await self._run(
+                self.s3.download_file,
                 self.bucket_name,
                 self._get_full_path(remote_path),
-                local_path
+                local_path,
+                Config=self.transfer_config,
             )
             return True
-        except ClientError:
+        except (ClientError, BotoCoreError, OSError):
             return False
+
+    def _list(self, path: str, prefix: str) -> list[str]:
+        full_path = self._get_full_path(path)
+        # Let S3 filter by prefix instead of listing the whole directory
+        key_prefix = f"{full_path.rstrip('/')}/{prefix}" if full_path else prefix
+
+        paginator = self.s3.get_paginator('list_objects_v2')
+        files = []
+
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=key_prefix):
+            if 'Contents' in page:
+                for obj in page['Contents']:
+                    # Remove base_path from the key
+                    key = obj['Key']
+                    if self.base_path and key.startswith(self.base_path):
+                        key = key[len(self.base_path.rstrip('/'))+1:]
+                    files.append(key)
+
+        return files
     
-    async def list_files(self, path: str) -> list[str]:
+    async def list_files(self, path: str, prefix: str = "") -> list[str]:
         """List files in S3 path."""
         try:
-            full_path = self._get_full_path(path)
-            prefix = f"{full_path}/" if full_path else ""
-            
-            paginator = self.s3.get_paginator('list_objects_v2')
-            files = []
-            
-            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
-                if 'Contents' in page:
-                    for obj in page['Contents']:
-                        # Remove base_path from the key
-                        key = obj['Key']
-                        if self.base_path and key.startswith(self.base_path):
-                            key = key[len(self.base_path.rstrip('/'))+1:]
-                        files.append(key)
-            
-            return files
-        except ClientError:
+            return await self._run(self._list, path, prefix)
+        except (ClientError, BotoCoreError):
             return []
     
     async def delete_file(self, path: str) -> bool:
         """Delete file from S3 bucket."""
         try:
-            self.s3.delete_object(
-                Bucket=self.bucket_name,
-                Key=self._get_full_path(path)
-            )
+            await self._run(self.s3.delete_object, Bucket=self.bucket_name, Key=self._get_full_path(path))
             return True
-        except ClientError:
-            return False
\ No newline at end of file
+        except (ClientError, BotoCoreError):
+            return False
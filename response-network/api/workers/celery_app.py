@@ -36,6 +36,12 @@ from workers.tasks.cache_maintenance import cleanup_old_cache, cleanup_redis_cac
 from workers.tasks.system_monitoring import system_health_check
 from workers.tasks.execute_query import execute_pending_queries
 from workers.tasks.users_exporter import export_users_to_request_network
+from workers.tasks.bundle_exporter import export_transfer_bundle
+from workers.tasks.bundle_importer import import_transfer_bundles
+
+# With the import watcher running, beat only polls import directories as a
+# fallback for missed events
+IMPORT_POLL_SECONDS = settings.IMPORT_POLL_FALLBACK_SECONDS if settings.IMPORT_WATCHER_ENABLED else 10.0
 
 # Celery Beat schedule for the Response Network
 celery_app.conf.beat_schedule = {
@@ -47,13 +53,23 @@ celery_app.conf.beat_schedule = {
     # Import requests from request-network every 10 seconds (polling)
     "import-requests-from-request-network": {
         "task": "workers.tasks.import_requests.import_requests_from_request_network",
-        "schedule": 10.0,  # هر 10 ثانیه
+        "schedule": IMPORT_POLL_SECONDS,
     },
     # Export results to request-network every 10 seconds
     "export-results-to-request-network": {
         "task": "workers.tasks.export_results.export_completed_results",
         "schedule": 10.0,  # هر 10 ثانیه
     },
+    # Pack loose exports into one transfer bundle every 10 seconds (TRANSFER_BUNDLE_ENABLED)
+    "export-transfer-bundle": {
+        "task": "workers.tasks.bundle_exporter.export_transfer_bundle",
+        "schedule": 10.0,
+    },
+    # Import transfer bundles from request-network every 10 seconds
+    "import-transfer-bundles": {
+        "task": "workers.tasks.bundle_importer.import_transfer_bundles",
+        "schedule": IMPORT_POLL_SECONDS,
+    },
     # Export settings to request-network every 60 seconds
     "export-settings-every-minute": {
         "task": "workers.tasks.settings_exporter.export_settings_to_request_network",
@@ -0,0 +1,54 @@
+"""
+Import Watcher - dispatch response-network importers as files arrive
+
+Run next to the Celery worker when IMPORT_WATCHER_ENABLED is set:
+
+    python -m workers.import_watcher
+
+Beat keeps polling the import directories every IMPORT_POLL_FALLBACK_SECONDS
+in case an event is missed.
+"""
+from pathlib import Path
+import logging
+
+from core.config import settings
+from shared.import_watcher import ImportWatcher, WatchRoute
+from workers.celery_app import celery_app
+
+logger = logging.getLogger(__name__)
+
+IMPORT_PATH = Path(settings.IMPORT_DIR)
+
+WATCH_ROUTES = [
+    WatchRoute(
+        "requests",
+        IMPORT_PATH / "requests",
+        ["requests_*.jsonl", "requests_*.meta.json"],
+        "workers.tasks.import_requests.import_requests_from_request_network",
+    ),
+    WatchRoute(
+        "bundles",
+        IMPORT_PATH / "bundles",
+        ["*.bundle"],
+        "workers.tasks.bundle_importer.import_transfer_bundles",
+    ),
+]
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    if not settings.IMPORT_WATCHER_ENABLED:
+        logger.info("IMPORT_WATCHER_ENABLED is off; importers run on the beat schedule")
+        return
+
+    watcher = ImportWatcher(
+        WATCH_ROUTES,
+        dispatch=celery_app.send_task,
+        settle_seconds=settings.IMPORT_WATCH_SETTLE_SECONDS,
+    )
+    logger.info(f"Watching {len(WATCH_ROUTES)} import directories with {type(watcher.backend).__name__}")
+    watcher.run_forever()
+
+
+if __name__ == "__main__":
+    main()
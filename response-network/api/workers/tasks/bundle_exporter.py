@@ -0,0 +1,130 @@
+"""
+Bundle Exporter Task - Pack one sync window of exports into a single bundle
+"""
+from datetime import datetime
+import json
+from pathlib import Path
+
+from celery import shared_task
+
+from core.config import settings
+from shared.change_log import LogOffset
+from shared.transfer_bundle import (
+    BundleWriter,
+    generate_bundle_filename,
+    pack_export_files,
+    pack_snapshot_files,
+    write_member_file,
+)
+from workers.tasks.password_sync import PASSWORD_CHANGE_LOG
+
+EXPORT_PATH = Path(settings.EXPORT_DIR)
+BUNDLE_PATH = EXPORT_PATH / "bundles"
+ARCHIVE_PATH = EXPORT_PATH / "archive"
+# Last password change sequence number shipped in a bundle
+PASSWORD_CHANGES_SHIPPED = LogOffset(BUNDLE_PATH / "password_changes.offset")
+# Checksum of each snapshot as last shipped
+SNAPSHOTS_SHIPPED = BUNDLE_PATH / "snapshots.json"
+
+# (member type, glob relative to EXPORT_DIR) for the timestamped exports,
+# which are archived once packed
+BUNDLE_SOURCES = [
+    ("results", "results/results_*.jsonl"),
+    ("results_meta", "results/results_*.meta.json"),
+    ("settings", "settings_*.json"),
+    ("profile_types", "profile_types_*.json"),
+]
+
+# (member type, path relative to EXPORT_DIR) for snapshots rewritten in
+# place; they stay where they are and are shipped only when they change
+SNAPSHOT_SOURCES = [
+    ("users", "users/latest.json"),
+]
+
+
+def _load_shipped_snapshots() -> dict:
+    try:
+        return json.loads(SNAPSHOTS_SHIPPED.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _add_password_changes(writer: BundleWriter) -> int:
+    """
+    Adds password change log records not yet shipped as one JSONL member.
+
+    The log is append-only, so it is read from the shipped offset rather
+    than packed and archived like the other exports.
+
+    Returns:
+        Sequence number of the last record added (0 if none).
+    """
+    records = list(PASSWORD_CHANGE_LOG.read_from(PASSWORD_CHANGES_SHIPPED.load()))
+    if not records:
+        return 0
+    first, last = records[0]["seq"], records[-1]["seq"]
+    data = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records)
+    writer.add_bytes(f"password_changes_{first:012d}_{last:012d}.jsonl", "password_changes", data.encode("utf-8"))
+    return last
+
+
+@shared_task(bind=True, max_retries=3)
+def export_transfer_bundle(self):
+    """
+    Pack all loose export files into one bundle for request-network.
+
+    Exports to: /exports/bundles/bundle_response-network_{timestamp}_{id}.bundle
+
+    Workflow:
+    1. Collect results, settings, profile types, the users snapshot (if it
+       changed since the last bundle) and password changes
+    2. Write them into one bundle with a manifest (type, count, checksum, codec)
+    3. Move the packed timestamped files to archive/ (snapshots stay in
+       place), record the shipped snapshot checksums and advance the
+       password change log's shipped offset
+    """
+    if not settings.TRANSFER_BUNDLE_ENABLED:
+        return {"status": "disabled"}
+
+    try:
+        writer = BundleWriter("response-network", codec=settings.TRANSFER_BUNDLE_CODEC)
+        packed = pack_export_files(writer, EXPORT_PATH, BUNDLE_SOURCES)
+        shipped_snapshots = _load_shipped_snapshots()
+        snapshots = pack_snapshot_files(writer, EXPORT_PATH, SNAPSHOT_SOURCES, shipped_snapshots)
+        shipped_seq = _add_password_changes(writer)
+
+        if not packed and not snapshots and not shipped_seq:
+            return {
+                "status": "no_changes",
+                "exported_at": datetime.utcnow().isoformat(),
+                "member_count": 0,
+            }
+
+        bundle_file = writer.write(
+            BUNDLE_PATH / generate_bundle_filename("response-network", writer.bundle_id)
+        )
+
+        for file_path in packed:
+            archive_file = ARCHIVE_PATH / file_path.relative_to(EXPORT_PATH)
+            archive_file.parent.mkdir(parents=True, exist_ok=True)
+            file_path.replace(archive_file)
+
+        if snapshots:
+            shipped_snapshots.update(snapshots)
+            write_member_file(json.dumps(shipped_snapshots, indent=2).encode("utf-8"), SNAPSHOTS_SHIPPED)
+
+        if shipped_seq:
+            PASSWORD_CHANGES_SHIPPED.store(shipped_seq)
+            PASSWORD_CHANGE_LOG.prune(shipped_seq)
+
+        manifest = writer.manifest()
+        return {
+            "status": "success",
+            "bundle_file": str(bundle_file),
+            "bundle_id": manifest["bundle_id"],
+            "member_count": manifest["member_count"],
+            "record_count": manifest["record_count"],
+            "exported_at": datetime.utcnow().isoformat(),
+        }
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=60)
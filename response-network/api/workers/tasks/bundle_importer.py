@@ -0,0 +1,90 @@
+"""
+Bundle Importer Task - Import transfer bundles from request-network
+"""
+from datetime import datetime
+from pathlib import Path
+import logging
+
+from celery import shared_task
+
+from core.config import settings
+from shared.transfer_bundle import BUNDLE_SUFFIX, BundleReader, unpack_bundle, write_member_file
+from workers.tasks.import_requests import import_requests_from_request_network
+
+logger = logging.getLogger(__name__)
+
+IMPORT_PATH = Path(settings.IMPORT_DIR)
+BUNDLE_PATH = IMPORT_PATH / "bundles"
+
+# Where each member type is staged for the importer that owns it
+MEMBER_DESTINATIONS = {
+    "requests": IMPORT_PATH / "requests",
+    "requests_meta": IMPORT_PATH / "requests",
+}
+
+
+def _stage_member(member, data: bytes) -> Path:
+    return write_member_file(data, MEMBER_DESTINATIONS[member.member_type] / member.name)
+
+
+@shared_task(bind=True, max_retries=3)
+def import_transfer_bundles(self):
+    """
+    Import transfer bundles from request-network.
+
+    Workflow:
+    1. Poll /imports/bundles/ for *.bundle files
+    2. Verify every member checksum against the manifest
+    3. Stage each member where its importer reads it
+    4. Run the requests importer once for the whole batch
+    5. Move bundle to archive/ (or failed/ if verification fails)
+    """
+    try:
+        BUNDLE_PATH.mkdir(parents=True, exist_ok=True)
+        bundle_files = sorted(BUNDLE_PATH.glob(f"*{BUNDLE_SUFFIX}"))
+
+        if not bundle_files:
+            return {
+                "status": "no_files",
+                "imported_at": datetime.utcnow().isoformat(),
+                "total_bundles": 0,
+            }
+
+        imported_bundles = []
+        failed_bundles = []
+        staged_types = set()
+
+        for bundle_file in bundle_files:
+            try:
+                with BundleReader(bundle_file) as reader:
+                    written = unpack_bundle(
+                        reader, {member_type: _stage_member for member_type in MEMBER_DESTINATIONS}
+                    )
+                staged_types.update(written)
+                imported_bundles.append(bundle_file.name)
+                target_dir = BUNDLE_PATH / "archive"
+            except ValueError as e:
+                failed_bundles.append((bundle_file.name, str(e)))
+                target_dir = BUNDLE_PATH / "failed"
+
+            target_dir.mkdir(parents=True, exist_ok=True)
+            bundle_file.rename(target_dir / bundle_file.name)
+
+        dispatched = {}
+        if "requests" in staged_types:
+            try:
+                dispatched["requests"] = import_requests_from_request_network()
+            except Exception as e:
+                logger.error(f"Requests importer failed after bundle import: {e}")
+                dispatched["requests"] = {"status": "error", "error": str(e)}
+
+        return {
+            "status": "success" if not failed_bundles else "partial_success",
+            "imported_bundles": imported_bundles,
+            "failed_bundles": failed_bundles,
+            "dispatched": dispatched,
+            "imported_at": datetime.utcnow().isoformat(),
+        }
+
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=60)
@@ -11,6 +11,7 @@ from core.config import settings
 from models.incoming_request import IncomingRequest
 from models.request_type import RequestType
 from models.query_result import QueryResult
+from shared.blob_store import store_blob
 
 # Setup sync database connection for Celery
 sync_engine = create_engine(
@@ -93,12 +94,12 @@ def execute_pending_queries(self):
                     "provider": "Elasticsearch"
                 }
 
-                # Create QueryResult
+                # Create QueryResult (payload deduplicated in the blob store)
                 query_result = QueryResult(
                     id=uuid.uuid4(),
                     request_id=req.id,
                     original_request_id=req.original_request_id,
-                    result_data=result_data,
+                    result_hash=store_blob(db, result_data),
                     result_count=result_data["count"],
                     execution_time_ms=es_result.get("took", 0), # Approximate
                     elasticsearch_took_ms=es_result.get("took", 0),
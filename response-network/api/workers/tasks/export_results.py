@@ -1,16 +1,17 @@
-from datetime import datetime
+from datetime import datetime, timezone
 import json
 from pathlib import Path
-import os
 import uuid
 
 from celery import shared_task
-from sqlalchemy import create_engine, select
+from sqlalchemy import case, create_engine, func, select, update
 from sqlalchemy.orm import sessionmaker
 
 from core.config import settings
-from models.incoming_request import IncomingRequest
 from models.query_result import QueryResult
+from shared.blob_store import payload_hash
+from shared.file_format_handler import BatchMetadata, SizeCappedJSONLWriter, adaptive_batch_size
+from shared.models.result_blob import ResultBlob
 
 # Setup sync database connection for Celery
 sync_engine = create_engine(
@@ -21,61 +22,164 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
 
 EXPORT_PATH = Path(settings.EXPORT_DIR) / "results"
 
+# Bytes per exported line besides the payload (ids, counts, timestamps, hash)
+LINE_OVERHEAD_BYTES = 300
+
+
+def _backlog_stats(db):
+    """Returns (unexported rows, average bytes one of them adds to the file)."""
+    # Payloads the request network already holds travel as hash references
+    payload_bytes = case(
+        (ResultBlob.peer_synced_at.is_(None), ResultBlob.size_bytes),
+        else_=0,
+    )
+    backlog, avg_payload = db.execute(
+        select(func.count(QueryResult.id), func.coalesce(func.avg(payload_bytes), 0))
+        .select_from(QueryResult)
+        .outerjoin(ResultBlob, QueryResult.result_hash == ResultBlob.hash)
+        .where(QueryResult.exported_at.is_(None))
+    ).one()
+    return backlog, float(avg_payload) + LINE_OVERHEAD_BYTES
+
+
+def _export_line(row, exported_at: str) -> str:
+    item = {
+        "request_id": str(row.original_request_id),  # Map back to original ID for Request Network
+        "status": "completed",
+        "result_count": row.result_count,
+        "execution_time_ms": row.execution_time_ms,
+        "executed_at": row.executed_at.isoformat() if row.executed_at else None,
+        "exported_at": exported_at,
+    }
+    if row.result_hash:
+        item["result_hash"] = row.result_hash
+        # Blobs the request network has acknowledged travel as hash references only
+        if row.peer_synced_at is None:
+            item["result_data"] = row.blob_payload
+    else:
+        item["result_data"] = row.stored_result_data
+        if row.stored_result_data is not None:
+            item["result_hash"] = payload_hash(row.stored_result_data)
+    return json.dumps(item)
+
+
+def _mark_exported(db, ids, exported_at: datetime, batch_id: uuid.UUID) -> int:
+    result = db.execute(
+        update(QueryResult)
+        .where(QueryResult.id.in_(ids), QueryResult.exported_at.is_(None))
+        .values(exported_at=exported_at, export_batch_id=batch_id)
+        .returning(QueryResult.id)
+    )
+    return len(result.all())
+
+
 @shared_task(bind=True, max_retries=3)
 def export_completed_results(self):
-    """Export completed request results to request network."""
+    """
+    Export completed request results to request network.
+
+    Exports to: /exports/results/results_YYYYMMDD_HHMMSS.jsonl
+
+    Workflow:
+    1. Size the batch from backlog depth and the average exported line size
+       (RESULTS_EXPORT_TARGET_FILE_BYTES, clamped to MIN/MAX_BATCH)
+    2. Stream unexported results through a server-side cursor, locking them
+       so an overlapping run skips them
+    3. Write each row straight into the (size-capped) JSONL parts
+    4. Mark every fetched chunk exported with one UPDATE ... RETURNING
+    5. Write part metadata, commit, then publish the parts (a failed commit
+       discards them, so no row is ever sent twice)
+    """
     db = SessionLocal()
     try:
         EXPORT_PATH.mkdir(parents=True, exist_ok=True)
 
-        # Get results that haven't been exported
-        # We join with IncomingRequest to ensure we have the original request info
-        results = db.query(QueryResult).join(IncomingRequest).filter(
-            QueryResult.exported_at.is_(None)
-        ).limit(50).all()
-        
-        if not results:
+        backlog, avg_line_bytes = _backlog_stats(db)
+        batch_size = adaptive_batch_size(
+            backlog,
+            avg_line_bytes,
+            settings.RESULTS_EXPORT_TARGET_FILE_BYTES,
+            settings.RESULTS_EXPORT_MIN_BATCH,
+            settings.RESULTS_EXPORT_MAX_BATCH,
+        )
+        if not batch_size:
             return {"status": "no_new_results", "count": 0}
-        
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+
+        now = datetime.now(timezone.utc)
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
+        exported_at = now.isoformat()
         batch_id = uuid.uuid4()
-        
-        # Prepare export data
-        export_list = []
-        for res in results:
-            export_list.append({
-                "request_id": str(res.original_request_id), # Map back to original ID for Request Network
-                "status": "completed",
-                "result_data": res.result_data,
-                "execution_time_ms": res.execution_time_ms,
-                "executed_at": res.executed_at.isoformat() if res.executed_at else None,
-                "exported_at": datetime.utcnow().isoformat()
-            })
-            
-        # Write to JSONL file
-        filename = f"results_{timestamp}.jsonl"
-        export_file = EXPORT_PATH / filename
-        
-        with open(export_file, "w", encoding="utf-8") as f:
-            for item in export_list:
-                f.write(json.dumps(item) + "\n")
-        
-        # Mark as exported
-        for res in results:
-            res.exported_at = datetime.utcnow()
-            res.export_batch_id = batch_id
-            
-        db.commit()
-        
+        chunk_size = settings.RESULTS_EXPORT_CHUNK_SIZE
+
+        stmt = (
+            select(
+                QueryResult.id,
+                QueryResult.original_request_id,
+                QueryResult.result_count,
+                QueryResult.execution_time_ms,
+                QueryResult.executed_at,
+                QueryResult.result_hash,
+                QueryResult.stored_result_data,
+                ResultBlob.payload.label("blob_payload"),
+                ResultBlob.peer_synced_at,
+            )
+            .outerjoin(ResultBlob, QueryResult.result_hash == ResultBlob.hash)
+            .where(QueryResult.exported_at.is_(None))
+            .order_by(QueryResult.executed_at)
+            .limit(batch_size)
+            .with_for_update(of=QueryResult, skip_locked=True)
+            .execution_options(stream_results=True, yield_per=chunk_size)
+        )
+
+        exported = 0
+        with SizeCappedJSONLWriter(
+            EXPORT_PATH, f"results_{timestamp}", settings.EXPORT_MAX_PART_BYTES
+        ) as writer:
+            for rows in db.execute(stmt).partitions(chunk_size):
+                for row in rows:
+                    writer.write_line(_export_line(row, exported_at))
+                exported += _mark_exported(db, [row.id for row in rows], now, batch_id)
+
+            if not writer.parts:
+                writer.abort()
+                db.rollback()
+                return {"status": "no_new_results", "count": 0}
+
+            parts = writer.close()
+
+            # Metadata with part numbering and the chunk Merkle manifest goes
+            # out before the parts are published, so the importer can verify
+            # each part in parallel and waits until every part has arrived
+            meta_files = []
+            for part in parts:
+                metadata = BatchMetadata.from_file(
+                    batch_id=batch_id,
+                    batch_type="results",
+                    record_count=part.record_count,
+                    file_path=part.tmp_path,
+                    chunk_size=settings.TRANSFER_CHUNK_SIZE_BYTES,
+                    max_workers=settings.TRANSFER_VERIFY_WORKERS,
+                    part_number=part.part_number,
+                    part_count=part.part_count,
+                )
+                meta_files.append(metadata.write_metadata_file(part.meta_path))
+
+            db.commit()
+            export_files = writer.publish()
+
         return {
             "status": "success",
-            "count": len(results),
-            "file": str(export_file),
+            "count": exported,
+            "backlog": backlog,
+            "batch_size": batch_size,
+            "file": str(export_files[0]),
+            "metadata_file": str(meta_files[0]),
+            "files": [str(path) for path in export_files],
             "batch_id": str(batch_id)
         }
-            
+
     except Exception as exc:
         db.rollback()
         raise self.retry(exc=exc, countdown=60)
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -5,6 +5,7 @@ from datetime import datetime
 import json
 from pathlib import Path
 import hashlib
+import logging
 import uuid
 
 from celery import shared_task
@@ -13,8 +14,62 @@ from sqlalchemy.orm import Session
 from core.config import settings
 from core.dependencies import get_db_sync
 from models.incoming_request import IncomingRequest as RequestModel
+from shared.blob_store import mark_peer_synced
+from shared.file_format_handler import (
+    collect_batch_parts,
+    metadata_path,
+    quarantine_for_retransfer,
+    verify_batch_file,
+)
+
+logger = logging.getLogger(__name__)
 
 IMPORT_PATH = Path(settings.IMPORT_DIR) / "requests"
+RETRANSFER_PATH = IMPORT_PATH / "retransfer"
+
+
+def _import_request_file(db, request_file: Path):
+    """Adds the requests in one JSONL file; returns (imported, duplicates)."""
+    # Read JSONL file
+    with open(request_file, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+    imported_count = 0
+    duplicate_count = 0
+
+    for line in lines:
+        if not line.strip():
+            continue
+
+        try:
+            req_data = json.loads(line)
+            request_id = req_data.get("id")
+
+            # Check if request already exists (by original_request_id)
+            existing = db.query(RequestModel).filter(
+                RequestModel.original_request_id == request_id
+            ).first()
+
+            if not existing:
+                # Create new request
+                new_request = RequestModel(
+                    original_request_id=request_id,
+                    user_id=req_data.get("user_id"),
+                    query_type=req_data.get("query_type"),
+                    query_params=req_data.get("query_params", {}),
+                    priority=req_data.get("priority", 5),
+                    status="pending",
+                    # created_at is handled by TimestampMixin, imported_at by default
+                    import_batch_id=uuid.UUID(req_data.get("batch_id")) if req_data.get("batch_id") else None
+                )
+                db.add(new_request)
+                imported_count += 1
+            else:
+                duplicate_count += 1
+        except (json.JSONDecodeError, ValueError):
+            continue
+
+    return imported_count, duplicate_count
 
 
 @shared_task(bind=True, max_retries=3)
@@ -23,13 +78,21 @@ def import_requests_from_request_network(self):
     Import pending requests from request-network.
     
     Workflow:
-    1. Poll /imports/requests/ for JSONL files
-    2. Read each line as a request
-    3. Check for duplicates by request ID
-    4. Insert into incoming_requests table
-    5. Archive processed file
+    1. Poll /imports/requests/ for JSONL files and group split batches by
+       part metadata; batches still missing parts, and files whose
+       .meta.json has not arrived, wait for the next run (files still
+       without it after TRANSFER_METADATA_MAX_WAIT_SECONDS are imported
+       unverified)
+    2. Verify chunk hashes against .meta.json in parallel (or the whole-file
+       checksum when it has no chunk manifest); quarantine damaged files in
+       retransfer/ with a report of the chunks to re-send
+    3. Read each line as a request
+    4. Check for duplicates by request ID
+    5. Insert into incoming_requests table
+    6. Record result blobs the request network acknowledged (from .meta.json)
+    7. Commit once per batch and archive its files and metadata
     
-    File format: requests_YYYYMMDD_HHMMSS.jsonl
+    File format: requests_YYYYMMDD_HHMMSS.jsonl (or .partNNN.jsonl)
     Each line: {"id": "uuid", "user_id": "uuid", "query_type": "...", "query_params": {...}, ...}
     """
     try:
@@ -48,69 +111,72 @@ def import_requests_from_request_network(self):
         db = next(get_db_sync())
         total_imported = 0
         total_duplicates = 0
+        total_acknowledged = 0
         failed_files = []
+        retransfer_requests = []
 
         try:
-            for request_file in request_files:
+            batches, waiting_batches, unmanifested = collect_batch_parts(
+                request_files, settings.TRANSFER_METADATA_MAX_WAIT_SECONDS
+            )
+            # Files from exporters that predate batch metadata: import them
+            # unverified as single-part batches, as before
+            for request_file in unmanifested:
+                logger.warning(
+                    f"{request_file.name} has no metadata after "
+                    f"{settings.TRANSFER_METADATA_MAX_WAIT_SECONDS}s, importing it unverified"
+                )
+            batches += [[(request_file, metadata_path(request_file), {})] for request_file in unmanifested]
+
+            for parts in batches:
                 try:
-                    # Read JSONL file
-                    with open(request_file, "r", encoding="utf-8") as f:
-                        lines = f.readlines()
-
-                    imported_count = 0
-                    duplicate_count = 0
-
-                    for line in lines:
-                        if not line.strip():
+                    # Verify every part before importing any of them
+                    damaged = False
+                    for request_file, meta_file, metadata in parts:
+                        if request_file in unmanifested:
                             continue
-
-                        try:
-                            req_data = json.loads(line)
-                            request_id = req_data.get("id")
-                            
-                            # Check if request already exists (by original_request_id)
-                            existing = db.query(RequestModel).filter(
-                                RequestModel.original_request_id == request_id
-                            ).first()
-
-                            if not existing:
-                                # Create new request
-                                new_request = RequestModel(
-                                    original_request_id=request_id,
-                                    user_id=req_data.get("user_id"),
-                                    query_type=req_data.get("query_type"),
-                                    query_params=req_data.get("query_params", {}),
-                                    priority=req_data.get("priority", 5),
-                                    status="pending",
-                                    # created_at is handled by TimestampMixin, imported_at by default
-                                    import_batch_id=uuid.UUID(req_data.get("batch_id")) if req_data.get("batch_id") else None
-                                )
-                                db.add(new_request)
-                                imported_count += 1
-                            else:
-                                duplicate_count += 1
-                        except (json.JSONDecodeError, ValueError):
-                            continue
-
+                        report = verify_batch_file(request_file, metadata, settings.TRANSFER_VERIFY_WORKERS)
+                        if not report["valid"]:
+                            retransfer_requests.append(quarantine_for_retransfer(
+                                request_file, meta_file, metadata, report, RETRANSFER_PATH
+                            ))
+                            damaged = True
+                    if damaged:
+                        # The remaining parts wait for the re-sent ones
+                        continue
+
+                    for request_file, meta_file, metadata in parts:
+                        imported_count, duplicate_count = _import_request_file(db, request_file)
+                        total_imported += imported_count
+                        total_duplicates += duplicate_count
+
+                        # The batch metadata lists result blobs the request network now holds
+                        total_acknowledged += mark_peer_synced(db, metadata.get("known_result_blobs", []))
+
+                    # One commit per batch: a split batch lands all at once
                     db.commit()
-                    total_imported += imported_count
-                    total_duplicates += duplicate_count
 
-                    # Move file to archive
+                    # Move files to archive
                     archive_dir = IMPORT_PATH / "archive"
                     archive_dir.mkdir(parents=True, exist_ok=True)
-                    request_file.rename(archive_dir / request_file.name)
+                    for request_file, meta_file, metadata in parts:
+                        request_file.rename(archive_dir / request_file.name)
+                        if meta_file.exists():
+                            meta_file.rename(archive_dir / meta_file.name)
 
                 except Exception as e:
-                    failed_files.append((request_file.name, str(e)))
+                    failed_files.append((parts[0][0].name, str(e)))
                     db.rollback()
                     continue
 
             return {
-                "status": "success" if not failed_files else "partial_success",
+                "status": "success" if not (failed_files or retransfer_requests) else "partial_success",
                 "total_imported": total_imported,
                 "total_duplicates": total_duplicates,
+                "acknowledged_blobs": total_acknowledged,
                 "failed_files": failed_files,
+                "waiting_batches": waiting_batches,
+                "retransfer_requests": retransfer_requests,
                 "imported_at": datetime.utcnow().isoformat()
             }
         finally:
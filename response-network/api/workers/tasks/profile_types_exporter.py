@@ -2,7 +2,6 @@
 Export profile types to Request Network
 """
 from datetime import datetime
-import json
 import asyncio
 
 from celery import shared_task
@@ -10,7 +9,7 @@ from sqlalchemy import select
 
 from db.session import async_session
 from models.profile_type_config import ProfileTypeConfig
-from services.export_storage import ExportStorageService
+from services.export_storage import ExportStorageService, json_chunks
 
 
 @shared_task
@@ -45,8 +44,9 @@ def export_profile_types_to_request_network():
             
             # Save using ExportStorageService
             filename = f"profile_types_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
-            json_data = json.dumps(export_data, indent=2, default=str).encode('utf-8')
-            file_path = await ExportStorageService.save_export_file(filename, json_data)
+            file_path = await ExportStorageService.save_export_file(
+                filename, json_chunks(export_data, indent=2, default=str)
+            )
             
             return {
                 "status": "success",
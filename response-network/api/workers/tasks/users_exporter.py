@@ -6,8 +6,6 @@ import json
 from pathlib import Path
 import os
 from dotenv import load_dotenv
-import ftplib
-import io
 
 from celery import shared_task
 from sqlalchemy import create_engine, select
@@ -18,6 +16,7 @@ load_dotenv()
 
 # Import Settings model
 from models.settings import Settings
+from shared.ftp_pool import get_pool
 import logging
 
 logger = logging.getLogger(__name__)
@@ -142,31 +141,19 @@ def export_users_to_request_network():
                 return {"status": "error", "reason": "ftp_host_missing"}
             
             try:
-                # Prepare JSON data in memory
                 json_data = json.dumps(export_data, indent=2, ensure_ascii=False).encode('utf-8')
-                bio = io.BytesIO(json_data)
-                
-                with ftplib.FTP(host) as ftp:
-                    ftp.login(user=user, passwd=passwd)
-                    # Try to change to remote path, create if not exist (simple version)
-                    try:
-                        ftp.cwd(remote_path)
-                    except ftplib.error_perm:
-                        # Try to create directories one by one or just assume they exist for now
-                        # FTP doesn't have mkdir -p usually, so we'll just try to mkdir the last part
-                        try:
-                            ftp.mkd(remote_path)
-                            ftp.cwd(remote_path)
-                        except:
-                            pass
-                    
-                    ftp.storbinary(f"STOR latest.json", bio)
+
+                # Pooled session: no reconnect/login per export, and an
+                # unchanged snapshot is not re-uploaded
+                pool = get_pool(host, config.get("port", 21), user, passwd)
+                uploaded = pool.upload_bytes(f"{remote_path.rstrip('/')}/latest.json", json_data)
                 
                 return {
                     "status": "success",
                     "exported_at": export_data["exported_at"],
                     "total_count": len(users),
                     "method": "ftp",
+                    "uploaded": uploaded,
                     "destination": f"ftp://{host}{remote_path}/latest.json"
                 }
             except Exception as e:
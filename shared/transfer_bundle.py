@@ -0,0 +1,430 @@
+"""
+Transfer bundles: one container file per sync window.
+
+A bundle is a tar archive whose first member is ``manifest.json``. Every
+other member is one export file (requests JSONL, results JSONL, users /
+settings / profile-type snapshots, password changes). Each member is encoded
+with its own codec so the importer can verify every checksum before it
+dispatches anything, which keeps a transfer all-or-nothing.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_SUFFIX = ".bundle"
+MANIFEST_NAME = "manifest.json"
+
+MEMBER_TYPES = (
+    "requests",
+    "requests_meta",
+    "results",
+    "results_meta",
+    "users",
+    "settings",
+    "profile_types",
+    "password_changes",
+)
+CODECS = ("identity", "gzip")
+
+
+def _encode(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        # mtime=0 keeps the encoded bytes deterministic for identical payloads
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if codec == "identity":
+        return data
+    raise ValueError(f"Unknown bundle codec: {codec}")
+
+
+def _decode(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "identity":
+        return data
+    raise ValueError(f"Unknown bundle codec: {codec}")
+
+
+def count_records(data: bytes, filename: str) -> int:
+    """
+    Counts the records in an export file.
+
+    JSONL files count one record per non-empty line. JSON snapshots use their
+    ``total_count`` field, the length of a top-level list, or the length of
+    the first list-valued field (``users``, ``settings``, ...).
+    """
+    if filename.endswith(".jsonl"):
+        return sum(1 for line in data.splitlines() if line.strip())
+
+    try:
+        payload = json.loads(data)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return 0
+
+    if isinstance(payload, list):
+        return len(payload)
+    if isinstance(payload, dict):
+        if isinstance(payload.get("total_count"), int):
+            return payload["total_count"]
+        for value in payload.values():
+            if isinstance(value, list):
+                return len(value)
+    return 1
+
+
+class BundleMember:
+    """
+    Manifest entry describing one file inside a bundle.
+
+    ``checksum_sha256`` and ``size_bytes`` describe the decoded content, so
+    they match the loose file the member was built from.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        member_type: str,
+        record_count: int,
+        checksum_sha256: str,
+        size_bytes: int,
+        codec: str = "identity",
+    ):
+        if member_type not in MEMBER_TYPES:
+            raise ValueError(f"Unknown bundle member type: {member_type}")
+        if codec not in CODECS:
+            raise ValueError(f"Unknown bundle codec: {codec}")
+        # Importers stage members under their name, so it must stay a plain
+        # file name inside the staging directory
+        if not name or name.startswith(".") or ".." in name or any(c in name for c in "/\\\0"):
+            raise ValueError(f"Unsafe bundle member name: {name!r}")
+        self.name = name
+        self.member_type = member_type
+        self.record_count = record_count
+        self.checksum_sha256 = checksum_sha256
+        self.size_bytes = size_bytes
+        self.codec = codec
+
+    @property
+    def archive_path(self) -> str:
+        """Path of the member inside the tar container."""
+        suffix = ".gz" if self.codec == "gzip" else ""
+        return f"{self.member_type}/{self.name}{suffix}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "type": self.member_type,
+            "record_count": self.record_count,
+            "checksum_sha256": self.checksum_sha256,
+            "size_bytes": self.size_bytes,
+            "codec": self.codec,
+            "archive_path": self.archive_path,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BundleMember":
+        return cls(
+            name=data["name"],
+            member_type=data["type"],
+            record_count=data.get("record_count", 0),
+            checksum_sha256=data["checksum_sha256"],
+            size_bytes=data.get("size_bytes", 0),
+            codec=data.get("codec", "identity"),
+        )
+
+
+class BundleWriter:
+    """
+    Collects export files and writes them as a single bundle file.
+    """
+
+    def __init__(
+        self,
+        source_network: str,
+        codec: str = "gzip",
+        bundle_id: Optional[uuid.UUID] = None,
+    ):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown bundle codec: {codec}")
+        self.bundle_id = bundle_id or uuid.uuid4()
+        self.source_network = source_network
+        self.codec = codec
+        self.created_at = datetime.now(timezone.utc)
+        self._members: List[Tuple[BundleMember, bytes]] = []
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    @property
+    def members(self) -> List[BundleMember]:
+        return [member for member, _ in self._members]
+
+    def add_bytes(
+        self,
+        name: str,
+        member_type: str,
+        data: bytes,
+        record_count: Optional[int] = None,
+        codec: Optional[str] = None,
+    ) -> BundleMember:
+        """Adds an in-memory file to the bundle."""
+        if any(existing.name == name and existing.member_type == member_type for existing in self.members):
+            raise ValueError(f"Duplicate bundle member: {member_type}/{name}")
+
+        member = BundleMember(
+            name=name,
+            member_type=member_type,
+            record_count=count_records(data, name) if record_count is None else record_count,
+            checksum_sha256=hashlib.sha256(data).hexdigest(),
+            size_bytes=len(data),
+            codec=codec or self.codec,
+        )
+        self._members.append((member, _encode(data, member.codec)))
+        return member
+
+    def add_file(
+        self,
+        file_path: Union[str, Path],
+        member_type: str,
+        name: Optional[str] = None,
+        codec: Optional[str] = None,
+    ) -> BundleMember:
+        """Adds a file from disk to the bundle."""
+        path = Path(file_path)
+        return self.add_bytes(name or path.name, member_type, path.read_bytes(), codec=codec)
+
+    def manifest(self) -> Dict[str, Any]:
+        members = self.members
+        return {
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "bundle_id": str(self.bundle_id),
+            "source_network": self.source_network,
+            "created_at_utc": self.created_at.isoformat(),
+            "member_count": len(members),
+            "record_count": sum(member.record_count for member in members),
+            "members": [member.to_dict() for member in members],
+        }
+
+    def write(self, dest_path: Union[str, Path]) -> Path:
+        """
+        Writes the bundle next to ``dest_path`` under a temporary name and
+        renames it into place, so importers never see a partial bundle.
+        """
+        dest = Path(dest_path)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dest.with_name(f".{dest.name}.tmp")
+
+        with tarfile.open(tmp_path, "w") as tar:
+            _add_tar_member(tar, MANIFEST_NAME, json.dumps(self.manifest(), indent=2).encode("utf-8"))
+            for member, encoded in self._members:
+                _add_tar_member(tar, member.archive_path, encoded)
+
+        os.replace(tmp_path, dest)
+        return dest
+
+
+def _add_tar_member(tar: tarfile.TarFile, name: str, data: bytes) -> None:
+    info = tarfile.TarInfo(name=name)
+    info.size = len(data)
+    info.mtime = int(datetime.now(timezone.utc).timestamp())
+    tar.addfile(info, io.BytesIO(data))
+
+
+class BundleReader:
+    """
+    Reads and verifies a bundle written by :class:`BundleWriter`.
+
+    Raises ``ValueError`` if the container or manifest is malformed.
+    """
+
+    def __init__(self, bundle_path: Union[str, Path]):
+        self.path = Path(bundle_path)
+        try:
+            self._tar = tarfile.open(self.path, "r")
+        except tarfile.TarError as e:
+            raise ValueError(f"Not a transfer bundle: {self.path.name}: {e}") from e
+
+        try:
+            manifest_file = self._tar.extractfile(MANIFEST_NAME)
+        except KeyError as e:
+            self._tar.close()
+            raise ValueError(f"Bundle {self.path.name} has no {MANIFEST_NAME}") from e
+
+        self.manifest: Dict[str, Any] = json.loads(manifest_file.read())
+        if self.manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+            self._tar.close()
+            raise ValueError(
+                f"Unsupported bundle format version: {self.manifest.get('format_version')}"
+            )
+        try:
+            self.members: List[BundleMember] = [
+                BundleMember.from_dict(entry) for entry in self.manifest.get("members", [])
+            ]
+        except ValueError:
+            self._tar.close()
+            raise
+
+    def __enter__(self) -> "BundleReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._tar.close()
+
+    @property
+    def bundle_id(self) -> str:
+        return self.manifest["bundle_id"]
+
+    def read_member(self, member: BundleMember) -> bytes:
+        """Returns the decoded content of a member after checking its checksum."""
+        try:
+            encoded = self._tar.extractfile(member.archive_path).read()
+        except (KeyError, AttributeError) as e:
+            raise ValueError(f"Bundle member missing: {member.archive_path}") from e
+
+        data = _decode(encoded, member.codec)
+        if hashlib.sha256(data).hexdigest() != member.checksum_sha256:
+            raise ValueError(f"Checksum mismatch for bundle member {member.archive_path}")
+        return data
+
+    def verify(self) -> List[str]:
+        """
+        Verifies every member against the manifest.
+
+        Returns:
+            Archive paths of members that are missing or corrupted (empty if
+            the bundle is intact).
+        """
+        failed = []
+        for member in self.members:
+            try:
+                self.read_member(member)
+            except (ValueError, OSError, EOFError):
+                failed.append(member.archive_path)
+        return failed
+
+    def iter_members(self, member_types: Optional[Iterable[str]] = None):
+        """Yields ``(member, data)`` pairs, optionally filtered by type."""
+        wanted = set(member_types) if member_types is not None else None
+        for member in self.members:
+            if wanted is None or member.member_type in wanted:
+                yield member, self.read_member(member)
+
+
+def pack_export_files(
+    writer: BundleWriter,
+    export_dir: Union[str, Path],
+    sources: Iterable[Tuple[str, str]],
+) -> List[Path]:
+    """
+    Adds every loose export file matching ``sources`` to ``writer``.
+
+    Args:
+        writer: The bundle being built.
+        export_dir: Directory the exporters write to.
+        sources: ``(member_type, glob_pattern)`` pairs relative to ``export_dir``.
+
+    Returns:
+        The files that were packed, so the caller can archive them once the
+        bundle has been written.
+    """
+    base = Path(export_dir)
+    packed = []
+    for member_type, pattern in sources:
+        for file_path in sorted(base.glob(pattern)):
+            if not file_path.is_file() or file_path.name.startswith("."):
+                continue
+            writer.add_file(file_path, member_type)
+            packed.append(file_path)
+    return packed
+
+
+def pack_snapshot_files(
+    writer: BundleWriter,
+    export_dir: Union[str, Path],
+    sources: Iterable[Tuple[str, str]],
+    shipped: Dict[str, str],
+) -> Dict[str, str]:
+    """
+    Adds snapshot files that changed since they were last shipped.
+
+    Snapshots (e.g. ``users/latest.json``) are rewritten in place by their
+    exporter and read by other consumers, so unlike timestamped exports they
+    are copied into the bundle and left where they are.
+
+    Args:
+        writer: The bundle being built.
+        export_dir: Directory the exporters write to.
+        sources: ``(member_type, relative_path)`` pairs.
+        shipped: SHA-256 per relative path as of the last bundle.
+
+    Returns:
+        The checksums of the snapshots added, by relative path, to merge into
+        ``shipped`` once the bundle has been written.
+    """
+    base = Path(export_dir)
+    added = {}
+    for member_type, relative_path in sources:
+        file_path = base / relative_path
+        if not file_path.is_file():
+            continue
+        data = file_path.read_bytes()
+        checksum = hashlib.sha256(data).hexdigest()
+        if shipped.get(relative_path) == checksum:
+            continue
+        writer.add_bytes(file_path.name, member_type, data)
+        added[relative_path] = checksum
+    return added
+
+
+def unpack_bundle(
+    reader: BundleReader,
+    destinations: Dict[str, Callable[[BundleMember, bytes], Path]],
+) -> Dict[str, List[Path]]:
+    """
+    Verifies a bundle and hands each member to the writer for its type.
+
+    Nothing is written unless every member passes verification. Members whose
+    type has no entry in ``destinations`` are left in the bundle.
+
+    Returns:
+        The files written, grouped by member type.
+
+    Raises:
+        ValueError: if any member is missing or fails its checksum.
+    """
+    failed = reader.verify()
+    if failed:
+        raise ValueError(f"Bundle {reader.path.name} failed verification: {', '.join(failed)}")
+
+    written: Dict[str, List[Path]] = {}
+    for member, data in reader.iter_members(destinations.keys()):
+        written.setdefault(member.member_type, []).append(destinations[member.member_type](member, data))
+    return written
+
+
+def generate_bundle_filename(source_network: str, bundle_id: uuid.UUID) -> str:
+    """
+    Format: bundle_{source_network}_{timestamp}_{bundle_id}.bundle
+    """
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    return f"bundle_{source_network}_{timestamp}_{bundle_id}{BUNDLE_SUFFIX}"
+
+
+def write_member_file(data: bytes, dest_path: Union[str, Path]) -> Path:
+    """Writes a bundle member to its importer's directory atomically."""
+    dest = Path(dest_path)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(f".{dest.name}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, dest)
+    return dest
@@ -0,0 +1,56 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from shared.blob_store import canonical_payload, payload_hash, store_blob
+
+
+def test_payload_hash_ignores_key_order():
+    """
+    Tests that equal payloads hash equally regardless of key order or whitespace.
+    """
+    first = {"count": 2, "results": [{"from": "THR", "to": "IST"}], "provider": "Elasticsearch"}
+    second = {"provider": "Elasticsearch", "results": [{"to": "IST", "from": "THR"}], "count": 2}
+
+    assert canonical_payload(first) == canonical_payload(second)
+    assert payload_hash(first) == payload_hash(second)
+    assert len(payload_hash(first)) == 64
+
+
+def test_payload_hash_distinguishes_payloads():
+    """
+    Tests that different payloads (including list order) get different hashes.
+    """
+    assert payload_hash({"results": [1, 2]}) != payload_hash({"results": [2, 1]})
+    assert payload_hash({"count": 1}) != payload_hash({"count": "1"})
+
+
+def test_canonical_payload_keeps_unicode():
+    """
+    Tests that non-ASCII text is stored as UTF-8 rather than escaped.
+    """
+    assert canonical_payload({"city": "تهران"}) == '{"city":"تهران"}'.encode("utf-8")
+
+
+def test_store_blob_upserts_by_hash():
+    """
+    Tests that storing a payload issues one INSERT ... ON CONFLICT keyed by its hash.
+    """
+    db = MagicMock()
+    payload = {"count": 1, "results": [{"id": 1}]}
+
+    blob_hash = store_blob(db, payload)
+
+    assert blob_hash == payload_hash(payload)
+    stmt = db.execute.call_args[0][0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (hash) DO NOTHING" in sql
+
+
+def test_store_blob_skips_empty_payload():
+    """
+    Tests that a missing payload stores nothing.
+    """
+    db = MagicMock()
+    assert store_blob(db, None) is None
+    db.execute.assert_not_called()
@@ -0,0 +1,103 @@
+import multiprocessing
+from pathlib import Path
+
+from shared.change_log import ChangeLog, LogOffset
+
+
+def _append_worker(directory: str, worker: int, count: int) -> None:
+    log = ChangeLog(directory, "password_changes", segment_max_bytes=2048)
+    for i in range(count):
+        log.append({"user_id": f"{worker}-{i}", "hashed_password": "x" * 20})
+
+
+def test_append_assigns_consecutive_sequence_numbers(tmp_path: Path):
+    """
+    Tests that appends are numbered in order and read back from an offset.
+    """
+    log = ChangeLog(tmp_path, "password_changes")
+    assert log.append({"user_id": "a"}) == 1
+    assert log.append_many([{"user_id": "b"}, {"user_id": "c"}]) == [2, 3]
+
+    assert [r["user_id"] for r in log.read_from(0)] == ["a", "b", "c"]
+    assert [r["seq"] for r in log.read_from(1)] == [2, 3]
+    assert [r["seq"] for r in log.read_from(1, limit=1)] == [2]
+    assert list(log.read_from(3)) == []
+
+
+def test_concurrent_appends_do_not_interleave(tmp_path: Path):
+    """
+    Tests that writers in several processes never lose, duplicate or tear a record.
+    """
+    workers = [
+        multiprocessing.Process(target=_append_worker, args=(str(tmp_path), w, 50))
+        for w in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+
+    log = ChangeLog(tmp_path, "password_changes", segment_max_bytes=2048)
+    records = list(log.read_from(0))
+    assert [r["seq"] for r in records] == list(range(1, 201))
+    assert len({r["user_id"] for r in records}) == 200
+    assert len(log.segments()) > 1
+
+
+def test_segments_rotate_and_prune(tmp_path: Path):
+    """
+    Tests rotation by size and that pruning keeps unread and newest segments.
+    """
+    log = ChangeLog(tmp_path, "password_changes", segment_max_bytes=200)
+    for i in range(20):
+        log.append({"user_id": str(i), "hashed_password": "h" * 40})
+
+    segments = log.segments()
+    assert len(segments) > 2
+    assert segments[0][1].name == "password_changes.000000000001.jsonl"
+
+    offset = segments[2][0] - 1
+    removed = log.prune(offset)
+    assert len(removed) == 2
+    assert [r["seq"] for r in log.read_from(offset)] == list(range(offset + 1, 21))
+
+    log.prune(20)
+    assert len(log.segments()) == 1
+    assert log.append({"user_id": "next"}) == 21
+
+
+def test_partial_trailing_line_is_left_for_next_read(tmp_path: Path):
+    """
+    Tests that a write in progress is neither returned nor breaks numbering.
+    """
+    log = ChangeLog(tmp_path, "password_changes")
+    log.append({"user_id": "a"})
+    with open(log.segments()[-1][1], "ab") as f:
+        f.write(b'{"seq": 2, "user_')
+
+    assert [r["seq"] for r in log.read_from(0)] == [1]
+    assert log.last_seq() == 1
+
+
+def test_extend_skips_records_already_copied(tmp_path: Path):
+    """
+    Tests that copying records between logs keeps sequence numbers and is idempotent.
+    """
+    source = ChangeLog(tmp_path / "source", "password_changes")
+    source.append_many([{"user_id": str(i)} for i in range(5)])
+    target = ChangeLog(tmp_path / "target", "password_changes")
+
+    assert target.extend(list(source.read_from(0, limit=3))) == 3
+    assert target.extend(list(source.read_from(0))) == 2
+    assert [r["seq"] for r in target.read_from(0)] == [1, 2, 3, 4, 5]
+
+
+def test_log_offset_round_trip(tmp_path: Path):
+    """
+    Tests that the consumer offset starts at zero and survives a reload.
+    """
+    offset = LogOffset(tmp_path / "state" / "password_changes.offset")
+    assert offset.load() == 0
+    offset.store(42)
+    assert LogOffset(offset.path).load() == 42
+    assert not list(offset.path.parent.glob(".*.tmp"))
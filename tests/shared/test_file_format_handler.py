@@ -1,3 +1,4 @@
+import os
 import pytest
 from pathlib import Path
 import uuid
@@ -8,7 +9,17 @@ from shared.file_format_handler import (
     generate_filename,
     parse_filename,
     calculate_checksum,
+    calculate_chunk_hashes,
+    merkle_root,
+    verify_chunks,
+    verify_batch_file,
+    retransfer_request,
+    missing_blobs_report,
+    collect_batch_parts,
+    metadata_path,
     BatchMetadata,
+    SizeCappedJSONLWriter,
+    adaptive_batch_size,
 )
 
 # Sample data for testing
@@ -150,4 +161,263 @@ def test_batch_metadata_creation_and_write(tmp_path: Path):
     assert meta_data["batch_id"] == str(batch_id)
     assert meta_data["record_count"] == record_count
     assert meta_data["checksum_sha256"] == checksum
-    assert "created_at_utc" in meta_data
\ No newline at end of file
+    assert "created_at_utc" in meta_data
+
+
+def test_chunk_hashes_and_merkle_root(tmp_path: Path):
+    """
+    Tests fixed-size chunk hashing and the Merkle root over chunk hashes.
+    """
+    import hashlib
+
+    file_path = tmp_path / "chunks.bin"
+    file_path.write_bytes(b"a" * 10 + b"b" * 10 + b"c" * 5)
+
+    hashes = calculate_chunk_hashes(file_path, chunk_size=10, max_workers=3)
+    assert hashes == [
+        hashlib.sha256(b"a" * 10).hexdigest(),
+        hashlib.sha256(b"b" * 10).hexdigest(),
+        hashlib.sha256(b"c" * 5).hexdigest(),
+    ]
+
+    # Two leaves pair up, the odd third is promoted
+    left = hashlib.sha256(bytes.fromhex(hashes[0]) + bytes.fromhex(hashes[1])).digest()
+    expected = hashlib.sha256(left + bytes.fromhex(hashes[2])).hexdigest()
+    assert merkle_root(hashes) == expected
+    assert merkle_root(hashes[:1]) == hashes[0]
+
+    empty_path = tmp_path / "empty.bin"
+    empty_path.touch()
+    assert calculate_chunk_hashes(empty_path, chunk_size=10) == []
+
+
+def test_batch_metadata_records_chunk_manifest(tmp_path: Path):
+    """
+    Tests that metadata built from a file carries its chunk manifest.
+    """
+    file_path = tmp_path / "batch.jsonl"
+    JSONLHandler.write_jsonl(SAMPLE_DATA, file_path)
+
+    metadata = BatchMetadata.from_file(uuid.uuid4(), "results", 3, file_path, chunk_size=16)
+    meta_path = metadata.write_metadata_file(tmp_path / "batch.meta.json")
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+
+    assert meta["checksum_sha256"] == calculate_checksum(file_path)
+    assert meta["chunk_size"] == 16
+    assert meta["chunk_count"] == len(meta["chunk_hashes"]) == -(-file_path.stat().st_size // 16)
+    assert meta["merkle_root"] == merkle_root(meta["chunk_hashes"])
+    assert verify_chunks(file_path, meta)["valid"]
+
+
+def test_verify_chunks_reports_damaged_chunks(tmp_path: Path):
+    """
+    Tests that only the corrupted and truncated chunks are reported for re-send.
+    """
+    file_path = tmp_path / "batch.jsonl"
+    original = bytes(range(256)) * 4
+    file_path.write_bytes(original)
+    meta = BatchMetadata.from_file(uuid.uuid4(), "requests", 0, file_path, chunk_size=100).to_dict()
+
+    damaged = bytearray(original)
+    damaged[250] ^= 0xFF
+    file_path.write_bytes(bytes(damaged[:950]))
+
+    report = verify_chunks(file_path, meta, max_workers=4)
+    assert not report["valid"]
+    assert report["bad_chunks"] == [2, 9, 10]
+
+    retransfer = retransfer_request(file_path, meta, report)
+    assert retransfer["byte_ranges"] == [[200, 300], [900, 1000], [1000, 1024]]
+
+
+def test_verify_chunks_without_manifest(tmp_path: Path):
+    """
+    Tests that legacy metadata without chunk hashes is passed through unverified.
+    """
+    file_path = tmp_path / "legacy.jsonl"
+    file_path.write_text("{}\n")
+    report = verify_chunks(file_path, {"checksum": "abc"})
+    assert report["valid"] and not report["verified"]
+
+
+def test_verify_batch_file_falls_back_to_checksum(tmp_path: Path):
+    """
+    Tests that files without a chunk manifest are checked by their whole-file checksum.
+    """
+    file_path = tmp_path / "legacy.jsonl"
+    file_path.write_text("{}\n")
+    checksum = calculate_checksum(file_path)
+
+    assert verify_batch_file(file_path, {"checksum_sha256": checksum})["valid"]
+
+    report = verify_batch_file(file_path, {"checksum_sha256": "0" * 64})
+    assert not report["valid"]
+    assert retransfer_request(file_path, {"file_size_bytes": 3}, report)["byte_ranges"] == [[0, 3]]
+    assert not verify_batch_file(file_path, {})["valid"]
+
+
+def test_retransfer_request_lists_missing_blobs(tmp_path: Path):
+    """
+    Tests that an intact file referencing unknown blobs asks for the payloads only.
+    """
+    file_path = tmp_path / "results.jsonl"
+    file_path.write_text("{}\n")
+    meta = {"chunk_size": 100, "file_size_bytes": 3}
+
+    retransfer = retransfer_request(file_path, meta, missing_blobs_report(meta, ["b" * 64, "a" * 64, "b" * 64]))
+
+    assert retransfer["byte_ranges"] == []
+    assert retransfer["missing_result_blobs"] == ["a" * 64, "b" * 64]
+
+
+def test_verify_chunks_rejects_tampered_manifest(tmp_path: Path):
+    """
+    Tests that a manifest whose hashes do not match its Merkle root is rejected.
+    """
+    file_path = tmp_path / "batch.jsonl"
+    file_path.write_bytes(b"x" * 30)
+    meta = BatchMetadata.from_file(uuid.uuid4(), "requests", 0, file_path, chunk_size=10).to_dict()
+    meta["chunk_hashes"][1] = "0" * 64
+
+    report = verify_chunks(file_path, meta)
+    assert not report["valid"]
+    assert report["bad_chunks"] == [0, 1, 2]
+
+
+def test_size_capped_writer_rolls_over(tmp_path: Path):
+    """
+    Tests that parts respect the byte budget and oversized records get their own part.
+    """
+    records = [{"id": i, "pad": "x" * 20} for i in range(5)] + [{"id": 99, "pad": "y" * 200}]
+
+    with SizeCappedJSONLWriter(tmp_path, "results_1", max_part_bytes=90) as writer:
+        for record in records:
+            writer.write(record)
+        parts = writer.close()
+        assert not list(tmp_path.glob("*.jsonl"))
+        paths = writer.publish()
+
+    assert [p.name for p in paths] == [f"results_1.part{n:03d}.jsonl" for n in range(1, 5)]
+    assert all(part.part_count == 4 for part in parts)
+    assert [part.record_count for part in parts] == [2, 2, 1, 1]
+    assert all(p.stat().st_size <= 90 for p in paths[:3])
+    assert [r for p in paths for r in JSONLHandler.read_jsonl(p)] == records
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_size_capped_writer_single_part_keeps_plain_name(tmp_path: Path):
+    """
+    Tests that an unsplit batch keeps the plain file name.
+    """
+    with SizeCappedJSONLWriter(tmp_path, "requests_1") as writer:
+        writer.write({"id": 1})
+        paths = writer.publish()
+
+    assert [p.name for p in paths] == ["requests_1.jsonl"]
+    assert metadata_path(paths[0]).name == "requests_1.meta.json"
+
+
+def test_size_capped_writer_abort_removes_parts(tmp_path: Path):
+    """
+    Tests that a failed export leaves no part files behind.
+    """
+    with pytest.raises(RuntimeError):
+        with SizeCappedJSONLWriter(tmp_path, "results_1", max_part_bytes=10) as writer:
+            writer.write({"id": 1})
+            writer.write({"id": 2})
+            raise RuntimeError("boom")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_size_capped_writer_abort_removes_unpublished_metadata(tmp_path: Path):
+    """
+    Tests that metadata written for parts of a rolled-back export is discarded too.
+    """
+    with pytest.raises(RuntimeError):
+        with SizeCappedJSONLWriter(tmp_path, "results_1") as writer:
+            writer.write({"id": 1})
+            parts = writer.close()
+            parts[0].meta_path.write_text("{}")
+            raise RuntimeError("commit failed")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def _write_parts(directory: Path, batch_id: str, part_count: int, present) -> None:
+    for number in present:
+        data_file = directory / f"results_{batch_id}.part{number:03d}.jsonl"
+        data_file.write_text("{}\n")
+        metadata_path(data_file).write_text(json.dumps(
+            {"batch_id": batch_id, "part_number": number, "part_count": part_count}
+        ))
+
+
+def test_collect_batch_parts_waits_for_all_parts(tmp_path: Path):
+    """
+    Tests that split batches complete only when every part has arrived, in any order.
+    """
+    _write_parts(tmp_path, "a", 3, [3, 1])
+    _write_parts(tmp_path, "b", 2, [2, 1])
+    (tmp_path / "results_legacy.jsonl").write_text("{}\n")
+
+    complete, waiting, _ = collect_batch_parts(list(tmp_path.glob("results_*.jsonl")))
+
+    assert waiting == ["a", "results_legacy.jsonl"]
+    names = sorted([data_file.name for data_file, _, _ in batch] for batch in complete)
+    assert names == [["results_b.part001.jsonl", "results_b.part002.jsonl"]]
+
+    _write_parts(tmp_path, "a", 3, [2])
+    metadata_path(tmp_path / "results_legacy.jsonl").write_text(json.dumps({"batch_id": "legacy"}))
+    complete, waiting, _ = collect_batch_parts(list(tmp_path.glob("results_*.jsonl")))
+    assert waiting == []
+    assert len(complete) == 3
+
+
+def test_collect_batch_parts_holds_part_without_metadata(tmp_path: Path):
+    """
+    Tests that a part whose metadata is late is not imported as a batch of its own.
+    """
+    _write_parts(tmp_path, "a", 2, [1, 2])
+    metadata_path(tmp_path / "results_a.part002.jsonl").unlink()
+
+    complete, waiting, _ = collect_batch_parts(list(tmp_path.glob("results_*.jsonl")))
+
+    assert complete == []
+    assert waiting == ["a", "results_a.part002.jsonl"]
+
+
+def test_collect_batch_parts_gives_up_on_legacy_file(tmp_path: Path):
+    """
+    Tests that a file from an exporter that never writes metadata is not held forever.
+    """
+    legacy = tmp_path / "results_20240101_000000.jsonl"
+    legacy.write_text('{"request_id": "a", "result_data": {"count": 1}}\n')
+    os.utime(legacy, (1000, 1000))
+    _write_parts(tmp_path, "a", 2, [1])
+    metadata_path(tmp_path / "results_a.part001.jsonl").unlink()
+
+    files = list(tmp_path.glob("results_*.jsonl"))
+    complete, waiting, unmanifested = collect_batch_parts(files, max_metadata_wait=600, now=1500)
+    assert complete == [] and unmanifested == []
+    assert waiting == ["results_20240101_000000.jsonl", "results_a.part001.jsonl"]
+
+    complete, waiting, unmanifested = collect_batch_parts(files, max_metadata_wait=600, now=1601)
+    assert complete == []
+    assert unmanifested == [legacy]
+    assert waiting == ["results_a.part001.jsonl"]
+
+
+def test_adaptive_batch_size():
+    """
+    Tests that export batches follow backlog depth and the target file size.
+    """
+    # Small backlog is drained in one run
+    assert adaptive_batch_size(120, 1000, 64 * 1024 * 1024, 50, 50000) == 120
+    # Deep backlog of small rows is capped by max_batch
+    assert adaptive_batch_size(10**6, 500, 64 * 1024 * 1024, 50, 50000) == 50000
+    # Large rows are limited by the target file size
+    assert adaptive_batch_size(10**6, 1024 * 1024, 64 * 1024 * 1024, 50, 50000) == 64
+    # Huge rows never drop below min_batch
+    assert adaptive_batch_size(10**6, 10 * 1024 * 1024, 64 * 1024 * 1024, 50, 50000) == 50
+    assert adaptive_batch_size(0, 500, 64 * 1024 * 1024, 50, 50000) == 0
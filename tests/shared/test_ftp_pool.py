@@ -0,0 +1,140 @@
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pyftpdlib")
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.servers import ThreadedFTPServer
+
+from shared.ftp_pool import FTPSessionPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def ftp_server(tmp_path: Path):
+    """
+    Runs a local pyftpdlib server rooted at a temporary directory.
+    """
+    root = tmp_path / "ftp_root"
+    root.mkdir()
+    authorizer = DummyAuthorizer()
+    authorizer.add_user("relay", "secret", str(root), perm="elradfmwMT")
+    handler = type("Handler", (FTPHandler,), {"authorizer": authorizer, "banner": "test relay"})
+    server = ThreadedFTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"timeout": 0.1}, daemon=True)
+    thread.start()
+    yield server.address[1], root
+    server.close_all()
+    thread.join(timeout=5)
+
+
+def make_pool(port: int, **options) -> FTPSessionPool:
+    return FTPSessionPool("127.0.0.1", port, "relay", "secret", **options)
+
+
+def test_sessions_are_reused(ftp_server):
+    """
+    Tests that sequential transfers share one logged-in session.
+    """
+    port, root = ftp_server
+    pool = make_pool(port)
+    try:
+        for i in range(5):
+            pool.upload_bytes(f"/users/file_{i}.json", b"{}")
+        assert pool.stats["connects"] == 1
+        assert pool.stats["reused"] == 4
+        assert (root / "users" / "file_4.json").read_bytes() == b"{}"
+        assert not list((root / "users").glob(".*.tmp"))
+    finally:
+        pool.close()
+
+
+def test_dead_session_is_recycled(ftp_server):
+    """
+    Tests that a session dropped by the server is replaced transparently.
+    """
+    port, root = ftp_server
+    clock = FakeClock()
+    pool = make_pool(port, keepalive_interval=10.0, clock=clock)
+    try:
+        pool.upload_bytes("/a.json", b"1")
+        # Kill the idle session behind the pool's back
+        pool._idle[0][0].sock.shutdown(socket.SHUT_RDWR)
+        clock.now = 20.0
+
+        assert pool.download_bytes("/a.json") == b"1"
+        assert pool.stats["recycled"] == 1
+        assert pool.stats["connects"] == 2
+    finally:
+        pool.close()
+
+
+def test_unchanged_files_are_skipped(ftp_server):
+    """
+    Tests that MLSD size/modify facts let unchanged uploads and downloads skip the transfer.
+    """
+    port, root = ftp_server
+    pool = make_pool(port)
+    try:
+        assert pool.upload_bytes("/users/latest.json", b'{"users": []}') is True
+        assert pool.upload_bytes("/users/latest.json", b'{"users": []}') is False
+        assert pool.upload_bytes("/users/latest.json", b'{"users": [1]}') is True
+
+        assert pool.download_bytes("/users/latest.json") == b'{"users": [1]}'
+        skipped = pool.stats["skipped"]
+        assert pool.download_bytes("/users/latest.json") == b'{"users": [1]}'
+        assert pool.stats["skipped"] == skipped + 1
+
+        # A change on the server is picked up
+        (root / "users" / "latest.json").write_bytes(b'{"users": [1, 2, 3]}')
+        assert pool.download_bytes("/users/latest.json") == b'{"users": [1, 2, 3]}'
+    finally:
+        pool.close()
+
+
+def test_upload_and_download_many(ftp_server, tmp_path: Path):
+    """
+    Tests parallel multi-file transfers over pooled sessions.
+    """
+    port, root = ftp_server
+    pool = make_pool(port, max_size=3)
+    try:
+        items = [(f"line {i}\n".encode(), f"/results/results_{i}.jsonl") for i in range(6)]
+        uploaded = pool.upload_many(items)
+        assert all(uploaded.values())
+        assert pool.stats["connects"] <= 3
+        assert sorted(pool.list_dir("/results")) == [f"results_{i}.jsonl" for i in range(6)]
+
+        local_dir = tmp_path / "imports"
+        downloaded = pool.download_many("/results", local_dir)
+        assert all(downloaded.values())
+        assert (local_dir / "results_3.jsonl").read_bytes() == b"line 3\n"
+
+        assert not any(pool.download_many("/results", local_dir).values())
+    finally:
+        pool.close()
+
+
+def test_upload_chunks(ftp_server):
+    """
+    Tests that streamed chunks upload like bytes and skip when unchanged.
+    """
+    port, root = ftp_server
+    pool = make_pool(port)
+    try:
+        chunks = lambda: (f"{i}\n".encode() for i in range(100))
+        assert pool.upload_chunks("/settings/settings_1.json", chunks()) is True
+        assert (root / "settings" / "settings_1.json").read_bytes() == b"".join(chunks())
+        assert pool.upload_chunks("/settings/settings_1.json", chunks()) is False
+    finally:
+        pool.close()
@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from shared.import_watcher import ImportWatcher, InotifyBackend, SettleTracker, WatchRoute
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeBackend:
+    overflowed = False
+
+    def read(self, timeout):
+        return []
+
+    def close(self):
+        pass
+
+
+def test_settle_tracker_waits_for_stable_size(tmp_path: Path):
+    """
+    Tests that a file still being written is not reported until it stops changing.
+    """
+    clock = FakeClock()
+    tracker = SettleTracker(settle_seconds=2.0, clock=clock)
+    path = tmp_path / "results_1.jsonl"
+    path.write_text("{}\n")
+
+    tracker.observe(path)
+    assert tracker.settled() == []
+
+    clock.now = 1.0
+    with path.open("a") as f:
+        f.write("{}\n")
+    assert tracker.settled() == []
+
+    clock.now = 2.5
+    assert tracker.settled() == []
+    clock.now = 3.1
+    assert tracker.settled() == [path]
+    assert len(tracker) == 0
+
+
+def test_settle_tracker_marker_and_rename(tmp_path: Path):
+    """
+    Tests that renamed files and files with a completion marker settle at once.
+    """
+    tracker = SettleTracker(settle_seconds=60.0, clock=FakeClock())
+    moved = tmp_path / "a.jsonl"
+    marked = tmp_path / "b.jsonl"
+    gone = tmp_path / "c.jsonl"
+    moved.write_text("{}\n")
+    marked.write_text("{}\n")
+    (tmp_path / "b.jsonl.done").touch()
+
+    tracker.observe(moved, moved=True)
+    tracker.observe(marked)
+    tracker.observe(gone)
+    assert sorted(tracker.settled()) == [moved, marked]
+    assert len(tracker) == 0
+
+
+def test_watcher_dispatches_each_route_once(tmp_path: Path):
+    """
+    Tests that settled files dispatch their route's task once per tick.
+    """
+    dispatched = []
+    routes = [
+        WatchRoute("results", tmp_path / "results", ["results_*.jsonl"], "import_results"),
+        WatchRoute("users", tmp_path / "users", ["latest.json"], "import_users"),
+    ]
+    watcher = ImportWatcher(routes, dispatched.append, settle_seconds=1.0, backend=FakeBackend())
+
+    results_dir = routes[0].directory
+    for name in ["results_1.jsonl", "results_2.jsonl", ".results_3.jsonl.tmp", "other.txt"]:
+        (results_dir / name).write_text("{}\n")
+        watcher.handle_event(results_dir / name, moved=True)
+
+    assert watcher.tick() == ["import_results"]
+    assert dispatched == ["import_results"]
+    assert watcher.tick() == []
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_backend_reports_renames(tmp_path: Path):
+    """
+    Tests that the inotify backend reports an atomic rename as a move.
+    """
+    backend = InotifyBackend([tmp_path])
+    try:
+        tmp_file = tmp_path / ".results_1.jsonl.tmp"
+        tmp_file.write_text("{}\n")
+        os.replace(tmp_file, tmp_path / "results_1.jsonl")
+
+        events = []
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline and (tmp_path / "results_1.jsonl", True) not in events:
+            events.extend(backend.read(0.2))
+    finally:
+        backend.close()
+
+    assert (tmp_path / "results_1.jsonl", True) in events
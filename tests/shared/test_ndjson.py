@@ -0,0 +1,50 @@
+import json
+import uuid
+
+import pytest
+
+from shared.ndjson import batched, dumps_line, iter_lines
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(items):
+    return [item async for item in items]
+
+
+async def test_lines_split_across_chunks():
+    """
+    Tests that lines are reassembled across chunk boundaries and blank lines skipped.
+    """
+    lines = await collect(iter_lines(stream(b'{"a": 1}\n{"b"', b': 2}\n\n', b'{"c": 3}')))
+
+    assert [json.loads(line) for line in lines] == [{"a": 1}, {"b": 2}, {"c": 3}]
+
+
+async def test_overlong_line_rejected():
+    """
+    Tests that a stream without newlines cannot grow the buffer without bound.
+    """
+    with pytest.raises(ValueError):
+        await collect(iter_lines(stream(b"x" * 10, b"x" * 10), max_line_bytes=15))
+
+
+async def test_batched():
+    """
+    Tests grouping into fixed-size lists with a short last batch.
+    """
+    assert await collect(batched(stream(*range(5)), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_dumps_line():
+    """
+    Tests that one compact line is written and UUIDs are serialized.
+    """
+    request_id = uuid.uuid4()
+
+    assert dumps_line({"id": request_id, "status": "created"}) == (
+        f'{{"id":"{request_id}","status":"created"}}\n'.encode()
+    )
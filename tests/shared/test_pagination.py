@@ -0,0 +1,25 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from shared.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    """
+    Tests that a cursor decodes to the timestamp (with its zone) and id it encodes.
+    """
+    created_at = datetime(2026, 10, 19, 12, 30, 1, 123456, tzinfo=timezone.utc)
+    row_id = uuid.uuid4()
+
+    cursor = encode_cursor(created_at, row_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "bm8tc2VwYXJhdG9y", encode_cursor(datetime(2026, 1, 1), uuid.UUID(int=1))[:-4]])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
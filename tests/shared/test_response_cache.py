@@ -0,0 +1,240 @@
+import asyncio
+import gzip
+
+import fakeredis
+import orjson
+import pytest
+from fakeredis import aioredis
+
+from shared.response_cache import (
+    CachedResponse,
+    LocalResponseLRU,
+    RedisHealth,
+    ResponseCache,
+    accepts_gzip,
+    encode_response,
+    invalidate_responses,
+    redis_headroom,
+    response_key,
+    user_index_key,
+    warm_responses,
+)
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def cache(server):
+    return ResponseCache(aioredis.FakeRedis(server=server), ttl_seconds=60, compress_min_bytes=64)
+
+
+@pytest.fixture
+async def started(server):
+    cache = ResponseCache(aioredis.FakeRedis(server=server), ttl_seconds=60, compress_min_bytes=64, poll_timeout=0.01)
+    cache.start()
+    for _ in range(100):
+        if cache.local_enabled:
+            break
+        await asyncio.sleep(0.01)
+    yield cache
+    await cache.close()
+
+
+@pytest.mark.parametrize("header,expected", [
+    ("gzip, deflate, br", True),
+    ("br;q=1.0, gzip;q=0.5", True),
+    ("gzip;q=0", False),
+    ("*", True),
+    ("*, gzip;q=0", False),
+    ("identity", False),
+    ("", False),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
+
+
+async def test_roundtrip_compresses_large_bodies(server, cache):
+    """
+    Tests that large bodies are stored gzipped and small ones as they are.
+    """
+    large = {"result_data": {"flights": [{"id": i} for i in range(50)]}}
+    await cache.set("big", "alice", large)
+    await cache.set("small", "alice", {"ok": True})
+
+    big = await cache.get("big")
+    small = await cache.get("small")
+
+    assert big.owner_id == "alice"
+    assert big.encoding == "gzip"
+    assert orjson.loads(gzip.decompress(big.body)) == large
+    assert orjson.loads(big.decoded()) == large
+    assert small.encoding == "identity"
+    assert small.body == b'{"ok":true}'
+    assert 0 < fakeredis.FakeRedis(server=server).ttl(response_key(0, "big")) <= 60
+
+
+async def test_invalidate_user_drops_only_their_entries(server, cache):
+    """
+    Tests that a user's entries are found through their set, without KEYS.
+    """
+    await cache.set("r1", "alice", {"id": "r1"})
+    await cache.set("r2", "alice", {"id": "r2"})
+    await cache.set("r3", "bob", {"id": "r3"})
+
+    assert await cache.invalidate_user("alice") == 2
+    assert await cache.get("r1") is None
+    assert await cache.get("r2") is None
+    assert await cache.get("r3") is not None
+    assert not fakeredis.FakeRedis(server=server).exists(user_index_key(0, "alice"))
+
+
+async def test_clear_moves_to_a_new_generation(server, cache):
+    """
+    Tests that clearing hides every entry and new entries land in the new generation.
+    """
+    await cache.set("r1", "alice", {"id": "r1"})
+
+    assert await cache.clear() == 1
+    cache.invalidate_local(["*"])  # As delivered by the subscription
+    assert await cache.get("r1") is None
+
+    await cache.set("r1", "alice", {"id": "r1"})
+    assert fakeredis.FakeRedis(server=server).exists(response_key(1, "r1"))
+    assert (await cache.invalidate(["r1"])) == 1
+
+
+async def test_stats_sample_the_keyspace(server, cache):
+    """
+    Tests the exact count on a small keyspace and the estimate from a partial scan.
+    """
+    for i in range(40):
+        await cache.set(f"r{i}", "alice", {"id": i})
+    fakeredis.FakeRedis(server=server).mset({f"other:{i}": 1 for i in range(39)})
+
+    exact = await cache.stats()
+    sampled = await cache.stats(sample_keys=10, scan_count=10)
+
+    assert exact["response_cache_keys"] == 40
+    assert exact["response_cache_keys_exact"]
+    assert exact["total_keys"] == 80
+    assert not sampled["response_cache_keys_exact"]
+    assert 0 <= sampled["response_cache_keys"] <= 80
+
+
+async def test_redis_outage_is_a_miss(server, cache):
+    """
+    Tests that the endpoint can still serve a body when Redis is down.
+    """
+    server.connected = False
+
+    assert await cache.get("r1") is None
+    entry = await cache.set("r1", "alice", {"id": "r1"})
+    assert entry.decoded() == b'{"id":"r1"}'
+
+
+async def test_invalidate_responses(server, cache):
+    """
+    Tests that the importer's invalidation drops only the given entries.
+    """
+    await cache.set("r1", "alice", {"id": "r1"})
+    await cache.set("r2", "alice", {"id": "r2"})
+
+    assert invalidate_responses(fakeredis.FakeRedis(server=server), ["r1", "missing"]) == 1
+    assert await cache.get("r1") is None
+    assert await cache.get("r2") is not None
+    assert invalidate_responses(fakeredis.FakeRedis(server=server), []) == 0
+
+
+async def test_local_tier_serves_hits_without_redis(server, started):
+    """
+    Tests that a body read once is served from the process while Redis is down.
+    """
+    await started.set("r1", "alice", {"id": "r1"})
+    server.connected = False
+
+    assert (await started.get("r1")).body == b'{"id":"r1"}'
+    assert await started.get("r2") is None
+    assert not started.health.available
+
+
+async def test_invalidation_reaches_local_tier(server, started):
+    """
+    Tests that the importer's invalidation drops the entry from every process.
+    """
+    await started.set("r1", "alice", {"id": "r1"})
+    await started.set("r2", "alice", {"id": "r2"})
+    invalidate_responses(fakeredis.FakeRedis(server=server), ["r1"])
+
+    for _ in range(100):
+        if started.local.get("r1") is None:
+            break
+        await asyncio.sleep(0.01)
+    assert started.local.get("r1") is None
+    assert started.local.get("r2") is not None
+    assert await started.get("r1") is None
+
+
+def test_local_lru_is_bounded_in_bytes():
+    """
+    Tests eviction by body size and that oversized bodies are not kept.
+    """
+    lru = LocalResponseLRU(max_bytes=100, ttl=60)
+    for key in ("a", "b", "c", "d"):
+        lru.set(key, CachedResponse("u", "identity", b"x" * 25))
+    lru.get("a")
+    lru.set("e", CachedResponse("u", "identity", b"x" * 25))
+
+    assert lru.size == 100
+    assert lru.get("b") is None
+    assert lru.get("a") is not None
+    lru.set("big", CachedResponse("u", "identity", b"x" * 26))
+    assert lru.get("big") is None
+
+
+def test_redis_health_retries_after_delay():
+    """
+    Tests that a failure skips Redis until the retry delay has passed.
+    """
+    now = [0.0]
+    health = RedisHealth(retry_after=5.0, clock=lambda: now[0])
+    health.record_failure()
+
+    assert not health.available
+    now[0] = 5.0
+    assert health.available
+    health.record_success()
+    assert health.available
+
+
+async def test_warmed_entries_are_hits(server, cache):
+    """
+    Tests that the importer's entries are read back by the API and stale ones dropped.
+    """
+    await cache.set("old", "alice", {"id": "old"})
+    await cache.set("r1", "alice", {"id": "stale"})
+    entries = {"r1": encode_response("alice", {"id": "r1"}), "r2": encode_response("bob", {"id": "r2"})}
+
+    warmed = warm_responses(fakeredis.FakeRedis(server=server), entries, ["r1", "r2", "old"], ttl_seconds=60, chunk_size=1)
+
+    assert warmed == 2
+    assert (await cache.get("r1")).body == b'{"id":"r1"}'
+    assert (await cache.get("r2")).owner_id == "bob"
+    assert await cache.get("old") is None
+    assert await cache.invalidate_user("bob") == 1
+
+
+class MemoryInfo:
+    def __init__(self, **memory):
+        self.memory = memory
+
+    def info(self, section):
+        return self.memory
+
+
+def test_redis_headroom():
+    assert redis_headroom(MemoryInfo(maxmemory=0, used_memory=10)) is None
+    assert redis_headroom(MemoryInfo(maxmemory=1000, used_memory=600), max_memory_ratio=0.9) == 300
+    assert redis_headroom(MemoryInfo(maxmemory=1000, used_memory=950)) == 0
@@ -0,0 +1,75 @@
+import asyncio
+
+import fakeredis
+import pytest
+from fakeredis import aioredis
+
+from shared.status_events import StatusHub, publish_status_changes, status_event
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+async def hub(server):
+    hub = StatusHub(aioredis.FakeRedis(server=server), poll_timeout=0.01)
+    yield hub
+    await hub.close()
+
+
+async def next_event(queue):
+    return await asyncio.wait_for(queue.get(), timeout=1.0)
+
+
+async def test_events_reach_the_owner_only(server, hub):
+    """
+    Tests that a worker's events are delivered on the owner's channel only.
+    """
+    publisher = fakeredis.FakeRedis(server=server)
+    async with hub.subscribe("alice") as alice, hub.subscribe("bob") as bob:
+        published = publish_status_changes(publisher, [
+            status_event("r1", "alice", "exported"),
+            status_event("r2", "alice", "completed"),
+        ])
+
+        assert published == 2
+        assert (await next_event(alice))["status"] == "exported"
+        assert (await next_event(alice))["request_id"] == "r2"
+        assert bob.empty()
+
+
+async def test_clients_share_one_subscription(server, hub):
+    """
+    Tests fan-out to every client of a user and unsubscribing after the last one leaves.
+    """
+    publisher = fakeredis.FakeRedis(server=server)
+    async with hub.subscribe("alice") as first:
+        async with hub.subscribe("alice") as second:
+            assert publisher.pubsub_numsub("request_status:alice") == [(b"request_status:alice", 1)]
+            publish_status_changes(publisher, [status_event("r1", "alice", "completed")])
+            assert (await next_event(first))["status"] == "completed"
+            assert (await next_event(second))["status"] == "completed"
+
+    await asyncio.sleep(0.05)  # Unsubscribing happens in the background
+    assert publisher.pubsub_numsub("request_status:alice") == [(b"request_status:alice", 0)]
+
+
+async def test_close_ends_streams(hub):
+    """
+    Tests that closing the hub wakes subscribers with the end-of-stream marker.
+    """
+    async with hub.subscribe("alice") as queue:
+        await hub.close()
+
+        assert await next_event(queue) is None
+
+
+def test_publish_without_redis(server):
+    """
+    Tests that publishing never fails the writer when Redis is down.
+    """
+    server.connected = False
+
+    assert publish_status_changes(fakeredis.FakeRedis(server=server), [status_event("r1", "u", "completed")]) == 0
@@ -0,0 +1,194 @@
+import io
+import json
+import tarfile
+from pathlib import Path
+
+import pytest
+
+from shared.transfer_bundle import (
+    BundleMember,
+    BundleReader,
+    BundleWriter,
+    BUNDLE_FORMAT_VERSION,
+    MANIFEST_NAME,
+    count_records,
+    pack_export_files,
+    pack_snapshot_files,
+    unpack_bundle,
+    write_member_file,
+)
+
+RESULTS_JSONL = (
+    b'{"request_id": "a", "result_data": {"count": 1}}\n'
+    b'{"request_id": "b", "result_data": {"count": 2}}\n'
+)
+USERS_JSON = json.dumps({"users": [{"id": "1"}, {"id": "2"}, {"id": "3"}]}).encode()
+
+
+def test_count_records():
+    """
+    Tests record counting for JSONL batches and JSON snapshots.
+    """
+    assert count_records(RESULTS_JSONL, "results_1.jsonl") == 2
+    assert count_records(USERS_JSON, "latest.json") == 3
+    assert count_records(b'{"settings": [], "total_count": 7}', "settings_1.json") == 7
+    assert count_records(b'[{"user_id": "1"}]', "password_changes_queue.json") == 1
+
+
+@pytest.mark.parametrize("codec", ["gzip", "identity"])
+def test_bundle_round_trip(tmp_path: Path, codec: str):
+    """
+    Tests that every member comes back byte-for-byte with a correct manifest.
+    """
+    writer = BundleWriter("response-network", codec=codec)
+    writer.add_bytes("results_1.jsonl", "results", RESULTS_JSONL)
+    writer.add_bytes("latest.json", "users", USERS_JSON)
+    bundle_path = writer.write(tmp_path / "test.bundle")
+
+    assert bundle_path.exists()
+    assert not list(tmp_path.glob(".*.tmp"))
+
+    with BundleReader(bundle_path) as reader:
+        assert reader.manifest["member_count"] == 2
+        assert reader.manifest["record_count"] == 5
+        assert reader.manifest["source_network"] == "response-network"
+        assert reader.verify() == []
+
+        members = {member.member_type: member for member in reader.members}
+        assert members["results"].codec == codec
+        assert members["results"].record_count == 2
+        assert reader.read_member(members["results"]) == RESULTS_JSONL
+        assert reader.read_member(members["users"]) == USERS_JSON
+
+
+def test_manifest_is_first_member(tmp_path: Path):
+    """
+    Tests that the manifest can be read without scanning the whole archive.
+    """
+    writer = BundleWriter("request-network")
+    writer.add_bytes("requests_1.jsonl", "requests", b'{"id": "x"}\n')
+    bundle_path = writer.write(tmp_path / "test.bundle")
+
+    with tarfile.open(bundle_path) as tar:
+        assert tar.getnames()[0] == MANIFEST_NAME
+
+
+def test_corrupted_member_fails_verification(tmp_path: Path):
+    """
+    Tests that a tampered member is reported and nothing is unpacked.
+    """
+    writer = BundleWriter("response-network", codec="identity")
+    writer.add_bytes("results_1.jsonl", "results", RESULTS_JSONL)
+    bundle_path = writer.write(tmp_path / "test.bundle")
+
+    raw = bundle_path.read_bytes()
+    bundle_path.write_bytes(raw.replace(b'"count": 2', b'"count": 9'))
+
+    with BundleReader(bundle_path) as reader:
+        assert reader.verify() == ["results/results_1.jsonl"]
+        with pytest.raises(ValueError):
+            unpack_bundle(
+                reader,
+                {"results": lambda member, data: write_member_file(data, tmp_path / "out" / member.name)},
+            )
+
+    assert not (tmp_path / "out").exists()
+
+
+def test_unknown_member_type_rejected():
+    """
+    Tests that only known member types can be added.
+    """
+    writer = BundleWriter("response-network")
+    with pytest.raises(ValueError):
+        writer.add_bytes("x.json", "unknown", b"{}")
+
+
+@pytest.mark.parametrize("name", ["../../etc/cron.d/x", "results/x.jsonl", "..\\x.jsonl", ".hidden.jsonl", "a..b", ""])
+def test_unsafe_member_name_rejected(name: str):
+    """
+    Tests that manifest names which could escape the staging directory are rejected.
+    """
+    with pytest.raises(ValueError):
+        BundleMember.from_dict({"name": name, "type": "results", "checksum_sha256": "0" * 64})
+
+
+def test_reader_rejects_traversal_in_manifest(tmp_path: Path):
+    """
+    Tests that a bundle whose manifest names a member outside its directory is rejected.
+    """
+    manifest = json.dumps({
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "members": [{"name": "../../x.jsonl", "type": "results", "checksum_sha256": "0" * 64}],
+    }).encode()
+    info = tarfile.TarInfo(MANIFEST_NAME)
+    info.size = len(manifest)
+    path = tmp_path / "evil.bundle"
+    with tarfile.open(path, "w") as tar:
+        tar.addfile(info, io.BytesIO(manifest))
+
+    with pytest.raises(ValueError, match="Unsafe bundle member name"):
+        BundleReader(path)
+
+
+def test_pack_and_unpack_export_directory(tmp_path: Path):
+    """
+    Tests packing an export directory and dispatching members by type.
+    """
+    export_dir = tmp_path / "exports"
+    (export_dir / "results").mkdir(parents=True)
+    (export_dir / "results" / "results_1.jsonl").write_bytes(RESULTS_JSONL)
+    (export_dir / "results" / ".results_2.jsonl.tmp").write_bytes(b"partial")
+    (export_dir / "settings_1.json").write_text('{"settings": [{"key": "a"}]}')
+
+    writer = BundleWriter("response-network")
+    packed = pack_export_files(
+        writer,
+        export_dir,
+        [("results", "results/results_*.jsonl"), ("settings", "settings_*.json")],
+    )
+    assert sorted(p.name for p in packed) == ["results_1.jsonl", "settings_1.json"]
+    bundle_path = writer.write(tmp_path / "out.bundle")
+
+    import_dir = tmp_path / "imports"
+    with BundleReader(bundle_path) as reader:
+        written = unpack_bundle(
+            reader,
+            {"results": lambda member, data: write_member_file(data, import_dir / "results" / member.name)},
+        )
+
+    assert list(written) == ["results"]
+    assert (import_dir / "results" / "results_1.jsonl").read_bytes() == RESULTS_JSONL
+    assert not (import_dir / "settings").exists()
+
+
+def test_snapshots_stay_in_place_and_ship_when_changed(tmp_path: Path):
+    """
+    Tests that snapshots are copied, not moved, and skipped while unchanged.
+    """
+    (tmp_path / "users").mkdir()
+    snapshot = tmp_path / "users" / "latest.json"
+    snapshot.write_bytes(USERS_JSON)
+    sources = [("users", "users/latest.json"), ("settings", "settings/latest.json")]
+
+    writer = BundleWriter("response-network")
+    shipped = pack_snapshot_files(writer, tmp_path, sources, {})
+    assert [member.archive_path for member in writer.members] == ["users/latest.json.gz"]
+    assert snapshot.read_bytes() == USERS_JSON
+
+    writer = BundleWriter("response-network")
+    assert pack_snapshot_files(writer, tmp_path, sources, shipped) == {}
+    assert len(writer) == 0
+
+    snapshot.write_text('{"users": []}')
+    assert list(pack_snapshot_files(writer, tmp_path, sources, shipped)) == ["users/latest.json"]
+
+
+def test_reader_rejects_non_bundle(tmp_path: Path):
+    """
+    Tests that arbitrary files are rejected with ValueError.
+    """
+    path = tmp_path / "junk.bundle"
+    path.write_bytes(b"not a tar archive")
+    with pytest.raises(ValueError):
+        BundleReader(path)
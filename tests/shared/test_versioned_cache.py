@@ -0,0 +1,137 @@
+import json
+
+import fakeredis
+import pytest
+from fakeredis import aioredis
+
+from shared.versioned_cache import LocalTTLCache, VersionedCache, bump_version
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingLoader:
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+
+    async def __call__(self, key):
+        self.calls.append(key)
+        return self.data.get(key)
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_cache(server, clock, loader, **kwargs):
+    return VersionedCache(
+        aioredis.FakeRedis(server=server),
+        "users",
+        loader=loader,
+        dumps=json.dumps,
+        loads=json.loads,
+        clock=clock,
+        **kwargs,
+    )
+
+
+def test_local_cache_expires_and_evicts_least_recently_used(clock):
+    """
+    Tests TTL expiry and LRU eviction of the in-process tier.
+    """
+    cache = LocalTTLCache(ttl=10, max_entries=2, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    clock.now += 10
+    assert cache.get("a") is None
+
+
+async def test_reads_go_local_then_redis_then_loader(server, clock):
+    """
+    Tests that each tier is consulted only when the one in front of it misses.
+    """
+    loader = CountingLoader({"u1": {"name": "alice"}})
+    first = make_cache(server, clock, loader)
+    second = make_cache(server, clock, loader)  # Another API process
+
+    assert await first.get("u1") == {"name": "alice"}
+    assert await first.get("u1") == {"name": "alice"}
+    assert await second.get("u1") == {"name": "alice"}  # From Redis
+
+    assert loader.calls == ["u1"]
+
+
+async def test_misses_are_not_cached(server, clock):
+    """
+    Tests that unknown keys return None and are looked up again.
+    """
+    loader = CountingLoader({})
+    cache = make_cache(server, clock, loader)
+
+    assert await cache.get("nobody") is None
+    assert await cache.get("nobody") is None
+    assert loader.calls == ["nobody", "nobody"]
+
+
+async def test_version_bump_invalidates_every_process(server, clock):
+    """
+    Tests that a writer's bump drops local and Redis entries after the check interval.
+    """
+    loader = CountingLoader({"u1": {"active": True}})
+    cache = make_cache(server, clock, loader, check_interval=1.0)
+    assert await cache.get("u1") == {"active": True}
+
+    loader.data["u1"] = {"active": False}
+    assert bump_version(fakeredis.FakeRedis(server=server), "users") == 1
+
+    assert await cache.get("u1") == {"active": True}  # Within the check interval
+    clock.now += 1.0
+    assert await cache.get("u1") == {"active": False}
+    assert loader.calls == ["u1", "u1"]
+
+
+async def test_local_entries_expire(server, clock):
+    """
+    Tests that local entries are refreshed from Redis after local_ttl.
+    """
+    loader = CountingLoader({"u1": {"n": 1}})
+    cache = make_cache(server, clock, loader, local_ttl=5.0)
+    await cache.get("u1")
+
+    await cache.redis.set("users:0:u1", json.dumps({"n": 2}))
+    clock.now += 5.0
+
+    assert await cache.get("u1") == {"n": 2}
+    assert loader.calls == ["u1"]
+
+
+async def test_redis_outage_falls_back_to_loader(server, clock):
+    """
+    Tests that the cache keeps answering from the loader when Redis is down.
+    """
+    loader = CountingLoader({"u1": {"n": 1}})
+    cache = make_cache(server, clock, loader)
+    server.connected = False
+
+    assert await cache.get("u1") == {"n": 1}
+    assert cache.version is None
+    assert await cache.get("u1") == {"n": 1}  # Local tier still used
+    assert loader.calls == ["u1"]
@@ -0,0 +1,148 @@
+import asyncio
+
+from shared.write_behind import WriteBehindBuffer
+
+
+class RecordingFlush:
+    def __init__(self, fail_times=0):
+        self.batches = []
+        self.fail_times = fail_times
+        self.calls = 0
+
+    async def __call__(self, batch):
+        self.calls += 1
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("database unavailable")
+        self.batches.append(dict(batch))
+
+
+async def test_updates_are_coalesced_per_key():
+    """
+    Tests that only the latest value per key is written, in one batch.
+    """
+    flush = RecordingFlush()
+    buffer = WriteBehindBuffer(flush, interval=60)
+    for value in range(3):
+        buffer.record("a", value)
+    buffer.record("b", 10)
+
+    assert await buffer.flush() == 2
+    assert flush.batches == [{"a": 2, "b": 10}]
+    await buffer.close()
+
+
+async def test_background_flush_every_interval():
+    """
+    Tests that pending updates are written without an explicit flush.
+    """
+    flush = RecordingFlush()
+    buffer = WriteBehindBuffer(flush, interval=0.05)
+    buffer.record("a", 1)
+
+    await asyncio.sleep(0.2)
+
+    assert flush.batches == [{"a": 1}]
+    assert len(buffer) == 0
+    await buffer.close()
+
+
+async def test_max_pending_flushes_early():
+    """
+    Tests that a full buffer is written before the interval ends.
+    """
+    flush = RecordingFlush()
+    buffer = WriteBehindBuffer(flush, interval=60, max_pending=3)
+    for key in "abc":
+        buffer.record(key, 1)
+
+    await asyncio.sleep(0.05)
+
+    assert flush.batches == [{"a": 1, "b": 1, "c": 1}]
+    await buffer.close()
+
+
+async def test_failed_flush_keeps_updates():
+    """
+    Tests that a failed write is retried and newer values are not overwritten.
+    """
+    flush = RecordingFlush(fail_times=1)
+    buffer = WriteBehindBuffer(flush, interval=60)
+    buffer.record("a", 1)
+    buffer.record("b", 1)
+
+    assert await buffer.flush() == 0
+    buffer.record("a", 2)
+    assert await buffer.flush() == 2
+
+    assert flush.batches == [{"a": 2, "b": 1}]
+    await buffer.close()
+
+
+async def test_close_writes_pending_updates():
+    """
+    Tests that closing the buffer writes what is left.
+    """
+    flush = RecordingFlush()
+    buffer = WriteBehindBuffer(flush, interval=60)
+    buffer.record("a", 1)
+
+    await buffer.close()
+
+    assert flush.batches == [{"a": 1}]
+
+
+async def test_cancelled_flush_keeps_updates():
+    """
+    Tests that closing during a slow write does not lose the batch being written.
+    """
+    flush = RecordingFlush()
+    started = asyncio.Event()
+
+    async def slow_first_flush(batch):
+        if not started.is_set():
+            started.set()
+            await asyncio.sleep(60)
+        await flush(batch)
+
+    buffer = WriteBehindBuffer(slow_first_flush, interval=60, max_pending=1)
+    buffer.record("a", 1)
+    await asyncio.wait_for(started.wait(), timeout=1)
+
+    await buffer.close()
+
+    assert flush.batches == [{"a": 1}]
+
+
+async def test_failing_writes_back_off():
+    """
+    Tests that a full buffer does not retry in a tight loop while writes fail.
+    """
+    flush = RecordingFlush(fail_times=1000)
+    buffer = WriteBehindBuffer(flush, interval=0.05, max_pending=1, max_retry_delay=0.2)
+    for i in range(30):
+        buffer.record(i, 1)
+        await asyncio.sleep(0.01)
+
+    assert flush.calls <= 5
+    assert len(buffer) == 30
+    await buffer.close()
+
+
+async def test_retry_delay_doubles_and_resets():
+    """
+    Tests that the retry delay doubles up to its bound and resets after a write.
+    """
+    flush = RecordingFlush(fail_times=4)
+    buffer = WriteBehindBuffer(flush, interval=1, max_retry_delay=5)
+    buffer.record("a", 1)
+
+    delays = []
+    for _ in range(4):
+        await buffer.flush()
+        delays.append(buffer.retry_delay)
+
+    assert delays == [1, 2, 4, 5]
+    assert await buffer.flush() == 1
+    assert buffer.retry_delay == 0
+    await buffer.close()
@@ -3,22 +3,27 @@ Tests for Grace Period Rate Limiting
 """
 
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
-from datetime import datetime, timedelta
+from fakeredis import aioredis
 
 from rate_limiter import RateLimiter, LimitLevel, RateLimitConfig
 
 
 @pytest.fixture
-def mock_redis():
-    """Mock Redis client"""
-    return AsyncMock()
+def redis():
+    """In-memory Redis with Lua scripting"""
+    return aioredis.FakeRedis()
 
 
 @pytest.fixture
-def rate_limiter(mock_redis):
-    """Rate limiter instance with mock Redis"""
-    return RateLimiter(mock_redis)
+def rate_limiter(redis):
+    """Rate limiter instance with in-memory Redis"""
+    return RateLimiter(redis)
+
+
+async def set_counts(rate_limiter, user_id, minute, hour, day):
+    """Seed the current window counters"""
+    keys = rate_limiter._get_window_keys(user_id)
+    await rate_limiter.redis.mset({keys["minute"]: minute, keys["hour"]: hour, keys["day"]: day})
 
 
 class TestRateLimitConfig:
@@ -58,10 +63,8 @@ class TestRateLimiterBasics:
     @pytest.mark.asyncio
     async def test_get_user_limits_default_profile(self, rate_limiter):
         """Test getting default profile limits"""
-        rate_limiter.redis.hgetall.return_value = {}
-        
         limits = await rate_limiter.get_user_limits("user123", "free")
-        
+
         assert limits["minute"] == 10
         assert limits["hour"] == 100
         assert limits["day"] == 1000
@@ -69,14 +72,10 @@ class TestRateLimiterBasics:
     @pytest.mark.asyncio
     async def test_get_user_limits_custom(self, rate_limiter):
         """Test getting custom user limits"""
-        rate_limiter.redis.hgetall.return_value = {
-            b"minute": b"50",
-            b"hour": b"1000",
-            b"day": b"10000",
-        }
-        
+        await rate_limiter.set_custom_limits("user123", minute=50, hour=1000, day=10000)
+
         limits = await rate_limiter.get_user_limits("user123", "free")
-        
+
         assert limits["minute"] == 50
         assert limits["hour"] == 1000
         assert limits["day"] == 10000
@@ -84,7 +83,7 @@ class TestRateLimiterBasics:
     def test_window_key_generation(self, rate_limiter):
         """Test Redis window key generation"""
         keys = rate_limiter._get_window_keys("user123")
-        
+
         assert "rate_limit:user123:minute:" in keys["minute"]
         assert "rate_limit:user123:hour:" in keys["hour"]
         assert "rate_limit:user123:day:" in keys["day"]
@@ -96,52 +95,37 @@ class TestRateLimitChecking:
     @pytest.mark.asyncio
     async def test_check_limit_ok_status(self, rate_limiter):
         """Test when usage is OK (< 80%)"""
-        # Setup mock redis
-        rate_limiter.redis.hgetall.return_value = {}  # no custom limits
-        rate_limiter.redis.get.side_effect = [
-            b"5",   # minute count: 5/10 = 50%
-            b"50",  # hour count: 50/100 = 50%
-            b"500", # day count: 500/1000 = 50%
-        ]
-        rate_limiter.redis.exists.return_value = False  # no soft block
-        
+        await set_counts(rate_limiter, "user123", 5, 50, 500)
+
         status, details = await rate_limiter.check_limit("user123", "free")
-        
+
         assert status == LimitLevel.OK
-        assert details["remaining_minute"] == 5
-        assert details["remaining_hour"] == 50
-        assert details["remaining_day"] == 500
+        # Remaining counts include this request
+        assert details["remaining_minute"] == 4
+        assert details["remaining_hour"] == 49
+        assert details["remaining_day"] == 499
 
     @pytest.mark.asyncio
     async def test_check_limit_warning_status(self, rate_limiter):
-        """Test when usage reaches WARNING (80%)"""
-        rate_limiter.redis.hgetall.return_value = {}
-        rate_limiter.redis.get.side_effect = [
-            b"8",   # minute: 8/10 = 80%
-            b"80",  # hour: 80/100 = 80%
-            b"800", # day: 800/1000 = 80%
-        ]
-        rate_limiter.redis.exists.return_value = False  # no soft block
-        
+        """Test when usage reaches WARNING (80%) and the grace period starts"""
+        await set_counts(rate_limiter, "user123", 8, 80, 800)
+
         status, details = await rate_limiter.check_limit("user123", "free")
-        
+
         assert status == LimitLevel.WARNING
-        assert details["hit_limit"] in ["minute", "hour", "day"]
+        assert details["hit_limit"] == "minute"
         assert details["message"] == "Approaching minute limit (80% used)"
+        assert 0 < await rate_limiter.redis.ttl("rate_limit:soft_block:user123:minute") <= 300
 
     @pytest.mark.asyncio
     async def test_check_limit_soft_block_status(self, rate_limiter):
         """Test when in SOFT_BLOCK grace period"""
-        rate_limiter.redis.hgetall.return_value = {}
-        rate_limiter.redis.get.side_effect = [
-            b"11",  # minute: 11/10 = 110% (over limit)
-            b"100", # hour: 100/100 = 100%
-            b"1000", # day: 1000/1000 = 100%
-        ]
-        rate_limiter.redis.exists.return_value = True  # soft block ACTIVE
-        
+        await set_counts(rate_limiter, "user123", 11, 100, 1000)
+        for window in ("minute", "hour", "day"):
+            await rate_limiter.activate_soft_block("user123", window)
+
         status, details = await rate_limiter.check_limit("user123", "free")
-        
+
         assert status == LimitLevel.SOFT_BLOCK
         assert details["message"] == "Soft block active for minute (grace period)"
         assert "grace_period_ends_at" in details
@@ -149,44 +133,67 @@ class TestRateLimitChecking:
     @pytest.mark.asyncio
     async def test_check_limit_exceeded_status(self, rate_limiter):
         """Test when rate limit is EXCEEDED"""
-        rate_limiter.redis.hgetall.return_value = {}
-        rate_limiter.redis.get.side_effect = [
-            b"10",  # minute: 10/10 = 100% (at limit)
-            b"100", # hour: 100/100 = 100%
-            b"1000", # day: 1000/1000 = 100%
-        ]
-        
+        await set_counts(rate_limiter, "user123", 10, 100, 1000)
+
         status, details = await rate_limiter.check_limit("user123", "free")
-        
+
         assert status == LimitLevel.EXCEEDED
         assert details["message"] == "Rate limit exceeded for minute"
 
+    @pytest.mark.asyncio
+    async def test_explicit_limits_override_profile(self, rate_limiter):
+        """Test that per-user limits replace the profile defaults"""
+        await set_counts(rate_limiter, "user123", 10, 100, 1000)
+
+        status, details = await rate_limiter.check_limit(
+            "user123", "free", limits={"minute": 60, "hour": 1000, "day": 10000}
+        )
+
+        assert status == LimitLevel.OK
+        assert details["limits"] == {"minute": 60, "hour": 1000, "day": 10000}
+
 
 class TestCounterIncrement:
     """Test counter increment functionality"""
 
     @pytest.mark.asyncio
-    async def test_increment_counter(self, rate_limiter):
-        """Test incrementing all window counters"""
-        rate_limiter.redis.pipeline.return_value.__aenter__.return_value = AsyncMock()
-        
-        await rate_limiter.increment_counter("user123")
-        
-        # Verify pipeline was called
-        assert rate_limiter.redis.pipeline.called
+    async def test_check_limit_increments_all_windows(self, rate_limiter):
+        """Test that an allowed request is counted in every window"""
+        await rate_limiter.check_limit("user123", "free")
+        await rate_limiter.check_limit("user123", "free")
+
+        keys = rate_limiter._get_window_keys("user123")
+        for window in ("minute", "hour", "day"):
+            assert int(await rate_limiter.redis.get(keys[window])) == 2
 
     @pytest.mark.asyncio
     async def test_increment_sets_correct_ttls(self, rate_limiter):
         """Test that TTLs are set correctly for each window"""
-        pipeline_mock = AsyncMock()
-        rate_limiter.redis.pipeline.return_value = pipeline_mock
-        pipeline_mock.__aenter__.return_value = pipeline_mock
-        
-        await rate_limiter.increment_counter("user123")
-        
-        # Verify expire was called for each window
-        calls = pipeline_mock.expire.call_args_list
-        assert len(calls) >= 3  # minute, hour, day
+        await rate_limiter.check_limit("user123", "free")
+
+        keys = rate_limiter._get_window_keys("user123")
+        for window, ttl in RateLimitConfig.WINDOW_TTLS.items():
+            assert 0 < await rate_limiter.redis.ttl(keys[window]) <= ttl
+
+    @pytest.mark.asyncio
+    async def test_exceeded_request_not_counted(self, rate_limiter):
+        """Test that a blocked request leaves the counters alone"""
+        await set_counts(rate_limiter, "user123", 10, 10, 10)
+
+        await rate_limiter.check_limit("user123", "free")
+
+        keys = rate_limiter._get_window_keys("user123")
+        assert int(await rate_limiter.redis.get(keys["minute"])) == 10
+
+    @pytest.mark.asyncio
+    async def test_inspect_without_consuming(self, rate_limiter):
+        """Test that consume=False and get_remaining do not count"""
+        await set_counts(rate_limiter, "user123", 3, 3, 3)
+
+        await rate_limiter.check_limit("user123", "free", consume=False)
+        remaining = await rate_limiter.get_remaining("user123", "free")
+
+        assert remaining["minute"] == {"remaining": 7, "used": 3, "limit": 10}
 
 
 class TestAdminOperations:
@@ -195,27 +202,27 @@ class TestAdminOperations:
     @pytest.mark.asyncio
     async def test_reset_user_limit_all(self, rate_limiter):
         """Test resetting all user limits"""
-        pipeline_mock = AsyncMock()
-        rate_limiter.redis.pipeline.return_value = pipeline_mock
-        pipeline_mock.__aenter__.return_value = pipeline_mock
-        
+        await set_counts(rate_limiter, "user123", 5, 5, 5)
+
         result = await rate_limiter.reset_user_limit("user123", "all")
-        
+
         assert result["user_id"] == "user123"
         assert result["window"] == "all"
         assert result["reset_count"] == 3  # minute, hour, day
+        stats = await rate_limiter.get_user_stats("user123", "free")
+        assert stats["usage"] == {"minute": 0, "hour": 0, "day": 0}
 
     @pytest.mark.asyncio
     async def test_reset_user_limit_single_window(self, rate_limiter):
         """Test resetting specific window"""
-        pipeline_mock = AsyncMock()
-        rate_limiter.redis.pipeline.return_value = pipeline_mock
-        pipeline_mock.__aenter__.return_value = pipeline_mock
-        
+        await set_counts(rate_limiter, "user123", 5, 5, 5)
+
         result = await rate_limiter.reset_user_limit("user123", "minute")
-        
+
         assert result["window"] == "minute"
         assert result["reset_count"] == 1
+        stats = await rate_limiter.get_user_stats("user123", "free")
+        assert stats["usage"] == {"minute": 0, "hour": 5, "day": 5}
 
     @pytest.mark.asyncio
     async def test_set_custom_limits(self, rate_limiter):
@@ -226,21 +233,30 @@ class TestAdminOperations:
             hour=1000,
             day=10000
         )
-        
+
         assert result["user_id"] == "user123"
         assert result["custom_limits"]["minute"] == 50
         assert result["custom_limits"]["hour"] == 1000
         assert result["custom_limits"]["day"] == 10000
 
+    @pytest.mark.asyncio
+    async def test_custom_limits_win_over_user_limits(self, rate_limiter):
+        """Test that admin overrides apply inside the atomic check"""
+        await rate_limiter.set_custom_limits("user123", minute=2)
+
+        _, details = await rate_limiter.check_limit(
+            "user123", "free", limits={"minute": 60, "hour": 1000, "day": 10000}
+        )
+
+        assert details["limits"]["minute"] == 2
+
     @pytest.mark.asyncio
     async def test_activate_soft_block(self, rate_limiter):
         """Test activating grace period soft block"""
         await rate_limiter.activate_soft_block("user123", "hour")
-        
-        # Verify setex was called with 5 min TTL
-        rate_limiter.redis.setex.assert_called_once()
-        call_args = rate_limiter.redis.setex.call_args
-        assert call_args[0][1] == 300  # 5 minutes
+
+        ttl = await rate_limiter.redis.ttl("rate_limit:soft_block:user123:hour")
+        assert 0 < ttl <= 300  # 5 minutes
 
 
 class TestUserStats:
@@ -249,15 +265,10 @@ class TestUserStats:
     @pytest.mark.asyncio
     async def test_get_user_stats(self, rate_limiter):
         """Test getting comprehensive user stats"""
-        rate_limiter.redis.hgetall.return_value = {}
-        rate_limiter.redis.get.side_effect = [
-            b"7",   # minute
-            b"70",  # hour
-            b"700", # day
-        ]
-        
+        await set_counts(rate_limiter, "user123", 7, 70, 700)
+
         stats = await rate_limiter.get_user_stats("user123", "free")
-        
+
         assert stats["user_id"] == "user123"
         assert stats["profile"] == "free"
         assert stats["limits"]["minute"] == 10
@@ -272,50 +283,36 @@ class TestGracePeriodFlow:
     @pytest.mark.asyncio
     async def test_grace_period_5min_duration(self, rate_limiter):
         """Test that grace period is 5 minutes"""
-        # Grace period should be activated with 300 second TTL
-        await rate_limiter.activate_soft_block("user123", "minute")
-        
-        call_args = rate_limiter.redis.setex.call_args
-        ttl = call_args[0][1]
-        
-        assert ttl == 300  # 5 minutes in seconds
+        assert RateLimitConfig.GRACE_PERIOD_SECONDS == 300
 
     @pytest.mark.asyncio
     async def test_progression_ok_to_warning_to_soft_block(self, rate_limiter):
-        """Test progression through states"""
-        rate_limiter.redis.hgetall.return_value = {}
-        rate_limiter.redis.exists.return_value = False
-        
-        # State 1: OK (50%)
-        rate_limiter.redis.get.side_effect = [
-            b"5", b"50", b"500",
-        ]
-        status1, _ = await rate_limiter.check_limit("user123", "free")
-        assert status1 == LimitLevel.OK
-        
-        # State 2: WARNING (80%)
-        rate_limiter.redis.get.side_effect = [
-            b"8", b"80", b"800",
-        ]
-        rate_limiter.redis.exists.return_value = False
-        status2, _ = await rate_limiter.check_limit("user123", "free")
-        assert status2 == LimitLevel.WARNING
-        
-        # State 3: SOFT_BLOCK (110%)
-        rate_limiter.redis.get.side_effect = [
-            b"11", b"100", b"1000",
-        ]
-        rate_limiter.redis.exists.return_value = True
-        status3, _ = await rate_limiter.check_limit("user123", "free")
-        assert status3 == LimitLevel.SOFT_BLOCK
-        
-        # State 4: EXCEEDED (120%)
-        rate_limiter.redis.get.side_effect = [
-            b"12", b"120", b"1200",
-        ]
-        rate_limiter.redis.exists.return_value = False
-        status4, _ = await rate_limiter.check_limit("user123", "free")
-        assert status4 == LimitLevel.EXCEEDED
+        """Test progression through states with real counting"""
+        statuses = []
+        for _ in range(12):
+            status, _ = await rate_limiter.check_limit("user123", "free")
+            statuses.append(status)
+
+        # Requests 1-8: OK (below 80% before the request)
+        assert statuses[:8] == [LimitLevel.OK] * 8
+        # Request 9: WARNING (80%), starts the grace period
+        assert statuses[8] == LimitLevel.WARNING
+        # Requests 10-12: grace period allows up to 110%
+        assert statuses[9:12] == [LimitLevel.SOFT_BLOCK] * 3
+
+        # Past 110%: EXCEEDED
+        status, _ = await rate_limiter.check_limit("user123", "free")
+        assert status == LimitLevel.EXCEEDED
+
+    @pytest.mark.asyncio
+    async def test_no_grace_period_hard_blocks_at_limit(self, rate_limiter):
+        """Test that the limit is hard without an active grace period"""
+        await set_counts(rate_limiter, "user123", 10, 10, 10)
+        await rate_limiter.redis.delete("rate_limit:soft_block:user123:minute")
+
+        status, _ = await rate_limiter.check_limit("user123", "free")
+
+        assert status == LimitLevel.EXCEEDED
 
 
 class TestErrorHandling:
@@ -324,21 +321,197 @@ class TestErrorHandling:
     @pytest.mark.asyncio
     async def test_check_limit_redis_error_gracefully_fails(self, rate_limiter):
         """Test that check_limit fails gracefully if Redis is down"""
-        rate_limiter.redis.hgetall.side_effect = Exception("Redis connection error")
-        
+        async def broken(*args, **kwargs):
+            raise Exception("Redis connection error")
+        rate_limiter._script = broken
+
         status, details = await rate_limiter.check_limit("user123", "free")
-        
+
         # Should fall back to OK (allow)
         assert status == LimitLevel.OK
-        assert "error" in details.get("message", "").lower() or True
+        assert "error" in details["message"].lower()
+
+
+class FakeClock:
+    """Settable clock for the limiter"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+# One second before a minute boundary
+BOUNDARY = 1_700_000_040 + 59.0
+LIMITS = {"minute": 10, "hour": 1000, "day": 10000}
+
+
+async def burst(rate_limiter, profile, count):
+    """Number of allowed requests out of ``count`` sent at once"""
+    allowed = 0
+    for _ in range(count):
+        status, _ = await rate_limiter.check_limit("user123", profile, limits=LIMITS)
+        allowed += status != LimitLevel.EXCEEDED
+    return allowed
+
+
+class TestGcra:
+    """Test the GCRA algorithm with an injected clock"""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock(BOUNDARY)
+
+    @pytest.fixture
+    def limiter(self, redis, clock):
+        return RateLimiter(redis, clock=clock)
+
+    def test_algorithm_per_profile(self):
+        """Test that every profile selects a known algorithm"""
+        config = RateLimitConfig()
+
+        for profile in config.LIMITS:
+            assert config.ALGORITHMS[profile] in (config.FIXED_WINDOW, config.GCRA)
 
     @pytest.mark.asyncio
-    async def test_increment_counter_silent_failure(self, rate_limiter):
-        """Test that increment counter fails silently"""
-        rate_limiter.redis.pipeline.side_effect = Exception("Redis error")
-        
-        # Should not raise
-        await rate_limiter.increment_counter("user123")
+    async def test_fixed_window_allows_double_burst_at_boundary(self, limiter, clock):
+        """Test the fixed window weakness GCRA removes"""
+        first = await burst(limiter, "free", 20)
+        clock.now += 1
+        second = await burst(limiter, "free", 20)
+
+        assert first == 12  # 110% with the grace period
+        assert second == 12  # New minute bucket
+
+    @pytest.mark.asyncio
+    async def test_gcra_blocks_burst_across_boundary(self, limiter, clock):
+        """Test that crossing a minute boundary does not restore capacity"""
+        first = await burst(limiter, "premium", 20)
+        clock.now += 1
+        second = await burst(limiter, "premium", 20)
+
+        assert first == 12
+        assert second == 0
+
+    @pytest.mark.asyncio
+    async def test_gcra_refills_one_request_per_interval(self, limiter, clock):
+        """Test that capacity returns evenly, one request per period / limit"""
+        await burst(limiter, "premium", 20)
+
+        clock.now += 5.9
+        assert await burst(limiter, "premium", 5) == 0
+
+        clock.now += 0.1  # One 6 second emission interval since the burst
+        assert await burst(limiter, "premium", 5) == 1
+
+        clock.now += 18  # Three more intervals
+        assert await burst(limiter, "premium", 5) == 3
+
+    @pytest.mark.asyncio
+    async def test_gcra_full_capacity_after_idle_period(self, limiter, clock):
+        """Test that a whole period of silence restores the full burst"""
+        await burst(limiter, "premium", 20)
+
+        clock.now += 72  # Drained: 12 requests x 6 seconds
+        await limiter.redis.delete(*[f"rate_limit:soft_block:user123:{w}" for w in LIMITS])
+        status, details = await limiter.check_limit("user123", "premium", limits=LIMITS, consume=False)
+
+        assert status == LimitLevel.OK
+        assert details["remaining_minute"] == 10
+
+    @pytest.mark.asyncio
+    async def test_gcra_constant_memory(self, limiter, clock):
+        """Test that GCRA keeps one key per window regardless of traffic"""
+        for _ in range(5):
+            await burst(limiter, "premium", 5)
+            clock.now += 30
+
+        keys = await limiter.redis.keys("rate_limit:user123:*")
+        assert sorted(k.decode() for k in keys) == [
+            "rate_limit:user123:gcra:day",
+            "rate_limit:user123:gcra:hour",
+            "rate_limit:user123:gcra:minute",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_gcra_key_expires_when_drained(self, limiter):
+        """Test that the arrival time expires once capacity is fully back"""
+        await limiter.check_limit("user123", "premium", limits=LIMITS)
+
+        assert 0 < await limiter.redis.pttl("rate_limit:user123:gcra:minute") <= 6000
+
+    @pytest.mark.asyncio
+    async def test_gcra_counts_and_stats(self, limiter):
+        """Test remaining counts and stats for a GCRA profile"""
+        await burst(limiter, "premium", 3)
+
+        _, details = await limiter.check_limit("user123", "premium", limits=LIMITS, consume=False)
+        stats = await limiter.get_user_stats("user123", "premium", limits=LIMITS)
+
+        assert details["remaining_minute"] == 7
+        assert stats["algorithm"] == "gcra"
+        assert stats["usage"]["minute"] == 3
+
+
+class TestBatch:
+    """Test counting a bulk submission in one call"""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock(BOUNDARY - 30)
+
+    @pytest.fixture
+    def limiter(self, redis, clock):
+        return RateLimiter(redis, clock=clock)
+
+    @pytest.mark.parametrize("profile", ["free", "premium"])
+    @pytest.mark.asyncio
+    async def test_batch_admits_what_single_calls_would(self, limiter, profile):
+        """Test that a batch grants the same number as separate calls"""
+        level, details = await limiter.check_batch("user123", 20, profile, limits=LIMITS)
+
+        assert details["granted"] == await burst(RateLimiter(aioredis.FakeRedis(), limiter.clock), profile, 20)
+        assert level == LimitLevel.EXCEEDED
+        assert details["counts"]["minute"] == details["granted"] == 12
+
+    @pytest.mark.asyncio
+    async def test_batch_within_quota(self, limiter):
+        """Test a batch admitted in full reports the last request's level"""
+        level, details = await limiter.check_batch("user123", 8, "free", limits=LIMITS)
+
+        assert details["granted"] == 8
+        assert level == LimitLevel.OK
+        assert await limiter.redis.exists("rate_limit:soft_block:user123:minute") == 0
+
+        level, details = await limiter.check_batch("user123", 1, "free", limits=LIMITS)
+        assert level == LimitLevel.WARNING  # The 9th request starts the grace period
+
+        level, details = await limiter.check_batch("user123", 2, "free", limits=LIMITS)
+        assert details["granted"] == 2
+        assert level == LimitLevel.SOFT_BLOCK
+        assert await limiter.redis.exists("rate_limit:soft_block:user123:minute") == 1
+
+    @pytest.mark.asyncio
+    async def test_refund(self, limiter):
+        """Test that refunded requests are no longer counted"""
+        _, details = await limiter.check_batch("user123", 5, "free", limits=LIMITS)
+        await limiter.refund("user123", 3, "free", limits=LIMITS)
+
+        remaining = await limiter.get_remaining("user123", "free", limits=LIMITS)
+        assert remaining["minute"]["used"] == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_fails_open(self, limiter):
+        """Test that a Redis failure admits the whole batch"""
+        async def broken(*args, **kwargs):
+            raise Exception("Redis connection error")
+        limiter._script = broken
+
+        level, details = await limiter.check_batch("user123", 50, "free")
+
+        assert level == LimitLevel.OK
+        assert details["granted"] == 50
 
 
 # Integration-like tests
@@ -348,8 +521,6 @@ class TestRateLimiterWithProfiles:
     @pytest.mark.asyncio
     async def test_free_profile_lower_limits(self, rate_limiter):
         """Test that free profile has lower limits"""
-        rate_limiter.redis.hgetall.return_value = {}
-        
         free_limits = await rate_limiter.get_user_limits("user1", "free")
         premium_limits = await rate_limiter.get_user_limits("user2", "premium")
         
@@ -360,8 +531,6 @@ class TestRateLimiterWithProfiles:
     @pytest.mark.asyncio
     async def test_enterprise_profile_highest_limits(self, rate_limiter):
         """Test that enterprise profile has highest limits"""
-        rate_limiter.redis.hgetall.return_value = {}
-        
         limits = await rate_limiter.get_user_limits("user", "enterprise")
         
         assert limits["minute"] == 500
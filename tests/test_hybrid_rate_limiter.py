@@ -0,0 +1,157 @@
+"""
+Tests for the hybrid (leased quota) rate limiter
+"""
+
+import pytest
+from fakeredis import aioredis
+
+from rate_limiter import HybridRateLimiter, RateLimiter, LimitLevel, RateLimitConfig
+
+
+class FakeClock:
+    """Settable clock for the limiter"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+# One second before a minute boundary
+BOUNDARY = 1_700_000_040 + 59.0
+LIMITS = {"minute": 100, "hour": 10000, "day": 100000}  # Leases of 5
+
+
+def count_calls(limiter):
+    """Records every script call (one Redis round trip each)"""
+    calls = []
+    script = limiter._script
+
+    async def counted(*args, **kwargs):
+        calls.append(kwargs["args"][9])  # units
+        return await script(*args, **kwargs)
+
+    limiter._script = counted
+    return calls
+
+
+async def send(limiter, count, user_id="user123", profile="enterprise", limits=LIMITS):
+    """Number of allowed requests out of ``count``"""
+    allowed = 0
+    for _ in range(count):
+        status, _ = await limiter.check_limit(user_id, profile, limits=limits)
+        allowed += status != LimitLevel.EXCEEDED
+    return allowed
+
+
+@pytest.fixture
+def redis():
+    return aioredis.FakeRedis()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(BOUNDARY)
+
+
+@pytest.fixture
+def limiter(redis, clock):
+    return HybridRateLimiter(redis, clock=clock)
+
+
+@pytest.mark.asyncio
+async def test_redis_calls_drop_an_order_of_magnitude(redis, clock, limiter):
+    """Tests that an enterprise user costs one Redis call per lease"""
+    strict = RateLimiter(redis, clock=clock)
+    strict_calls = count_calls(strict)
+    hybrid_calls = count_calls(limiter)
+
+    assert await send(strict, 400, user_id="strict", limits=None) == 400
+    assert await send(limiter, 400, user_id="hybrid", limits=None) == 400
+
+    assert len(strict_calls) == 400
+    assert len(hybrid_calls) * 10 <= len(strict_calls)
+
+
+@pytest.mark.asyncio
+async def test_never_admits_more_than_strict_mode(redis, clock):
+    """Tests the upper accuracy bound with two workers sharing Redis"""
+    strict_allowed = await send(RateLimiter(redis, clock=clock), 300, user_id="strict")
+    workers = [HybridRateLimiter(redis, clock=clock) for _ in range(2)]
+
+    hybrid_allowed = 0
+    for i in range(300):
+        status, _ = await workers[i % 2].check_limit("hybrid", "enterprise", limits=LIMITS)
+        hybrid_allowed += status != LimitLevel.EXCEEDED
+
+    assert strict_allowed == 111  # 110% with the grace period
+    # Lower bound: other workers hold at most one lease each
+    assert strict_allowed - 2 * 5 <= hybrid_allowed <= strict_allowed
+
+
+@pytest.mark.asyncio
+async def test_unused_tokens_returned_on_expiry(limiter, clock):
+    """Tests that what is left of a lease is given back when it expires"""
+    limiter.config.ALGORITHMS = {**RateLimitConfig.ALGORITHMS, "enterprise": RateLimitConfig.FIXED_WINDOW}
+    clock.now -= 30  # Mid-minute
+    await send(limiter, 1)
+    stats = await limiter.get_user_stats("user123", "enterprise", limits=LIMITS)
+    assert stats["usage"]["minute"] == 5  # Whole lease counted
+
+    clock.now += RateLimitConfig.LEASE_SECONDS
+    await limiter.release_expired()
+
+    stats = await limiter.get_user_stats("user123", "enterprise", limits=LIMITS)
+    assert stats["usage"]["minute"] == 1
+
+
+@pytest.mark.asyncio
+async def test_release_all(limiter):
+    """Tests that shutdown gives back every outstanding lease"""
+    await send(limiter, 2, user_id="a")
+    await send(limiter, 3, user_id="b")
+
+    await limiter.release_all()
+
+    assert (await limiter.get_user_stats("a", "enterprise", limits=LIMITS))["usage"]["minute"] == 2
+    assert (await limiter.get_user_stats("b", "enterprise", limits=LIMITS))["usage"]["minute"] == 3
+
+
+@pytest.mark.asyncio
+async def test_strict_mode_near_quota(redis, clock, limiter):
+    """Tests that no lease is granted once the quota left is small"""
+    await send(RateLimiter(redis, clock=clock), 78)
+    calls = count_calls(limiter)
+
+    await send(limiter, 3)
+
+    assert calls == [5, 5, 5]  # Lease asked for, one request counted each time
+
+
+@pytest.mark.asyncio
+async def test_fixed_window_lease_ends_at_minute_boundary(limiter, clock):
+    """Tests that fixed-window leases are spent in the minute that counted them"""
+    limiter.config.ALGORITHMS = {**RateLimitConfig.ALGORITHMS, "enterprise": RateLimitConfig.FIXED_WINDOW}
+    calls = count_calls(limiter)
+
+    await send(limiter, 2)
+    assert len(calls) == 1
+
+    clock.now += 1.5  # Still inside LEASE_SECONDS, but a new minute
+    await send(limiter, 1)
+    assert len(calls) == 2
+
+    await limiter.release_expired()
+    previous = limiter._get_window_keys("user123", BOUNDARY)
+    assert int(await limiter.redis.get(previous["minute"])) == 2
+
+
+@pytest.mark.asyncio
+async def test_other_profiles_stay_strict(limiter):
+    """Tests that profiles outside HYBRID_PROFILES go to Redis every time"""
+    calls = count_calls(limiter)
+
+    await send(limiter, 5, profile="free", limits=None)
+
+    assert calls == [1] * 5
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from storage.ftp import FTPStorageHandler
+from storage.local import LocalStorageHandler
+from storage.s3 import S3StorageHandler
+
+BUCKET = "exports"
+
+
+@pytest.fixture
+def s3_handler(monkeypatch):
+    """
+    S3 handler against an in-process moto stand-in with a small part size.
+    """
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        yield S3StorageHandler({
+            "bucket_name": BUCKET,
+            "base_path": "network",
+            "aws_access_key_id": "test",
+            "aws_secret_access_key": "test",
+            "region_name": "us-east-1",
+            "multipart_part_size": 5 * 1024 * 1024,  # S3 minimum part size
+            "part_concurrency": 4,
+        })
+
+
+async def test_s3_multipart_round_trip(s3_handler, tmp_path: Path):
+    """
+    Tests that a file above the part size goes up as multipart and comes back intact.
+    """
+    source = tmp_path / "results_1.jsonl"
+    source.write_bytes(b"x" * (12 * 1024 * 1024))
+
+    assert await s3_handler.upload_file(str(source), "results/results_1.jsonl")
+
+    head = s3_handler.s3.head_object(Bucket=BUCKET, Key="network/results/results_1.jsonl")
+    assert head["ETag"].strip('"').endswith("-3")  # three parts
+
+    target = tmp_path / "out" / "results_1.jsonl"
+    assert await s3_handler.download_file("results/results_1.jsonl", str(target))
+    assert target.read_bytes() == source.read_bytes()
+
+
+async def test_s3_upload_many_and_prefix_listing(s3_handler, tmp_path: Path):
+    """
+    Tests bulk upload and prefix-filtered listing.
+    """
+    items = []
+    for name in ["results_1.jsonl", "results_2.jsonl", "users_1.json"]:
+        path = tmp_path / name
+        path.write_text(name)
+        items.append((str(path), f"batch/{name}"))
+
+    results = await s3_handler.upload_many(items)
+    assert all(results.values())
+
+    assert sorted(await s3_handler.list_files("batch")) == [
+        "batch/results_1.jsonl", "batch/results_2.jsonl", "batch/users_1.json",
+    ]
+    assert sorted(await s3_handler.list_files("batch", prefix="results_")) == [
+        "batch/results_1.jsonl", "batch/results_2.jsonl",
+    ]
+
+
+@pytest.fixture
+def ftp_handler(tmp_path: Path):
+    """
+    FTP handler against a local pyftpdlib server.
+    """
+    pytest.importorskip("pyftpdlib")
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler
+    from pyftpdlib.servers import ThreadedFTPServer
+
+    root = tmp_path / "ftp_root"
+    root.mkdir()
+    authorizer = DummyAuthorizer()
+    authorizer.add_user("relay", "secret", str(root), perm="elradfmwMT")
+    server = ThreadedFTPServer(("127.0.0.1", 0), type("Handler", (FTPHandler,), {"authorizer": authorizer}))
+    thread = threading.Thread(target=server.serve_forever, kwargs={"timeout": 0.1}, daemon=True)
+    thread.start()
+    handler = FTPStorageHandler({
+        "host": "127.0.0.1", "port": server.address[1], "username": "relay", "password": "secret",
+        "base_path": "/", "max_concurrency": 2,
+    })
+    yield handler, root
+    handler.pool.close()
+    server.close_all()
+    thread.join(timeout=5)
+
+
+async def test_ftp_upload_many_reports_each_file(ftp_handler, tmp_path: Path):
+    """
+    Tests that one failed transfer does not mark the files that went up as failed.
+    """
+    handler, root = ftp_handler
+    (root / "blocked").write_text("a file, not a directory")
+    items = []
+    for name in ["results_1.jsonl", "results_2.jsonl"]:
+        path = tmp_path / name
+        path.write_text(name)
+        items.append((str(path), f"batch/{name}"))
+    items.append((str(tmp_path / "results_1.jsonl"), "blocked/results_1.jsonl"))
+
+    results = await handler.upload_many(items)
+
+    assert results == {
+        "batch/results_1.jsonl": True,
+        "batch/results_2.jsonl": True,
+        "blocked/results_1.jsonl": False,
+    }
+    assert (root / "batch" / "results_2.jsonl").read_text() == "results_2.jsonl"
+
+
+async def test_blocking_calls_leave_event_loop_free(tmp_path: Path, monkeypatch):
+    """
+    Tests that a slow copy runs off the event loop while other tasks keep running.
+    """
+    handler = LocalStorageHandler({"base_path": str(tmp_path / "dest")})
+    release = threading.Event()
+
+    def slow_copy(src, dest):
+        release.wait(5)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        dest.write_bytes(Path(src).read_bytes())
+
+    monkeypatch.setattr(handler, "_copy_atomic", slow_copy)
+    source = tmp_path / "a.json"
+    source.write_text("{}")
+
+    upload = asyncio.create_task(handler.upload_file(str(source), "a.json"))
+    await asyncio.sleep(0.05)
+    # The loop is still responsive while the copy blocks its worker thread
+    assert not upload.done()
+    release.set()
+    assert await upload
+    assert (tmp_path / "dest" / "a.json").read_text() == "{}"
+
+
+async def test_local_upload_many_and_prefix_listing(tmp_path: Path):
+    """
+    Tests atomic local copies, bulk upload and prefix listing.
+    """
+    handler = LocalStorageHandler({"base_path": str(tmp_path / "dest"), "max_concurrency": 2})
+    items = []
+    for name in ["requests_1.jsonl", "requests_1.meta.json", "settings_1.json"]:
+        path = tmp_path / name
+        path.write_text(name)
+        items.append((str(path), f"requests/{name}"))
+
+    assert all((await handler.upload_many(items)).values())
+    assert sorted(await handler.list_files("requests", prefix="requests_1")) == [
+        "requests/requests_1.jsonl", "requests/requests_1.meta.json",
+    ]
+    assert not list((tmp_path / "dest" / "requests").glob(".*.tmp"))
+
+
+async def test_local_write_file_streams_chunks_atomically(tmp_path: Path):
+    """
+    Tests that chunked content is written once into place with no temp file left.
+    """
+    handler = LocalStorageHandler({"base_path": str(tmp_path)})
+    chunks = (f"line {i}\n".encode() for i in range(1000))
+
+    assert await handler.write_file("exports/settings_1.json", chunks)
+    written = tmp_path / "exports" / "settings_1.json"
+    assert written.read_bytes() == b"".join(f"line {i}\n".encode() for i in range(1000))
+    assert not list(written.parent.glob(".*.tmp"))
+
+
+async def test_local_write_file_failure_keeps_previous_file(tmp_path: Path):
+    """
+    Tests that a producer failing mid-stream leaves the old file untouched.
+    """
+    handler = LocalStorageHandler({"base_path": str(tmp_path)})
+    assert await handler.write_file("latest.json", b'{"v": 1}')
+
+    def broken():
+        yield b'{"v": '
+        raise OSError("disk full")
+
+    assert not await handler.write_file("latest.json", broken())
+    assert (tmp_path / "latest.json").read_bytes() == b'{"v": 1}'
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_json_chunks_matches_dumps():
+    """
+    Tests that incremental encoding yields bounded blocks of the same JSON.
+    """
+    from services.export_storage import json_chunks
+
+    data = {"settings": [{"key": f"k{i}", "value": "é" * 50} for i in range(2000)]}
+    chunks = list(json_chunks(data, chunk_size=4096, indent=2, default=str))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) < 4096 + 1024 for chunk in chunks)
+    assert b"".join(chunks) == json.dumps(data, indent=2, default=str).encode("utf-8")